@@ -0,0 +1,30 @@
+from .metrics import (
+    RunRecord,
+    annual_return,
+    max_drawdown,
+    pad,
+    sharpe_ratio,
+    sortino_ratio,
+    summarize,
+    total_return,
+    turnover,
+    win_rate,
+)
+from .recorder import EquityRecorder
+from .robustness import RobustnessReport, robustness_test
+
+__all__ = [
+    "RunRecord",
+    "EquityRecorder",
+    "RobustnessReport",
+    "annual_return",
+    "max_drawdown",
+    "pad",
+    "robustness_test",
+    "sharpe_ratio",
+    "sortino_ratio",
+    "summarize",
+    "total_return",
+    "turnover",
+    "win_rate",
+]
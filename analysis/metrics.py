@@ -0,0 +1,192 @@
+"""基于 NumPy 的绩效指标计算。
+
+回测结束后对资金曲线数组做一次性计算，替代 backtrader 在每个 Bar 上运行的
+`SharpeRatio`、`DrawDown` 等 Analyzer。所有函数沿最后一个轴计算：一维数组是
+单次回测，二维数组是 (回测 × Bar) 的批量结果，长度不同的资金曲线在末尾用 NaN
+补齐（见 `pad`）。
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+FILL_DTYPE = np.dtype([("date", "datetime64[D]"), ("size", "f8"), ("price", "f8")])
+
+
+@dataclass
+class RunRecord:
+    """一次回测的结果，只包含数组，不引用策略对象。
+
+    Attributes:
+        dates: 每个 Bar 的日期
+        equity: 每个 Bar 收盘后的账户总资产
+        exposure: 每个 Bar 的持仓市值占总资产的比例
+        trade_pnl: 每笔已平仓交易的净盈亏（扣除手续费）
+        traded_value: 累计成交金额
+        label: 用于区分回测的标签，例如股票代码和策略参数
+        fills: 成交记录，结构化数组，字段为 date, size（卖出为负）, price
+    """
+
+    dates: np.ndarray
+    equity: np.ndarray
+    exposure: np.ndarray
+    trade_pnl: np.ndarray
+    traded_value: float = 0.0
+    label: dict = field(default_factory=dict)
+    fills: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=FILL_DTYPE))
+
+
+def pad(series: list[np.ndarray]) -> np.ndarray:
+    """把长度不同的一维数组在末尾补 NaN，堆叠为二维数组。"""
+    width = max((len(s) for s in series), default=0)
+    out = np.full((len(series), width), np.nan)
+    for row, s in enumerate(series):
+        out[row, : len(s)] = s
+    return out
+
+
+def simple_returns(equity: np.ndarray) -> np.ndarray:
+    """逐 Bar 收益率，长度比资金曲线少 1。"""
+    equity = np.asarray(equity, dtype=np.float64)
+    return equity[..., 1:] / equity[..., :-1] - 1.0
+
+
+def total_return(equity: np.ndarray) -> np.ndarray:
+    """区间总收益率。"""
+    equity = np.asarray(equity, dtype=np.float64)
+    return _last_valid(equity) / equity[..., 0] - 1.0
+
+
+def annual_return(equity: np.ndarray, periods: int = TRADING_DAYS) -> np.ndarray:
+    """年化收益率（几何）。"""
+    equity = np.asarray(equity, dtype=np.float64)
+    bars = np.count_nonzero(~np.isnan(equity), axis=-1) - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (1.0 + total_return(equity)) ** (periods / bars) - 1.0
+
+
+def sharpe_ratio(
+    equity: np.ndarray, risk_free: float = 0.0, periods: int = TRADING_DAYS
+) -> np.ndarray:
+    """年化夏普比率。
+
+    Args:
+        equity: 资金曲线
+        risk_free: 年化无风险利率
+        periods: 每年的 Bar 数量
+
+    Returns:
+        夏普比率，收益率标准差为 0 时为 NaN
+    """
+    excess = simple_returns(equity) - risk_free / periods
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = _nanstd(excess)
+        return np.where(std > 0, np.nanmean(excess, axis=-1) / std, np.nan) * np.sqrt(
+            periods
+        )
+
+
+def sortino_ratio(
+    equity: np.ndarray, risk_free: float = 0.0, periods: int = TRADING_DAYS
+) -> np.ndarray:
+    """年化索提诺比率，分母为下行偏差。"""
+    excess = simple_returns(equity) - risk_free / periods
+    downside = np.where(np.isnan(excess), np.nan, np.minimum(excess, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deviation = np.sqrt(np.nanmean(downside**2, axis=-1))
+        return np.where(
+            deviation > 0, np.nanmean(excess, axis=-1) / deviation, np.nan
+        ) * np.sqrt(periods)
+
+
+def max_drawdown(equity: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """最大回撤和最长回撤持续期。
+
+    Returns:
+        (最大回撤比例, 最长回撤持续的 Bar 数)，回撤持续期是资金曲线低于前期
+        最高点的最长连续区间
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    peak = np.fmax.accumulate(equity, axis=-1)
+    drawdown = 1.0 - equity / peak
+    depth = np.nanmax(drawdown, axis=-1)
+
+    idx = np.arange(equity.shape[-1])
+    # 最近一次创新高（或持平）的位置，NaN 补齐的部分视为结束
+    at_peak = ~(equity < peak)
+    last_peak = np.maximum.accumulate(np.where(at_peak, idx, 0), axis=-1)
+    duration = np.max(np.where(at_peak, 0, idx - last_peak), axis=-1)
+    return depth, duration
+
+
+def exposure(exposure: np.ndarray) -> np.ndarray:
+    """平均仓位（持仓市值占总资产比例的均值）。"""
+    return np.nanmean(exposure, axis=-1)
+
+
+def turnover(traded_value, equity: np.ndarray) -> np.ndarray:
+    """换手率：累计成交金额与平均总资产之比。"""
+    return np.asarray(traded_value, dtype=np.float64) / np.nanmean(equity, axis=-1)
+
+
+def win_rate(trade_pnl: np.ndarray) -> float:
+    """盈利交易的比例，没有交易时为 NaN。"""
+    trade_pnl = np.asarray(trade_pnl, dtype=np.float64)
+    if trade_pnl.size == 0:
+        return np.nan
+    return float(np.count_nonzero(trade_pnl > 0) / trade_pnl.size)
+
+
+def summarize(
+    records: list[RunRecord],
+    risk_free: float = 0.0,
+    periods: int = TRADING_DAYS,
+) -> pd.DataFrame:
+    """批量计算回测结果的绩效指标。
+
+    所有资金曲线补齐后一次性完成向量化计算，适合参数扫描或多股票回测后
+    汇总成千上万次的结果。
+
+    Args:
+        records: 回测结果列表
+        risk_free: 年化无风险利率
+        periods: 每年的 Bar 数量
+
+    Returns:
+        每次回测一行的 DataFrame，列为标签和各项指标
+    """
+    equity = pad([r.equity for r in records])
+    depth, duration = max_drawdown(equity)
+    metrics = pd.DataFrame(
+        {
+            "total_return": total_return(equity),
+            "annual_return": annual_return(equity, periods),
+            "sharpe": sharpe_ratio(equity, risk_free, periods),
+            "sortino": sortino_ratio(equity, risk_free, periods),
+            "max_drawdown": depth,
+            "max_drawdown_duration": duration,
+            "turnover": turnover([r.traded_value for r in records], equity),
+            "exposure": exposure(pad([r.exposure for r in records])),
+            "trades": [len(r.trade_pnl) for r in records],
+            "win_rate": [win_rate(r.trade_pnl) for r in records],
+        }
+    )
+    labels = pd.DataFrame([r.label for r in records], index=metrics.index)
+    return pd.concat([labels, metrics], axis=1)
+
+
+def _last_valid(x: np.ndarray) -> np.ndarray:
+    """沿最后一个轴的最后一个非 NaN 值。"""
+    valid = ~np.isnan(x)
+    last = x.shape[-1] - 1 - np.argmax(valid[..., ::-1], axis=-1)
+    return np.take_along_axis(x, last[..., None], axis=-1)[..., 0]
+
+
+def _nanstd(x: np.ndarray) -> np.ndarray:
+    """样本标准差（ddof=1），忽略 NaN。"""
+    count = np.count_nonzero(~np.isnan(x), axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = np.nansum((x - np.nanmean(x, axis=-1)[..., None]) ** 2, axis=-1)
+        return np.sqrt(var / (count - 1))
@@ -0,0 +1,64 @@
+"""记录回测过程的资金曲线和交易列表。"""
+
+import backtrader as bt
+import numpy as np
+
+from .metrics import FILL_DTYPE, RunRecord
+
+
+class EquityRecorder(bt.Analyzer):
+    """逐 Bar 记录总资产和仓位，逐笔记录成交和平仓盈亏。
+
+    每个 Bar 只追加两个浮点数，绩效指标在回测结束后由 `analysis.metrics`
+    一次性计算。`get_analysis()` 返回不引用策略对象的 `RunRecord`，
+    参数优化（`optreturn=True`）时也可以安全地跨进程传递和长期保存。
+
+    Params:
+        label: 附加到结果上的标签，例如 {"symbol": "000001.SZ"}
+    """
+
+    params = (("label", None),)
+
+    def start(self):
+        self._dates: list[float] = []
+        self._equity: list[float] = []
+        self._invested: list[float] = []
+        self._trade_pnl: list[float] = []
+        self._fills: list[tuple] = []
+        self._traded_value = 0.0
+
+    def next(self):
+        broker = self.strategy.broker
+        invested = 0.0
+        for data in self.datas:
+            invested += abs(broker.getposition(data).size * data.close[0])
+        self._dates.append(self.datas[0].datetime[0])
+        self._equity.append(broker.getvalue())
+        self._invested.append(invested)
+
+    def notify_order(self, order):
+        if order.status == order.Completed:
+            size, price = order.executed.size, order.executed.price
+            self._traded_value += abs(size * price)
+            self._fills.append((bt.num2date(order.executed.dt).date(), size, price))
+
+    def notify_trade(self, trade):
+        if trade.isclosed:
+            self._trade_pnl.append(trade.pnlcomm)
+
+    def get_analysis(self) -> RunRecord:
+        equity = np.asarray(self._equity, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            exposure = np.asarray(self._invested, dtype=np.float64) / equity
+        dates = np.array(
+            [bt.num2date(d).date() for d in self._dates], dtype="datetime64[D]"
+        )
+        return RunRecord(
+            dates=dates,
+            equity=equity,
+            exposure=exposure,
+            trade_pnl=np.asarray(self._trade_pnl, dtype=np.float64),
+            traded_value=self._traded_value,
+            label=dict(self.p.label or {}),
+            fills=np.array(self._fills, dtype=FILL_DTYPE),
+        )
@@ -0,0 +1,14 @@
+from .fingerprint import code_fingerprint, run_key
+from .job import BacktestJob
+from .result import BacktestResult
+from .runner import run_backtest
+from .store import ResultStore
+
+__all__ = [
+    "BacktestJob",
+    "BacktestResult",
+    "ResultStore",
+    "code_fingerprint",
+    "run_backtest",
+    "run_key",
+]
@@ -0,0 +1,393 @@
+"""批量回测。
+
+从任务文件读取多组回测（策略、参数网格、股票、回测区间），数据库最多更新一次，
+然后在进程池中按优先级调度。每个任务在独立的子进程中运行，超时的任务会被终止，
+崩溃的任务只影响它自己。完成的结果逐行追加到 JSONL 文件，中断后重新运行同一个
+任务文件会跳过已经完成的任务。
+
+任务文件示例::
+
+    [batch]
+    workers = 4          # 并行进程数，为0则使用全部CPU
+    timeout = 600        # 默认的单个任务超时时间（秒）
+    output = "results/batch.jsonl"
+    shared_memory = true # 行情只读取一次，放入共享内存供所有子进程使用
+
+    [[jobs]]
+    strategy = "MACD"
+    symbols = ["000001.SZ", "000063.SZ"]
+    windows = [["20230101", "20231231"], ["20240101", "20241231"]]
+    params = { ma_period = [10, 15, 20] }   # 列表展开为参数网格
+    priority = 10        # 数值越大越先运行
+    timeout = 300
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+import tomllib
+import traceback
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+
+from data.db_reader import StockDBReader
+from data.shared_panel import SharedPanel, SharedPanelHandle
+from monitor import counter, histogram
+
+from .job import BacktestJob
+from .result import BacktestResult
+from .runner import run_backtest
+from .store import ResultStore
+
+DEFAULT_BATCH_CONFIG = {
+    "workers": max(1, (os.cpu_count() or 2) - 1),
+    "timeout": 600,
+    "output": "results/batch.jsonl",
+    "update_db": True,
+    "quiet": True,  # 屏蔽子进程中策略的日志输出
+    "shared_memory": False,  # 行情放入共享内存，所有子进程共用一份
+}
+# 已完成、恢复运行时跳过的状态
+DONE_STATUSES = ("ok", "no_data")
+
+# 子进程中的指标随进程退出而丢失，批量任务的指标由父进程根据结果摘要记录
+BATCH_JOBS = counter(
+    "batch_jobs_total", "批量回测完成的任务数，status 与结果文件一致", ["status"]
+)
+BATCH_JOB_SECONDS = histogram(
+    "batch_job_seconds", "批量回测中单个任务的耗时（含子进程启动）"
+)
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """批量回测中的一个任务。"""
+
+    id: str
+    job: BacktestJob
+    priority: int = 0
+    timeout: float = 600
+
+
+def job_id(job: BacktestJob) -> str:
+    """任务的唯一标识，由任务设置决定，用于恢复运行时识别已完成的任务。"""
+    text = json.dumps(job.to_dict(), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def _grid(params: dict) -> list[dict]:
+    """把取值为列表的参数展开为参数网格。"""
+    keys = list(params)
+    values = [v if isinstance(v, list) else [v] for v in params.values()]
+    return [dict(zip(keys, combo, strict=True)) for combo in itertools.product(*values)]
+
+
+def load_jobs(path: str, config: dict) -> tuple[dict, list[BatchItem]]:
+    """读取任务文件。
+
+    每个 [[jobs]] 按 symbols × windows × 参数网格展开为多个任务，未指定的设置
+    （初始资金、手续费、复权方式、回测区间等）取自 `config.toml`。
+
+    Args:
+        path: 任务文件路径
+        config: `config/config.toml` 的内容
+
+    Returns:
+        (批量运行设置, 任务列表)
+    """
+    with open(path, "rb") as f:
+        spec = tomllib.load(f)
+    settings = {**DEFAULT_BATCH_CONFIG, **spec.get("batch", {})}
+    # 与 [robustness] 一致，0 表示使用全部 CPU
+    settings["workers"] = settings["workers"] or os.cpu_count() or 1
+    if settings["workers"] < 1:
+        raise ValueError(f"workers 不能为负数: {settings['workers']}")
+    base = BacktestJob.from_config(config)
+
+    items, seen = [], set()
+    for entry in spec.get("jobs", []):
+        symbols = entry.get("symbols", [base.symbol])
+        windows = entry.get("windows", [[base.start_date, base.end_date]])
+        for symbol, (start, end), params in itertools.product(
+            symbols, windows, _grid(entry.get("params", {}))
+        ):
+            job = BacktestJob(
+                strategy=entry.get("strategy", base.strategy),
+                symbol=symbol,
+                start_date=str(start),
+                end_date=str(end),
+                adj_type=entry.get("adjust", base.adj_type),
+                cash=entry.get("cash", base.cash),
+                broker={**base.broker, **entry.get("broker", {})},
+                params=params,
+                engine=entry.get("engine", base.engine),
+            )
+            item = BatchItem(
+                id=job_id(job),
+                job=job,
+                priority=entry.get("priority", 0),
+                timeout=entry.get("timeout", settings["timeout"]),
+            )
+            if item.id not in seen:
+                seen.add(item.id)
+                items.append(item)
+    return settings, items
+
+
+def completed_ids(output: str) -> set[str]:
+    """读取结果文件中已完成的任务，忽略中断时写了一半的行。"""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") in DONE_STATUSES:
+                done.add(record["id"])
+    return done
+
+
+def result_payload(result: BacktestResult | None) -> dict:
+    """回测结果的摘要，写入结果文件或任务队列。"""
+    if result is None:
+        return {"status": "no_data"}
+    return {
+        "status": "ok",
+        "key": result.key,
+        "cached": result.cached,
+        "final_value": result.final_value,
+        "metrics": result.metrics,
+    }
+
+
+def _run_item(
+    job: dict,
+    db_name: str,
+    result_dir: str,
+    force: bool,
+    quiet: bool,
+    conn,
+    panel: SharedPanelHandle | None = None,
+):
+    """子进程入口：运行一个任务并通过管道发回结果摘要。"""
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+    shared = None
+    try:
+        reader = StockDBReader(db_name)
+        store = ResultStore(result_dir) if result_dir else None
+        shared = SharedPanel.attach(panel) if panel is not None else None
+        result = run_backtest(BacktestJob(**job), reader, store, force, panel=shared)
+        payload = result_payload(result)
+    except Exception:
+        payload = {"status": "error", "error": traceback.format_exc()}
+    finally:
+        if shared is not None:
+            shared.close()
+    conn.send(payload)
+    conn.close()
+
+
+class _Output:
+    """逐行追加结果，每行写完立即刷新到磁盘。"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: dict) -> None:
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def run_items(
+    items: list[BatchItem],
+    output: str,
+    workers: int = 1,
+    db_name: str = "stock_db_based_Tushare.db",
+    result_dir: str = "",
+    force: bool = False,
+    quiet: bool = True,
+    panel: SharedPanelHandle | None = None,
+) -> list[dict]:
+    """在进程池中运行任务，返回本次运行的结果记录。
+
+    Args:
+        items: 任务列表
+        output: 结果 JSONL 文件，已完成的任务会被跳过
+        workers: 并行进程数，为 0 时使用全部 CPU
+        db_name: 数据库文件
+        result_dir: 结果缓存目录，为空则不使用结果缓存
+        force: 忽略结果缓存和已完成记录，全部重新运行
+        quiet: 屏蔽子进程的标准输出
+        panel: 共享内存行情面板，子进程附加后直接取数据，不再读取数据库
+
+    Returns:
+        结果记录列表，每条包含 id、status、job、elapsed 以及结果或错误信息
+    """
+    workers = workers or os.cpu_count() or 1
+    done = set() if force else completed_ids(output)
+    queue = [(-item.priority, order, item) for order, item in enumerate(items)]
+    queue = [entry for entry in queue if entry[2].id not in done]
+    heapq.heapify(queue)
+
+    ctx = mp.get_context()
+    sink = _Output(output)
+    running: dict[str, tuple] = {}
+    records: list[dict] = []
+
+    def finish(item: BatchItem, started: float, payload: dict) -> None:
+        elapsed = time.monotonic() - started
+        status = payload["status"]
+        if status == "ok" and payload.get("cached"):
+            status = "cached"
+        BATCH_JOBS.labels(status=status).inc()
+        BATCH_JOB_SECONDS.observe(elapsed)
+        record = {
+            "id": item.id,
+            "job": item.job.to_dict(),
+            "elapsed": round(elapsed, 3),
+            **payload,
+        }
+        sink.write(record)
+        records.append(record)
+
+    try:
+        while queue or running:
+            while queue and len(running) < workers:
+                _, _, item = heapq.heappop(queue)
+                receiver, sender = ctx.Pipe(duplex=False)
+                process = ctx.Process(
+                    target=_run_item,
+                    args=(
+                        item.job.to_dict(),
+                        db_name,
+                        result_dir,
+                        force,
+                        quiet,
+                        sender,
+                        panel,
+                    ),
+                    daemon=True,
+                )
+                process.start()
+                sender.close()
+                running[item.id] = (item, process, receiver, time.monotonic())
+
+            now = time.monotonic()
+            next_deadline = min(
+                started + item.timeout for item, _, _, started in running.values()
+            )
+            wait(
+                [receiver for _, _, receiver, _ in running.values()],
+                timeout=max(0.0, min(next_deadline - now, 1.0)),
+            )
+
+            for item_id, (item, process, receiver, started) in list(running.items()):
+                payload = None
+                if receiver.poll():
+                    try:
+                        payload = receiver.recv()
+                    except EOFError:
+                        payload = {
+                            "status": "error",
+                            "error": f"子进程异常退出，退出码 {process.exitcode}",
+                        }
+                elif time.monotonic() - started > item.timeout:
+                    process.terminate()
+                    payload = {"status": "timeout", "error": f"超过 {item.timeout} 秒"}
+                elif not process.is_alive():
+                    payload = {
+                        "status": "error",
+                        "error": f"子进程异常退出，退出码 {process.exitcode}",
+                    }
+                if payload is not None:
+                    process.join()
+                    receiver.close()
+                    del running[item_id]
+                    finish(item, started, payload)
+    finally:
+        for _, process, receiver, _ in running.values():
+            process.terminate()
+            receiver.close()
+        sink.close()
+    return records
+
+
+def run_batch(
+    path: str, config: dict, force: bool = False, update_db=None
+) -> list[dict]:
+    """运行任务文件中的全部回测并打印汇总。
+
+    Args:
+        path: 任务文件路径
+        config: `config/config.toml` 的内容
+        force: 忽略结果缓存和已完成记录，全部重新运行
+        update_db: 更新数据库的函数，[batch] update_db 为 true 时在调度前调用一次
+
+    Returns:
+        本次运行的结果记录
+    """
+    settings, items = load_jobs(path, config)
+    if settings["update_db"] and update_db is not None:
+        update_db()
+
+    done = set() if force else completed_ids(settings["output"])
+    todo = sum(item.id not in done for item in items)
+    print(
+        f"共 {len(items)} 个任务，已完成 {len(items) - todo} 个，"
+        f"本次运行 {todo} 个（{settings['workers']} 个进程）"
+    )
+    started = time.monotonic()
+    db_name = settings.get("db", "stock_db_based_Tushare.db")
+    pending = [item.job for item in items if item.id not in done]
+    panel = None
+    if settings["shared_memory"] and pending:
+        panel = SharedPanel.load(
+            StockDBReader(db_name),
+            sorted({job.symbol for job in pending}),
+            min(job.start_date for job in pending),
+            max(job.end_date for job in pending),
+        )
+        print(f"行情已放入共享内存（{panel.nbytes / 2**20:.1f} MiB）")
+    try:
+        records = run_items(
+            items,
+            settings["output"],
+            workers=settings["workers"],
+            db_name=db_name,
+            result_dir=settings.get(
+                "result_dir", config.get("cache", {}).get("result_dir", "")
+            ),
+            force=force,
+            quiet=settings["quiet"],
+            panel=panel.handle if panel is not None else None,
+        )
+    finally:
+        if panel is not None:
+            panel.close()
+            panel.unlink()
+
+    counts: dict[str, int] = {}
+    for record in records:
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+    summary = ", ".join(f"{status}: {n}" for status, n in sorted(counts.items()))
+    print(
+        f"批量回测结束，用时 {time.monotonic() - started:.1f}s，{summary or '无任务'}。"
+        f"结果保存在 {settings['output']}"
+    )
+    return records
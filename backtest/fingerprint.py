@@ -0,0 +1,96 @@
+"""回测结果缓存键的计算。
+
+缓存键由四部分组成：回测任务的设置（来自 `config.toml`）、校验后的策略参数
+（来自 `strategy_config.toml` 和任务中的覆盖值）、策略及回测引擎的源代码指纹、
+输入数据的指纹。任何一部分变化都会得到新的缓存键。
+"""
+
+import hashlib
+import inspect
+import json
+import os
+
+import backtrader as bt
+
+# 影响回测结果的引擎模块，修改后旧的结果全部失效。数据指纹只覆盖原始行情和
+# 复权因子，复权计算、归档合并和数据源的代码也在这里
+_ENGINE_MODULES = [
+    "analysis/recorder.py",
+    "backtest/runner.py",
+    "commission/commission.py",
+    "commission/cost_model.py",
+    "data/akshare_data.py",
+    "data/archive.py",
+    "data/array_feed.py",
+    "data/db_reader.py",
+    "data/shared_panel.py",
+    "data/source.py",
+    "engine/broker.py",
+    "engine/data.py",
+    "engine/engine.py",
+    "indicators/lines.py",
+    "indicators/ta.py",
+]
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 结果格式的版本号，格式变化时递增
+RESULT_VERSION = 1
+
+# 文件路径 -> (修改时间, 摘要)
+_file_digests: dict[str, tuple[float, str]] = {}
+
+
+def _file_digest(path: str) -> str:
+    """文件内容的摘要，按修改时间缓存。"""
+    mtime = os.path.getmtime(path)
+    cached = _file_digests.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = (mtime, hashlib.sha1(f.read()).hexdigest())
+        _file_digests[path] = cached
+    return cached[1]
+
+
+def code_fingerprint(strategy_class: type) -> str:
+    """策略类（包括其父类）所在源文件和回测引擎模块的摘要。"""
+    paths = set()
+    for cls in inspect.getmro(strategy_class):
+        if cls is bt.Strategy:
+            break
+        try:
+            path = inspect.getsourcefile(cls)
+        except TypeError:  # 交互式环境中定义的类没有源文件
+            path = None
+        if path:
+            paths.add(os.path.abspath(path))
+    paths.update(os.path.join(_ROOT, module) for module in _ENGINE_MODULES)
+
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        if os.path.exists(path):
+            digest.update(os.path.relpath(path, _ROOT).encode())
+            digest.update(_file_digest(path).encode())
+    return digest.hexdigest()
+
+
+def run_key(job: dict, params: dict, code: str, data: str) -> str:
+    """计算一次回测的缓存键。
+
+    Args:
+        job: 回测任务的设置
+        params: 校验后的完整策略参数
+        code: 源代码指纹
+        data: 输入数据指纹
+
+    Returns:
+        十六进制的 SHA-256 摘要
+    """
+    payload = {
+        "version": RESULT_VERSION,
+        "job": job,
+        "params": params,
+        "code": code,
+        "data": data,
+    }
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
@@ -0,0 +1,57 @@
+"""回测任务的描述。"""
+
+import calendar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+
+@dataclass(frozen=True)
+class BacktestJob:
+    """一次回测所需的全部设置。
+
+    Attributes:
+        strategy: 策略名称，见 `config/strategy_config.toml`
+        symbol: 股票代码
+        start_date: 开始日期，格式为 'YYYYMMDD'
+        end_date: 结束日期，格式为 'YYYYMMDD'
+        adj_type: 复权方式
+        cash: 初始资金
+        broker: 手续费设置，同 `config.toml` 的 [broker] 部分
+        params: 覆盖策略配置文件默认值的参数
+        engine: 回测引擎，backtrader 或 bar（轻量引擎，见 `engine`）
+    """
+
+    strategy: str
+    symbol: str
+    start_date: str
+    end_date: str
+    adj_type: str = "qfq"
+    cash: float = 100000
+    broker: dict = field(default_factory=dict)
+    params: dict = field(default_factory=dict)
+    engine: str = "backtrader"
+
+    @classmethod
+    def from_config(cls, config: dict, **overrides) -> "BacktestJob":
+        """由 `config/config.toml` 的内容创建，回测区间为起始月第一天到结束月最后一天。"""
+        date = config["date"]
+        end_day = calendar.monthrange(date["end_year"], date["end_month"])[1]
+        settings = {
+            "strategy": config["strategy"]["name"],
+            "symbol": config["stock"]["symbol"][0],
+            "start_date": datetime(date["start_year"], date["start_month"], 1).strftime(
+                "%Y%m%d"
+            ),
+            "end_date": datetime(date["end_year"], date["end_month"], end_day).strftime(
+                "%Y%m%d"
+            ),
+            "adj_type": config["stock"]["adjust"],
+            "cash": config["cash"],
+            "broker": dict(config["broker"]),
+            "engine": config["strategy"].get("engine", "backtrader"),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
@@ -0,0 +1,371 @@
+"""基于 SQLite 的回测任务队列，用于多机分布式回测。
+
+协调者把任务写入队列文件，任意数量的 `main.py worker` 进程（可以在不同机器上，
+只要共享同一个文件系统）从队列中领取任务。领取时获得一个租约，运行期间定期续约；
+worker 崩溃或失联后租约过期，任务回到队列由其他 worker 重新运行，超过最大尝试
+次数则标记为失败。结果摘要写回队列，协调者可以随时查询进度和结果。
+
+所有写操作都在 `BEGIN IMMEDIATE` 事务中完成，依靠 SQLite 的文件锁保证同一个任务
+只会被一个 worker 领取。没有使用 WAL 模式，因为 WAL 不支持网络文件系统。
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+
+from data.db_reader import StockDBReader
+
+from .batch import BatchItem, load_jobs, result_payload
+from .job import BacktestJob
+from .runner import run_backtest
+from .store import ResultStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT UNIQUE NOT NULL,
+    job TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    result TEXT,
+    error TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (state, priority DESC, seq);
+"""
+# 任务状态：queued-等待运行 running-运行中 done-已完成 failed-失败
+STATES = ("queued", "running", "done", "failed")
+
+
+@dataclass(frozen=True)
+class QueuedJob:
+    """worker 领取到的任务。"""
+
+    id: str
+    job: BacktestJob
+    attempts: int
+
+
+class JobQueue:
+    """SQLite 任务队列。
+
+    Args:
+        path: 队列文件路径，多台机器共享时放在共享文件系统上
+        timeout: 等待其他进程释放文件锁的时间（秒）
+    """
+
+    def __init__(self, path: str = "results/queue.db", timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每次操作单独连接，可以在线程和子进程中安全使用
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def push(self, items: list[BatchItem], max_attempts: int = 3) -> int:
+        """添加任务，已在队列中的任务（相同 id）会被忽略。
+
+        Returns:
+            新添加的任务数量
+        """
+        now = time.time()
+        rows = [
+            (
+                item.id,
+                json.dumps(item.job.to_dict(), ensure_ascii=False),
+                item.priority,
+                max_attempts,
+                now,
+            )
+            for item in items
+        ]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (id, job, priority, max_attempts, updated) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            return conn.total_changes - before
+
+    def requeue_expired(self) -> int:
+        """把租约过期的任务放回队列，超过最大尝试次数的标记为失败。
+
+        Returns:
+            处理的任务数量
+        """
+        with self._transaction() as conn:
+            return self._requeue_expired(conn, time.time())
+
+    @staticmethod
+    def _requeue_expired(conn: sqlite3.Connection, now: float) -> int:
+        failed = conn.execute(
+            "UPDATE jobs SET state = 'failed', worker = NULL, lease_until = NULL, "
+            "error = '租约过期次数超过上限', updated = ? "
+            "WHERE state = 'running' AND lease_until < ? AND attempts >= max_attempts",
+            (now, now),
+        ).rowcount
+        requeued = conn.execute(
+            "UPDATE jobs SET state = 'queued', worker = NULL, lease_until = NULL, "
+            "updated = ? WHERE state = 'running' AND lease_until < ?",
+            (now, now),
+        ).rowcount
+        return failed + requeued
+
+    def claim(self, worker: str, lease: float = 60.0) -> QueuedJob | None:
+        """领取优先级最高的任务。
+
+        Args:
+            worker: worker 标识
+            lease: 租约时长（秒），到期前需要调用 `heartbeat` 续约
+
+        Returns:
+            领取到的任务；队列中没有等待运行的任务时返回 None
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            self._requeue_expired(conn, now)
+            row = conn.execute(
+                "SELECT id, job, attempts FROM jobs WHERE state = 'queued' "
+                "ORDER BY priority DESC, seq LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = 'running', worker = ?, lease_until = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (worker, now + lease, now, row["id"]),
+            )
+        return QueuedJob(
+            id=row["id"],
+            job=BacktestJob(**json.loads(row["job"])),
+            attempts=row["attempts"] + 1,
+        )
+
+    def heartbeat(self, job_id: str, worker: str, lease: float = 60.0) -> bool:
+        """续约。
+
+        Returns:
+            是否仍持有该任务；租约已过期并被其他 worker 领取时返回 False
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            return (
+                conn.execute(
+                    "UPDATE jobs SET lease_until = ?, updated = ? "
+                    "WHERE id = ? AND worker = ? AND state = 'running'",
+                    (now + lease, now, job_id, worker),
+                ).rowcount
+                == 1
+            )
+
+    def complete(self, job_id: str, worker: str, payload: dict) -> bool:
+        """写回结果。回测报错的任务直接标记为失败，不再重试。
+
+        Returns:
+            结果是否被接受；不再持有该任务时返回 False，结果被丢弃
+        """
+        state = "failed" if payload.get("status") == "error" else "done"
+        with self._transaction() as conn:
+            return (
+                conn.execute(
+                    "UPDATE jobs SET state = ?, result = ?, error = ?, "
+                    "lease_until = NULL, updated = ? "
+                    "WHERE id = ? AND worker = ? AND state = 'running'",
+                    (
+                        state,
+                        json.dumps(payload, ensure_ascii=False, default=str),
+                        payload.get("error"),
+                        time.time(),
+                        job_id,
+                        worker,
+                    ),
+                ).rowcount
+                == 1
+            )
+
+    def counts(self) -> dict[str, int]:
+        """各状态的任务数量。"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT state, COUNT(*) FROM jobs GROUP BY state"
+            ).fetchall()
+        return {state: 0 for state in STATES} | {state: n for state, n in rows}
+
+    def results(self) -> list[dict]:
+        """已结束任务的记录，格式与批量回测的结果文件一致。"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, job, worker, attempts, state, result, error FROM jobs "
+                "WHERE state IN ('done', 'failed') ORDER BY seq"
+            ).fetchall()
+        records = []
+        for row in rows:
+            payload = json.loads(row["result"]) if row["result"] else {}
+            payload.setdefault("status", "error")
+            if row["error"] and "error" not in payload:
+                payload["error"] = row["error"]
+            records.append(
+                {
+                    "id": row["id"],
+                    "job": json.loads(row["job"]),
+                    "worker": row["worker"],
+                    "attempts": row["attempts"],
+                    **payload,
+                }
+            )
+        return records
+
+
+class _Heartbeat(threading.Thread):
+    """在后台线程中定期续约，直到任务结束或租约丢失。"""
+
+    def __init__(self, queue: JobQueue, job_id: str, worker: str, lease: float):
+        super().__init__(daemon=True)
+        self.queue, self.job_id, self.worker, self.lease = queue, job_id, worker, lease
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        while not self.stopped.wait(self.lease / 3):
+            try:
+                if not self.queue.heartbeat(self.job_id, self.worker, self.lease):
+                    self.lost = True
+                    return
+            except sqlite3.OperationalError:
+                # 文件锁等待超时，下一轮再试；租约足够长时不会因此过期
+                continue
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_worker(
+    queue_path: str,
+    db_name: str = "stock_db_based_Tushare.db",
+    result_dir: str = "",
+    lease: float = 60.0,
+    poll: float = 5.0,
+    keep_alive: bool = False,
+    worker: str | None = None,
+    quiet: bool = True,
+) -> int:
+    """worker 主循环：领取任务、运行回测、写回结果。
+
+    Args:
+        queue_path: 队列文件路径
+        db_name: 数据库文件
+        result_dir: 结果缓存目录，为空则不使用结果缓存
+        lease: 租约时长（秒）
+        poll: 队列为空时的轮询间隔（秒）
+        keep_alive: 队列为空时是否继续等待新任务；为 False 时所有任务结束后退出
+        worker: worker 标识，默认为 `主机名:进程号`
+        quiet: 屏蔽策略的日志输出
+
+    Returns:
+        本 worker 完成的任务数量
+    """
+    queue = JobQueue(queue_path)
+    worker = worker or default_worker_id()
+    reader = StockDBReader(db_name)
+    store = ResultStore(result_dir) if result_dir else None
+    finished = 0
+    print(f"worker {worker} 启动，队列 {queue_path}")
+
+    while True:
+        claimed = queue.claim(worker, lease)
+        if claimed is None:
+            counts = queue.counts()
+            # 仍有运行中的任务时继续等待，它们的租约过期后可能回到队列
+            if not keep_alive and counts["queued"] == 0 and counts["running"] == 0:
+                break
+            time.sleep(poll)
+            continue
+
+        heartbeat = _Heartbeat(queue, claimed.id, worker, lease)
+        heartbeat.start()
+        started = time.monotonic()
+        stdout = sys.stdout
+        try:
+            if quiet:
+                sys.stdout = open(os.devnull, "w")
+            payload = result_payload(run_backtest(claimed.job, reader, store))
+        except Exception as e:
+            payload = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        finally:
+            if quiet:
+                sys.stdout.close()
+                sys.stdout = stdout
+            heartbeat.stop()
+        payload["elapsed"] = round(time.monotonic() - started, 3)
+
+        job = claimed.job
+        if heartbeat.lost or not queue.complete(claimed.id, worker, payload):
+            print(f"任务 {claimed.id} 的租约已失效，丢弃结果")
+            continue
+        finished += 1
+        print(
+            f"完成 {job.strategy} {job.symbol} {job.start_date}-{job.end_date} "
+            f"{job.params}: {payload['status']}（{payload['elapsed']}s）"
+        )
+
+    print(f"队列已空，worker {worker} 退出，共完成 {finished} 个任务")
+    return finished
+
+
+def enqueue(path: str, config: dict, queue_path: str, update_db=None) -> int:
+    """协调者：把任务文件中的回测写入队列。
+
+    Args:
+        path: 任务文件路径，格式与批量回测相同
+        config: `config/config.toml` 的内容
+        queue_path: 队列文件路径
+        update_db: 更新数据库的函数，[batch] update_db 为 true 时在写入前调用一次
+
+    Returns:
+        新添加的任务数量
+    """
+    settings, items = load_jobs(path, config)
+    if settings["update_db"] and update_db is not None:
+        update_db()
+    queue = JobQueue(queue_path)
+    added = queue.push(items, max_attempts=settings.get("max_attempts", 3))
+    counts = queue.counts()
+    print(
+        f"共 {len(items)} 个任务，新加入队列 {added} 个。队列状态: "
+        + ", ".join(f"{state}: {counts[state]}" for state in STATES)
+    )
+    return added
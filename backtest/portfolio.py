@@ -0,0 +1,93 @@
+"""按因子轮动的全市场组合回测。
+
+在 `config.toml` 的回测区间内，每个调仓日按 [portfolio] 中设置的因子选出前 N 只
+股票等权持有，用 `engine.PortfolioEngine` 在全市场面板上模拟成交。因子值由
+`factor.FactorEngine` 计算，启用 [factor] 的缓存目录时与 `main.py factors` 共用缓存。
+"""
+
+import time
+from dataclasses import replace
+
+from analysis import summarize
+from commission.cost_model import AShareCostModel
+from data.db_reader import StockDBReader
+from engine import PortfolioEngine, PortfolioResult, rebalance_dates, top_n_weights
+from factor import FactorEngine, FactorStore
+
+from .job import BacktestJob
+
+DEFAULT_PORTFOLIO_CONFIG = {
+    "factor": "momentum_20_neutral",  # 选股因子
+    "top": 50,  # 持有的股票数量
+    "ascending": False,  # 为 True 时选因子值最小的股票
+    "freq": "W",  # 调仓频率，W-每周 M-每月，整数为每隔 N 个交易日
+    "cash": 1_000_000,  # 初始资金
+    "price_limit": 0.1,  # 涨跌停幅度，开盘涨停不能买入、跌停不能卖出
+    "list_status": [],  # 上市状态筛选，为空则不筛选
+}
+
+
+def run_portfolio(
+    config: dict, reader: StockDBReader | None = None
+) -> PortfolioResult | None:
+    """按配置运行组合回测并打印绩效指标。
+
+    Args:
+        config: `config/config.toml` 的内容，组合设置见 [portfolio] 部分，
+            回测区间、复权方式和手续费与单只股票的回测相同
+        reader: 数据库读取器
+
+    Returns:
+        组合回测结果；区间内没有数据时返回 None
+    """
+    portfolio = {**DEFAULT_PORTFOLIO_CONFIG, **config.get("portfolio", {})}
+    reader = reader or StockDBReader()
+    job = BacktestJob.from_config(config)
+    list_status = portfolio["list_status"] or None
+
+    started = time.perf_counter()
+    dates = reader.get_trade_dates(job.start_date, job.end_date)
+    if not dates:
+        print(f"{job.start_date} 至 {job.end_date} 没有行情数据。")
+        return None
+    panel = reader.get_daily_panel(
+        last_n=len(dates),
+        end_date=dates[-1],
+        adj_type=job.adj_type,
+        list_status=list_status,
+    )
+    directory = config.get("factor", {}).get("directory", "")
+    factors = FactorEngine(
+        reader, FactorStore(directory) if directory else None, list_status=list_status
+    )
+    values = factors.compute([portfolio["factor"]], job.start_date, job.end_date)
+    loaded = time.perf_counter()
+
+    weights = top_n_weights(
+        values.values[portfolio["factor"]],
+        values.codes,
+        values.dates,
+        portfolio["top"],
+        at=rebalance_dates(values.dates, portfolio["freq"]),
+        ascending=portfolio["ascending"],
+    )
+    engine = PortfolioEngine(
+        portfolio["cash"],
+        AShareCostModel.from_config(job.broker),
+        portfolio["price_limit"],
+    )
+    result = engine.run(
+        panel, weights, label={"factor": portfolio["factor"], "top": portfolio["top"]}
+    )
+    finished = time.perf_counter()
+
+    print(
+        f"组合回测: {panel.shape[0]} 只股票, {panel.shape[1]} 个交易日, "
+        f"{len(weights)} 次调仓, {len(result.trades)} 笔成交, "
+        f"{result.blocked} 笔因停牌或涨跌停未成交; "
+        f"读取和因子 {loaded - started:.2f}s, 模拟 {finished - loaded:.2f}s"
+    )
+    print(f"期末总资产: {result.record.equity[-1]:.2f}")
+    metrics = summarize([replace(result.record, label={})]).iloc[0]
+    print(metrics.to_string(float_format=lambda x: f"{x:.4f}"))
+    return result
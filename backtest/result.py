@@ -0,0 +1,31 @@
+"""回测结果。"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from analysis import RunRecord
+
+
+@dataclass
+class BacktestResult:
+    """一次回测的结果。
+
+    Attributes:
+        key: 缓存键
+        job: 回测任务的设置
+        params: 校验后的完整策略参数
+        metrics: 绩效指标，见 `analysis.summarize`
+        final_value: 回测结束时的总资产
+        record: 资金曲线、成交等数组
+        cached: 是否来自结果缓存
+        strategy: 运行结束的策略对象，只在实际运行时存在，不会被保存
+    """
+
+    key: str | None
+    job: dict
+    params: dict
+    metrics: dict
+    final_value: float
+    record: RunRecord
+    cached: bool = False
+    strategy: Any = field(default=None, repr=False, compare=False)
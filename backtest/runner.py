@@ -0,0 +1,176 @@
+"""运行一次回测。"""
+
+import time
+from dataclasses import replace
+
+import backtrader as bt
+import numpy as np
+
+from analysis import EquityRecorder, summarize
+from commission.commission import MyStockCommissionScheme
+from commission.cost_model import AShareCostModel
+from data.array_feed import ArrayData
+from data.db_reader import StockDBReader
+from data.shared_panel import SharedPanel
+from data.source import DataSource
+from engine import BarData, BarEngine
+from indicators import IndicatorCache
+from monitor import counter, histogram, phase
+from strategy.config_loader import StrategyConfig
+
+from .fingerprint import code_fingerprint, run_key
+from .job import BacktestJob
+from .result import BacktestResult
+from .store import ResultStore
+
+BACKTESTS = counter(
+    "backtests_total",
+    "回测次数，status 为 ok、cached、no_data 或 error",
+    ["engine", "status"],
+)
+BACKTEST_SECONDS = histogram("backtest_seconds", "单次回测耗时", ["engine"])
+BACKTEST_BARS = counter("backtest_bars_total", "实际运行的回测 Bar 数", ["engine"])
+
+
+def _to_builtin(value):
+    """把 NumPy 标量转换为 Python 内置类型，便于保存为 JSON。"""
+    return value.item() if hasattr(value, "item") else value
+
+
+def run_backtest(
+    job: BacktestJob,
+    reader: DataSource | None = None,
+    store: ResultStore | None = None,
+    force: bool = False,
+    indicator_cache: IndicatorCache | None = None,
+    panel: SharedPanel | None = None,
+) -> BacktestResult | None:
+    """运行回测，相同的设置、代码和数据直接返回保存的结果。
+
+    Args:
+        job: 回测任务
+        reader: 数据源，默认为 Tushare 数据库
+        store: 结果存储，为 None 时不使用结果缓存
+        force: 忽略已保存的结果，重新运行并覆盖
+        indicator_cache: 指标缓存
+        panel: 共享内存行情面板，包含该股票时从面板取数据，不再读取数据库
+
+    Returns:
+        回测结果；区间内没有数据时返回 None
+    """
+    started = time.perf_counter()
+    status = "error"
+    try:
+        result = _run_backtest(job, reader, store, force, indicator_cache, panel)
+        if result is None:
+            status = "no_data"
+        elif result.cached:
+            status = "cached"
+        else:
+            status = "ok"
+            BACKTEST_BARS.labels(engine=job.engine).inc(len(result.record.dates))
+        return result
+    finally:
+        BACKTESTS.labels(engine=job.engine, status=status).inc()
+        BACKTEST_SECONDS.labels(engine=job.engine).observe(
+            time.perf_counter() - started
+        )
+
+
+def _run_backtest(
+    job: BacktestJob,
+    reader: DataSource | None,
+    store: ResultStore | None,
+    force: bool,
+    indicator_cache: IndicatorCache | None,
+    panel: SharedPanel | None,
+) -> BacktestResult | None:
+    reader = reader or StockDBReader()
+    strategy_class, params = StrategyConfig().get_strategy(
+        name=job.strategy, params=job.params
+    )
+
+    with phase("cache"):
+        fingerprint = reader.get_data_fingerprint(
+            job.symbol, job.start_date, job.end_date
+        )
+        if fingerprint == "":
+            return None
+        # 指纹计算失败时无法判断数据是否变化，不使用结果缓存
+        key = None
+        if fingerprint is not None:
+            key = run_key(
+                job.to_dict(), params, code_fingerprint(strategy_class), fingerprint
+            )
+        if store is not None and key is not None and not force:
+            cached = store.get(key)
+            if cached is not None:
+                return cached
+
+    with phase("load"):
+        if panel is not None and job.symbol in panel:
+            arrays = panel.symbol_arrays(
+                job.symbol, job.start_date, job.end_date, job.adj_type
+            )
+            if not len(arrays["close"]):
+                return None
+        else:
+            raw_data = reader.get_daily_price(
+                job.symbol, job.start_date, job.end_date, job.adj_type
+            )
+            if raw_data.empty:
+                return None
+            arrays = {"datetime": raw_data.index.to_numpy()}
+            arrays.update(
+                {
+                    name: raw_data[name].to_numpy(dtype=np.float64)
+                    for name in ("open", "high", "low", "close", "volume")
+                }
+            )
+
+    label = {"symbol": job.symbol, "strategy": job.strategy}
+    with phase("run"):
+        if job.engine == "bar":
+            engine = BarEngine(job.cash, AShareCostModel.from_config(job.broker))
+            engine.run(
+                strategy_class,
+                BarData(**arrays, name=job.symbol),
+                **params,
+                indicator_cache=indicator_cache,
+                adj_type=job.adj_type,
+                data_version=fingerprint,
+            )
+            record = engine.record(label)
+            final_value = engine.broker.getvalue()
+            strategy = None
+        else:
+            cerebro = bt.Cerebro()
+            cerebro.adddata(ArrayData(**arrays), name=job.symbol)
+            cerebro.addstrategy(
+                strategy_class,
+                **params,
+                indicator_cache=indicator_cache,
+                adj_type=job.adj_type,
+                data_version=fingerprint,
+            )
+            cerebro.broker.setcash(job.cash)
+            cerebro.broker.addcommissioninfo(MyStockCommissionScheme(**job.broker))
+            cerebro.addanalyzer(EquityRecorder, _name="equity", label=label)
+            strategy = cerebro.run()[0]
+            record = strategy.analyzers.equity.get_analysis()
+            final_value = cerebro.broker.getvalue()
+
+    with phase("metrics"):
+        metrics = summarize([replace(record, label={})]).iloc[0].to_dict()
+        result = BacktestResult(
+            key=key,
+            job=job.to_dict(),
+            params=params,
+            metrics={name: _to_builtin(value) for name, value in metrics.items()},
+            final_value=final_value,
+            record=record,
+            strategy=strategy,
+        )
+        if store is not None and key is not None:
+            store.put(result)
+    return result
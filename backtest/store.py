@@ -0,0 +1,105 @@
+"""按内容寻址的回测结果存储。
+
+每个结果按缓存键保存为两个文件：`<key>.npz` 保存资金曲线、成交等数组，
+`<key>.json` 保存任务、参数和绩效指标。JSON 文件最后写入，它存在即表示结果
+完整；两个文件都通过临时文件加 `os.replace` 原子写入，多个进程可以共享同一个
+目录。
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from analysis import RunRecord
+
+from .result import BacktestResult
+
+_ARRAY_FIELDS = ("dates", "equity", "exposure", "trade_pnl", "fills")
+
+
+class ResultStore:
+    """本地回测结果存储。
+
+    Args:
+        directory: 存储目录，文件按缓存键的前两位分到子目录中
+    """
+
+    def __init__(self, directory: str = "results"):
+        self.directory = directory
+
+    def path(self, key: str) -> str:
+        """结果文件的路径（不含扩展名）。"""
+        return os.path.join(self.directory, key[:2], key)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self.path(key) + ".json")
+
+    def get(self, key: str) -> BacktestResult | None:
+        """读取结果，不存在或文件损坏时返回 None。"""
+        path = self.path(key)
+        try:
+            with open(path + ".json", encoding="utf-8") as f:
+                meta = json.load(f)
+            with np.load(path + ".npz") as arrays:
+                record = RunRecord(
+                    **{name: arrays[name] for name in _ARRAY_FIELDS},
+                    traded_value=meta["traded_value"],
+                    label=meta["label"],
+                )
+        except (OSError, ValueError, KeyError):
+            return None
+        return BacktestResult(
+            key=key,
+            job=meta["job"],
+            params=meta["params"],
+            metrics=meta["metrics"],
+            final_value=meta["final_value"],
+            record=record,
+            cached=True,
+        )
+
+    def put(self, result: BacktestResult) -> None:
+        """保存结果，已存在的同键结果会被覆盖。"""
+        path = self.path(result.key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = result.record
+        self._write(
+            path + ".npz",
+            lambda f: np.savez(
+                f, **{name: getattr(record, name) for name in _ARRAY_FIELDS}
+            ),
+        )
+        meta = {
+            "job": result.job,
+            "params": result.params,
+            "metrics": result.metrics,
+            "final_value": result.final_value,
+            "traded_value": record.traded_value,
+            "label": record.label,
+        }
+        self._write(
+            path + ".json",
+            lambda f: f.write(
+                json.dumps(meta, ensure_ascii=False, indent=2, default=str).encode()
+            ),
+        )
+
+    def delete(self, key: str) -> None:
+        for ext in (".json", ".npz"):
+            try:
+                os.remove(self.path(key) + ext)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _write(path: str, write) -> None:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
@@ -0,0 +1,84 @@
+"""回测引擎基准测试。
+
+比较 backtrader 和轻量引擎 `engine.BarEngine` 运行同一个策略的耗时，
+两者使用相同的随机行情和手续费设置，并检查最终资产一致。`speedup` 为
+backtrader 耗时与轻量引擎耗时之比：
+
+    python benchmarks/engine.py --bars 1000 5000 --strategy MACD
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import backtrader as bt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.feeds import make_frames  # noqa: E402
+from commission.commission import MyStockCommissionScheme  # noqa: E402
+from commission.cost_model import AShareCostModel  # noqa: E402
+from data.array_feed import ArrayData  # noqa: E402
+from engine import BarData, BarEngine  # noqa: E402
+from strategy.config_loader import StrategyConfig  # noqa: E402
+
+BROKER = {"commission": 0.0006, "stamp_duty": 0.0005, "transfer_fee": 0.00001}
+CASH = 100000.0
+
+
+def _run_backtrader(df, strategy_class, params) -> float:
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(ArrayData.from_dataframe(df))
+    cerebro.addstrategy(strategy_class, **params)
+    cerebro.broker.setcash(CASH)
+    cerebro.broker.addcommissioninfo(MyStockCommissionScheme(**BROKER))
+    cerebro.run()
+    return cerebro.broker.getvalue()
+
+
+def _run_engine(df, strategy_class, params) -> float:
+    engine = BarEngine(CASH, AShareCostModel.from_config(BROKER))
+    engine.run(strategy_class, BarData.from_dataframe(df), **params)
+    return engine.broker.getvalue()
+
+
+ENGINES = {"backtrader": _run_backtrader, "bar": _run_engine}
+
+
+def measure(bars: int, strategy: str = "MACD", repeat: int = 3) -> dict:
+    """分别用两种引擎运行 `repeat` 次，返回最快一次的耗时和最终资产。"""
+    df = make_frames(1, bars)[0]
+    strategy_class, params = StrategyConfig().get_strategy(name=strategy)
+    result = {"strategy": strategy, "bars": bars}
+    for name, run in ENGINES.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result[f"{name}_value"] = run(df, strategy_class, params)
+            timings.append(time.perf_counter() - started)
+        result[name] = min(timings)
+    result["speedup"] = result["backtrader"] / result["bar"]
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="compare backtrader and BarEngine")
+    parser.add_argument("--bars", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--strategy", default="MACD", help="strategy name")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs")
+    parser.add_argument("--json", action="store_true", help="print result as JSON")
+    args = parser.parse_args()
+
+    results = [measure(n, args.strategy, args.repeat) for n in args.bars]
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for r in results:
+            print(
+                f"{r['strategy']} × {r['bars']} 个Bar: "
+                f"backtrader {r['backtrader']:.3f}s, 轻量引擎 {r['bar']:.3f}s, "
+                f"加速 {r['speedup']:.1f}x, "
+                f"最终资产 {r['backtrader_value']:.2f} / {r['bar_value']:.2f}"
+            )
@@ -0,0 +1,92 @@
+"""数据源基准测试。
+
+比较 `bt.feeds.PandasData` 和 `data.array_feed.ArrayData` 加载 1 到 500 只股票
+并运行一个空策略的耗时。两种数据源使用相同的随机行情，结果中的 `speedup`
+为 PandasData 耗时与 ArrayData 耗时之比：
+
+    python benchmarks/feeds.py --symbols 1 10 100 500 --bars 1000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.array_feed import ArrayData  # noqa: E402
+
+
+def make_frames(symbols: int, bars: int, seed: int = 0) -> list[pd.DataFrame]:
+    """生成 `symbols` 只股票、每只 `bars` 个交易日的随机行情。"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2015-01-05", periods=bars, name="date")
+    frames = []
+    for _ in range(symbols):
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+        frames.append(
+            pd.DataFrame(
+                {
+                    "open": close,
+                    "high": close * 1.01,
+                    "low": close * 0.99,
+                    "close": close,
+                    "volume": rng.integers(1000, 9000, bars).astype(float),
+                },
+                index=index,
+            )
+        )
+    return frames
+
+
+def _run(frames: list[pd.DataFrame], make_feed) -> float:
+    started = time.perf_counter()
+    cerebro = bt.Cerebro(stdstats=False)
+    for i, df in enumerate(frames):
+        cerebro.adddata(make_feed(df), name=str(i))
+    cerebro.addstrategy(bt.Strategy)
+    cerebro.run()
+    return time.perf_counter() - started
+
+
+FEEDS = {
+    "PandasData": lambda df: bt.feeds.PandasData(dataname=df),
+    "ArrayData": ArrayData.from_dataframe,
+}
+
+
+def measure(symbols: int, bars: int = 1000, repeat: int = 3) -> dict:
+    """分别用两种数据源运行 `repeat` 次，返回最快一次的耗时。"""
+    frames = make_frames(symbols, bars)
+    result = {"symbols": symbols, "bars": bars}
+    for name, make_feed in FEEDS.items():
+        result[name] = min(_run(frames, make_feed) for _ in range(repeat))
+    result["speedup"] = result["PandasData"] / result["ArrayData"]
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="compare PandasData and ArrayData")
+    parser.add_argument(
+        "--symbols", type=int, nargs="+", default=[1, 10, 100, 500], help="symbols"
+    )
+    parser.add_argument("--bars", type=int, default=1000, help="bars per symbol")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs")
+    parser.add_argument("--json", action="store_true", help="print result as JSON")
+    args = parser.parse_args()
+
+    results = [measure(n, args.bars, args.repeat) for n in args.symbols]
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for r in results:
+            print(
+                f"{r['symbols']:>4} 只股票 × {r['bars']} 个Bar: "
+                f"PandasData {r['PandasData']:.3f}s, ArrayData {r['ArrayData']:.3f}s, "
+                f"加速 {r['speedup']:.1f}x"
+            )
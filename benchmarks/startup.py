@@ -0,0 +1,68 @@
+"""启动耗时基准测试。
+
+在全新的解释器中反复导入 `main`（即 `python main.py run` 在开始回测前的
+准备工作），统计导入耗时，并列出被导入的重量级依赖。切换到不同的提交后
+分别运行，即可比较优化前后的启动时间：
+
+    python benchmarks/startup.py --repeat 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["matplotlib", "scipy", "tushare", "akshare", "sqlmodel", "tqdm"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(module: str = "main", repeat: int = 5) -> dict:
+    """在子进程中导入模块 `repeat` 次，返回耗时统计。"""
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    seconds = [run["seconds"] for run in runs]
+    return {
+        "module": module,
+        "repeat": repeat,
+        "median_seconds": statistics.median(seconds),
+        "min_seconds": min(seconds),
+        "heavy_modules": runs[-1]["heavy"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="measure import time of main.py")
+    parser.add_argument("--module", default="main", help="module to import")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs")
+    parser.add_argument("--json", action="store_true", help="print result as JSON")
+    args = parser.parse_args()
+
+    result = measure(args.module, args.repeat)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(
+            f"导入 {result['module']}: 中位数 {result['median_seconds']:.3f}s, "
+            f"最快 {result['min_seconds']:.3f}s ({result['repeat']} 次)"
+        )
+        print(f"已导入的重量级依赖: {', '.join(result['heavy_modules']) or '无'}")
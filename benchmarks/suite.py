@@ -0,0 +1,244 @@
+"""性能基准测试套件。
+
+在临时目录中用 `benchmarks.synthetic` 生成不同规模的模拟行情数据库，测量：
+
+* reader_qfq / reader_hfq: `StockDBReader.get_daily_price` 读取单只股票的复权行情；
+* reader_panel: 一次读取全部股票的前复权行情；
+* upsert: `TushareDownloader._upsert_data` 写入所有股票一个交易日的增量数据；
+* commission: `MyStockCommissionScheme` 计算 10 万次手续费；
+* macd_backtrader / macd_bar: `run_backtest` 完整运行一次 `MACDStrategy`
+  （含读取数据库），分别使用 backtrader 和轻量引擎。
+
+每项取多次运行中最快的一次。结果写入 JSON，切换提交后再运行一次并用
+`--compare` 对比，可以发现性能退化：
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_market, next_day, write_db  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCALES = [(10, 1000), (100, 1000)]
+BROKER = {"commission": 0.0006, "stamp_duty": 0.0005, "transfer_fee": 0.00001}
+
+
+def best_of(fn, repeat: int, setup=None) -> float:
+    """运行 `repeat` 次，返回最快一次的秒数。
+
+    `setup` 在每次运行前调用，不计时。正式计时前先运行一次预热，排除首次导入
+    scipy 等一次性开销（启动耗时见 `benchmarks/startup.py`）。
+    """
+    timings = []
+    for i in range(repeat + 1):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        if i > 0:
+            timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _bench_reader(db: str, codes: list[str], start: str, end: str, repeat: int):
+    from data.db_reader import StockDBReader
+
+    reader = StockDBReader(db)
+    return {
+        "reader_qfq": best_of(
+            lambda: reader.get_daily_price(codes[0], start, end, "qfq"), repeat
+        ),
+        "reader_hfq": best_of(
+            lambda: reader.get_daily_price(codes[0], start, end, "hfq"), repeat
+        ),
+        "reader_panel": best_of(
+            lambda: reader.get_daily_price(codes, start, end, "qfq"), repeat
+        ),
+    }
+
+
+def _bench_upsert(db: str, market: dict, repeat: int, workdir: str) -> float:
+    from sqlalchemy import create_engine
+
+    from data.db_based_tushare import TushareDownloader
+
+    rows = next_day(market)
+    target = os.path.join(workdir, "upsert.db")
+    # 不经过 __init__，避免连接 Tushare
+    downloader = object.__new__(TushareDownloader)
+
+    def setup():
+        shutil.copyfile(db, target)
+        downloader.engine = create_engine(f"sqlite:///{target}")
+
+    def run():
+        downloader._upsert_data(rows, "daily_price", ["ts_code", "trade_date"])
+        downloader.engine.dispose()
+
+    return best_of(run, repeat, setup)
+
+
+def _bench_commission(repeat: int, calls: int = 100_000) -> float:
+    from commission.commission import MyStockCommissionScheme
+
+    comm = MyStockCommissionScheme(**BROKER)
+    rng = np.random.default_rng(0)
+    sizes = (rng.integers(1, 100, calls) * 100 * rng.choice([1, -1], calls)).tolist()
+    prices = rng.uniform(2, 200, calls).round(2).tolist()
+
+    def run():
+        for size, price in zip(sizes, prices):
+            comm.getcommission(size, price)
+
+    return best_of(run, repeat)
+
+
+def _bench_backtest(db: str, code: str, start: str, end: str, repeat: int):
+    from backtest import BacktestJob, run_backtest
+    from data.db_reader import StockDBReader
+
+    reader = StockDBReader(db)
+    results = {}
+    for engine in ("backtrader", "bar"):
+        job = BacktestJob(
+            strategy="MACD",
+            symbol=code,
+            start_date=start,
+            end_date=end,
+            broker=BROKER,
+            engine=engine,
+        )
+        results[f"macd_{engine}"] = best_of(lambda: run_backtest(job, reader), repeat)
+    return results
+
+
+def run_suite(scales=SCALES, repeat: int = 3, seed: int = 0) -> dict:
+    """在每个规模上运行全部基准测试。
+
+    Args:
+        scales: (股票数, 交易日数) 的列表
+        repeat: 每项的运行次数
+        seed: 模拟行情的随机数种子
+
+    Returns:
+        包含运行环境（meta）和各项耗时（results）的字典
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for symbols, bars in scales:
+            market = make_market(symbols, bars, seed=seed)
+            db = os.path.join(workdir, f"market_{symbols}_{bars}.db")
+            write_db(db, market)
+            codes = market["stock_basic"]["ts_code"].tolist()
+            dates = market["trade_calendar"]["cal_date"]
+            start, end = dates.iloc[0], dates.iloc[-1]
+
+            timings = _bench_reader(db, codes, start, end, repeat)
+            timings["upsert"] = _bench_upsert(db, market, repeat, workdir)
+            timings["commission"] = _bench_commission(repeat)
+            timings.update(_bench_backtest(db, codes[0], start, end, repeat))
+            for case, seconds in timings.items():
+                results.append(
+                    {"case": case, "symbols": symbols, "bars": bars, "seconds": seconds}
+                )
+    return {"meta": _meta(repeat, seed), "results": results}
+
+
+def _meta(repeat: int, seed: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+    return {
+        "commit": commit,
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "backtrader": bt.__version__,
+        "repeat": repeat,
+        "seed": seed,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 1.2) -> list[dict]:
+    """对比两次运行的结果，`ratio` 为当前耗时与基准耗时之比，超过阈值视为退化。"""
+    previous = {
+        (r["case"], r["symbols"], r["bars"]): r["seconds"] for r in baseline["results"]
+    }
+    rows = []
+    for r in current["results"]:
+        before = previous.get((r["case"], r["symbols"], r["bars"]))
+        if before is None:
+            continue
+        ratio = r["seconds"] / before if before > 0 else float("nan")
+        rows.append(
+            {**r, "baseline": before, "ratio": ratio, "slower": ratio > threshold}
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="run the benchmark suite")
+    parser.add_argument(
+        "--scales",
+        nargs="+",
+        default=[f"{s}x{b}" for s, b in SCALES],
+        help="symbols x bars, e.g. 10x1000 100x2000",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--output", default="", help="write results to a JSON file")
+    parser.add_argument("--compare", default="", help="baseline JSON file")
+    parser.add_argument(
+        "--threshold", type=float, default=1.2, help="slowdown ratio to flag"
+    )
+    args = parser.parse_args()
+
+    scales = [tuple(int(x) for x in scale.split("x")) for scale in args.scales]
+    report = run_suite(scales, args.repeat, args.seed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"结果已保存至 {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            rows = compare(report, json.load(f), args.threshold)
+        for r in rows:
+            flag = "  <-- 变慢" if r["slower"] else ""
+            print(
+                f"{r['case']:<16}{r['symbols']:>5} × {r['bars']:<6}"
+                f"{r['baseline']:.4f}s -> {r['seconds']:.4f}s ({r['ratio']:.2f}x){flag}"
+            )
+        if any(r["slower"] for r in rows):
+            sys.exit(1)
+    else:
+        for r in report["results"]:
+            print(
+                f"{r['case']:<16}{r['symbols']:>5} × {r['bars']:<6}{r['seconds']:.4f}s"
+            )
@@ -0,0 +1,243 @@
+"""确定性的模拟 A 股行情。
+
+基准测试需要规模可控、每次完全相同的数据，而不是依赖 Tushare 和本地数据库。
+`make_market` 按随机种子生成与 Tushare 表结构相同的数据：
+
+* daily_price: 不复权日线，后复权价格为带涨跌停限制的随机游走；
+* adj_factor: 复权因子，在分红送转日跳升，不复权价格同时下跳；
+* 停牌: 随机的连续交易日没有日线，但复权因子照常存在；
+* trade_calendar、stock_basic: 交易日历和股票列表。
+
+`make_fundamentals` 生成对应的 daily_basic（每日指标）和 fina_indicator（财务指标，
+公告日期晚于报告期，部分报告期有更正公告）。
+
+    market = make_market(symbols=100, bars=1000, seed=0)
+    write_db("bench.db", market)
+    reader = StockDBReader("bench.db")
+"""
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+PRICE_LIMIT = 0.1  # 主板涨跌停幅度
+
+
+def _codes(symbols: int) -> list[str]:
+    return [
+        f"{600000 + i:06d}.SH" if i % 2 == 0 else f"{i:06d}.SZ" for i in range(symbols)
+    ]
+
+
+def make_market(
+    symbols: int = 10,
+    bars: int = 1000,
+    start: str = "20150105",
+    seed: int = 0,
+    suspend_rate: float = 0.002,
+    event_rate: float = 0.004,
+) -> dict[str, pd.DataFrame]:
+    """生成模拟行情。
+
+    Args:
+        symbols: 股票数量
+        bars: 交易日数量
+        start: 第一个交易日，格式为 'YYYYMMDD'
+        seed: 随机数种子，相同的参数得到完全相同的数据
+        suspend_rate: 每个交易日开始停牌的概率，停牌持续 1 到 20 个交易日
+        event_rate: 每个交易日发生分红送转（复权因子跳升）的概率
+
+    Returns:
+        表名到 DataFrame 的映射，表结构与 Tushare 相同
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=bars)
+    trade_dates = dates.strftime("%Y%m%d").to_numpy()
+    codes = _codes(symbols)
+    shape = (symbols, bars)
+
+    # 后复权价格：带涨跌停限制的随机游走
+    returns = np.clip(rng.normal(0.0003, 0.022, shape), -PRICE_LIMIT, PRICE_LIMIT)
+    hfq_close = rng.uniform(5, 50, (symbols, 1)) * np.cumprod(1 + returns, axis=1)
+
+    # 复权因子：分红为小幅跳升，送转为 1.2 到 2 倍
+    jumps = np.where(
+        rng.random(shape) < event_rate,
+        np.where(
+            rng.random(shape) < 0.7,
+            1 + rng.uniform(0.005, 0.04, shape),
+            rng.choice([1.2, 1.3, 1.5, 2.0], shape),
+        ),
+        1.0,
+    )
+    jumps[:, 0] = 1.0
+    adj = np.round(rng.uniform(1, 3, (symbols, 1)) * np.cumprod(jumps, axis=1), 4)
+
+    close = np.round(hfq_close / adj, 2)
+    pre_close = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    # 除权日的昨收按复权因子调整，涨跌幅与后复权价格一致
+    pre_close[:, 1:] = np.round(pre_close[:, 1:] * adj[:, :-1] / adj[:, 1:], 2)
+    open_ = np.round(pre_close * (1 + rng.normal(0, 0.008, shape)), 2)
+    spread = np.abs(rng.normal(0, 0.01, shape))
+    high = np.round(np.maximum(open_, close) * (1 + spread), 2)
+    low = np.round(np.minimum(open_, close) * (1 - spread), 2)
+    vol = np.round(rng.lognormal(11, 0.6, shape), 2)
+
+    # 停牌：从随机日期开始的连续交易日没有日线
+    suspended = np.zeros(shape, dtype=bool)
+    for row, col in zip(*np.nonzero(rng.random(shape) < suspend_rate)):
+        suspended[row, col : col + rng.integers(1, 21)] = True
+    suspended[:, 0] = False
+
+    rows, cols = np.nonzero(~suspended)
+    daily = pd.DataFrame(
+        {
+            "ts_code": np.asarray(codes)[rows],
+            "trade_date": trade_dates[cols],
+            "open": open_[rows, cols],
+            "high": high[rows, cols],
+            "low": low[rows, cols],
+            "close": close[rows, cols],
+            "pre_close": pre_close[rows, cols],
+            "change": np.round(close - pre_close, 2)[rows, cols],
+            "pct_chg": np.round((close / pre_close - 1) * 100, 4)[rows, cols],
+            "vol": vol[rows, cols],
+            "amount": np.round(vol * close / 10, 3)[rows, cols],
+        }
+    )
+    adj_factor = pd.DataFrame(
+        {
+            "ts_code": np.repeat(codes, bars),
+            "trade_date": np.tile(trade_dates, symbols),
+            "adj_factor": adj.ravel(),
+        }
+    )
+    calendar = pd.DataFrame(
+        {
+            "exchange": "SSE",
+            "cal_date": trade_dates,
+            "is_open": 1,
+            "pretrade_date": np.concatenate([[""], trade_dates[:-1]]),
+        }
+    )
+    basic = pd.DataFrame(
+        {
+            "ts_code": codes,
+            "symbol": [code[:6] for code in codes],
+            "name": [f"模拟{i:04d}" for i in range(symbols)],
+            "area": "上海",
+            "industry": rng.choice(["银行", "医药", "电子", "汽车"], symbols),
+            "list_date": "20100104",
+            "list_status": "L",
+        }
+    )
+    return {
+        "daily_price": daily,
+        "adj_factor": adj_factor,
+        "trade_calendar": calendar,
+        "stock_basic": basic,
+    }
+
+
+def make_fundamentals(
+    market: dict[str, pd.DataFrame], seed: int = 0, revision_rate: float = 0.1
+) -> dict[str, pd.DataFrame]:
+    """生成与模拟行情对应的每日指标和财务指标。
+
+    Args:
+        market: `make_market` 的结果
+        seed: 随机数种子
+        revision_rate: 每个报告期另有一条更正公告的概率
+
+    Returns:
+        表名到 DataFrame 的映射，表结构与 Tushare 的 daily_basic、fina_indicator 相同
+    """
+    rng = np.random.default_rng(seed)
+    daily = market["daily_price"]
+    codes = market["stock_basic"]["ts_code"].to_numpy()
+    # 总股本（万股）、流通比例和每股收益决定市值和估值
+    total_share = dict(zip(codes, rng.uniform(1e4, 1e6, len(codes))))
+    float_ratio = dict(zip(codes, rng.uniform(0.3, 1.0, len(codes))))
+    eps = dict(zip(codes, rng.uniform(-0.2, 2.0, len(codes))))
+    bps = dict(zip(codes, rng.uniform(2, 15, len(codes))))
+    share = daily["ts_code"].map(total_share)
+    float_share = share * daily["ts_code"].map(float_ratio)
+    close = daily["close"]
+    daily_basic = pd.DataFrame(
+        {
+            "ts_code": daily["ts_code"],
+            "trade_date": daily["trade_date"],
+            "close": close,
+            "turnover_rate": np.round(daily["vol"] / float_share, 4),
+            "pe_ttm": np.round(close / daily["ts_code"].map(eps), 4),
+            "pb": np.round(close / daily["ts_code"].map(bps), 4),
+            "total_share": share,
+            "float_share": float_share,
+            "total_mv": np.round(close * share, 4),
+            "circ_mv": np.round(close * float_share, 4),
+        }
+    )
+
+    first = pd.Timestamp(market["trade_calendar"]["cal_date"].iloc[0])
+    last = pd.Timestamp(market["trade_calendar"]["cal_date"].iloc[-1])
+    periods = pd.date_range(first - pd.DateOffset(years=1), last, freq="QE")
+    rows = []
+    for code in codes:
+        for period in periods:
+            ann = period + pd.Timedelta(days=int(rng.integers(15, 100)))
+            value = {
+                "eps": np.round(eps[code] * rng.uniform(0.8, 1.2), 4),
+                "roe": np.round(rng.normal(8, 5), 4),
+                "debt_to_assets": np.round(rng.uniform(20, 80), 4),
+            }
+            rows.append((code, ann, period, value))
+            if rng.random() < revision_rate:
+                later = ann + pd.Timedelta(days=int(rng.integers(10, 200)))
+                revised = {
+                    k: np.round(v * rng.uniform(0.9, 1.1), 4) for k, v in value.items()
+                }
+                rows.append((code, later, period, revised))
+    fina = pd.DataFrame(
+        [
+            {
+                "ts_code": code,
+                "ann_date": ann.strftime("%Y%m%d"),
+                "end_date": period.strftime("%Y%m%d"),
+                **value,
+            }
+            for code, ann, period, value in rows
+        ]
+    )
+    return {"daily_basic": daily_basic, "fina_indicator": fina}
+
+
+def write_db(path: str, market: dict[str, pd.DataFrame]) -> None:
+    """把模拟行情写入 SQLite 数据库，已存在的表被替换。"""
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        for name, df in market.items():
+            df.to_sql(name, engine, if_exists="replace", index=False, chunksize=20000)
+    finally:
+        engine.dispose()
+
+
+def next_day(market: dict[str, pd.DataFrame], seed: int = 0) -> pd.DataFrame:
+    """所有股票下一个交易日的日线，模拟每日增量更新写入的数据。"""
+    rng = np.random.default_rng(seed)
+    daily = market["daily_price"]
+    last = daily.groupby("ts_code").tail(1).reset_index(drop=True)
+    date = (
+        pd.Timestamp(market["trade_calendar"]["cal_date"].iloc[-1]) + pd.offsets.BDay()
+    ).strftime("%Y%m%d")
+    returns = np.clip(rng.normal(0, 0.02, len(last)), -PRICE_LIMIT, PRICE_LIMIT)
+    close = np.round(last["close"].to_numpy() * (1 + returns), 2)
+    return last.assign(
+        trade_date=date,
+        open=last["close"],
+        high=np.maximum(last["close"], close),
+        low=np.minimum(last["close"], close),
+        close=close,
+        pre_close=last["close"],
+        change=np.round(close - last["close"], 2),
+        pct_chg=np.round(returns * 100, 4),
+    )
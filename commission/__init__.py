@@ -1,3 +1,4 @@
 from .commission import MyStockCommissionScheme
+from .cost_model import AShareCostModel
 
-__all__ = ["MyStockCommissionScheme"]
+__all__ = ["MyStockCommissionScheme", "AShareCostModel"]
@@ -1,14 +1,18 @@
 from backtrader import CommInfoBase
 
+from .cost_model import AShareCostModel
+
 
 class MyStockCommissionScheme(CommInfoBase):
     """
     A股交易手续费计算类
     包含佣金(双向,最低5元)+印花税(卖出0.05%)+过户费(双向0.001%)
+    费用规则由 `AShareCostModel` 实现，与向量化引擎共用。
     """
 
     params = (
         ("commission", 0.0006),  # 佣金费率（双向）
+        ("min_commission", 5.0),  # 单笔最低佣金
         ("stamp_duty", 0.0005),  # 印花税率（卖出）
         ("transfer_fee", 0.00001),  # 过户费（双向）
         ("percabs", False),  # 是否按绝对值固定收费
@@ -18,6 +22,12 @@ class MyStockCommissionScheme(CommInfoBase):
         super().__init__()
         for k, v in params.items():
             setattr(self.p, k, v)
+        self.cost_model = AShareCostModel(
+            commission=self.p.commission,
+            min_commission=self.p.min_commission,
+            stamp_duty=self.p.stamp_duty,
+            transfer_fee=self.p.transfer_fee,
+        )
 
     def _getcommission(self, size, price, pseudoexec):
         """
@@ -29,34 +39,11 @@ class MyStockCommissionScheme(CommInfoBase):
         Returns:
             float: 手续费总额(保留两位小数)
         """
-        if size == 0:  # 零股交易不收费
-            return 0.0
-
-        # 佣金类型根据percabs参数自动处理
-
-        # 计算成交金额绝对值
-        trade_amount = abs(size) * price
-
-        # 1. 计算佣金(双向)
-        commission_fee = max(trade_amount * self.p.commission, 5.0)
-
-        # 2. 计算过户费(双向)
-        transfer_fee = trade_amount * self.p.transfer_fee
-
-        # 3. 计算印花税(仅卖出)
-        stamp_duty = 0.0
-        if size < 0:  # 卖出操作
-            stamp_duty = trade_amount * self.p.stamp_duty
-
-        # 总手续费 = 佣金 + 过户费 + 印花税
-        total_fee = commission_fee + transfer_fee + stamp_duty
-
-        # 保留两位小数(四舍五入)
-        return round(total_fee, 2)
+        return self.cost_model.fee(size, price)
 
     def getcommission(self, size, price):
         """Backtrader标准接口"""
-        return self._getcommission(size, price, False)
+        return self.cost_model.fee(size, price)
 
     def getvaluesize(self, size, price):
         """返回交易金额(用于保证金计算)"""
@@ -0,0 +1,111 @@
+"""A股交易成本模型。
+
+佣金(双向,最低5元) + 印花税(仅卖出) + 过户费(双向)，以及整手取整和滑点。
+`fee` 用于逐笔撮合（backtrader），`fees` 对 NumPy 数组批量计算；两者的浮点运算
+顺序完全相同，保证回测、向量化引擎和报表算出的手续费逐分一致。
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class AShareCostModel:
+    """A股交易成本模型。
+
+    直接构造时各费率都是实际比例。`config.toml` 的 [broker] 与 backtrader 的
+    约定相同，按配置创建时使用 `from_config`，不带参数的默认费率为
+    `from_config({})`。
+
+    Attributes:
+        commission: 佣金费率（双向）
+        min_commission: 单笔最低佣金（元）
+        stamp_duty: 印花税率（仅卖出）
+        transfer_fee: 过户费率（双向）
+        lot_size: 每手股数
+        slippage: 滑点比例，买入价上浮、卖出价下浮
+    """
+
+    commission: float = 0.0006
+    min_commission: float = 5.0
+    stamp_duty: float = 0.0005
+    transfer_fee: float = 0.00001
+    lot_size: int = 100
+    slippage: float = 0.0
+
+    @classmethod
+    def from_config(cls, broker: dict) -> "AShareCostModel":
+        """由 `config.toml` 的 [broker] 部分创建，忽略不属于成本模型的配置项。
+
+        与 backtrader 的 `CommInfoBase` 一致：`percabs` 为 False（默认）时
+        佣金费率按百分数解释。
+        """
+        fields = cls.__dataclass_fields__
+        params = {k: v for k, v in broker.items() if k in fields}
+        if not broker.get("percabs", False):
+            params["commission"] = params.get("commission", cls.commission) / 100.0
+        return cls(**params)
+
+    def fee(self, size: float, price: float) -> float:
+        """计算单笔交易的手续费。
+
+        Args:
+            size: 成交数量，正数为买入，负数为卖出
+            price: 成交价格
+
+        Returns:
+            手续费总额，四舍五入到分
+        """
+        if size == 0:  # 零股交易不收费
+            return 0.0
+        amount = abs(size) * price
+        total = max(amount * self.commission, self.min_commission)
+        total += amount * self.transfer_fee
+        if size < 0:
+            total += amount * self.stamp_duty
+        return round(total * 100) / 100
+
+    def fees(self, size, price) -> np.ndarray:
+        """批量计算手续费，结果与逐笔调用 `fee` 完全相同。
+
+        Args:
+            size: 成交数量数组，正数为买入，负数为卖出
+            price: 成交价格数组，可与 size 广播
+
+        Returns:
+            手续费数组，四舍五入到分
+        """
+        size = np.asarray(size, dtype=np.float64)
+        amount = np.abs(size) * price
+        total = np.maximum(amount * self.commission, self.min_commission)
+        total += amount * self.transfer_fee
+        total += np.where(size < 0, amount * self.stamp_duty, 0.0)
+        return np.where(size == 0, 0.0, np.rint(total * 100) / 100)
+
+    def breakdown(self, size, price) -> dict[str, np.ndarray]:
+        """按费用类型拆分手续费（未取整），用于报表展示。
+
+        Returns:
+            包含 commission, transfer_fee, stamp_duty, slippage 的字典
+        """
+        size = np.asarray(size, dtype=np.float64)
+        amount = np.abs(size) * price
+        traded = size != 0
+        return {
+            "commission": np.where(
+                traded, np.maximum(amount * self.commission, self.min_commission), 0.0
+            ),
+            "transfer_fee": amount * self.transfer_fee,
+            "stamp_duty": np.where(size < 0, amount * self.stamp_duty, 0.0),
+            "slippage": amount * self.slippage,
+        }
+
+    def round_lot(self, size) -> np.ndarray:
+        """把委托数量向零取整到整手。"""
+        size = np.asarray(size, dtype=np.float64)
+        return np.trunc(size / self.lot_size) * self.lot_size
+
+    def execution_price(self, size, price) -> np.ndarray:
+        """计入滑点后的成交价格：买入上浮，卖出下浮。"""
+        return price * (1 + np.sign(size) * self.slippage)
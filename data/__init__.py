@@ -1,5 +1,34 @@
-from .akshare_data import get_stock_data
-from .db_based_tushare import TushareDownloader
+from .archive import ArchiveStore, archive_database
 from .db_reader import StockDBReader
+from .minute import MinuteStore
+from .source import DataSource, fetch_many, get_source
 
-__all__ = ["get_stock_data", "TushareDownloader", "StockDBReader"]
+__all__ = [
+    "get_stock_data",
+    "AKShareSource",
+    "TushareDownloader",
+    "StockDBReader",
+    "ArchiveStore",
+    "archive_database",
+    "MinuteStore",
+    "DataSource",
+    "fetch_many",
+    "get_source",
+]
+
+
+def __getattr__(name: str):
+    # 数据源SDK（akshare、tushare）导入很慢，只在第一次使用时导入
+    if name == "get_stock_data":
+        from .akshare_data import get_stock_data
+
+        return get_stock_data
+    if name == "AKShareSource":
+        from .akshare_data import AKShareSource
+
+        return AKShareSource
+    if name == "TushareDownloader":
+        from .db_based_tushare import TushareDownloader
+
+        return TushareDownloader
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,26 +1,242 @@
-import akshare as ak
+"""带本地缓存的 AKShare 日线数据源。
+
+`ak.stock_zh_a_hist` 每次都返回一只股票的全部历史。`AKShareSource` 把每只股票的
+不复权和后复权日线缓存在 `<cache_dir>/<代码>.npz`，之后只请求最后一个缓存日期以后
+的数据并追加；后复权的历史价格不随新的除权除息变化，前复权价格由后复权价格
+按区间最后一天换算，与 `StockDBReader` 的计算方法相同。
+
+缓存的倒数第二天与新数据不一致时（数据源修正了历史数据），重新下载全部历史。
+最后一天可能是盘中下载的不完整数据，下次更新时被覆盖。
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from datetime import datetime
+
+import numpy as np
 import pandas as pd
 
+from monitor import counter
+
+from .source import PRICE_COLUMNS
+
+API_REQUESTS = counter(
+    "akshare_api_requests_total",
+    "AKShare 接口调用次数，status 为 ok 或 error",
+    ["status"],
+)
+# AKShare 的中文列名到日线列名的映射
+AK_COLUMNS = {
+    "日期": "date",
+    "开盘": "open",
+    "收盘": "close",
+    "最高": "high",
+    "最低": "low",
+    "成交量": "volume",
+}
+HFQ_COLUMNS = ["hfq_open", "hfq_close", "hfq_high", "hfq_low"]
+FIRST_DATE = "19700101"
+
+
+class AKShareSource:
+    """AKShare 日线数据源，实现 `data.source.DataSource`。
+
+    Args:
+        cache_dir: 缓存目录，每只股票一个文件
+        client: 提供 `stock_zh_a_hist` 的对象，默认为 akshare 模块
+    """
+
+    def __init__(self, cache_dir: str = "results/akshare", client=None):
+        self.cache_dir = cache_dir
+        self._client = client
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            import akshare as ak  # akshare导入很慢，只在实际下载时导入
+
+            self._client = ak
+        return self._client
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.cache_dir, f"{symbol}.npz")
+
+    def _request(self, symbol: str, start_date: str, end_date: str, adjust: str):
+        """请求一段日线，返回以 'YYYYMMDD' 为索引的 DataFrame。"""
+        try:
+            df = self.client.stock_zh_a_hist(
+                symbol=symbol,
+                period="daily",
+                start_date=start_date,
+                end_date=end_date,
+                adjust=adjust,
+            )
+        except Exception:
+            API_REQUESTS.labels(status="error").inc()
+            raise
+        API_REQUESTS.labels(status="ok").inc()
+        if df is None or df.empty:
+            return pd.DataFrame(columns=PRICE_COLUMNS, dtype=np.float64)
+        df = df[list(AK_COLUMNS)].rename(columns=AK_COLUMNS)
+        df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y%m%d")
+        return df.set_index("date")[PRICE_COLUMNS].astype(np.float64)
+
+    def _download(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """不复权和后复权日线，后复权价格的列名加 hfq_ 前缀。"""
+        bfq = self._request(symbol, start_date, end_date, "")
+        hfq = self._request(symbol, start_date, end_date, "hfq")
+        hfq = hfq[PRICE_COLUMNS[:4]].add_prefix("hfq_")
+        return bfq.join(hfq, how="inner")
+
+    def _load(self, symbol: str) -> tuple[pd.DataFrame | None, str]:
+        try:
+            with np.load(self._path(symbol)) as f:
+                columns = PRICE_COLUMNS + HFQ_COLUMNS
+                df = pd.DataFrame(
+                    {name: f[name] for name in columns},
+                    index=pd.Index(f["dates"], name="date"),
+                )
+                return df, str(f["fetched"])
+        except (FileNotFoundError, ValueError, KeyError):
+            return None, ""
+
+    def _save(self, symbol: str, df: pd.DataFrame, fetched: str) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    dates=df.index.to_numpy(dtype=str),
+                    fetched=np.array(fetched),
+                    **{name: df[name].to_numpy() for name in PRICE_COLUMNS},
+                    **{name: df[name].to_numpy() for name in HFQ_COLUMNS},
+                )
+            os.replace(tmp_path, self._path(symbol))
+        except OSError as e:
+            print(f"写入AKShare缓存失败: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def history(self, ts_code: str, end_date: str) -> pd.DataFrame:
+        """一只股票截至 `end_date` 的全部缓存日线，必要时先更新缓存的尾部。
+
+        Args:
+            ts_code: 股票代码，如 '000001.SZ' 或 '000001'
+            end_date: 需要的最后日期，格式为 'YYYYMMDD'
+
+        Returns:
+            以 'YYYYMMDD' 为索引，包含不复权价格、成交量和后复权价格的 DataFrame
+        """
+        symbol = ts_code.split(".")[0]
+        today = datetime.now().strftime("%Y%m%d")
+        with self._lock(symbol):
+            cached, fetched = self._load(symbol)
+            need = min(end_date.replace("-", ""), today)
+            if cached is not None and (
+                fetched >= need or (len(cached) and cached.index[-1] >= need)
+            ):
+                return cached
+
+            if cached is None or len(cached) < 2:
+                df = self._download(symbol, FIRST_DATE, today)
+            else:
+                # 从倒数第二天开始请求，用这一天检查历史数据是否被修正
+                check = cached.index[-2]
+                tail = self._download(symbol, check, today)
+                same = check in tail.index and np.allclose(
+                    tail.loc[check, PRICE_COLUMNS + HFQ_COLUMNS].to_numpy(np.float64),
+                    cached.loc[check, PRICE_COLUMNS + HFQ_COLUMNS].to_numpy(np.float64),
+                    rtol=1e-6,
+                )
+                if same:
+                    df = pd.concat([cached[cached.index < check], tail])
+                else:
+                    print(f"{symbol} 的历史数据已变化，重新下载全部历史。")
+                    df = self._download(symbol, FIRST_DATE, today)
+            self._save(symbol, df, today)
+            return df
+
+    def get_daily_price(
+        self,
+        ts_code: str,
+        start_date: str,
+        end_date: str,
+        adj_type: str = "qfq",
+    ) -> pd.DataFrame:
+        """
+        获取指定股票在指定时间段内的日线数据，格式与 `StockDBReader.get_daily_price` 相同。
+
+        :param ts_code: 股票代码，如 '000001.SZ'，也可以不带交易所后缀。
+        :param start_date: 开始日期，格式为 'YYYYMMDD'。
+        :param end_date: 结束日期，格式为 'YYYYMMDD'。
+        :param adj_type: 复权类型，可选 'bfq'（不复权）、'qfq'（前复权）、'hfq'（后复权）。
+        :return: 以日期为索引的 DataFrame，前复权价格以区间最后一天为基准。
+        """
+        df = self.history(ts_code, end_date)
+        start, end = start_date.replace("-", ""), end_date.replace("-", "")
+        df = df[(df.index >= start) & (df.index <= end)]
+        if df.empty:
+            print("未查询到数据。")
+            return pd.DataFrame(
+                columns=PRICE_COLUMNS,
+                index=pd.DatetimeIndex([], name="date"),
+                dtype=np.float64,
+            )
+
+        out = df[PRICE_COLUMNS].copy()
+        if adj_type in ["qfq", "hfq"]:
+            factor = df["hfq_close"] / df["close"]
+            hfq = df[HFQ_COLUMNS].to_numpy()
+            if adj_type == "hfq":
+                out[PRICE_COLUMNS[:4]] = hfq
+                out["volume"] = df["volume"] / factor
+            else:
+                last = factor.iloc[-1]
+                out[PRICE_COLUMNS[:4]] = hfq / last
+                out["volume"] = df["volume"] / (factor / last)
+        out.index = pd.DatetimeIndex(
+            pd.to_datetime(df.index, format="%Y%m%d"), name="date"
+        )
+        return out
+
+    def get_data_fingerprint(
+        self, ts_code: str, start_date: str, end_date: str
+    ) -> str | None:
+        """
+        计算区间内缓存数据的指纹，数据的任何变化都会改变指纹。
+
+        :param ts_code: 股票代码。
+        :param start_date: 开始日期，格式为 'YYYYMMDD'。
+        :param end_date: 结束日期，格式为 'YYYYMMDD'。
+        :return: 指纹字符串；区间内没有数据时返回空字符串，下载失败时返回 None。
+        """
+        try:
+            df = self.history(ts_code, end_date)
+        except Exception as e:
+            print(f"计算数据指纹时发生错误: {e}")
+            return None
+        start, end = start_date.replace("-", ""), end_date.replace("-", "")
+        df = df[(df.index >= start) & (df.index <= end)]
+        if df.empty:
+            return ""
+        digest = hashlib.sha1(df.index.to_numpy(dtype=str).tobytes())
+        digest.update(np.ascontiguousarray(df.to_numpy(np.float64)).tobytes())
+        return digest.hexdigest()
+
 
 def get_stock_data(symbol: str, adjust: str) -> pd.DataFrame:
-    # 利用 AKShare 获取股票的后复权数据，这里只获取前 7 列
-    stock_hfq_df = ak.stock_zh_a_hist(symbol=symbol, adjust=adjust).iloc[:, :7]
-    # 删除 `股票代码` 列
-    if "股票代码" in stock_hfq_df.columns:
-        stock_hfq_df = stock_hfq_df.drop(columns=["股票代码"])
-    # 处理字段命名，以符合 Backtrader 的要求
-    stock_hfq_df.columns = [
-        "date",
-        "open",
-        "close",
-        "high",
-        "low",
-        "volume",
-    ]
-    # 把 date 作为日期索引，以符合 Backtrader 的要求
-    stock_hfq_df["date"] = pd.to_datetime(stock_hfq_df["date"])
-    stock_hfq_df = stock_hfq_df.set_index("date")
-    return stock_hfq_df
+    """获取一只股票的全部日线，`adjust` 为 AKShare 的复权参数（'qfq'、'hfq' 或空字符串）。"""
+    today = datetime.now().strftime("%Y%m%d")
+    return AKShareSource().get_daily_price(symbol, FIRST_DATE, today, adjust or "bfq")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,430 @@
+"""已结束年份的日线归档为压缩的列式分段。
+
+SQLite 数据库随历史增长，而 `daily_price`、`adj_factor` 上的查询不论远近都要扫描
+整张表。`main.py archive` 把已结束年份的数据搬出数据库，写成只读的分段文件：
+
+    <directory>/<表名>/index.json                    # 清单：每个分段的日期和代码范围
+    <directory>/<表名>/<年份>-<批次>-<分组>.npz       # 一年中一组股票（最多 500 只）
+
+分段按列保存为压缩的 `.npz`，按 (日期, 股票) 排序：股票代码为字典编码（代码表加
+每行的序号），日期为相对前一行的天数差（同一天的行为 0），数值列原样保存，读出的
+值与数据库中完全相同。
+
+分段写入后不再修改。归档之后数据库里又出现了已归档年份的数据（例如重新运行首次
+下载），下一次归档时只把新的键写成同一年份的新批次。清单中的 `until` 是已归档的
+最后一天（年底）：读取时这一天及以前的数据只从归档读取，之后的数据只从数据库读取，
+两部分不会重叠。`StockDBReader` 按清单中的日期和代码范围跳过与查询无关的分段。
+"""
+
+import bisect
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+ARCHIVE_TABLES = ("daily_price", "adj_factor")
+KEYS = ["ts_code", "trade_date"]
+# 每个分段的股票数量，按股票读取时每年只需解压一个分段
+BUCKET = 500
+# 内存中保留的已解码分段数量
+CACHE_SEGMENTS = 8
+
+
+def default_archive_dir(db_name: str) -> str:
+    """数据库对应的归档目录，与数据库文件放在一起。"""
+    return os.path.splitext(db_name)[0] + "_archive"
+
+
+def _day_numbers(dates) -> np.ndarray:
+    """'YYYYMMDD' 或 'YYYY-MM-DD' 日期转换为 1970-01-01 起的天数。"""
+    codes, uniques = pd.factorize(np.asarray(dates))
+    parsed = pd.to_datetime(
+        [str(u).replace("-", "") for u in uniques], format="%Y%m%d"
+    ).to_numpy("datetime64[D]")
+    return parsed.astype(np.int64)[codes]
+
+
+def _yyyymmdd(days: np.ndarray) -> np.ndarray:
+    """天数转换为 YYYYMMDD 整数，只转换不重复的值。"""
+    uniques, inverse = np.unique(days, return_inverse=True)
+    stamps = pd.DatetimeIndex(uniques.astype("datetime64[D]"))
+    parsed = stamps.year * 10000 + stamps.month * 100 + stamps.day
+    return np.asarray(parsed, dtype=np.int64)[inverse]
+
+
+@dataclass
+class Segment:
+    """解码后的分段。
+
+    Attributes:
+        codes: 股票代码表
+        code: 每行的股票代码在代码表中的序号
+        dates: 每行的日期，YYYYMMDD 整数，升序
+        values: 数值列
+    """
+
+    codes: np.ndarray
+    code: np.ndarray
+    dates: np.ndarray
+    values: dict[str, np.ndarray]
+
+    @classmethod
+    def encode(cls, df: pd.DataFrame, columns: list[str]) -> dict[str, np.ndarray]:
+        """把 (股票, 日期) 唯一的数据编码为写入 `.npz` 的数组。"""
+        days = _day_numbers(df["trade_date"])
+        codes, code = np.unique(df["ts_code"].to_numpy(dtype=str), return_inverse=True)
+        order = np.lexsort((code, days))
+        days = days[order]
+        index_type = np.uint16 if len(codes) <= np.iinfo(np.uint16).max else np.int32
+        arrays = {
+            "codes": codes,
+            "code": code[order].astype(index_type),
+            "first_day": np.array(days[0]),
+            "day_delta": np.diff(days, prepend=days[0]).astype(np.uint16),
+        }
+        for name in columns:
+            values = df[name].to_numpy()[order]
+            if not np.issubdtype(values.dtype, np.number):
+                values = values.astype(str)
+            arrays[f"v_{name}"] = values
+        return arrays
+
+    @classmethod
+    def load(cls, path: str, columns: list[str]) -> "Segment":
+        with np.load(path) as f:
+            days = int(f["first_day"]) + np.cumsum(f["day_delta"], dtype=np.int64)
+            return cls(
+                codes=f["codes"],
+                code=f["code"].astype(np.int64),
+                dates=_yyyymmdd(days),
+                values={name: f[f"v_{name}"] for name in columns},
+            )
+
+    def mask(self, start: int, end: int, codes: list[str] | None) -> np.ndarray:
+        """日期在 [start, end] 内且股票在 `codes` 中的行。"""
+        lo, hi = np.searchsorted(self.dates, [start, end + 1])
+        mask = np.zeros(len(self.dates), dtype=bool)
+        mask[lo:hi] = True
+        if codes is not None:
+            wanted = np.flatnonzero(np.isin(self.codes, codes))
+            mask &= np.isin(self.code, wanted)
+        return mask
+
+
+class ArchiveStore:
+    """归档分段的读写。
+
+    Args:
+        directory: 归档目录，不存在时视为没有归档
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._manifests: dict[str, tuple[tuple, dict]] = {}
+        self._segments: OrderedDict[str, Segment] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _index_path(self, table: str) -> str:
+        return os.path.join(self.directory, table, "index.json")
+
+    def manifest(self, table: str) -> dict:
+        """表的清单，文件修改后重新读取；没有归档时为空字典。"""
+        path = self._index_path(table)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return {}
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._manifests.get(table)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        self._manifests[table] = (stamp, manifest)
+        return manifest
+
+    def until(self, table: str) -> str:
+        """已归档的最后一天，'YYYYMMDD'；没有归档时为空字符串。"""
+        return self.manifest(table).get("until", "")
+
+    def trade_dates(self, table: str, start: str, end: str) -> list[str]:
+        """区间内有归档数据的日期，升序。"""
+        dates = self.manifest(table).get("dates", [])
+        return dates[bisect.bisect_left(dates, start) : bisect.bisect_right(dates, end)]
+
+    def segments(
+        self, table: str, start: str, end: str, codes: list[str] | None = None
+    ) -> list[dict]:
+        """按清单中的最小/最大日期和代码筛选可能包含查询数据的分段。"""
+        found = []
+        for segment in self.manifest(table).get("segments", []):
+            if segment["max_date"] < start or segment["min_date"] > end:
+                continue
+            if codes is not None and not any(
+                segment["min_code"] <= code <= segment["max_code"] for code in codes
+            ):
+                continue
+            found.append(segment)
+        return found
+
+    def _load(self, table: str, segment: dict) -> Segment:
+        path = os.path.join(self.directory, table, segment["file"])
+        with self._lock:
+            cached = self._segments.get(path)
+            if cached is not None:
+                self._segments.move_to_end(path)
+                return cached
+        loaded = Segment.load(path, self.manifest(table)["columns"])
+        with self._lock:
+            self._segments[path] = loaded
+            while len(self._segments) > CACHE_SEGMENTS:
+                self._segments.popitem(last=False)
+        return loaded
+
+    def _frame(
+        self, table: str, parts: list[tuple[Segment, np.ndarray]], columns
+    ) -> pd.DataFrame:
+        names = self.manifest(table).get("columns", [])
+        columns = names if columns is None else columns
+        if not parts:
+            return pd.DataFrame(columns=KEYS + list(columns))
+        dates = np.concatenate([seg.dates[mask] for seg, mask in parts])
+        uniques, inverse = np.unique(dates, return_inverse=True)
+        data = {
+            "ts_code": np.concatenate(
+                [seg.codes[seg.code[mask]] for seg, mask in parts]
+            ),
+            "trade_date": uniques.astype(str)[inverse],
+        }
+        for name in columns:
+            data[name] = np.concatenate([seg.values[name][mask] for seg, mask in parts])
+        return pd.DataFrame(data)
+
+    def read(
+        self,
+        table: str,
+        start: str,
+        end: str,
+        codes: list[str] | None = None,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """读取区间内的归档数据。
+
+        Args:
+            table: 表名，'daily_price' 或 'adj_factor'
+            start: 开始日期，格式为 'YYYYMMDD'
+            end: 结束日期，格式为 'YYYYMMDD'
+            codes: 股票代码列表，为空则读取全部股票
+            columns: 除 ts_code、trade_date 以外的列，默认为全部列
+
+        Returns:
+            按 (trade_date, ts_code) 排序的 DataFrame，列为 ts_code、trade_date 和 `columns`
+        """
+        parts = []
+        for segment in self.segments(table, start, end, codes):
+            seg = self._load(table, segment)
+            mask = seg.mask(int(start), int(end), codes)
+            if mask.any():
+                parts.append((seg, mask))
+        df = self._frame(table, parts, columns)
+        if len(parts) > 1:
+            df = df.sort_values(KEYS[::-1], kind="stable", ignore_index=True)
+        return df
+
+    def last_rows(
+        self,
+        table: str,
+        codes: list[str],
+        before: str,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """每只股票在 `before` 之前（不含当天）的最后一行，从最新的分段向前查找。"""
+        segments = self.segments(table, "00000000", before, codes)
+        segments = sorted(segments, key=lambda s: s["max_date"], reverse=True)
+        remaining, frames = set(codes), []
+        for segment in segments:
+            if not remaining:
+                break
+            seg = self._load(table, segment)
+            mask = seg.mask(0, int(before) - 1, sorted(remaining))
+            if not mask.any():
+                continue
+            df = self._frame(table, [(seg, mask)], columns)
+            df = df.groupby("ts_code", sort=False).tail(1)
+            frames.append(df)
+            remaining -= set(df["ts_code"])
+        if not frames:
+            return self._frame(table, [], columns)
+        df = pd.concat(frames, ignore_index=True)
+        # 较早的批次中也可能有更晚的日期，按日期取每只股票的最后一行
+        df = df.sort_values("trade_date", kind="stable")
+        return df.groupby("ts_code", sort=False).tail(1).reset_index(drop=True)
+
+    def _write_manifest(self, table: str, manifest: dict) -> None:
+        directory = os.path.join(self.directory, table)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(tmp_path, self._index_path(table))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def write(self, table: str, year: int, df: pd.DataFrame) -> int:
+        """把一年的数据写成新的分段，已经归档的键不再重复写入。
+
+        先写分段文件，最后原子替换清单；中途失败时清单不变，新文件不会被读取。
+
+        Args:
+            table: 表名
+            year: 年份，`df` 中只能有这一年的数据
+            df: 包含 ts_code、trade_date 的数据
+
+        Returns:
+            新写入的行数
+        """
+        manifest = self.manifest(table) or {"columns": [], "segments": [], "dates": []}
+        columns = manifest["columns"] or [c for c in df.columns if c not in KEYS]
+        missing = set(columns) - set(df.columns)
+        if missing:
+            raise ValueError(f"{table} 缺少归档中已有的列: {sorted(missing)}")
+        df = df.assign(trade_date=df["trade_date"].astype(str).str.replace("-", ""))
+        df = df.drop_duplicates(KEYS, keep="last")
+        first, last = f"{year}0101", f"{year}1231"
+        if not df["trade_date"].between(first, last).all():
+            raise ValueError(f"{table} 的数据不全在 {year} 年内")
+
+        existing = self.read(table, first, last, columns=[])
+        if len(existing):
+            known = pd.MultiIndex.from_frame(existing[KEYS])
+            df = df[~pd.MultiIndex.from_frame(df[KEYS]).isin(known)]
+        if df.empty:
+            return 0
+
+        directory = os.path.join(self.directory, table)
+        os.makedirs(directory, exist_ok=True)
+        batch = len({s["file"] for s in manifest["segments"] if s["year"] == year})
+        codes = np.unique(df["ts_code"].to_numpy(dtype=str))
+        segments = []
+        for i in range(0, len(codes), BUCKET):
+            bucket = codes[i : i + BUCKET]
+            part = df[df["ts_code"].isin(bucket)]
+            name = f"{year}-{batch:02d}-{i // BUCKET:03d}.npz"
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez_compressed(f, **Segment.encode(part, columns))
+                os.replace(tmp_path, os.path.join(directory, name))
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            segments.append(
+                {
+                    "file": name,
+                    "year": year,
+                    "min_date": part["trade_date"].min(),
+                    "max_date": part["trade_date"].max(),
+                    "min_code": str(bucket[0]),
+                    "max_code": str(bucket[-1]),
+                    "rows": len(part),
+                }
+            )
+
+        self._write_manifest(
+            table,
+            {
+                "columns": columns,
+                "until": max(manifest.get("until", ""), last),
+                "dates": sorted(set(manifest["dates"]) | set(df["trade_date"])),
+                "segments": manifest["segments"] + segments,
+            },
+        )
+        return len(df)
+
+
+def archive_database(
+    db_name: str = "stock_db_based_Tushare.db",
+    directory: str = "",
+    keep_years: int = 1,
+    vacuum: bool = True,
+) -> dict[str, int]:
+    """把数据库中已结束年份的日线和复权因子移入归档。
+
+    以数据库中日线的最新日期所在年份为准，保留最近 `keep_years` 年在数据库中，
+    更早的年份逐年写入归档后从数据库删除。数据库中总会保留最新的数据，
+    增量更新仍然可以从数据库的最新日期继续。
+
+    Args:
+        db_name: SQLite 数据库文件名
+        directory: 归档目录，默认为数据库旁边的 `<数据库名>_archive`
+        keep_years: 保留在数据库中的年数，至少为 1
+        vacuum: 删除数据后是否压缩数据库文件
+
+    Returns:
+        每张表移入归档的行数
+    """
+    if keep_years < 1:
+        raise ValueError("keep_years 至少为 1")
+    store = ArchiveStore(directory or default_archive_dir(db_name))
+    engine = create_engine(f"sqlite:///{db_name}")
+    moved = dict.fromkeys(ARCHIVE_TABLES, 0)
+    day = "REPLACE(trade_date, '-', '')"
+    try:
+        with engine.connect() as conn:
+            latest = conn.execute(text("SELECT MAX(trade_date) FROM daily_price"))
+            latest = latest.scalar()
+        if latest is None:
+            print("数据库中没有日线数据，无需归档。")
+            return moved
+        last_year = int(latest.replace("-", "")[:4]) - keep_years
+
+        for table in ARCHIVE_TABLES:
+            query = text(
+                f"SELECT DISTINCT SUBSTR({day}, 1, 4) FROM {table} WHERE {day} <= :end"
+            )
+            try:
+                with engine.connect() as conn:
+                    years = conn.execute(query, {"end": f"{last_year}1231"})
+                    years = sorted(int(row[0]) for row in years)
+            except Exception as e:
+                print(f"读取 {table} 时发生错误: {e}")
+                continue
+            for year in years:
+                params = {"start": f"{year}0101", "end": f"{year}1231"}
+                where = f"WHERE {day} >= :start AND {day} <= :end"
+                df = pd.read_sql(
+                    text(f"SELECT * FROM {table} {where}"), engine, params=params
+                )
+                added = store.write(table, year, df)
+                # 分段和清单都已写入，这一年的数据从归档读取，可以从数据库删除
+                with engine.begin() as conn:
+                    conn.execute(text(f"DELETE FROM {table} {where}"), params)
+                moved[table] += len(df)
+                print(f"{table} {year} 年: 归档 {added} 行，从数据库删除 {len(df)} 行")
+
+        if vacuum and any(moved.values()):
+            with engine.connect() as conn:
+                conn.exec_driver_sql("VACUUM")
+    finally:
+        engine.dispose()
+    return moved
+
+
+def update_archive(config: dict) -> dict[str, int]:
+    """按 [archive] 配置归档数据库，见 `archive_database`。"""
+    archive_config = config.get("archive", {})
+    return archive_database(
+        config.get("data", {}).get("db") or "stock_db_based_Tushare.db",
+        directory=archive_config.get("directory", ""),
+        keep_years=archive_config.get("keep_years", 1),
+        vacuum=archive_config.get("vacuum", True),
+    )
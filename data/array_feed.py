@@ -0,0 +1,133 @@
+"""基于 NumPy 数组的 backtrader 数据源。
+
+`bt.feeds.PandasData` 在预加载时逐行遍历 DataFrame，每个 Bar 都要经过列映射、
+日期转换和 from/to 日期判断，历史较长、股票较多时占了回测准备阶段的大部分时间。
+`ArrayData` 直接接收连续的日期和 OHLCV 数组：回测区间由二分查找确定，切片是视图；
+预加载时每条 line 一次性写入 backtrader 的缓冲区，不再逐个 Bar 处理。
+
+    feed = ArrayData(
+        datetime=dates, open=o, high=h, low=l, close=c, volume=v,
+        fromdate=datetime(2024, 1, 1),
+    )
+    feed = ArrayData.from_dataframe(df)  # 与 PandasData 相同格式的 DataFrame
+"""
+
+import array
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+from backtrader.linebuffer import LineBuffer
+
+from monitor.profiling import phase
+
+_EPOCH = np.datetime64("0001-01-01", "D")
+LINES = ("datetime", "open", "high", "low", "close", "volume", "openinterest")
+
+
+def to_datenum(dates) -> np.ndarray:
+    """把日期数组转换为 backtrader 的日期数值（公历序数，小数部分为一天中的时间）。
+
+    Args:
+        dates: datetime64 数组、pandas 日期索引，或已经是日期数值的浮点数组
+
+    Returns:
+        float64 数组
+    """
+    values = np.asarray(dates)
+    if not np.issubdtype(values.dtype, np.datetime64):
+        return values.astype(np.float64, copy=False)
+    days = values.astype("datetime64[D]")
+    frac = (values - days) / np.timedelta64(1, "D")
+    return (days - _EPOCH).astype(np.int64) + 1 + frac
+
+
+class ArrayData(bt.feed.DataBase):
+    """由 NumPy 数组构建的数据源。
+
+    Params:
+        datetime: 日期，datetime64 数组或 backtrader 日期数值，必须升序
+        open, high, low, close, volume: 与日期等长的数组
+        openinterest: 持仓量，为 None 时填 0
+        fromdate, todate: 回测区间，用二分查找截取，不复制数组
+    """
+
+    params = (
+        ("datetime", None),
+        ("open", None),
+        ("high", None),
+        ("low", None),
+        ("close", None),
+        ("volume", None),
+        ("openinterest", None),
+    )
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, **kwargs) -> "ArrayData":
+        """由日期索引、包含 open/high/low/close/volume 列的 DataFrame 构建数据源。
+
+        格式与 `StockDBReader.get_daily_price` 的返回值、`PandasData` 的输入相同。
+        """
+        columns = {
+            name: df[name].to_numpy(dtype=np.float64)
+            for name in LINES[1:]
+            if name in df.columns
+        }
+        return cls(datetime=df.index.to_numpy(), **columns, **kwargs)
+
+    def start(self):
+        super().start()
+        self._columns = None
+        self._idx = 0
+
+    def _window(self) -> dict[str, np.ndarray]:
+        """回测区间内的各列，都是输入数组的视图。"""
+        dates = to_datenum(self.p.datetime)
+        # fromdate/todate 在 _start_finish 中已转换为日期数值
+        lo = np.searchsorted(dates, self.fromdate, side="left")
+        hi = np.searchsorted(dates, self.todate, side="right")
+        columns = {"datetime": dates[lo:hi]}
+        for name in LINES[1:]:
+            values = getattr(self.p, name)
+            if values is None:
+                columns[name] = np.zeros(hi - lo)
+            else:
+                columns[name] = np.asarray(values, dtype=np.float64)[lo:hi]
+        return columns
+
+    def preload(self):
+        with phase("preload"):
+            self._preload()
+
+    def _preload(self):
+        # 过滤器、时区转换和节省内存模式需要逐个 Bar 处理，交给默认实现
+        bulk = (
+            not self._filters
+            and not self._ffilters
+            and not self._tzinput
+            and self.lines.datetime.mode != LineBuffer.QBuffer
+        )
+        if not bulk:
+            return super().preload()
+
+        columns = self._window()
+        for name, values in columns.items():
+            buffer = array.array("d")
+            buffer.frombytes(np.ascontiguousarray(values).tobytes())
+            getattr(self.lines, name).array = buffer
+        # 已全部加载，之后的 _load 不再返回新的 Bar
+        self._columns = [columns[name] for name in LINES]
+        self._idx = len(columns["datetime"])
+        self.home()
+
+    def _load(self):
+        if self._columns is None:
+            columns = self._window()
+            self._columns = [columns[name] for name in LINES]
+        i = self._idx
+        if i >= len(self._columns[0]):
+            return False
+        for name, values in zip(LINES, self._columns):
+            getattr(self.lines, name)[0] = values[i]
+        self._idx = i + 1
+        return True
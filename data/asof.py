@@ -0,0 +1,174 @@
+"""按时间点（point-in-time）把低频数据对齐到日线上。
+
+财务指标按报告期发布，公告日期晚于报告期；直接按报告期与日线关联会用到当时还
+不知道的数据。这里的 as-of 关联对每根 K 线只取截至当天已经公布的最新一条记录：
+
+    values = asof_join(bars, fina, right_on="ann_date", allow_exact=False)
+
+全部股票一起处理：把 (股票序号, 日期) 编码为一个有序的 int64 键，对左右两边的键
+做一次 `np.searchsorted`，每只股票的记录是有序键中连续的一段，不需要逐只股票循环，
+也不会像笛卡尔积再筛选那样占用大量内存。
+"""
+
+import numpy as np
+import pandas as pd
+
+# 日期编码为 YYYYMMDD 整数，股票序号乘以这个数后加上日期，得到有序的键
+_DATE_SPAN = 100_000_000
+
+
+def _dates(values) -> np.ndarray:
+    """把 'YYYYMMDD' 或 'YYYY-MM-DD' 日期转换为整数，只解析不重复的值。"""
+    codes, uniques = pd.factorize(np.asarray(values))
+    parsed = np.array([int(str(u).replace("-", "")) for u in uniques], dtype=np.int64)
+    return parsed[codes]
+
+
+def _right_keys(right_codes, right_dates):
+    """右边的有序键、排序前的行号和股票代码索引。"""
+    codes, uniques = pd.factorize(np.asarray(right_codes))
+    keys = codes.astype(np.int64) * _DATE_SPAN + _dates(right_dates)
+    order = np.argsort(keys, kind="stable")
+    return keys[order], order, pd.Index(uniques)
+
+
+def _search(right_keys, order, left_idx, left_dates, allow_exact: bool):
+    """在右边的有序键中查找，`left_idx` 和 `left_dates` 可以广播。"""
+    left_keys = left_idx * _DATE_SPAN + left_dates
+    if not len(right_keys):
+        return np.full(left_keys.shape, -1, dtype=np.int64)
+    side = "right" if allow_exact else "left"
+    pos = np.searchsorted(right_keys, left_keys, side=side) - 1
+    safe = np.maximum(pos, 0)
+    # 匹配到的记录必须属于同一只股票
+    matched = (
+        (left_idx >= 0) & (pos >= 0) & (right_keys[safe] // _DATE_SPAN == left_idx)
+    )
+    return np.where(matched, order[safe], -1)
+
+
+def asof_indices(
+    left_codes,
+    left_dates,
+    right_codes,
+    right_dates,
+    allow_exact: bool = True,
+) -> np.ndarray:
+    """为左边每一行找到同一股票、日期不晚于它的最后一条右边记录。
+
+    Args:
+        left_codes, left_dates: 左边（日线）的股票代码和日期，不要求有序
+        right_codes, right_dates: 右边的股票代码和日期，不要求有序；同一股票
+            同一日期有多条记录时取位置靠后的一条
+        allow_exact: 为 False 时只匹配日期严格早于左边日期的记录，用于当天
+            盘后才公布的数据
+
+    Returns:
+        右边的行号，没有匹配时为 -1
+    """
+    keys, order, codes = _right_keys(right_codes, right_dates)
+    left_idx = codes.get_indexer(np.asarray(left_codes)).astype(np.int64)
+    return _search(keys, order, left_idx, _dates(left_dates), allow_exact)
+
+
+def asof_grid(
+    codes, dates, right_codes, right_dates, allow_exact: bool = True
+) -> np.ndarray:
+    """与 `asof_indices` 相同，左边为 (股票 × 日期) 面板的全部格子。
+
+    面板有几千万个格子时不必先展开成长表：每只股票和每个日期只转换一次。
+
+    Returns:
+        形状为 (股票数, 日期数) 的右边行号，没有匹配时为 -1
+    """
+    keys, order, right = _right_keys(right_codes, right_dates)
+    left_idx = right.get_indexer(np.asarray(codes)).astype(np.int64)
+    rows = _search(keys, order, left_idx[:, None], _dates(dates)[None, :], allow_exact)
+    return rows
+
+
+def take(values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """按 `asof_indices`/`asof_grid` 的行号取值，没有匹配的位置为 NaN。"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(rows.shape, np.nan)
+    matched = rows >= 0
+    out[matched] = values[rows[matched]]
+    return out
+
+
+def asof_join(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    on: str = "trade_date",
+    by: str = "ts_code",
+    right_on: str | None = None,
+    columns: list[str] | None = None,
+    allow_exact: bool = True,
+) -> pd.DataFrame:
+    """把右边截至每一行日期的最新值附加到左边。
+
+    与 `pd.merge_asof(left, right, left_on=on, right_on=right_on, by=by)` 的结果
+    相同，但不要求两边按日期排序，也不改变左边的行顺序。
+
+    Args:
+        left: 日线等高频数据，包含 `by` 和 `on` 列
+        right: 低频数据，包含 `by` 和 `right_on` 列
+        on: 左边的日期列，'YYYYMMDD' 格式
+        by: 股票代码列
+        right_on: 右边的日期列，默认与 `on` 相同，例如财务指标的公告日期 ann_date
+        columns: 附加的列，默认为右边除 `by` 以外的全部列
+        allow_exact: 为 False 时只使用日期严格早于当天的记录
+
+    Returns:
+        左边加上右边的列，没有匹配的行为 NaN
+    """
+    right_on = right_on or on
+    columns = columns or [name for name in right.columns if name != by]
+    rows = asof_indices(
+        left[by], left[on], right[by], right[right_on], allow_exact=allow_exact
+    )
+    matched = rows >= 0
+    out = left.copy()
+    for name in columns:
+        values = right[name].to_numpy()
+        if not np.issubdtype(values.dtype, np.number):
+            values = values.astype(object)
+            filled = np.full(len(rows), None, dtype=object)
+        else:
+            values = values.astype(np.float64)
+            filled = np.full(len(rows), np.nan)
+        filled[matched] = values[rows[matched]]
+        out[name] = filled
+    return out
+
+
+def latest_reports(
+    df: pd.DataFrame,
+    by: str = "ts_code",
+    ann: str = "ann_date",
+    period: str = "end_date",
+) -> pd.DataFrame:
+    """整理财务数据，使每条记录都是公告时已知的最新报告期。
+
+    按公告日期排序后，只保留报告期不早于此前已公布的最新报告期的记录：
+    晚于新报告期公布的旧报告期修正（例如年报公布后再修正上一年的三季报）被丢弃，
+    同一报告期的更正公告保留。同一天公布多个报告期时，报告期最新的一条排在最后。
+
+    Args:
+        df: 财务数据，包含 `by`、`ann` 和 `period` 列
+        by: 股票代码列
+        ann: 公告日期列
+        period: 报告期列
+
+    Returns:
+        按 (股票代码, 公告日期, 报告期) 排序的记录，可直接用于 `asof_join`
+    """
+    df = df.dropna(subset=[ann, period])
+    df = df.sort_values([by, ann, period], kind="stable").reset_index(drop=True)
+    if df.empty:
+        return df
+    codes = np.unique(df[by].to_numpy(dtype=str), return_inverse=True)[1]
+    keys = codes * _DATE_SPAN + _dates(df[period])
+    # 代码在外层有序，键的累计最大值就是每只股票内报告期的累计最大值
+    newest = np.maximum.accumulate(keys)
+    return df[keys >= newest].reset_index(drop=True)
@@ -1,24 +1,78 @@
 import os
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
 import pandas as pd
-import tushare as ts
 from dotenv import load_dotenv
 from sqlalchemy import Engine, text
 from sqlmodel import Session, SQLModel, create_engine
 from tqdm import tqdm
 
+from monitor import counter, gauge, histogram
+
+API_SECONDS = histogram("tushare_api_seconds", "Tushare 接口调用耗时", ["api"])
+API_REQUESTS = counter(
+    "tushare_api_requests_total",
+    "Tushare 接口调用次数，status 为 ok、throttled 或 error",
+    ["api", "status"],
+)
+API_ROWS = counter("tushare_api_rows_total", "Tushare 接口返回的行数", ["api"])
+WRITE_SECONDS = histogram("sqlite_write_seconds", "写入一批数据的耗时", ["table"])
+ROWS_WRITTEN = counter("db_rows_written_total", "写入数据库的新行数", ["table"])
+ROWS_PER_SECOND = gauge(
+    "update_rows_per_second", "最近一次下载或更新每秒写入的行数", ["table"]
+)
+
+# Tushare 超过调用频率限制时的错误信息，例如"抱歉，您每分钟最多访问该接口500次"
+THROTTLE_MESSAGES = ("每分钟", "最多访问", "频率")
+
+
+class MeteredClient:
+    """Tushare 接口的代理，记录每次调用的耗时、返回行数和错误类型。"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, api: str):
+        func = getattr(self._client, api)
+        if not callable(func):
+            return func
+        seconds = API_SECONDS.labels(api=api)
+        rows = API_ROWS.labels(api=api)
+
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                df = func(*args, **kwargs)
+            except Exception as e:
+                message = str(e)
+                throttled = any(word in message for word in THROTTLE_MESSAGES)
+                status = "throttled" if throttled else "error"
+                API_REQUESTS.labels(api=api, status=status).inc()
+                raise
+            finally:
+                seconds.observe(time.perf_counter() - started)
+            API_REQUESTS.labels(api=api, status="ok").inc()
+            if df is not None:
+                rows.inc(len(df))
+            return df
+
+        return call
+
 
 class TushareDownloader:
     # TODO: token不存在的处理
     # TODO: logger
 
     def __init__(self) -> None:
+        import tushare as ts  # tushare导入很慢，只在实际下载时导入
+
         load_dotenv("config/.env")
         token = os.getenv("TUSHARE_TOKEN")
         if token is None:
             raise ValueError("TUSHARE_TOKEN 环境变量未设置")
-        self.pro = ts.pro_api(token)
+        self.pro = MeteredClient(ts.pro_api(token))
         self.sqlite_file_name: str = "stock_db_based_Tushare.db"
         self.engine: Engine = self.db_init()
 
@@ -33,17 +87,100 @@ class TushareDownloader:
         SQLModel.metadata.create_all(engine)
         return engine
 
-    def get_trade_cal(self, start_date: str, end_date: str) -> None:
-        """获取交易日历并全量替换"""
+    def get_trade_cal(
+        self, start_date: str, end_date: str, replace: bool = True
+    ) -> pd.DataFrame:
+        """获取交易日历，默认全量替换；`replace` 为 False 时只追加新的日期"""
         df = self.pro.trade_cal(exchange="", start_date=start_date, end_date=end_date)
         if df.empty:
             print(f"警告: 找不到给定日期范围 {start_date}-{end_date} 的交易日历数据。")
-        else:
+        elif replace:
             # 交易日历数据适合全量替换，以保证与数据源完全一致
             df.to_sql(
                 "trade_calendar", con=self.engine, if_exists="replace", index=False
             )
             print(f"交易日历已更新至 {end_date}。")
+        else:
+            self._upsert_data(df, "trade_calendar", ["exchange", "cal_date"])
+            print(f"交易日历已更新至 {end_date}。")
+        return df
+
+    def open_dates(self, start_date: str, end_date: str) -> list[str]:
+        """
+        区间内的交易日。
+
+        先查数据库中的交易日历；日历没有覆盖到 `end_date` 时，下载到 `end_date`
+        所在年份年底的日历（交易所提前公布全年的休市安排），每年只需下载一次。
+
+        :param start_date: 开始日期，格式为 'YYYYMMDD'。
+        :param end_date: 结束日期，格式为 'YYYYMMDD'。
+        :return: 升序的交易日列表。
+        """
+        query = "SELECT cal_date, is_open FROM trade_calendar"
+        try:
+            calendar = pd.read_sql(query, self.engine)
+        except Exception:
+            calendar = pd.DataFrame(columns=["cal_date", "is_open"])
+        if calendar.empty or calendar["cal_date"].max() < end_date:
+            last = calendar["cal_date"].max() if len(calendar) else start_date
+            first = min(start_date, last)
+            fetched = self.get_trade_cal(first, end_date[:4] + "1231", replace=False)
+            if not fetched.empty:
+                calendar = pd.concat([calendar, fetched[["cal_date", "is_open"]]])
+        is_open = pd.to_numeric(calendar["is_open"]) == 1
+        dates = calendar.loc[is_open, "cal_date"]
+        dates = dates[(dates >= start_date) & (dates <= end_date)]
+        return sorted(set(dates))
+
+    def last_trade_date(self) -> str | None:
+        """数据库中日线的最新日期，没有数据时返回 None"""
+        with Session(self.engine) as session:
+            try:
+                result = session.execute(
+                    text("SELECT MAX(trade_date) FROM daily_price")
+                )
+                return result.scalar()
+            except Exception:
+                return None  # 处理表不存在或查询失败的情况
+
+    def update_trade_dates(self, date_list: list[str], desc: str = "更新") -> int:
+        """
+        按交易日批量下载全部股票的日线、复权因子和每日指标。
+
+        每个接口每天只需一次请求，更新少量交易日时比按股票分组请求少得多。
+
+        :param date_list: 交易日列表，格式为 'YYYYMMDD'。
+        :param desc: 进度条的说明。
+        :return: 下载到的日线行数；数据源还没有当天的数据时为 0。
+        """
+        rows = 0
+        with (
+            self._throughput("daily_price"),
+            tqdm(total=len(date_list), desc=f"{desc}日线数据") as pbar,
+        ):
+            for date in date_list:
+                try:
+                    df = self.pro.daily(trade_date=date)
+                    self._upsert_data(df, "daily_price", ["ts_code", "trade_date"])
+                    rows += 0 if df is None else len(df)
+                except Exception as e:
+                    print(f"下载日线数据时发生错误: {e}, trade_date: {date}")
+                pbar.update(1)
+
+        with (
+            self._throughput("adj_factor"),
+            tqdm(total=len(date_list), desc=f"{desc}复权因子") as pbar,
+        ):
+            for date in date_list:
+                try:
+                    df = self.pro.adj_factor(trade_date=date)
+                    self._upsert_data(df, "adj_factor", ["ts_code", "trade_date"])
+                except Exception as e:
+                    print(f"下载复权因子时发生错误: {e}, trade_date: {date}")
+                pbar.update(1)
+
+        self.get_daily_basic(date_list, f"{desc}每日指标")
+        return rows
 
     def get_stock_basic(self) -> pd.DataFrame:
         """获取全量股票基本信息并全量替换"""
@@ -104,23 +241,41 @@ class TushareDownloader:
                 return  # 发生未知错误时，不进行任何操作
 
         if not df_to_insert.empty:
-            df_to_insert.to_sql(
-                table_name,
-                self.engine,
-                if_exists="append",
-                index=False,
-                chunksize=20000,
-            )
+            with WRITE_SECONDS.labels(table=table_name).time():
+                df_to_insert.to_sql(
+                    table_name,
+                    self.engine,
+                    if_exists="append",
+                    index=False,
+                    chunksize=20000,
+                )
+            ROWS_WRITTEN.labels(table=table_name).inc(len(df_to_insert))
         else:
             print(f"没有需要向 {table_name} 插入的新记录。")
 
+    @contextmanager
+    def _throughput(self, table_name: str):
+        """统计一段下载过程中每秒写入的行数。"""
+        written = ROWS_WRITTEN.labels(table=table_name)
+        before, started = written.value, time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed > 0:
+                rate = (written.value - before) / elapsed
+                ROWS_PER_SECOND.labels(table=table_name).set(rate)
+
     def first_download(self, start_date: str, end_date: str) -> None:
         """首次下载所有数据"""
         self.get_stock_basic()
         self.get_trade_cal(start_date, end_date)
         ts_codes_grouped = self.__group_string_data(self.ts_codes_str, 50)
 
-        with tqdm(total=len(ts_codes_grouped), desc="下载日线数据") as pbar:
+        with (
+            self._throughput("daily_price"),
+            tqdm(total=len(ts_codes_grouped), desc="下载日线数据") as pbar,
+        ):
             for ts_codes_str in ts_codes_grouped:
                 try:
                     df = self.pro.daily(
@@ -132,7 +287,10 @@ class TushareDownloader:
                 pbar.update(1)
 
         date_list = self.__get_dates_between(start_date, end_date)
-        with tqdm(total=len(date_list), desc="下载复权因子") as pbar:
+        with (
+            self._throughput("adj_factor"),
+            tqdm(total=len(date_list), desc="下载复权因子") as pbar,
+        ):
             for date in date_list:
                 try:
                     df = self.pro.adj_factor(trade_date=date)
@@ -141,6 +299,53 @@ class TushareDownloader:
                     print(f"下载复权因子时发生错误: {e}, trade_date: {date}")
                 pbar.update(1)
 
+        self.get_daily_basic(date_list)
+        # 往前多取一年的报告期，回测开始时已公布的财务数据也可用
+        fina_start = (
+            datetime.strptime(start_date, "%Y%m%d") - timedelta(days=365)
+        ).strftime("%Y%m%d")
+        self.get_fina_indicator(fina_start, end_date)
+
+    def get_daily_basic(self, date_list: list[str], desc: str = "下载每日指标") -> None:
+        """按交易日下载全部股票的每日指标（市盈率、市净率、市值、换手率等）"""
+        with (
+            self._throughput("daily_basic"),
+            tqdm(total=len(date_list), desc=desc) as pbar,
+        ):
+            for date in date_list:
+                try:
+                    df = self.pro.daily_basic(trade_date=date)
+                    self._upsert_data(df, "daily_basic", ["ts_code", "trade_date"])
+                except Exception as e:
+                    print(f"下载每日指标时发生错误: {e}, trade_date: {date}")
+                pbar.update(1)
+
+    def get_fina_indicator(self, start_date: str, end_date: str) -> None:
+        """
+        按报告期下载全部股票的财务指标。
+
+        同一报告期的更正公告有不同的公告日期，按 (ts_code, ann_date, end_date)
+        分别保存，读取时按公告日期对齐，不会用到当时还没有公布的数据。
+
+        :param start_date: 最早的报告期，格式为 'YYYYMMDD'。
+        :param end_date: 最晚的报告期，格式为 'YYYYMMDD'。
+        """
+        periods = pd.date_range(start_date, end_date, freq="QE").strftime("%Y%m%d")
+        keys = ["ts_code", "ann_date", "end_date"]
+        with (
+            self._throughput("fina_indicator"),
+            tqdm(total=len(periods), desc="下载财务指标") as pbar,
+        ):
+            for period in periods:
+                try:
+                    df = self.pro.fina_indicator_vip(period=period)
+                    if df is not None:
+                        df = df.dropna(subset=keys).drop_duplicates(keys)
+                    self._upsert_data(df, "fina_indicator", keys)
+                except Exception as e:
+                    print(f"下载财务指标时发生错误: {e}, period: {period}")
+                pbar.update(1)
+
     def __get_dates_between(self, start_date: str, end_date: str) -> list:
         """
         获取两个日期之间的所有日期，格式为YYYYMMDD
@@ -192,40 +397,38 @@ class TushareDownloader:
         return grouped_list
 
     def update(self) -> None:
-        """更新数据到最新"""
-        with Session(self.engine) as session:
-            try:
-                # 从数据库中获取最新的日期
-                result = session.execute(
-                    text("SELECT MAX(trade_date) FROM daily_price")
-                )
-                last_date = result.scalar()  # 格式通常是 'YYYY-MM-DD'
-            except Exception:
-                last_date = None  # 处理表不存在或查询失败的情况
-
-            if last_date is None:
-                print("数据库中没有数据或'daily_price'表不存在，请先运行首次下载。")
-                return
-
-            # 计算更新的起始日期 (最新日期的后一天)
-            start_date = (
-                datetime.strptime(last_date, "%Y%m%d") + timedelta(days=1)
-            ).strftime("%Y%m%d")
-            end_date = datetime.now().strftime("%Y%m%d")
+        """更新数据到最新，没有新的交易日时不请求任何数据"""
+        last_date = self.last_trade_date()
+        if last_date is None:
+            print("数据库中没有数据或'daily_price'表不存在，请先运行首次下载。")
+            return
 
-            if start_date >= end_date:
-                print("数据已经是最新的，无需更新。")
-                return
+        # 计算更新的起始日期 (最新日期的后一天)
+        start_date = (
+            datetime.strptime(last_date, "%Y%m%d") + timedelta(days=1)
+        ).strftime("%Y%m%d")
+        end_date = datetime.now().strftime("%Y%m%d")
+        date_list = (
+            self.open_dates(start_date, end_date) if start_date <= end_date else []
+        )
+        if not date_list:
+            print("数据已经是最新的，无需更新。")
+            return
 
-            print(f"开始更新数据，日期范围: {start_date} -> {end_date}")
+        print(f"开始更新数据，日期范围: {start_date} -> {end_date}")
 
-            # 1. 更新基础数据
-            self.get_stock_basic()
-            self.get_trade_cal(start_date, end_date)
+        # 1. 更新基础数据
+        self.get_stock_basic()
+        ts_codes_grouped = self.__group_string_data(self.ts_codes_str, 50)
 
-            # 2. 增量更新日线行情
-            ts_codes_grouped = self.__group_string_data(self.ts_codes_str, 50)
-            with tqdm(total=len(ts_codes_grouped), desc="更新日线数据") as pbar:
+        # 2. 交易日较少时按交易日批量下载，否则按股票分组下载日线行情
+        if len(date_list) <= len(ts_codes_grouped):
+            self.update_trade_dates(date_list)
+        else:
+            with (
+                self._throughput("daily_price"),
+                tqdm(total=len(ts_codes_grouped), desc="更新日线数据") as pbar,
+            ):
                 for ts_codes_str in ts_codes_grouped:
                     try:
                         df = self.pro.daily(
@@ -238,9 +441,11 @@ class TushareDownloader:
                         print(f"更新日线数据时发生错误: {e}, ts_codes: {ts_codes_str}")
                     pbar.update(1)
 
-            # 3. 增量更新复权因子
-            date_list = self.__get_dates_between(start_date, end_date)
-            with tqdm(total=len(date_list), desc="更新复权因子") as pbar:
+            # 3. 增量更新复权因子和每日指标
+            with (
+                self._throughput("adj_factor"),
+                tqdm(total=len(date_list), desc="更新复权因子") as pbar,
+            ):
                 for date in date_list:
                     try:
                         df = self.pro.adj_factor(trade_date=date)
@@ -248,6 +453,13 @@ class TushareDownloader:
                     except Exception as e:
                         print(f"更新复权因子时发生错误: {e}, trade_date: {date}")
                     pbar.update(1)
+            self.get_daily_basic(date_list, "更新每日指标")
+
+        # 4. 增量更新财务指标，最近一年的报告期可能有新公告或更正公告
+        fina_start = (
+            datetime.strptime(end_date, "%Y%m%d") - timedelta(days=365)
+        ).strftime("%Y%m%d")
+        self.get_fina_indicator(fina_start, end_date)
 
 
 if __name__ == "__main__":
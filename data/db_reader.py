@@ -1,15 +1,55 @@
+import hashlib
+
+import numpy as np
 import pandas as pd
-from sqlalchemy import Engine, create_engine
+from sqlalchemy import Engine, bindparam, create_engine, text
+
+from monitor.profiling import phase
+
+from .archive import KEYS, ArchiveStore, default_archive_dir
+from .asof import asof_grid, latest_reports, take
+from .panel import DailyPanel
 
 
 class StockDBReader:
-    def __init__(self, db_name: str = "stock_db_based_Tushare.db"):
+    def __init__(
+        self, db_name: str = "stock_db_based_Tushare.db", archive_dir: str = ""
+    ):
         """
         初始化数据库读取器。
+
+        日线和复权因子中已归档的年份（见 `data.archive`）从归档分段读取，
+        之后的数据从数据库读取，两部分拼接后与归档前的查询结果相同。
+
         :param db_name: SQLite 数据库文件名。
+        :param archive_dir: 归档目录，默认为数据库旁边的 `<数据库名>_archive`，
+            目录不存在时只读取数据库。
         """
         self.db_path = f"sqlite:///{db_name}"
         self.engine: Engine = create_engine(self.db_path)
+        self.archive = ArchiveStore(archive_dir or default_archive_dir(db_name))
+
+    def _with_archive(
+        self,
+        table: str,
+        df: pd.DataFrame,
+        ts_codes: list[str] | None,
+        start_date: str,
+        end_date: str,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """把归档中区间内的数据拼接在数据库查询结果（只含归档以后的日期）之前。"""
+        archived = self.archive.until(table)
+        if not archived or start_date > archived:
+            return df
+        cold = self.archive.read(
+            table, start_date, min(end_date, archived), ts_codes, columns
+        )
+        if cold.empty:
+            return df
+        if df.empty:
+            return cold
+        return pd.concat([cold[df.columns], df], ignore_index=True)
 
     def get_raw_daily_price(
         self, ts_code: str | list[str], start_date: str, end_date: str
@@ -37,21 +77,27 @@ class StockDBReader:
         start_date_formatted = start_date.replace("-", "")
         end_date_formatted = end_date.replace("-", "")
 
+        # 已归档的日期只从归档读取
+        archived = self.archive.until("daily_price")
         query = f"""
         SELECT *
         FROM daily_price
         WHERE ts_code IN {ts_code_tuple}
           AND REPLACE(trade_date, '-', '') >= '{start_date_formatted}'
           AND REPLACE(trade_date, '-', '') <= '{end_date_formatted}'
+          AND REPLACE(trade_date, '-', '') > '{archived}'
         ORDER BY trade_date ASC;
         """
 
         try:
             df = pd.read_sql(query, self.engine)
-            return df
         except Exception as e:
             print(f"查询数据时发生错误: {e}")
-            return pd.DataFrame()
+            df = pd.DataFrame()
+        codes = [ts_code] if isinstance(ts_code, str) else list(ts_code)
+        return self._with_archive(
+            "daily_price", df, codes, start_date_formatted, end_date_formatted
+        )
 
     def get_adj_factor(
         self, ts_code: str | list[str], start_date: str, end_date: str
@@ -77,21 +123,31 @@ class StockDBReader:
         start_date_formatted = start_date.replace("-", "")
         end_date_formatted = end_date.replace("-", "")
 
+        archived = self.archive.until("adj_factor")
         query = f"""
         SELECT ts_code, trade_date, adj_factor
         FROM adj_factor
         WHERE ts_code IN {ts_code_tuple}
           AND REPLACE(trade_date, '-', '') >= '{start_date_formatted}'
           AND REPLACE(trade_date, '-', '') <= '{end_date_formatted}'
+          AND REPLACE(trade_date, '-', '') > '{archived}'
         ORDER BY trade_date ASC;
         """
 
         try:
             df = pd.read_sql(query, self.engine)
-            return df
         except Exception as e:
             print(f"查询复权因子时发生错误: {e}")
-            return pd.DataFrame()
+            df = pd.DataFrame()
+        codes = [ts_code] if isinstance(ts_code, str) else list(ts_code)
+        return self._with_archive(
+            "adj_factor",
+            df,
+            codes,
+            start_date_formatted,
+            end_date_formatted,
+            ["adj_factor"],
+        )
 
     def get_daily_price(
         self,
@@ -109,36 +165,38 @@ class StockDBReader:
         :param adj_type: 复权类型，可选 'bfq'（不复权）、'qfq'（前复权）、'hfq'（后复权）。
         :return: 包含处理后数据的 pandas DataFrame。
         """
-        df = self.get_raw_daily_price(ts_code, start_date, end_date)
-        if df.empty:
-            print("未查询到数据。")
-            return df
+        with phase("sql"):
+            df = self.get_raw_daily_price(ts_code, start_date, end_date)
+            if df.empty:
+                print("未查询到数据。")
+                return df
 
-        if adj_type in ["qfq", "hfq"]:
-            df_adj = self.get_adj_factor(ts_code, start_date, end_date)
-            if df_adj.empty:
-                print("警告: 未查询到复权因子，返回不复权数据。")
-            else:
-                df = pd.merge(df, df_adj, on=["ts_code", "trade_date"], how="left")
-                df = df.sort_values(by=["ts_code", "trade_date"])
-                df["adj_factor"] = df.groupby("ts_code")["adj_factor"].ffill()
-                df = df.dropna(subset=["adj_factor"])
-
-                if not df.empty:
-                    price_cols = ["open", "close", "high", "low"]
-
-                    if adj_type == "hfq":
-                        df[price_cols] = df[price_cols].multiply(
-                            df["adj_factor"], axis=0
-                        )
-                        df["vol"] = df["vol"] / df["adj_factor"]
-                    elif adj_type == "qfq":
-                        last_factors = df.groupby("ts_code")["adj_factor"].transform(
-                            "last"
-                        )
-                        qfq_factor = df["adj_factor"] / last_factors
-                        df[price_cols] = df[price_cols].multiply(qfq_factor, axis=0)
-                        df["vol"] = df["vol"] / qfq_factor
+        with phase("adjust"):
+            if adj_type in ["qfq", "hfq"]:
+                df_adj = self.get_adj_factor(ts_code, start_date, end_date)
+                if df_adj.empty:
+                    print("警告: 未查询到复权因子，返回不复权数据。")
+                else:
+                    df = pd.merge(df, df_adj, on=["ts_code", "trade_date"], how="left")
+                    df = df.sort_values(by=["ts_code", "trade_date"])
+                    df["adj_factor"] = df.groupby("ts_code")["adj_factor"].ffill()
+                    df = df.dropna(subset=["adj_factor"])
+
+                    if not df.empty:
+                        price_cols = ["open", "close", "high", "low"]
+
+                        if adj_type == "hfq":
+                            df[price_cols] = df[price_cols].multiply(
+                                df["adj_factor"], axis=0
+                            )
+                            df["vol"] = df["vol"] / df["adj_factor"]
+                        elif adj_type == "qfq":
+                            last_factors = df.groupby("ts_code")[
+                                "adj_factor"
+                            ].transform("last")
+                            qfq_factor = df["adj_factor"] / last_factors
+                            df[price_cols] = df[price_cols].multiply(qfq_factor, axis=0)
+                            df["vol"] = df["vol"] / qfq_factor
 
         # 选择并重命名所需的列
         df = df[["trade_date", "open", "close", "high", "low", "vol"]]
@@ -150,6 +208,444 @@ class StockDBReader:
 
         return df
 
+    def get_daily_panel(
+        self,
+        last_n: int,
+        end_date: str | None = None,
+        adj_type: str = "qfq",
+        list_status: list[str] | None = None,
+        industries: list[str] | None = None,
+    ) -> DailyPanel:
+        """
+        一次性读取全市场最近 N 个交易日的日线数据，返回稠密的 (股票 × 日期) 面板。
+
+        上市状态和行业的筛选在 SQL 中与 stock_basic 表关联完成，
+        复权因子同样在 SQL 中关联，不需要逐只股票查询。数据库中归档以后的交易日
+        不足 N 个时，其余的交易日从归档读取。
+
+        :param last_n: 交易日数量。
+        :param end_date: 结束日期，格式为 'YYYYMMDD'，默认为数据库中的最新日期。
+        :param adj_type: 复权类型，可选 'bfq'（不复权）、'qfq'（前复权）、'hfq'（后复权）。
+        :param list_status: 上市状态筛选，例如 ['L']，为空则不筛选。
+        :param industries: 行业筛选，为空则不筛选。
+        :return: 日线行情面板，没有数据时面板为空。
+        """
+        filters = []
+        archived = self.archive.until("daily_price")
+        params: dict = {
+            "last_n": last_n,
+            "end_date": (end_date or "99991231").replace("-", ""),
+            "archived": archived,
+        }
+        if list_status:
+            filters.append("b.list_status IN :list_status")
+            params["list_status"] = list(list_status)
+        if industries:
+            filters.append("b.industry IN :industries")
+            params["industries"] = list(industries)
+        where = " AND ".join(filters) or "1 = 1"
+
+        adj_column = ", a.adj_factor" if adj_type in ["qfq", "hfq"] else ""
+        adj_join = (
+            "LEFT JOIN adj_factor a ON a.ts_code = d.ts_code AND a.trade_date = d.trade_date"
+            if adj_column
+            else ""
+        )
+        query = text(
+            f"""
+        WITH dates AS (
+            SELECT DISTINCT trade_date
+            FROM daily_price
+            WHERE trade_date <= :end_date AND trade_date > :archived
+            ORDER BY trade_date DESC
+            LIMIT :last_n
+        )
+        SELECT d.ts_code, d.trade_date, d.open, d.high, d.low, d.close, d.vol{adj_column}
+        FROM daily_price d
+        JOIN dates t ON t.trade_date = d.trade_date
+        JOIN stock_basic b ON b.ts_code = d.ts_code
+        {adj_join}
+        WHERE {where}
+        ORDER BY d.ts_code, d.trade_date;
+        """
+        )
+        for name in ("list_status", "industries"):
+            if name in params:
+                query = query.bindparams(bindparam(name, expanding=True))
+
+        try:
+            df = pd.read_sql(query, self.engine, params=params)
+        except Exception as e:
+            print(f"查询行情面板时发生错误: {e}")
+            df = pd.DataFrame(
+                columns=["ts_code", "trade_date", "open", "high", "low", "close", "vol"]
+            )
+
+        if archived:
+            try:
+                hot = self._sql_trade_dates("", params["end_date"], archived)
+            except Exception:
+                hot = []
+            missing = last_n - min(len(hot), last_n)
+            cold_end = min(params["end_date"], archived)
+            dates = self.archive.trade_dates("daily_price", "", cold_end)
+            dates = dates[max(len(dates) - missing, 0) :] if missing else []
+            if dates:
+                # 与 SQL 中的 JOIN stock_basic 相同，只保留满足筛选条件的股票
+                codes = text(f"SELECT b.ts_code FROM stock_basic b WHERE {where}")
+                for name in ("list_status", "industries"):
+                    if name in params:
+                        codes = codes.bindparams(bindparam(name, expanding=True))
+                codes = pd.read_sql(codes, self.engine, params=params)["ts_code"]
+                price_cols = ["open", "high", "low", "close", "vol"]
+                cold = self.archive.read(
+                    "daily_price", dates[0], dates[-1], columns=price_cols
+                )
+                cold = cold[cold["ts_code"].isin(codes)]
+                if adj_column:
+                    factors = self.archive.read(
+                        "adj_factor", dates[0], dates[-1], columns=["adj_factor"]
+                    )
+                    cold = cold.merge(factors, on=KEYS, how="left")
+                df = pd.concat([cold[df.columns], df], ignore_index=True)
+        return DailyPanel.from_frame(df, adj_type=adj_type)
+
+    def _sql_trade_dates(self, start: str, end: str, after: str = "") -> list[str]:
+        """数据库中 [start, end] 内、晚于 `after` 的交易日。"""
+        query = text(
+            """
+        SELECT DISTINCT trade_date FROM daily_price
+        WHERE trade_date >= :start AND trade_date <= :end AND trade_date > :after
+        ORDER BY trade_date;
+        """
+        )
+        params = {"start": start, "end": end, "after": after}
+        with self.engine.connect() as conn:
+            return [row[0] for row in conn.execute(query, params)]
+
+    def get_trade_dates(
+        self, start_date: str, end_date: str | None = None
+    ) -> list[str]:
+        """
+        获取区间内有日线数据的交易日。
+
+        :param start_date: 开始日期，格式为 'YYYYMMDD'。
+        :param end_date: 结束日期，格式为 'YYYYMMDD'，默认为数据库中的最新日期。
+        :return: 升序的交易日列表，查询失败时返回空列表。
+        """
+        start = start_date.replace("-", "")
+        end = (end_date or "99991231").replace("-", "")
+        archived = self.archive.until("daily_price")
+        cold = self.archive.trade_dates("daily_price", start, min(end, archived))
+        try:
+            return cold + self._sql_trade_dates(start, end, archived)
+        except Exception as e:
+            print(f"查询交易日时发生错误: {e}")
+            return cold
+
+    def get_last_close(
+        self, ts_codes: list[str], before_date: str, adj_type: str = "hfq"
+    ) -> pd.Series:
+        """
+        获取每只股票在指定日期之前最后一个交易日的收盘价。
+
+        用于填充行情面板开头仍在停牌的 Bar。前复权价格依赖面板最后一天的复权因子，
+        不在这里计算。
+
+        :param ts_codes: 股票代码列表。
+        :param before_date: 日期，格式为 'YYYYMMDD'，不包含当天。
+        :param adj_type: 复权类型，可选 'bfq'（不复权）、'hfq'（后复权）。
+        :return: 以 ts_code 为索引的收盘价，之前没有数据的股票为 NaN。
+        """
+        if adj_type not in ["bfq", "hfq"]:
+            raise ValueError(f"不支持的复权类型: {adj_type}")
+        price = "d.close * a.adj_factor" if adj_type == "hfq" else "d.close"
+        adj_join = (
+            "LEFT JOIN adj_factor a ON a.ts_code = d.ts_code AND a.trade_date = d.trade_date"
+            if adj_type == "hfq"
+            else ""
+        )
+        query = text(
+            f"""
+        WITH last AS (
+            SELECT ts_code, MAX(trade_date) AS trade_date
+            FROM daily_price
+            WHERE ts_code IN :ts_codes AND trade_date < :before
+              AND trade_date > :archived
+            GROUP BY ts_code
+        )
+        SELECT d.ts_code, {price} AS close
+        FROM daily_price d
+        JOIN last l ON l.ts_code = d.ts_code AND l.trade_date = d.trade_date
+        {adj_join};
+        """
+        ).bindparams(bindparam("ts_codes", expanding=True))
+        archived = self.archive.until("daily_price")
+        params = {
+            "ts_codes": list(ts_codes),
+            "before": before_date.replace("-", ""),
+            "archived": archived,
+        }
+        try:
+            df = pd.read_sql(query, self.engine, params=params)
+        except Exception as e:
+            print(f"查询停牌前收盘价时发生错误: {e}")
+            df = pd.DataFrame(columns=["ts_code", "close"])
+
+        # 归档以后没有数据的股票，在归档中查找最后一个交易日
+        missing = sorted(set(ts_codes) - set(df["ts_code"]))
+        if archived and missing:
+            cold = self.archive.last_rows(
+                "daily_price", missing, params["before"], ["close"]
+            )
+            if adj_type == "hfq" and len(cold):
+                factors = self.archive.read(
+                    "adj_factor",
+                    cold["trade_date"].min(),
+                    cold["trade_date"].max(),
+                    missing,
+                    ["adj_factor"],
+                )
+                cold = cold.merge(factors, on=KEYS, how="left")
+                cold["close"] = cold["close"] * cold["adj_factor"]
+            if len(cold):
+                df = pd.concat([df, cold[["ts_code", "close"]]], ignore_index=True)
+        return df.set_index("ts_code")["close"].reindex(ts_codes).astype(float)
+
+    def get_daily_basic(
+        self,
+        start_date: str,
+        end_date: str | None = None,
+        ts_codes: list[str] | None = None,
+        fields: list[str] | None = None,
+        include_prior: bool = False,
+    ) -> pd.DataFrame:
+        """
+        获取每日指标（市盈率、市净率、市值、换手率等）。
+
+        :param start_date: 开始日期，格式为 'YYYYMMDD'。
+        :param end_date: 结束日期，格式为 'YYYYMMDD'，默认为数据库中的最新日期。
+        :param ts_codes: 股票代码列表，为空则返回全部股票。
+        :param fields: 指标列，例如 ['pe_ttm', 'pb', 'total_mv']，为空则返回全部列。
+        :param include_prior: 是否同时返回每只股票在开始日期之前的最后一条记录，
+            用于区间开头仍在停牌的股票。
+        :return: 包含 ts_code、trade_date 和指标列的 DataFrame，按股票和日期排序；
+            没有 daily_basic 表时为空。
+        """
+        columns = ", ".join(["ts_code", "trade_date", *(fields or [])])
+        if not fields:
+            columns = "*"
+        code_filter = "AND ts_code IN :ts_codes" if ts_codes is not None else ""
+        prior = (
+            f"""
+        UNION ALL
+        SELECT {columns} FROM daily_basic
+        WHERE (ts_code, trade_date) IN (
+            SELECT ts_code, MAX(trade_date) FROM daily_basic
+            WHERE trade_date < :start {code_filter}
+            GROUP BY ts_code
+        )"""
+            if include_prior
+            else ""
+        )
+        query = text(
+            f"""
+        SELECT {columns} FROM daily_basic
+        WHERE trade_date >= :start AND trade_date <= :end {code_filter}{prior}
+        ORDER BY ts_code, trade_date;
+        """
+        )
+        params: dict = {
+            "start": start_date.replace("-", ""),
+            "end": (end_date or "99991231").replace("-", ""),
+        }
+        if ts_codes is not None:
+            query = query.bindparams(bindparam("ts_codes", expanding=True))
+            params["ts_codes"] = list(ts_codes)
+        try:
+            return pd.read_sql(query, self.engine, params=params)
+        except Exception as e:
+            print(f"查询每日指标时发生错误: {e}")
+            return pd.DataFrame(columns=["ts_code", "trade_date", *(fields or [])])
+
+    def get_fina_indicator(
+        self,
+        end_date: str | None = None,
+        ts_codes: list[str] | None = None,
+        fields: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        获取截至某个公告日期的全部财务指标，已按公告时点整理（见 `data.asof.latest_reports`）。
+
+        :param end_date: 最后的公告日期，格式为 'YYYYMMDD'，默认为全部。
+        :param ts_codes: 股票代码列表，为空则返回全部股票。
+        :param fields: 指标列，例如 ['roe', 'eps']，为空则返回全部列。
+        :return: 包含 ts_code、ann_date、end_date 和指标列的 DataFrame；
+            没有 fina_indicator 表时为空。
+        """
+        columns = ", ".join(["ts_code", "ann_date", "end_date", *(fields or [])])
+        if not fields:
+            columns = "*"
+        code_filter = "AND ts_code IN :ts_codes" if ts_codes is not None else ""
+        query = text(
+            f"""
+        SELECT {columns} FROM fina_indicator
+        WHERE ann_date <= :end {code_filter};
+        """
+        )
+        params: dict = {"end": (end_date or "99991231").replace("-", "")}
+        if ts_codes is not None:
+            query = query.bindparams(bindparam("ts_codes", expanding=True))
+            params["ts_codes"] = list(ts_codes)
+        try:
+            df = pd.read_sql(query, self.engine, params=params)
+        except Exception as e:
+            print(f"查询财务指标时发生错误: {e}")
+            df = pd.DataFrame(
+                columns=["ts_code", "ann_date", "end_date", *(fields or [])]
+            )
+        return latest_reports(df)
+
+    def get_point_in_time(
+        self,
+        panel: DailyPanel,
+        basic_fields: list[str] | None = None,
+        fina_fields: list[str] | None = None,
+    ) -> dict[str, np.ndarray]:
+        """
+        把每日指标和财务指标按时间点对齐到行情面板上。
+
+        每个 (股票, 日期) 取当天已知的最新值：每日指标取当天或之前最后一个交易日的值
+        （停牌日沿用停牌前的值），财务指标取公告日期早于当天的最新报告期的值，
+        当天公告的数据从下一个交易日起才可用，不会用到未来数据。
+
+        :param panel: 日线行情面板。
+        :param basic_fields: 每日指标列，例如 ['pe_ttm', 'pb', 'total_mv']。
+        :param fina_fields: 财务指标列，例如 ['roe', 'debt_to_assets']。
+        :return: 指标名到形状为 (股票数, 日期数) 的数组的映射，没有数据时为 NaN。
+        """
+        codes = panel.codes.tolist()
+        out = {
+            name: np.full(panel.shape, np.nan)
+            for name in [*(basic_fields or []), *(fina_fields or [])]
+        }
+        if not panel.shape[0] or not panel.shape[1]:
+            return out
+        with phase("point_in_time"):
+            if basic_fields:
+                basic = self.get_daily_basic(
+                    panel.dates[0], panel.dates[-1], codes, basic_fields, True
+                )
+                rows = asof_grid(
+                    panel.codes, panel.dates, basic["ts_code"], basic["trade_date"]
+                )
+                for name in basic_fields:
+                    out[name] = take(basic[name], rows)
+            if fina_fields:
+                fina = self.get_fina_indicator(panel.dates[-1], codes, fina_fields)
+                rows = asof_grid(
+                    panel.codes,
+                    panel.dates,
+                    fina["ts_code"],
+                    fina["ann_date"],
+                    allow_exact=False,
+                )
+                for name in fina_fields:
+                    out[name] = take(fina[name], rows)
+        return out
+
+    def get_data_fingerprint(
+        self, ts_code: str, start_date: str, end_date: str
+    ) -> str | None:
+        """
+        计算指定股票在指定时间段内原始行情和复权因子的指纹。
+
+        只在数据库中做聚合（行数、首尾日期、按日期加权的价格与成交量之和），
+        不读取明细数据。任何一天的数据被新增、删除或修改，指纹都会改变。
+        已归档的日期读取这只股票的归档数据计算摘要，归档以后指纹会变化一次。
+
+        :param ts_code: 股票代码，如 '000001.SZ'。
+        :param start_date: 开始日期，格式为 'YYYYMMDD'。
+        :param end_date: 结束日期，格式为 'YYYYMMDD'。
+        :return: 指纹字符串；区间内没有数据时返回空字符串，查询失败时返回 None。
+        """
+        params = {
+            "ts_code": ts_code,
+            "start": start_date.replace("-", ""),
+            "end": end_date.replace("-", ""),
+        }
+        where = """
+        WHERE ts_code = :ts_code
+          AND REPLACE(trade_date, '-', '') >= :start
+          AND REPLACE(trade_date, '-', '') <= :end
+          AND REPLACE(trade_date, '-', '') > :archived
+        """
+        day = "CAST(REPLACE(trade_date, '-', '') AS INTEGER)"
+        price_query = text(f"""
+        SELECT COUNT(*), MIN(trade_date), MAX(trade_date),
+               TOTAL(open + high + low + close), TOTAL(vol),
+               TOTAL((open + high + low + close) * {day}), TOTAL(vol * {day})
+        FROM daily_price {where}
+        """)
+        adj_query = text(f"""
+        SELECT COUNT(*), TOTAL(adj_factor), TOTAL(adj_factor * {day})
+        FROM adj_factor {where}
+        """)
+        archived = {
+            table: self.archive.until(table) for table in ["daily_price", "adj_factor"]
+        }
+        try:
+            with self.engine.connect() as conn:
+                price = tuple(
+                    conn.execute(
+                        price_query, {**params, "archived": archived["daily_price"]}
+                    ).one()
+                )
+                try:
+                    adj = tuple(
+                        conn.execute(
+                            adj_query, {**params, "archived": archived["adj_factor"]}
+                        ).one()
+                    )
+                except Exception:
+                    adj = ()  # 没有复权因子表
+        except Exception as e:
+            print(f"计算数据指纹时发生错误: {e}")
+            return None
+        if not any(archived.values()):
+            if price[0] == 0:
+                return ""
+            return hashlib.sha1(repr((price, adj)).encode()).hexdigest()
+
+        cold = hashlib.sha1()
+        cold_rows = 0
+        for table in archived:
+            df = self._with_archive(
+                table, pd.DataFrame(), [ts_code], params["start"], params["end"]
+            )
+            if table == "daily_price":
+                cold_rows = len(df)
+            if len(df):
+                cold.update(df["trade_date"].to_numpy(dtype=str).tobytes())
+                values = df.drop(columns=KEYS).to_numpy(np.float64)
+                cold.update(np.ascontiguousarray(values).tobytes())
+        if price[0] == 0 and cold_rows == 0:
+            return ""
+        return hashlib.sha1(repr((price, adj, cold.hexdigest())).encode()).hexdigest()
+
+    def get_stock_basic(self, ts_codes: list[str] | None = None) -> pd.DataFrame:
+        """
+        获取股票基本信息。
+
+        :param ts_codes: 股票代码列表，为空则返回全部股票。
+        :return: 以 ts_code 为索引的股票基本信息。
+        """
+        query = text("SELECT ts_code, name, industry, list_status FROM stock_basic")
+        df = pd.read_sql(query, self.engine).set_index("ts_code")
+        if ts_codes is not None:
+            df = df.reindex(ts_codes)
+        return df
+
 
 if __name__ == "__main__":
     reader = StockDBReader()
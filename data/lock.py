@@ -0,0 +1,125 @@
+"""进程间的文件锁，防止多个进程同时更新数据库。
+
+`main.py daemon` 在盘后更新数据库和缓存，`main.py run`、`update` 等交互式任务
+启动时也会更新数据库；两者同时写入会重复下载，SQLite 也可能报 database is locked。
+更新数据库的代码都先取得同一个文件锁：
+
+    with FileLock():
+        downloader.update()
+
+锁由操作系统在进程退出（包括崩溃）时自动释放，不会留下需要手动清理的锁文件。
+锁文件中记录持有锁的进程号，只用于提示。
+"""
+
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+UPDATE_LOCK = "results/update.lock"
+
+
+class LockTimeout(RuntimeError):
+    """在等待时间内没有取得锁。"""
+
+
+class FileLock:
+    """基于 `flock`（Windows 上为 `msvcrt.locking`）的排他文件锁。
+
+    Args:
+        path: 锁文件路径，更新数据库的进程使用同一个路径
+        poll: 等待锁时的轮询间隔（秒）
+    """
+
+    def __init__(self, path: str = UPDATE_LOCK, poll: float = 1.0):
+        self.path = path
+        self.poll = poll
+        self._fd: int | None = None
+
+    @property
+    def locked(self) -> bool:
+        """本进程是否持有锁。"""
+        return self._fd is not None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def holder(self) -> str:
+        """锁文件中记录的进程号，没有记录时为空字符串。"""
+        try:
+            with open(self.path) as f:
+                return f.read().strip()
+        except OSError:
+            return ""
+
+    def acquire(self, blocking: bool = True, timeout: float | None = None) -> bool:
+        """取得锁。
+
+        Args:
+            blocking: 为 False 时只尝试一次
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Returns:
+            是否取得了锁；`blocking` 为 False 且锁被占用时返回 False
+
+        Raises:
+            LockTimeout: 超过 `timeout` 仍没有取得锁
+        """
+        if self._fd is not None:
+            raise RuntimeError(f"{self.path} 已经被本进程锁定")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiting = False
+        while not self._try_lock(fd):
+            if not blocking:
+                os.close(fd)
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                raise LockTimeout(f"等待 {timeout}s 后仍未取得锁 {self.path}")
+            if not waiting:
+                holder = self.holder()
+                print(f"数据库正在被其他进程更新（进程号 {holder or '未知'}），等待...")
+                waiting = True
+            time.sleep(self.poll)
+
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        """释放锁，没有持有锁时什么也不做。"""
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            os.ftruncate(fd, 0)
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,464 @@
+"""分钟线的存储、读取和重采样。
+
+分钟线的行数约为日线的 240 倍，不放进 SQLite，而是按交易日分区保存为压缩的
+`.npz` 文件，每个文件是一天全部股票的 K 线，按股票代码和时间排序：
+
+    <directory>/1min/<YYYYMMDD>.npz      原始 1 分钟线
+    <directory>/5min/<YYYYMMDD>.npz      由 1 分钟线聚合的缓存，15min、30min、60min、D 相同
+
+价格保存为 float32，时间保存为 int32 的 HHMM，成交量和成交额保存为 float64。
+读取时按日期逐个分区加载（`MinuteStore.iter_bars`），不会一次性把整个区间读入内存。
+聚合后的 K 线在第一次读取时计算并缓存，之后的回测直接使用，不必每次运行都由
+`cerebro.resampledata`/`replaydata` 重新聚合：
+
+    store = MinuteStore("results/minute")
+    for date, bars in store.iter_bars("20240101", "20240131", freq="5min"):
+        df = bars.frame()
+    cerebro.adddata(store.feed("000001.SZ", "20240101", "20240131", freq="5min"))
+
+A 股的分钟线按交易时段聚合：上午 09:30-11:30、下午 13:00-15:00 各 120 分钟，
+K 线的时间为区间结束时间（与数据源一致），60 分钟线为 10:30、11:30、14:00、15:00，
+集合竞价的 09:30 分钟线并入第一根 K 线。
+"""
+
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from monitor import counter, histogram
+
+RAW_FREQ = "1min"
+# 聚合周期到分钟数的映射，D 为日线
+FREQS = {"1min": 1, "5min": 5, "15min": 15, "30min": 30, "60min": 60, "D": 240}
+# Tushare stk_mins 接口单次最多返回的行数
+ROW_LIMIT = 8000
+PRICE_FIELDS = ("open", "high", "low", "close")
+
+WRITE_SECONDS = histogram("minute_write_seconds", "写入一个分钟线分区的耗时", ["freq"])
+ROWS_WRITTEN = counter("db_rows_written_total", "写入数据库的新行数", ["table"])
+
+
+def _session_index(hhmm: np.ndarray) -> np.ndarray:
+    """把 HHMM 时间换算为交易时段内的分钟序号，上午 1-120，下午 121-240。"""
+    minutes = hhmm // 100 * 60 + hhmm % 100
+    morning = np.maximum(minutes - (9 * 60 + 30), 1)
+    afternoon = 120 + np.maximum(minutes - 13 * 60, 1)
+    return np.where(minutes <= 11 * 60 + 30, morning, afternoon)
+
+
+def _session_time(index: np.ndarray) -> np.ndarray:
+    """`_session_index` 的逆变换。"""
+    index = np.minimum(index, 240)
+    minutes = np.where(index <= 120, 9 * 60 + 30 + index, 13 * 60 + index - 120).astype(
+        np.int32
+    )
+    return minutes // 60 * 100 + minutes % 60
+
+
+@dataclass
+class MinuteBars:
+    """一个交易日多只股票的分钟线。
+
+    第 i 只股票的 K 线为 `offsets[i]:offsets[i + 1]`，按时间升序。
+
+    Attributes:
+        date: 交易日期，格式为 'YYYYMMDD'
+        codes: 股票代码，升序
+        offsets: 每只股票的起始行，长度为股票数 + 1
+        time: K 线时间（HHMM）
+        open, high, low, close: 价格
+        volume: 成交量
+        amount: 成交额
+    """
+
+    date: str
+    codes: np.ndarray
+    offsets: np.ndarray
+    time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    amount: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @classmethod
+    def from_frame(cls, date: str, df: pd.DataFrame) -> "MinuteBars":
+        """由数据源格式的 DataFrame 构建。
+
+        Args:
+            date: 交易日期
+            df: 包含 ts_code, trade_time（'YYYY-MM-DD HH:MM:SS'）, open, high,
+                low, close, vol, amount 列；同一股票同一时间有多行时保留最后一行
+        """
+        trade_time = pd.to_datetime(df["trade_time"])
+        hhmm = (trade_time.dt.hour * 100 + trade_time.dt.minute).to_numpy(np.int32)
+        df = (
+            df.assign(_time=hhmm)
+            .drop_duplicates(["ts_code", "_time"], keep="last")
+            .sort_values(["ts_code", "_time"], kind="stable")
+        )
+        codes, starts = np.unique(df["ts_code"].to_numpy(dtype=str), return_index=True)
+        return cls(
+            date=date,
+            codes=codes,
+            offsets=np.append(starts, len(df)).astype(np.int64),
+            time=df["_time"].to_numpy(np.int32),
+            **{name: df[name].to_numpy(np.float32) for name in PRICE_FIELDS},
+            volume=df["vol"].to_numpy(np.float64),
+            amount=df["amount"].to_numpy(np.float64),
+        )
+
+    def _columns(self) -> dict[str, np.ndarray]:
+        return {
+            "time": self.time,
+            **{name: getattr(self, name) for name in PRICE_FIELDS},
+            "volume": self.volume,
+            "amount": self.amount,
+        }
+
+    def select(self, codes) -> "MinuteBars":
+        """只保留指定的股票，没有数据的代码被忽略。"""
+        codes = np.intersect1d(self.codes, np.asarray(codes, dtype=str))
+        positions = np.searchsorted(self.codes, codes)
+        starts, ends = self.offsets[positions], self.offsets[positions + 1]
+        rows = (
+            np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+            if len(codes)
+            else np.empty(0, dtype=np.int64)
+        )
+        return MinuteBars(
+            date=self.date,
+            codes=codes,
+            offsets=np.append(0, np.cumsum(ends - starts)).astype(np.int64),
+            **{name: values[rows] for name, values in self._columns().items()},
+        )
+
+    def frame(self) -> pd.DataFrame:
+        """转换为以 (ts_code, datetime) 为索引的 DataFrame。"""
+        counts = np.diff(self.offsets)
+        day = np.datetime64(f"{self.date[:4]}-{self.date[4:6]}-{self.date[6:]}", "m")
+        minutes = (self.time // 100 * 60 + self.time % 100).astype("timedelta64[m]")
+        index = pd.MultiIndex.from_arrays(
+            [np.repeat(self.codes, counts), (day + minutes).astype("datetime64[ns]")],
+            names=["ts_code", "datetime"],
+        )
+        columns = self._columns()
+        del columns["time"]
+        return pd.DataFrame(
+            {name: values.astype(np.float64) for name, values in columns.items()},
+            index=index,
+        )
+
+    def resample(self, freq: str) -> "MinuteBars":
+        """按交易时段聚合为 5/15/30/60 分钟线或日线。"""
+        if freq not in FREQS:
+            raise ValueError(f"不支持的K线周期: {freq}，可选 {list(FREQS)}")
+        if not len(self):
+            return self
+        n = FREQS[freq]
+        bucket = (_session_index(self.time) + n - 1) // n
+        code = np.repeat(np.arange(len(self.codes)), np.diff(self.offsets))
+        key = code * 1000 + bucket
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        ends = np.r_[starts[1:], len(key)].astype(np.int64)
+        group_code = code[starts]
+        return MinuteBars(
+            date=self.date,
+            codes=self.codes,
+            offsets=np.searchsorted(group_code, np.arange(len(self.codes) + 1)).astype(
+                np.int64
+            ),
+            time=_session_time(bucket[starts] * n),
+            open=self.open[starts],
+            high=np.maximum.reduceat(self.high, starts),
+            low=np.minimum.reduceat(self.low, starts),
+            close=self.close[ends - 1],
+            volume=np.add.reduceat(self.volume, starts),
+            amount=np.add.reduceat(self.amount, starts),
+        )
+
+
+class MinuteStore:
+    """按交易日分区保存分钟线，并缓存聚合后的 K 线。
+
+    Attributes:
+        directory: 存储根目录
+    """
+
+    def __init__(self, directory: str = "results/minute"):
+        self.directory = directory
+
+    def _path(self, date: str, freq: str) -> str:
+        return os.path.join(self.directory, freq, f"{date}.npz")
+
+    def dates(self, freq: str = RAW_FREQ) -> list[str]:
+        """已保存的交易日，升序。"""
+        try:
+            names = os.listdir(os.path.join(self.directory, freq))
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-4] for name in names if name.endswith(".npz"))
+
+    def _load(self, date: str, freq: str) -> MinuteBars | None:
+        try:
+            with np.load(self._path(date, freq)) as f:
+                return MinuteBars(date=date, **{name: f[name] for name in f.files})
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save(self, bars: MinuteBars, freq: str) -> None:
+        """先写临时文件再原子替换，读取方不会看到写了一半的分区。"""
+        directory = os.path.join(self.directory, freq)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f, WRITE_SECONDS.labels(freq=freq).time():
+                np.savez_compressed(
+                    f, codes=bars.codes, offsets=bars.offsets, **bars._columns()
+                )
+            os.replace(tmp_path, self._path(bars.date, freq))
+        except OSError as e:
+            print(f"写入分钟线失败: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def put(self, bars: MinuteBars) -> int:
+        """写入一天的 1 分钟线，与已有的分区合并，并删除这一天的聚合缓存。
+
+        Returns:
+            新增的行数
+        """
+        existing = self._load(bars.date, RAW_FREQ)
+        before = len(existing) if existing is not None else 0
+        if existing is not None:
+            df = pd.concat([_source_frame(existing), _source_frame(bars)])
+            bars = MinuteBars.from_frame(bars.date, df)
+        self._save(bars, RAW_FREQ)
+        for freq in FREQS:
+            if freq != RAW_FREQ and os.path.exists(self._path(bars.date, freq)):
+                os.remove(self._path(bars.date, freq))
+        added = len(bars) - before
+        ROWS_WRITTEN.labels(table="minute_price").inc(added)
+        return added
+
+    def read(self, date: str, freq: str = RAW_FREQ, codes=None) -> MinuteBars | None:
+        """读取一天的 K 线，聚合周期第一次读取时由 1 分钟线计算并缓存。
+
+        Args:
+            date: 交易日期，格式为 'YYYYMMDD'
+            freq: K 线周期，见 `FREQS`
+            codes: 股票代码，为 None 时返回全部股票
+
+        Returns:
+            这一天没有数据时返回 None
+        """
+        if freq not in FREQS:
+            raise ValueError(f"不支持的K线周期: {freq}，可选 {list(FREQS)}")
+        bars = self._load(date, freq)
+        if bars is None and freq != RAW_FREQ:
+            raw = self._load(date, RAW_FREQ)
+            if raw is not None:
+                bars = raw.resample(freq)
+                self._save(bars, freq)
+        if bars is not None and codes is not None:
+            bars = bars.select(codes)
+        return bars
+
+    def iter_bars(
+        self, start_date: str, end_date: str, freq: str = RAW_FREQ, codes=None
+    ):
+        """逐日读取区间内的 K 线，每次只加载一个分区。
+
+        Yields:
+            (交易日期, MinuteBars)
+        """
+        for date in self.dates(RAW_FREQ):
+            if start_date <= date <= end_date:
+                bars = self.read(date, freq, codes)
+                if bars is not None:
+                    yield date, bars
+
+    def build_cache(self, start_date: str, end_date: str, freqs=None) -> int:
+        """预先计算区间内各周期的聚合缓存，返回新计算的分区数。"""
+        freqs = [freq for freq in (freqs or FREQS) if freq != RAW_FREQ]
+        built = 0
+        for date in self.dates(RAW_FREQ):
+            if not start_date <= date <= end_date:
+                continue
+            for freq in freqs:
+                if not os.path.exists(self._path(date, freq)):
+                    self.read(date, freq)
+                    built += 1
+        return built
+
+    def get_bars(
+        self, ts_code: str, start_date: str, end_date: str, freq: str = RAW_FREQ
+    ) -> pd.DataFrame:
+        """一只股票的 K 线，以时间为索引，格式与 `StockDBReader.get_daily_price` 相同。"""
+        frames = [
+            bars.frame().droplevel("ts_code")
+            for _, bars in self.iter_bars(start_date, end_date, freq, [ts_code])
+        ]
+        columns = ["open", "high", "low", "close", "volume", "amount"]
+        df = pd.concat(frames) if frames else pd.DataFrame(columns=columns)
+        df["openinterest"] = 0.0
+        return df
+
+    def feed(self, ts_code: str, start_date: str, end_date: str, freq: str = "5min"):
+        """一只股票的 backtrader 数据源，时间周期和压缩比与 K 线周期一致。"""
+        import backtrader as bt
+
+        from .array_feed import ArrayData
+
+        df = self.get_bars(ts_code, start_date, end_date, freq)
+        if freq == "D":
+            return ArrayData.from_dataframe(df, name=ts_code)
+        return ArrayData.from_dataframe(
+            df,
+            name=ts_code,
+            timeframe=bt.TimeFrame.Minutes,
+            compression=FREQS[freq],
+        )
+
+
+def _source_frame(bars: MinuteBars) -> pd.DataFrame:
+    """转换回数据源的列格式，用于合并。"""
+    df = bars.frame().reset_index()
+    return pd.DataFrame(
+        {
+            "ts_code": df["ts_code"],
+            "trade_time": df["datetime"],
+            **{name: df[name] for name in PRICE_FIELDS},
+            "vol": df["volume"],
+            "amount": df["amount"],
+        }
+    )
+
+
+class MinuteDownloader:
+    """从 Tushare 的 `stk_mins` 接口下载 1 分钟线并按交易日写入 `MinuteStore`。
+
+    按时间窗口下载：每个窗口内逐只股票请求，窗口结束后按交易日写入分区，
+    内存中最多只有一个窗口的数据。
+
+    Args:
+        client: 提供 `stk_mins(ts_code, freq, start_date, end_date)` 的客户端，
+            通常是 `TushareDownloader.pro`
+        store: 分钟线存储
+        window_days: 每个窗口的自然日天数，单次请求的行数不能超过 `ROW_LIMIT`
+    """
+
+    def __init__(self, client, store: MinuteStore, window_days: int = 20):
+        self.client = client
+        self.store = store
+        self.window_days = window_days
+
+    def _windows(self, start_date: str, end_date: str):
+        start = datetime.strptime(start_date, "%Y%m%d")
+        end = datetime.strptime(end_date, "%Y%m%d")
+        while start <= end:
+            stop = min(start + timedelta(days=self.window_days - 1), end)
+            yield start.strftime("%Y%m%d"), stop.strftime("%Y%m%d")
+            start = stop + timedelta(days=1)
+
+    def download(self, ts_codes: list[str], start_date: str, end_date: str) -> int:
+        """下载区间内的分钟线，已有的分区合并写入。
+
+        Args:
+            ts_codes: 股票代码
+            start_date: 开始日期，格式为 'YYYYMMDD'
+            end_date: 结束日期，格式为 'YYYYMMDD'
+
+        Returns:
+            新增的行数
+        """
+        added = 0
+        started = time.perf_counter()
+        for window_start, window_end in self._windows(start_date, end_date):
+            frames = []
+            for ts_code in ts_codes:
+                try:
+                    df = self.client.stk_mins(
+                        ts_code=ts_code,
+                        freq=RAW_FREQ,
+                        start_date=f"{window_start[:4]}-{window_start[4:6]}-"
+                        f"{window_start[6:]} 09:00:00",
+                        end_date=f"{window_end[:4]}-{window_end[4:6]}-"
+                        f"{window_end[6:]} 15:30:00",
+                    )
+                except Exception as e:
+                    print(f"下载分钟线时发生错误: {e}, ts_code: {ts_code}")
+                    continue
+                if df is None or df.empty:
+                    continue
+                if len(df) >= ROW_LIMIT:
+                    print(
+                        f"警告: {ts_code} {window_start}-{window_end} 的分钟线达到"
+                        f"单次请求上限 {ROW_LIMIT} 行，可能不完整，请减小 window_days。"
+                    )
+                frames.append(df)
+            if not frames:
+                continue
+            df = pd.concat(frames, ignore_index=True)
+            dates = pd.to_datetime(df["trade_time"]).dt.strftime("%Y%m%d")
+            for date, day in df.groupby(dates.to_numpy()):
+                added += self.store.put(MinuteBars.from_frame(date, day))
+        elapsed = time.perf_counter() - started
+        print(f"分钟线下载完成，新增 {added} 行，耗时 {elapsed:.1f}s")
+        return added
+
+    def update(self, ts_codes: list[str], days: int = 30) -> int:
+        """从最后一个已保存的交易日更新到今天，没有数据时下载最近 `days` 天。
+
+        最后一天可能是盘中下载的，重新下载后与已有的分区合并。新加入的股票
+        不会补齐历史，需要用 `download` 单独下载。
+        """
+        today = datetime.now()
+        saved = self.store.dates(RAW_FREQ)
+        if saved:
+            start = datetime.strptime(saved[-1], "%Y%m%d")
+        else:
+            start = today - timedelta(days=days)
+        return self.download(
+            ts_codes, start.strftime("%Y%m%d"), today.strftime("%Y%m%d")
+        )
+
+
+DEFAULT_MINUTE_CONFIG = {
+    "directory": "results/minute",
+    "symbols": [],  # 为空时使用 [stock] 中的股票
+    "days": 30,  # 第一次下载的自然日天数
+    "window_days": 20,
+    "freqs": ["5min", "15min", "30min", "60min", "D"],  # 预先计算的聚合周期
+}
+
+
+def update_minutes(config: dict, client) -> int:
+    """按配置增量下载分钟线，并预先计算聚合缓存。
+
+    Args:
+        config: `config/config.toml` 的内容，分钟线设置见 [minute] 部分
+        client: Tushare 客户端，通常是 `TushareDownloader.pro`
+
+    Returns:
+        新增的行数
+    """
+    minute_config = {**DEFAULT_MINUTE_CONFIG, **config.get("minute", {})}
+    symbols = minute_config["symbols"] or config.get("stock", {}).get("symbol", [])
+    store = MinuteStore(minute_config["directory"])
+    downloader = MinuteDownloader(client, store, minute_config["window_days"])
+    added = downloader.update(symbols, minute_config["days"])
+    dates = store.dates(RAW_FREQ)
+    if dates:
+        built = store.build_cache(dates[0], dates[-1], minute_config["freqs"])
+        print(f"分钟线聚合缓存: 新计算 {built} 个分区")
+    return added
@@ -0,0 +1,117 @@
+"""稠密的日线行情面板。
+
+把 (股票, 日期) 的长表转换为 (股票 × 日期) 的 NumPy 二维数组，便于在全市场
+范围内做向量化计算。缺失的 Bar（停牌、尚未上市）为 NaN。
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+PRICE_FIELDS = ("open", "high", "low", "close")
+FIELDS = (*PRICE_FIELDS, "volume")
+
+
+@dataclass
+class DailyPanel:
+    """日线行情面板，每个字段是形状为 (股票数, 日期数) 的数组。
+
+    Attributes:
+        codes: 股票代码
+        dates: 交易日期，格式为 'YYYYMMDD'，升序
+        open, high, low, close, volume: 行情字段
+    """
+
+    codes: np.ndarray
+    dates: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.close.shape
+
+    def fields(self) -> dict[str, np.ndarray]:
+        """字段名到数组的映射，可直接作为 `indicators.ta.compute` 的输入。"""
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def select(self, mask: np.ndarray) -> "DailyPanel":
+        """按股票筛选，返回新的面板。"""
+        return DailyPanel(
+            codes=self.codes[mask],
+            dates=self.dates,
+            **{name: values[mask] for name, values in self.fields().items()},
+        )
+
+    def fill_suspensions(self, last_close: np.ndarray | None = None) -> "DailyPanel":
+        """把停牌日的价格填充为停牌前的收盘价，成交量填充为 0。
+
+        只填充第一个有效 Bar 之后的缺失值，上市之前的 Bar 仍为 NaN。
+
+        Args:
+            last_close: 每只股票在面板第一天之前的最后一个收盘价（与面板相同的
+                复权方式），用于填充面板开头仍在停牌的 Bar；为 NaN 的股票不填充
+        """
+        if last_close is None:
+            close = _ffill(self.close)
+        else:
+            seeded = np.column_stack([last_close, self.close])
+            close = _ffill(seeded)[:, 1:]
+        missing = np.isnan(self.close) & ~np.isnan(close)
+        filled = {}
+        for name in PRICE_FIELDS:
+            values = self.fields()[name].copy()
+            values[missing] = close[missing]
+            filled[name] = values
+        volume = self.volume.copy()
+        volume[missing] = 0.0
+        return DailyPanel(codes=self.codes, dates=self.dates, volume=volume, **filled)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, adj_type: str = "qfq") -> "DailyPanel":
+        """由长表构建面板并复权。
+
+        Args:
+            df: 包含 ts_code, trade_date, open, high, low, close, vol 列的长表，
+                复权时还需要 adj_factor 列
+            adj_type: 复权类型，可选 'bfq'、'qfq'、'hfq'
+
+        Returns:
+            日线行情面板
+        """
+        codes, code_idx = np.unique(df["ts_code"].to_numpy(), return_inverse=True)
+        dates, date_idx = np.unique(df["trade_date"].to_numpy(), return_inverse=True)
+        shape = (len(codes), len(dates))
+
+        def dense(column: str) -> np.ndarray:
+            values = np.full(shape, np.nan)
+            values[code_idx, date_idx] = df[column].to_numpy(dtype=np.float64)
+            return values
+
+        arrays = {name: dense(name) for name in PRICE_FIELDS}
+        arrays["volume"] = dense("vol")
+
+        if adj_type in ["qfq", "hfq"] and "adj_factor" in df.columns:
+            factor = _ffill(dense("adj_factor"))
+            if adj_type == "qfq":
+                factor = factor / factor[:, -1:]
+            for name in PRICE_FIELDS:
+                arrays[name] = arrays[name] * factor
+            arrays["volume"] = arrays["volume"] / factor
+
+        return cls(codes=codes, dates=dates.astype(str), **arrays)
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """沿日期方向向前填充 NaN。"""
+    valid = ~np.isnan(values)
+    idx = np.where(valid, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = values[np.arange(values.shape[0])[:, None], idx]
+    # 第一个有效值之前仍为 NaN
+    filled[~np.maximum.accumulate(valid, axis=1)] = np.nan
+    return filled
@@ -0,0 +1,224 @@
+"""共享内存行情面板。
+
+多进程回测时，每个子进程都从 SQLite 读取并构建同一份行情，内存随进程数线性增长。
+`SharedPanel` 在主进程中把整个股票池的原始 OHLCV 和复权因子读入一块
+`multiprocessing.shared_memory`，子进程凭 `SharedPanelHandle` 附加到同一块内存，
+按股票取得零拷贝的 NumPy 视图。复权在取出单只股票的回测区间时进行，同一个面板
+可以服务不同的回测区间和复权方式。
+
+    with SharedPanel.load(reader, codes, "20200101", "20241231") as panel:
+        handle = panel.handle  # 可 pickle，传给子进程
+        ...
+    # 子进程
+    panel = SharedPanel.attach(handle)
+    feed = ArrayData(**panel.symbol_arrays("000001.SZ", start, end, "qfq"))
+"""
+
+import sys
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .db_reader import StockDBReader
+from .panel import PRICE_FIELDS, _ffill
+
+# 共享内存中依次存放的字段，形状为 (字段数, 股票数, 日期数)
+FIELDS = (*PRICE_FIELDS, "volume", "adj_factor")
+_EPOCH = np.datetime64("0001-01-01", "D")
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """附加到已有的共享内存，不登记到 resource_tracker。
+
+    共享内存由创建者释放。附加方登记后，resource_tracker 会在退出时报告
+    "leaked shared_memory" 并再次释放它。
+    """
+    if sys.version_info >= (3, 13):  # noqa: UP036  项目要求 Python 3.11
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Python < 3.13 没有 track 参数。子进程与创建者共用同一个 resource_tracker，
+    # 附加后再 unregister 会把创建者的登记一起删除，所以附加期间跳过登记
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+@dataclass(frozen=True)
+class SharedPanelHandle:
+    """附加到共享面板所需的信息，可以通过 pickle 传给子进程。"""
+
+    name: str
+    codes: tuple[str, ...]
+    dates: tuple[str, ...]
+
+
+class SharedPanel:
+    """存放在共享内存中的行情面板。
+
+    不要直接实例化，使用 `SharedPanel.create`/`SharedPanel.load` 创建，
+    在子进程中使用 `SharedPanel.attach` 附加。创建者负责调用 `unlink` 释放内存，
+    作为上下文管理器使用时自动释放。
+    """
+
+    def __init__(
+        self, shm: shared_memory.SharedMemory, handle: SharedPanelHandle, owner: bool
+    ):
+        self.shm = shm
+        self.handle = handle
+        self.owner = owner
+        self.codes = np.asarray(handle.codes)
+        self.dates = np.asarray(handle.dates)
+        self._index = {code: i for i, code in enumerate(handle.codes)}
+        # backtrader 的日期数值（公历序数），每个交易日只换算一次
+        days = pd.to_datetime(self.dates, format="%Y%m%d").to_numpy("datetime64[D]")
+        self._datenums = ((days - _EPOCH).astype(np.int64) + 1).astype(np.float64)
+        self.data = np.ndarray(
+            (len(FIELDS), len(self.codes), len(self.dates)),
+            dtype=np.float64,
+            buffer=shm.buf,
+        )
+
+    @classmethod
+    def create(cls, codes, dates, arrays: dict[str, np.ndarray]) -> "SharedPanel":
+        """把 (股票 × 日期) 的数组复制到新的共享内存块中。
+
+        Args:
+            codes: 股票代码
+            dates: 交易日期，格式为 'YYYYMMDD'，升序
+            arrays: 字段名到形状为 (股票数, 日期数) 的数组的映射，
+                包含 open, high, low, close, volume, adj_factor
+        """
+        shape = (len(FIELDS), len(codes), len(dates))
+        size = max(int(np.prod(shape)) * 8, 1)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        handle = SharedPanelHandle(
+            name=shm.name,
+            codes=tuple(str(c) for c in codes),
+            dates=tuple(str(d) for d in dates),
+        )
+        panel = cls(shm, handle, owner=True)
+        for i, name in enumerate(FIELDS):
+            panel.data[i] = arrays[name]
+        return panel
+
+    @classmethod
+    def load(
+        cls,
+        reader: StockDBReader,
+        codes: list[str],
+        start_date: str,
+        end_date: str,
+    ) -> "SharedPanel":
+        """从数据库读取股票池在区间内的原始行情和复权因子，放入共享内存。
+
+        Args:
+            reader: 数据库读取器
+            codes: 股票代码
+            start_date: 开始日期，格式为 'YYYYMMDD'
+            end_date: 结束日期，格式为 'YYYYMMDD'
+        """
+        df = reader.get_raw_daily_price(list(codes), start_date, end_date)
+        columns = ["ts_code", "trade_date", *PRICE_FIELDS, "vol"]
+        df = df[columns] if not df.empty else pd.DataFrame(columns=columns)
+        adj = reader.get_adj_factor(list(codes), start_date, end_date)
+        if adj.empty:
+            df = df.assign(adj_factor=np.nan)
+        else:
+            df = df.merge(adj, on=["ts_code", "trade_date"], how="left")
+
+        panel_codes, code_idx = np.unique(df["ts_code"].to_numpy(), return_inverse=True)
+        dates, date_idx = np.unique(
+            df["trade_date"].astype(str).str.replace("-", "").to_numpy(),
+            return_inverse=True,
+        )
+        arrays = {}
+        for name, column in zip(FIELDS, [*PRICE_FIELDS, "vol", "adj_factor"]):
+            values = np.full((len(panel_codes), len(dates)), np.nan)
+            values[code_idx, date_idx] = df[column].to_numpy(dtype=np.float64)
+            arrays[name] = values
+        return cls.create(panel_codes, dates, arrays)
+
+    @classmethod
+    def attach(cls, handle: SharedPanelHandle) -> "SharedPanel":
+        """在子进程中附加到已有的共享面板，不复制数据。"""
+        return cls(_attach_untracked(handle.name), handle, owner=False)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._index
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def view(self, code: str) -> dict[str, np.ndarray]:
+        """单只股票全部日期的原始数据，返回共享内存上的只读视图。"""
+        i = self._index[code]
+        views = {}
+        for j, name in enumerate(FIELDS):
+            view = self.data[j, i]
+            view.flags.writeable = False
+            views[name] = view
+        return views
+
+    def symbol_arrays(
+        self, code: str, start_date: str, end_date: str, adj_type: str = "qfq"
+    ) -> dict[str, np.ndarray]:
+        """单只股票在回测区间内复权后的行情，可直接传给 `ArrayData`。
+
+        与 `StockDBReader.get_daily_price` 的结果一致：停牌日（没有行情）被跳过，
+        复权时没有复权因子的日期被丢弃，前复权以区间内最后一个交易日为基准。
+
+        Args:
+            code: 股票代码
+            start_date: 开始日期，格式为 'YYYYMMDD'
+            end_date: 结束日期，格式为 'YYYYMMDD'
+            adj_type: 复权类型，可选 'bfq'、'qfq'、'hfq'
+
+        Returns:
+            包含 datetime（backtrader 日期数值）、open、high、low、close、volume 的字典；
+            区间内没有数据时数组为空
+        """
+        view = self.view(code)
+        lo = np.searchsorted(self.dates, start_date.replace("-", ""))
+        hi = np.searchsorted(self.dates, end_date.replace("-", ""), side="right")
+        window = slice(lo, hi)
+        valid = ~np.isnan(view["close"][window])
+
+        factor = None
+        if adj_type in ["qfq", "hfq"] and not np.isnan(view["adj_factor"]).all():
+            factor = _ffill(view["adj_factor"][None, :])[0, window]
+            valid &= ~np.isnan(factor)
+        rows = np.flatnonzero(valid) + lo
+
+        arrays = {name: view[name][rows] for name in (*PRICE_FIELDS, "volume")}
+        if factor is not None and len(rows):
+            factor = factor[rows - lo]
+            if adj_type == "qfq":
+                factor = factor / factor[-1]
+            for name in PRICE_FIELDS:
+                arrays[name] = arrays[name] * factor
+            arrays["volume"] = arrays["volume"] / factor
+
+        arrays["datetime"] = self._datenums[rows]
+        return arrays
+
+    def close(self) -> None:
+        """断开与共享内存的连接，之前取得的视图不能再使用。"""
+        self.data = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        """释放共享内存，只能由创建者调用。"""
+        self.shm.unlink()
+
+    def __enter__(self) -> "SharedPanel":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+        if self.owner:
+            self.unlink()
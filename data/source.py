@@ -0,0 +1,90 @@
+"""行情数据源的统一接口。
+
+回测只需要两个方法：按股票和区间读取日线（`get_daily_price`），以及判断数据是否
+变化的指纹（`get_data_fingerprint`，用于结果缓存）。`StockDBReader`（Tushare
+下载的 SQLite 数据库）和 `AKShareSource`（带本地缓存的 AKShare 接口）都实现了
+`DataSource`，返回的 DataFrame 格式完全相同：以日期为索引，列为
+open, close, high, low, volume，复权方式的计算方法也相同。
+
+在 `config.toml` 的 [data] 中选择数据源：
+
+    source = get_source(config)
+    frames = fetch_many(source, ["000001.SZ", "600000.SH"], "20240101", "20241231")
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Protocol, runtime_checkable
+
+import pandas as pd
+
+SOURCES = ("tushare", "akshare")
+# 日线 DataFrame 的列，与 PandasData/ArrayData 的输入一致
+PRICE_COLUMNS = ["open", "close", "high", "low", "volume"]
+
+
+@runtime_checkable
+class DataSource(Protocol):
+    """日线数据源。"""
+
+    def get_daily_price(
+        self,
+        ts_code: str,
+        start_date: str,
+        end_date: str,
+        adj_type: str = "qfq",
+    ) -> pd.DataFrame:
+        """区间内的日线，以日期为索引，列为 `PRICE_COLUMNS`；没有数据时为空。"""
+        ...
+
+    def get_data_fingerprint(
+        self, ts_code: str, start_date: str, end_date: str
+    ) -> str | None:
+        """区间内数据的指纹；没有数据时返回空字符串，无法计算时返回 None。"""
+        ...
+
+
+def fetch_many(
+    source: DataSource,
+    ts_codes: list[str],
+    start_date: str,
+    end_date: str,
+    adj_type: str = "qfq",
+    workers: int = 8,
+) -> dict[str, pd.DataFrame]:
+    """并发读取多只股票的日线。
+
+    数据源的耗时主要在网络请求或数据库 IO 上，使用线程池并发读取。
+
+    Args:
+        source: 数据源
+        ts_codes: 股票代码，重复的代码只读取一次
+        start_date: 开始日期，格式为 'YYYYMMDD'
+        end_date: 结束日期，格式为 'YYYYMMDD'
+        adj_type: 复权类型，可选 'bfq'、'qfq'、'hfq'
+        workers: 线程数
+
+    Returns:
+        股票代码到日线的映射，顺序与 `ts_codes` 相同，没有数据的股票为空 DataFrame
+    """
+    ts_codes = list(dict.fromkeys(ts_codes))
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(ts_codes)))) as pool:
+        frames = pool.map(
+            lambda code: source.get_daily_price(code, start_date, end_date, adj_type),
+            ts_codes,
+        )
+        return dict(zip(ts_codes, frames))
+
+
+def get_source(config: dict) -> DataSource:
+    """按 [data] 配置创建数据源，默认为 Tushare 数据库。"""
+    data_config = config.get("data", {})
+    name = data_config.get("source", "tushare")
+    if name == "tushare":
+        from .db_reader import StockDBReader
+
+        return StockDBReader(data_config.get("db") or "stock_db_based_Tushare.db")
+    if name == "akshare":
+        from .akshare_data import AKShareSource
+
+        return AKShareSource(data_config.get("cache_dir", "results/akshare"))
+    raise ValueError(f"不支持的数据源: {name}，可选 {SOURCES}")
@@ -0,0 +1,24 @@
+from .broker import Broker, Order, Position, Trade
+from .data import BarData, Indicator, Series
+from .engine import BarEngine
+from .portfolio import (
+    PortfolioEngine,
+    PortfolioResult,
+    rebalance_dates,
+    top_n_weights,
+)
+
+__all__ = [
+    "BarData",
+    "BarEngine",
+    "Broker",
+    "Indicator",
+    "Order",
+    "PortfolioEngine",
+    "PortfolioResult",
+    "Position",
+    "Series",
+    "Trade",
+    "rebalance_dates",
+    "top_n_weights",
+]
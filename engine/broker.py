@@ -0,0 +1,282 @@
+"""轻量引擎的撮合与账户。
+
+只支持单只股票做多的市价单，撮合规则与 backtrader 的默认 `BackBroker` 一致：
+
+* 在第 t 个 Bar 下单，第 t+1 个 Bar 以开盘价成交；
+* 提交时按下单时的收盘价检查资金，成交时再按成交价检查，资金不足时订单状态为 Margin；
+* 手续费由 `AShareCostModel` 计算，与 `MyStockCommissionScheme` 相同。
+
+另外执行 A 股的 T+1 规则：当天买入的股票当天不能卖出。日线市价单在下一个 Bar
+才成交，策略正常使用时不会触发，触发时订单被拒绝（Rejected）。不支持卖空。
+"""
+
+from dataclasses import dataclass, field
+
+import backtrader as bt
+
+from commission.cost_model import AShareCostModel
+
+
+@dataclass
+class Execution:
+    """订单的成交信息，字段与 backtrader 的 `order.executed` 一致。"""
+
+    dt: float = 0.0
+    size: float = 0.0
+    price: float = 0.0
+    value: float = 0.0
+    comm: float = 0.0
+    pnl: float = 0.0
+
+
+@dataclass
+class OrderCreated:
+    """下单时的信息，字段与 backtrader 的 `order.created` 一致。"""
+
+    dt: float
+    size: float
+    price: float
+
+
+class Order:
+    """市价单，状态常量与 `bt.Order` 相同。"""
+
+    (
+        Created,
+        Submitted,
+        Accepted,
+        Partial,
+        Completed,
+        Canceled,
+        Expired,
+        Margin,
+        Rejected,
+    ) = range(9)
+    Status = bt.Order.Status
+    Buy, Sell = bt.Order.Buy, bt.Order.Sell
+    Market = bt.Order.Market
+
+    _refs = 0
+
+    def __init__(self, data, size: float, ordtype: int, created: OrderCreated):
+        Order._refs += 1
+        self.ref = Order._refs
+        self.data = data
+        self.size = size if ordtype == self.Buy else -size
+        self.ordtype = ordtype
+        self.exectype = self.Market
+        self.created = created
+        self.executed = Execution()
+        self.status = self.Created
+
+    def isbuy(self) -> bool:
+        return self.ordtype == self.Buy
+
+    def issell(self) -> bool:
+        return self.ordtype == self.Sell
+
+    def alive(self) -> bool:
+        return self.status in (self.Created, self.Submitted, self.Accepted)
+
+    def getstatusname(self, status: int | None = None) -> str:
+        return self.Status[self.status if status is None else status]
+
+    def clone(self) -> "Order":
+        order = object.__new__(Order)
+        order.__dict__.update(self.__dict__)
+        order.executed = Execution(**vars(self.executed))
+        return order
+
+    def __str__(self) -> str:
+        kind = "Buy" if self.isbuy() else "Sell"
+        return (
+            f"Ref: {self.ref}, OrdType: {kind}, Status: {self.getstatusname()}, "
+            f"Size: {self.size}, Price: {self.executed.price}"
+        )
+
+
+@dataclass
+class Position:
+    """持仓，`bool(position)` 表示是否持有。"""
+
+    size: float = 0.0
+    price: float = 0.0
+
+    def __bool__(self) -> bool:
+        return self.size != 0
+
+    def __len__(self) -> int:
+        return abs(int(self.size))
+
+
+@dataclass
+class Trade:
+    """一笔完整的交易（从开仓到平仓），字段与 backtrader 的 `Trade` 一致。"""
+
+    ref: int
+    size: float = 0.0
+    price: float = 0.0
+    value: float = 0.0
+    pnl: float = 0.0
+    commission: float = 0.0
+    isopen: bool = True
+    isclosed: bool = False
+    justopened: bool = True
+    dtopen: float = 0.0
+    dtclose: float = 0.0
+    barlen: int = 0
+    history: list = field(default_factory=list)
+
+    @property
+    def pnlcomm(self) -> float:
+        return self.pnl - self.commission
+
+    @property
+    def status(self) -> int:
+        return 2 if self.isclosed else 1
+
+
+class Broker:
+    """单只股票、只做多的模拟账户。
+
+    Args:
+        cash: 初始资金
+        cost_model: 交易成本模型，默认与 `MyStockCommissionScheme()` 的费率相同
+    """
+
+    def __init__(
+        self, cash: float = 100000.0, cost_model: AShareCostModel | None = None
+    ):
+        self.startingcash = self.cash = float(cash)
+        self.cost_model = cost_model or AShareCostModel.from_config({})
+        self.position = Position()
+        self.pending: list[Order] = []
+        self.trade: Trade | None = None
+        self._trades = 0
+        self._bought_today = 0.0
+        self._data = None
+
+    # --- 与 bt.BackBroker 相同的查询接口 ---
+    def getposition(self, data=None) -> Position:
+        return self.position
+
+    def getcash(self) -> float:
+        return self.cash
+
+    def getvalue(self, datas=None) -> float:
+        if not self.position.size:
+            return self.cash
+        return self.cash + self.position.size * self._data.close[0]
+
+    get_cash, get_value = getcash, getvalue
+
+    # --- 下单，由 bt.Strategy.buy/sell/close 调用 ---
+    def buy(self, owner, data, size, price=None, exectype=None, **kwargs) -> Order:
+        return self._submit(data, size, Order.Buy, exectype)
+
+    def sell(self, owner, data, size, price=None, exectype=None, **kwargs) -> Order:
+        return self._submit(data, size, Order.Sell, exectype)
+
+    def cancel(self, order: Order) -> bool:
+        if order not in self.pending:
+            return False
+        self.pending.remove(order)
+        order.status = Order.Canceled
+        return True
+
+    def _submit(self, data, size, ordtype, exectype) -> Order:
+        """提交市价单，在下一个 Bar 开盘时撮合。
+
+        Raises:
+            ValueError: 订单类型不是市价单，轻量引擎只支持市价单
+        """
+        if exectype not in (None, Order.Market):
+            raise ValueError(f"轻量引擎只支持市价单，不支持订单类型 {exectype}")
+        created = OrderCreated(dt=data.datetime[0], size=size, price=data.close[0])
+        order = Order(data, abs(size), ordtype, created)
+        self.pending.append(order)
+        return order
+
+    # --- 撮合，由引擎在每个 Bar 开始时调用 ---
+    def next(self, data) -> list:
+        """撮合上一个 Bar 提交的订单，返回按顺序排列的 (类型, 订单或交易) 通知。"""
+        self._bought_today = 0.0
+        notifications = []
+        orders, self.pending = self.pending, []
+        for order in orders:
+            if order.created.dt >= data.datetime[0]:  # 当前 Bar 提交的订单
+                self.pending.append(order)
+                continue
+            self._execute(order, data, notifications)
+        return notifications
+
+    def _execute(self, order: Order, data, notifications: list) -> None:
+        def notify(status):
+            order.status = status
+            notifications.append(("order", order.clone()))
+
+        notify(Order.Submitted)
+        size = order.size
+        fee = self.cost_model.fee
+        position = self.position
+
+        if size > 0:
+            # 提交检查：按下单时的收盘价估算资金
+            if (
+                self.cash
+                - (size * order.created.price + fee(size, order.created.price))
+                < 0
+            ):
+                notify(Order.Margin)
+                return
+        elif -size > position.size - self._bought_today:
+            notify(Order.Rejected)  # 不支持卖空，当天买入的不能卖出
+            return
+
+        notify(Order.Accepted)
+        price = data.open[0]
+        comm = fee(size, price)
+        dt = data.datetime[0]
+
+        if size > 0:
+            cost = size * price
+            if self.cash - cost - comm < 0:
+                notify(Order.Margin)
+                return
+            self.cash -= cost + comm
+            new_size = position.size + size
+            position.price = (position.size * position.price + cost) / new_size
+            position.size = new_size
+            self._bought_today += size
+            value, pnl = cost, 0.0
+        else:
+            value = -size * position.price
+            pnl = -size * (price - position.price)
+            self.cash += -size * price - comm
+            position.size += size
+            if not position.size:
+                position.price = 0.0
+
+        order.executed = Execution(
+            dt=dt, size=size, price=price, value=value, comm=comm, pnl=pnl
+        )
+        notify(Order.Completed)
+        self._update_trade(size, price, comm, pnl, dt, notifications)
+
+    def _update_trade(self, size, price, comm, pnl, dt, notifications) -> None:
+        trade = self.trade
+        if trade is None:
+            self._trades += 1
+            trade = self.trade = Trade(ref=self._trades, dtopen=dt)
+        else:
+            trade.justopened = False
+        trade.size += size
+        trade.commission += comm
+        trade.pnl += pnl
+        trade.price = self.position.price
+        trade.value = trade.size * trade.price
+        trade.history.append((dt, size, price, comm))
+        if not trade.size:
+            trade.isopen, trade.isclosed, trade.dtclose = False, True, dt
+            self.trade = None
+        notifications.append(("trade", trade))
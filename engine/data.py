@@ -0,0 +1,210 @@
+"""轻量引擎的行情和指标。
+
+取值方式与 backtrader 的 line 一致：`series[0]` 为当前 Bar，`series[-1]` 为前一个
+Bar，`series.get(size=10)` 为最近 10 个值。所有序列共享一个 `Clock`，引擎推进
+时只修改一个整数，不需要像 backtrader 那样逐条 line 移动指针。
+"""
+
+import numpy as np
+import pandas as pd
+
+from data.array_feed import to_datenum
+from indicators import ta
+from indicators.cache import IndicatorCache, IndicatorKey
+from indicators.lines import warmup_period
+
+_EPOCH = np.datetime64("0001-01-01", "D")
+
+
+class Clock:
+    """当前 Bar 的位置，`len(clock)` 为已处理的 Bar 数。"""
+
+    __slots__ = ("i",)
+
+    def __init__(self):
+        self.i = -1
+
+    def __len__(self) -> int:
+        return self.i + 1
+
+
+class Series:
+    """按当前 Bar 取值的序列。
+
+    Args:
+        values: 全部 Bar 的数值
+        clock: 共享的时钟
+    """
+
+    __slots__ = ("array", "values", "clock")
+
+    def __init__(self, values: np.ndarray, clock: Clock):
+        self.array = np.asarray(values, dtype=np.float64)
+        # Python 列表的下标访问比 NumPy 标量快得多，next() 中大量使用
+        self.values = self.array.tolist()
+        self.clock = clock
+
+    def __getitem__(self, ago: int) -> float:
+        return self.values[self.clock.i + ago]
+
+    def __len__(self) -> int:
+        return self.clock.i + 1
+
+    def get(self, ago: int = 0, size: int = 1) -> list[float]:
+        """截止到 `ago` 的最近 `size` 个值，与 backtrader 的 `line.get` 一致。"""
+        end = self.clock.i + ago + 1
+        return self.values[end - size : end]
+
+    def buflen(self) -> int:
+        return len(self.values)
+
+
+class DateSeries(Series):
+    """日期序列，数值为 backtrader 的日期数值。"""
+
+    __slots__ = ("_dates",)
+
+    def __init__(self, values: np.ndarray, clock: Clock, dates: np.ndarray):
+        super().__init__(values, clock)
+        self._dates = pd.DatetimeIndex(dates).to_pydatetime().tolist()
+
+    def datetime(self, ago: int = 0):
+        return self._dates[self.clock.i + ago]
+
+    def date(self, ago: int = 0):
+        return self.datetime(ago).date()
+
+
+class Lines:
+    """按名称访问的多条序列。"""
+
+    def __init__(self, series: dict[str, Series]):
+        self._names = tuple(series)
+        self.__dict__.update(series)
+
+    def getlinealiases(self) -> tuple[str, ...]:
+        return self._names
+
+    def __getitem__(self, index: int) -> Series:
+        return getattr(self, self._names[index])
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self._names)
+
+
+class LineGroup:
+    """数据源和指标的公共基类：按名称访问各条线，下标访问第一条线。"""
+
+    def __init__(self, series: dict[str, Series], clock: Clock):
+        self.lines = Lines(series)
+        self.clock = clock
+        self._first = next(iter(series.values()))
+
+    def __getattr__(self, name: str):
+        # 只在正常的属性查找失败时调用
+        lines = self.__dict__.get("lines")
+        if lines is None:
+            raise AttributeError(name)
+        return getattr(lines, name)
+
+    def __getitem__(self, ago: int) -> float:
+        return self._first[ago]
+
+    def __len__(self) -> int:
+        return self.clock.i + 1
+
+
+class Indicator(LineGroup):
+    """预先计算好的指标，`minperiod` 为第一个有效值所在的 Bar 数。"""
+
+    def __init__(self, arrays: dict[str, np.ndarray], clock: Clock):
+        super().__init__(
+            {name: Series(values, clock) for name, values in arrays.items()}, clock
+        )
+        self.minperiod = warmup_period(arrays)
+
+
+class BarData(LineGroup):
+    """轻量引擎的日线数据源。
+
+    Args:
+        datetime: 日期，datetime64 数组或 pandas 日期索引，升序
+        open, high, low, close, volume: 与日期等长的数组
+        name: 股票代码，用作指标缓存键
+    """
+
+    FIELDS = ("open", "high", "low", "close", "volume")
+
+    def __init__(self, datetime, open, high, low, close, volume, name: str = ""):
+        clock = Clock()
+        dates = np.asarray(datetime)
+        if not np.issubdtype(dates.dtype, np.datetime64):
+            # backtrader 的日期数值（公历序数）
+            days = np.floor(dates).astype(np.int64) - 1
+            dates = _EPOCH + days.astype("timedelta64[D]")
+        dates = dates.astype("datetime64[ns]")
+        arrays = {
+            "close": close,
+            "low": low,
+            "high": high,
+            "open": open,
+            "volume": volume,
+        }
+        series = {key: Series(values, clock) for key, values in arrays.items()}
+        series["openinterest"] = Series(np.zeros(len(dates)), clock)
+        series["datetime"] = DateSeries(to_datenum(dates), clock, dates)
+        super().__init__(series, clock)
+        self._name = name
+        # 策略创建的指标，引擎据此确定最小周期
+        self.indicators: list[Indicator] = []
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, name: str = "") -> "BarData":
+        """由日期索引、包含 open/high/low/close/volume 列的 DataFrame 构建。"""
+        return cls(
+            df.index.to_numpy(),
+            **{key: df[key].to_numpy(dtype=np.float64) for key in cls.FIELDS},
+            name=name,
+        )
+
+    def buflen(self) -> int:
+        return self.lines.close.buflen()
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        """OHLCV 数组，作为指标计算的输入。"""
+        return {key: getattr(self.lines, key).array for key in self.FIELDS}
+
+    def indicator(
+        self,
+        kind: str,
+        params: dict,
+        cache: IndicatorCache | None = None,
+        adj_type: str = "",
+        data_version: str | None = None,
+    ) -> Indicator:
+        """一次性计算整段行情的指标。
+
+        提供了缓存、数据源有名称和数据指纹时与 backtrader 路径共用缓存，
+        缓存键见 `indicators.lines.build_indicator`。
+        """
+
+        def compute():
+            return ta.compute(kind, self.arrays(), **params)
+
+        if cache is None or not self._name or not data_version:
+            arrays = compute()
+        else:
+            dates = self.lines.datetime
+            key = IndicatorKey.create(
+                self._name,
+                dates._dates[0].strftime("%Y%m%d"),
+                dates._dates[-1].strftime("%Y%m%d"),
+                adj_type,
+                data_version,
+                kind,
+                **params,
+            )
+            arrays = cache.get_or_compute(key, compute)
+        indicator = Indicator(arrays, self.clock)
+        self.indicators.append(indicator)
+        return indicator
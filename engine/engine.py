@@ -0,0 +1,136 @@
+"""轻量的逐 Bar 回测引擎。
+
+对单只股票、只做多的日线策略，backtrader 的通用机制（line 缓冲区、元类、面向
+所有资产类别的撮合）大部分是额外开销。`BarEngine` 直接运行现有的 `TradeStrategy`
+子类，不需要修改策略代码：
+
+* 策略实例绕过 backtrader 的元类创建，`self.data`、`self.broker`、`self.position`、
+  `len(self)` 由引擎提供，`buy`/`sell`/`close` 仍使用 `bt.Strategy` 的实现；
+* `self.indicator(...)` 创建的指标由 `indicators.ta` 一次性算好，与 backtrader
+  内置指标的取值和预热期一致；
+* 撮合和手续费见 `engine.broker`，与 backtrader 默认的 `BackBroker` 加
+  `MyStockCommissionScheme` 一致。
+
+策略只能通过 `self.indicator` 创建指标；直接使用 `bt.indicators` 的策略仍需
+使用 backtrader 运行。
+"""
+
+import numpy as np
+
+from analysis.metrics import FILL_DTYPE, RunRecord
+from commission.cost_model import AShareCostModel
+
+from .broker import Broker, Order
+from .data import BarData
+
+
+class FixedStake:
+    """与 backtrader 默认的 sizer 相同：不指定数量时每次交易 `stake` 股。"""
+
+    def __init__(self, stake: int = 1):
+        self.stake = stake
+
+    def getsizing(self, data, isbuy: bool) -> int:
+        return self.stake
+
+
+class BarEngine:
+    """单只股票的逐 Bar 回测引擎。
+
+    Args:
+        cash: 初始资金
+        cost_model: 交易成本模型，默认与 `config.toml` 的 [broker] 默认值相同
+        stake: 下单时不指定数量的默认股数
+    """
+
+    def __init__(
+        self,
+        cash: float = 100000.0,
+        cost_model: AShareCostModel | None = None,
+        stake: int = 1,
+    ):
+        self.broker = Broker(cash, cost_model)
+        self.stake = stake
+        self.strategy = None
+        self._dates: list = []
+        self._equity: list[float] = []
+        self._invested: list[float] = []
+        self._fills: list[tuple] = []
+        self._trade_pnl: list[float] = []
+        self._traded_value = 0.0
+
+    def _create(self, strategy_class: type, data: BarData, params: dict):
+        # 不经过 backtrader 的元类，只提供策略用到的属性
+        strategy = object.__new__(strategy_class)
+        strategy.lines = data.clock  # len(strategy) 为已处理的 Bar 数
+        strategy.datas = [data]
+        strategy.data = strategy.data0 = data
+        strategy.broker = self.broker
+        strategy.env = self
+        strategy._sizer = FixedStake(self.stake)
+        strategy_class.__init__(strategy, **params)
+        return strategy
+
+    def run(self, strategy_class: type, data: BarData, **params):
+        """运行回测。
+
+        Args:
+            strategy_class: `TradeStrategy` 的子类
+            data: 数据源
+            **params: 策略参数
+
+        Returns:
+            运行结束后的策略实例
+        """
+        broker = self.broker
+        broker._data = data
+        strategy = self.strategy = self._create(strategy_class, data, params)
+        minperiod = max([1, *(ind.minperiod for ind in data.indicators)])
+
+        close = data.lines.close
+        dates = data.lines.datetime
+        position = broker.position
+        strategy.start()
+        for i in range(data.buflen()):
+            data.clock.i = i
+            if broker.pending:
+                for kind, item in broker.next(data):
+                    if kind == "order":
+                        if item.status == Order.Completed:
+                            size, price = item.executed.size, item.executed.price
+                            self._traded_value += abs(size * price)
+                            self._fills.append((dates.date(0), size, price))
+                        strategy.notify_order(item)
+                    else:
+                        if item.isclosed:
+                            self._trade_pnl.append(item.pnlcomm)
+                        strategy.notify_trade(item)
+
+            if i + 1 > minperiod:
+                strategy.next()
+            elif i + 1 == minperiod:
+                strategy.nextstart()
+            else:
+                strategy.prenext()
+
+            self._dates.append(dates[0])
+            self._equity.append(broker.getvalue())
+            self._invested.append(abs(position.size * close[0]))
+        strategy.stop()
+        return strategy
+
+    def record(self, label: dict | None = None) -> RunRecord:
+        """资金曲线和成交记录，与 `analysis.EquityRecorder` 的结果格式相同。"""
+        equity = np.asarray(self._equity, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            exposure = np.asarray(self._invested, dtype=np.float64) / equity
+        days = np.floor(np.asarray(self._dates, dtype=np.float64)).astype(np.int64)
+        return RunRecord(
+            dates=np.datetime64("0001-01-01", "D") + (days - 1),
+            equity=equity,
+            exposure=exposure,
+            trade_pnl=np.asarray(self._trade_pnl, dtype=np.float64),
+            traded_value=self._traded_value,
+            label=dict(label or {}),
+            fills=np.array(self._fills, dtype=FILL_DTYPE),
+        )
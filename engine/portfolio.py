@@ -0,0 +1,288 @@
+"""全市场组合回测。
+
+把几百只股票的数据源加入同一个 Cerebro 时，backtrader 每个 Bar 都要同步全部
+数据源，速度随股票数急剧下降。轮动策略（例如每周按因子选前 N 只等权持有）只在
+调仓日交易，`PortfolioEngine` 直接在 (股票 × 日期) 面板上模拟：
+
+* 输入为各调仓日的目标权重（`pd.DataFrame`，索引为信号日期，列为股票代码），
+  信号日收盘后产生，下一个交易日以开盘价成交；
+* 先卖后买，买入按整手向下取整，资金不足时按比例缩减全部买单；
+* 停牌（当天没有开盘价）的股票不能交易，开盘即涨停的不能买入，开盘即跌停的
+  不能卖出，这些股票保持原有持仓；
+* 手续费、印花税、过户费和滑点由 `AShareCostModel` 计算；
+* 每只股票每天最多一笔净成交，且只在开盘成交，当天买入的股票最早在下一个
+  调仓日卖出，天然满足 T+1。
+
+调仓日之间持仓不变，逐日市值用一次矩阵乘法算出，整个回测只在调仓日循环。
+
+    weights = top_n_weights(factor, codes, dates, n=50, at=rebalance_dates(dates, "W"))
+    result = PortfolioEngine(1_000_000, cost_model).run(panel, weights)
+    summarize([result.record])
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from analysis.metrics import RunRecord
+from commission.cost_model import AShareCostModel
+from data.panel import DailyPanel, _ffill
+
+# 判断开盘涨跌停时允许的误差，复权价格的比值与实际涨跌幅有微小差异
+_LIMIT_TOLERANCE = 1e-3
+# 资金不足时缩减买单的最大次数
+_MAX_SCALE_STEPS = 20
+
+
+@dataclass
+class PortfolioResult:
+    """组合回测结果。
+
+    Attributes:
+        record: 资金曲线和交易统计，可直接用于 `analysis.summarize`
+        trades: 成交明细，列为 date, ts_code, size（卖出为负）, price, fee
+        positions: 回测结束时的持仓股数，以股票代码为索引
+        blocked: 因停牌或涨跌停未能成交的订单数
+    """
+
+    record: RunRecord
+    trades: pd.DataFrame
+    positions: pd.Series
+    blocked: int = 0
+
+
+def rebalance_dates(dates, freq: str | int = "W") -> np.ndarray:
+    """选出调仓日（信号日）。
+
+    Args:
+        dates: 交易日期，格式为 'YYYYMMDD'，升序
+        freq: "W" 为每周最后一个交易日，"M" 为每月最后一个交易日，
+            整数 n 为每隔 n 个交易日
+
+    Returns:
+        调仓日期数组
+    """
+    dates = np.asarray(dates, dtype=str)
+    if isinstance(freq, int):
+        return dates[freq - 1 :: freq]
+    index = pd.to_datetime(dates, format="%Y%m%d")
+    if freq == "W":
+        calendar = index.isocalendar()
+        period = calendar.year.to_numpy() * 100 + calendar.week.to_numpy()
+    elif freq == "M":
+        period = index.year * 100 + index.month
+    else:
+        raise ValueError(f"不支持的调仓频率: {freq}")
+    period = np.asarray(period)
+    last = np.append(period[1:] != period[:-1], True)
+    return dates[last]
+
+
+def top_n_weights(
+    values: np.ndarray,
+    codes,
+    dates,
+    n: int,
+    at=None,
+    ascending: bool = False,
+) -> pd.DataFrame:
+    """按因子值选前 N 只股票等权持有。
+
+    Args:
+        values: 因子值，形状为 (股票数, 日期数)，NaN 的股票不入选
+        codes: 股票代码
+        dates: 交易日期
+        n: 持有的股票数量
+        at: 调仓日期，默认为全部日期
+        ascending: 为 True 时选因子值最小的股票
+
+    Returns:
+        目标权重，索引为调仓日期，列为股票代码
+    """
+    dates = np.asarray(dates, dtype=str)
+    at = dates if at is None else np.asarray(at, dtype=str)
+    columns = np.searchsorted(dates, at)
+    selected = pd.DataFrame(values[:, columns]).rank(
+        axis=0, ascending=ascending, method="first"
+    )
+    chosen = (selected <= n).to_numpy()
+    counts = chosen.sum(axis=0)
+    weights = np.where(chosen, 1.0 / np.maximum(counts, 1), 0.0)
+    return pd.DataFrame(weights.T, index=at, columns=np.asarray(codes, dtype=str))
+
+
+class PortfolioEngine:
+    """在行情面板上按目标权重调仓的组合回测引擎。
+
+    Args:
+        cash: 初始资金
+        cost_model: 交易成本模型，默认与 `MyStockCommissionScheme()` 的费率相同
+        price_limit: 涨跌停幅度，为 0 时不检查涨跌停
+    """
+
+    def __init__(
+        self,
+        cash: float = 1_000_000.0,
+        cost_model: AShareCostModel | None = None,
+        price_limit: float = 0.1,
+    ):
+        self.cash = cash
+        self.cost_model = cost_model or AShareCostModel.from_config({})
+        self.price_limit = price_limit
+
+    def _schedule(self, panel: DailyPanel, weights: pd.DataFrame):
+        """把信号日期映射到下一个交易日（成交日），同一成交日只保留最后一个信号。"""
+        weights = weights.sort_index()
+        signal_dates = weights.index.astype(str).to_numpy()
+        execute = np.searchsorted(panel.dates, signal_dates, side="right")
+        target = weights.T.reindex(panel.codes).fillna(0.0).to_numpy(dtype=np.float64)
+        if (target < 0).any():
+            raise ValueError("目标权重不能为负数，组合回测不支持卖空")
+        keep = execute < len(panel.dates)
+        keep &= np.append(execute[1:] != execute[:-1], True)
+        return execute[keep], target[:, keep]
+
+    def run(
+        self, panel: DailyPanel, weights: pd.DataFrame, label: dict | None = None
+    ) -> PortfolioResult:
+        """运行组合回测。
+
+        Args:
+            panel: 日线行情面板，停牌日为 NaN（不要先填充）
+            weights: 目标权重，索引为信号日期（'YYYYMMDD'），列为股票代码；
+                不在面板中的股票被忽略，权重之和超过 1 时按比例缩小
+            label: 结果标签
+
+        Returns:
+            组合回测结果
+        """
+        costs = self.cost_model
+        n_stocks, n_dates = panel.shape
+        mark = _ffill(panel.close)
+        prev_close = np.full(mark.shape, np.nan)
+        prev_close[:, 1:] = mark[:, :-1]
+        mark = np.nan_to_num(mark)
+        execute, targets = self._schedule(panel, weights)
+
+        shares = np.zeros(n_stocks)
+        cost_basis = np.zeros(n_stocks)  # 持仓成本，含买入手续费
+        realized = np.zeros(n_stocks)  # 当前这笔持仓已实现的盈亏
+        cash = float(self.cash)
+        equity = np.full(n_dates, cash)
+        invested = np.zeros(n_dates)
+        trade_pnl: list[np.ndarray] = []
+        trades: list[tuple] = []
+        traded_value = 0.0
+        blocked = 0
+
+        def value(start: int, end: int) -> None:
+            held = shares @ mark[:, start:end]
+            invested[start:end] = held
+            equity[start:end] = cash + held
+
+        start = 0
+        for column, target in zip(execute, targets.T):
+            value(start, column)
+            start = column
+
+            open_ = panel.open[:, column]
+            tradable = ~np.isnan(open_)
+            price = np.where(tradable, open_, mark[:, column - 1] if column else 0.0)
+            total = cash + shares @ price
+            weight_sum = target.sum()
+            if weight_sum > 1:
+                target = target / weight_sum
+            with np.errstate(divide="ignore", invalid="ignore"):
+                wanted = np.where(price > 0, target * total / price, 0.0)
+            delta = costs.round_lot(wanted) - shares
+
+            if self.price_limit > 0:
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    change = open_ / prev_close[:, column] - 1
+                limit = self.price_limit - _LIMIT_TOLERANCE
+                limit_up = change >= limit
+                limit_down = change <= -limit
+            else:
+                limit_up = limit_down = np.zeros(n_stocks, dtype=bool)
+            stuck = ((delta > 0) & limit_up) | ((delta < 0) & limit_down)
+            stuck |= (delta != 0) & ~tradable
+            blocked += int(stuck.sum())
+            delta[stuck] = 0.0
+
+            # 卖出
+            sells = np.flatnonzero(delta < 0)
+            if len(sells):
+                size = delta[sells]
+                fill = costs.execution_price(size, open_[sells])
+                fee = costs.fees(size, fill)
+                proceeds = -size * fill - fee
+                sold = -size / shares[sells]
+                cost = cost_basis[sells] * sold
+                realized[sells] += proceeds - cost
+                cost_basis[sells] -= cost
+                shares[sells] += size
+                cash += proceeds.sum()
+                traded_value += float((-size * fill).sum())
+                trades.append((column, sells, size, fill, fee))
+                closed = sells[shares[sells] == 0]
+                if len(closed):
+                    trade_pnl.append(realized[closed].copy())
+                    realized[closed] = 0.0
+                    cost_basis[closed] = 0.0
+
+            # 买入，资金不足时按比例缩减
+            buys = np.flatnonzero(delta > 0)
+            if len(buys):
+                size = delta[buys]
+                fill = costs.execution_price(size, open_[buys])
+                for _ in range(_MAX_SCALE_STEPS):
+                    fee = costs.fees(size, fill)
+                    need = float((size * fill + fee).sum())
+                    if need <= cash:
+                        break
+                    size = costs.round_lot(size * (cash / need) * 0.999)
+                else:
+                    size = fee = np.zeros_like(size)
+                keep = size > 0
+                buys, size, fill, fee = buys[keep], size[keep], fill[keep], fee[keep]
+                cost_basis[buys] += size * fill + fee
+                shares[buys] += size
+                cash -= float((size * fill + fee).sum())
+                traded_value += float((size * fill).sum())
+                trades.append((column, buys, size, fill, fee))
+        value(start, n_dates)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            exposure = invested / equity
+        dates = pd.to_datetime(panel.dates, format="%Y%m%d").to_numpy("datetime64[D]")
+        record = RunRecord(
+            dates=dates,
+            equity=equity,
+            exposure=exposure,
+            trade_pnl=np.concatenate(trade_pnl) if trade_pnl else np.empty(0),
+            traded_value=traded_value,
+            label=dict(label or {}),
+        )
+        return PortfolioResult(
+            record=record,
+            trades=_trade_frame(panel, trades),
+            positions=pd.Series(shares, index=panel.codes)[shares != 0],
+            blocked=blocked,
+        )
+
+
+def _trade_frame(panel: DailyPanel, trades: list[tuple]) -> pd.DataFrame:
+    if not trades:
+        return pd.DataFrame(columns=["date", "ts_code", "size", "price", "fee"])
+    return pd.DataFrame(
+        {
+            "date": np.concatenate(
+                [np.full(len(rows), panel.dates[col]) for col, rows, *_ in trades]
+            ),
+            "ts_code": np.concatenate([panel.codes[rows] for _, rows, *_ in trades]),
+            "size": np.concatenate([t[2] for t in trades]),
+            "price": np.concatenate([t[3] for t in trades]),
+            "fee": np.concatenate([t[4] for t in trades]),
+        }
+    )
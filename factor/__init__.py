@@ -0,0 +1,17 @@
+from . import ops
+from .engine import FactorEngine, FactorValues, update_factors
+from .library import FACTORS, Factor, FactorContext, get_factor, register_factor
+from .store import FactorStore
+
+__all__ = [
+    "FACTORS",
+    "Factor",
+    "FactorContext",
+    "FactorEngine",
+    "FactorStore",
+    "FactorValues",
+    "get_factor",
+    "ops",
+    "register_factor",
+    "update_factors",
+]
@@ -0,0 +1,263 @@
+"""截面因子计算引擎。
+
+一次性从数据库读取全市场的 (股票 × 日期) 面板，在面板上向量化计算全部因子，
+不再逐只股票调用 `get_daily_price` 再做 pandas groupby。启用 `FactorStore` 时，
+已经算过的交易日直接读取缓存，只计算缺失的日期：每天收盘更新数据库后再运行
+一次，只会读取最新一天加上各因子预热期的数据，计算并写入新的一行。
+
+    engine = FactorEngine(reader, FactorStore("results/factors"))
+    values = engine.compute(["momentum_20", "volatility_20"], "20240101")
+    values.frame("momentum_20")          # 日期 × 股票的 DataFrame
+    values.cross_section("20241231")     # 某一天 股票 × 因子的 DataFrame
+
+默认使用后复权价格：历史价格不随新的复权因子变化，缓存的历史因子值保持有效。
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from data.db_reader import StockDBReader
+from data.panel import DailyPanel
+from monitor import phase
+
+from .library import Factor, FactorContext, get_factor
+from .store import FactorStore
+
+UNKNOWN_INDUSTRY = "未知"
+DEFAULT_FACTOR_CONFIG = {
+    "names": ["momentum_20", "volatility_20", "momentum_20_neutral"],
+    "start_date": "",  # 为空时只计算最新的 `bars` 个交易日
+    "bars": 250,
+    "directory": "results/factors",  # 为空则不缓存
+    "list_status": [],
+    "top": 20,
+}
+
+
+@dataclass
+class FactorValues:
+    """因子计算结果。
+
+    Attributes:
+        codes: 股票代码
+        dates: 交易日期，格式为 'YYYYMMDD'，升序
+        values: 因子名到形状为 (股票数, 日期数) 的数组的映射，停牌、
+            尚未上市或预热期不足时为 NaN
+    """
+
+    codes: np.ndarray
+    dates: np.ndarray
+    values: dict[str, np.ndarray]
+
+    def frame(self, name: str) -> pd.DataFrame:
+        """一个因子的 日期 × 股票 表。"""
+        return pd.DataFrame(self.values[name].T, index=self.dates, columns=self.codes)
+
+    def cross_section(self, date: str) -> pd.DataFrame:
+        """某一天全部因子的截面，以股票代码为索引，去掉全部为 NaN 的股票。"""
+        column = int(np.searchsorted(self.dates, date))
+        if column >= len(self.dates) or self.dates[column] != date:
+            raise KeyError(f"没有 {date} 的因子值")
+        df = pd.DataFrame(
+            {name: values[:, column] for name, values in self.values.items()},
+            index=pd.Index(self.codes, name="ts_code"),
+        )
+        return df.dropna(how="all")
+
+
+class FactorEngine:
+    """在全市场面板上计算截面因子。
+
+    Args:
+        reader: 数据库读取器
+        store: 因子缓存，为 None 时每次都重新计算
+        adj_type: 复权方式，必须与 `store.adj_type` 相同；前复权（qfq）不能启用缓存
+        list_status: 上市状态筛选，例如 ['L']，为空则不筛选
+
+    Raises:
+        ValueError: 复权方式与缓存不一致，或者前复权时启用了缓存
+    """
+
+    def __init__(
+        self,
+        reader: StockDBReader | None = None,
+        store: FactorStore | None = None,
+        adj_type: str = "hfq",
+        list_status: list[str] | None = None,
+    ):
+        if store is not None:
+            if store.adj_type != adj_type:
+                raise ValueError(
+                    f"因子缓存的复权方式 {store.adj_type} 与计算使用的 {adj_type} 不一致"
+                )
+            if adj_type == "qfq":
+                # 前复权价格在每个除权日后都会变化，缓存的历史因子值随之失效
+                raise ValueError(
+                    "前复权（qfq）的因子值不能缓存，请使用 hfq 或不启用缓存"
+                )
+        self.reader = reader or StockDBReader()
+        self.store = store
+        self.adj_type = adj_type
+        self.list_status = list_status
+
+    def context(self, panel: DailyPanel) -> FactorContext:
+        """由行情面板构建因子函数的输入，行业取自 `stock_basic`。
+
+        面板开头仍在停牌的股票用停牌前的收盘价填充，使增量计算与全量计算的
+        结果一致（前复权时无法得到一致的停牌前价格，不填充）。
+        """
+        codes = panel.codes.tolist()
+        industry = self.reader.get_stock_basic(codes)["industry"]
+        names = industry.fillna(UNKNOWN_INDUSTRY).to_numpy(dtype=str)
+        industries, groups = np.unique(names, return_inverse=True)
+        last_close = None
+        if codes and self.adj_type != "qfq":
+            suspended = np.isnan(panel.close[:, 0])
+            last_close = np.full(len(codes), np.nan)
+            if suspended.any():
+                last_close[suspended] = self.reader.get_last_close(
+                    list(panel.codes[suspended]), panel.dates[0], self.adj_type
+                ).to_numpy()
+        return FactorContext(
+            panel=panel.fill_suspensions(last_close),
+            trading=~np.isnan(panel.close),
+            industry=groups,
+            industries=industries,
+        )
+
+    def compute(
+        self, names: list[str], start_date: str, end_date: str | None = None
+    ) -> FactorValues:
+        """计算区间内每个交易日的因子值。
+
+        Args:
+            names: 因子名称
+            start_date: 开始日期，格式为 'YYYYMMDD'
+            end_date: 结束日期，格式为 'YYYYMMDD'，默认为数据库中的最新日期
+
+        Returns:
+            因子计算结果
+        """
+        with phase("factors"):
+            factors = [get_factor(name) for name in names]
+            dates = self.reader.get_trade_dates(start_date, end_date)
+            # 每个因子每天的截面：(股票代码, 因子值)
+            sections: dict[str, dict[str, tuple[np.ndarray, np.ndarray]]] = {
+                factor.name: {} for factor in factors
+            }
+            missing: dict[str, list[str]] = {}
+            with phase("cache"):
+                for factor in factors:
+                    cached = (
+                        self.store.dates(factor) if self.store is not None else set()
+                    )
+                    for date in dates:
+                        section = (
+                            self.store.get(factor, date) if date in cached else None
+                        )
+                        if section is None:
+                            missing.setdefault(factor.name, []).append(date)
+                        else:
+                            sections[factor.name][date] = section
+
+            if missing:
+                todo = [factor for factor in factors if factor.name in missing]
+                computed = self._compute(todo, missing, dates)
+                for name, by_date in computed.items():
+                    sections[name].update(by_date)
+            return _assemble(sections, np.asarray(dates, dtype=str))
+
+    def _compute(
+        self, factors: list[Factor], missing: dict[str, list[str]], dates: list[str]
+    ) -> dict[str, dict[str, tuple[np.ndarray, np.ndarray]]]:
+        """读取覆盖缺失日期和预热期的面板，计算并缓存缺失日期的因子值。"""
+        first = min(min(missing[factor.name]) for factor in factors)
+        new_dates = len(dates) - dates.index(first)
+        window = max(factor.window for factor in factors)
+        with phase("load"):
+            panel = self.reader.get_daily_panel(
+                last_n=new_dates + window,
+                end_date=dates[-1],
+                adj_type=self.adj_type,
+                list_status=self.list_status,
+            )
+            ctx = self.context(panel)
+
+        columns = {date: i for i, date in enumerate(panel.dates)}
+        out = {}
+        for factor in factors:
+            with phase(factor.name):
+                values = np.asarray(factor.func(ctx), dtype=np.float64)
+                values = np.where(ctx.trading, values, np.nan)
+            by_date = {}
+            for date in missing[factor.name]:
+                column = columns.get(date)
+                if column is None:
+                    continue
+                by_date[date] = (panel.codes, values[:, column])
+                if self.store is not None:
+                    self.store.put(factor, date, panel.codes, values[:, column])
+            out[factor.name] = by_date
+        return out
+
+
+def _assemble(
+    sections: dict[str, dict[str, tuple[np.ndarray, np.ndarray]]], dates: np.ndarray
+) -> FactorValues:
+    """把逐日的截面拼成稠密的 (股票 × 日期) 数组。"""
+    parts = [codes for by_date in sections.values() for codes, _ in by_date.values()]
+    codes = np.unique(np.concatenate(parts)).astype(str) if parts else np.array([])
+    values = {}
+    for name, by_date in sections.items():
+        dense = np.full((len(codes), len(dates)), np.nan)
+        for column, date in enumerate(dates):
+            section = by_date.get(date)
+            if section is not None:
+                dense[np.searchsorted(codes, section[0]), column] = section[1]
+        values[name] = dense
+    return FactorValues(codes=codes, dates=dates, values=values)
+
+
+def update_factors(config: dict, reader: StockDBReader | None = None) -> FactorValues:
+    """按配置计算（增量更新）因子，打印最新一天的截面。
+
+    Args:
+        config: `config/config.toml` 的内容，因子设置见 [factor] 部分
+        reader: 数据库读取器
+
+    Returns:
+        因子计算结果
+    """
+    factor_config = {**DEFAULT_FACTOR_CONFIG, **config.get("factor", {})}
+    reader = reader or StockDBReader()
+    directory = factor_config["directory"]
+    engine = FactorEngine(
+        reader,
+        FactorStore(directory) if directory else None,
+        list_status=factor_config["list_status"] or None,
+    )
+    start_date = factor_config["start_date"]
+    if not start_date:
+        dates = reader.get_trade_dates("00000000")
+        if not dates:
+            print("数据库中没有行情数据。")
+            return FactorValues(np.array([]), np.array([]), {})
+        start_date = dates[-factor_config["bars"] :][0]
+
+    started = time.perf_counter()
+    values = engine.compute(factor_config["names"], start_date)
+    print(
+        f"因子计算完成: {len(factor_config['names'])} 个因子, "
+        f"{len(values.dates)} 个交易日, {len(values.codes)} 只股票, "
+        f"耗时 {time.perf_counter() - started:.2f}s"
+    )
+    if len(values.dates):
+        section = values.cross_section(values.dates[-1])
+        first = factor_config["names"][0]
+        print(f"{values.dates[-1]} 按 {first} 排序:")
+        top = section.sort_values(first, ascending=False).head(factor_config["top"])
+        print(top.to_string(float_format=lambda x: f"{x:.4f}"))
+    return values
@@ -0,0 +1,153 @@
+"""因子定义与内置因子。
+
+因子是一个函数，输入 `FactorContext`（一段 (股票 × 日期) 行情面板），返回
+同样形状的因子值数组。用 `register_factor` 注册后即可按名称计算和缓存：
+
+    @register_factor("momentum_60", window=60)
+    def momentum_60(ctx):
+        return ctx.cross_section(ops.pct_change(ctx.close, 60))
+
+`window` 是计算某一天的因子值最多需要往前看的交易日数量，增量更新时只读取
+新日期加上这段预热期的数据。因子函数的源代码摘要作为版本号，修改定义后旧的
+缓存自动失效。
+"""
+
+import hashlib
+import inspect
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+
+from data.panel import DailyPanel
+
+from . import ops
+
+
+@dataclass(frozen=True)
+class Factor:
+    """一个已注册的因子。
+
+    Attributes:
+        name: 因子名称
+        func: 计算函数，输入 `FactorContext`，返回 (股票 × 日期) 的数组
+        window: 预热期，计算一天的因子值需要的历史交易日数量
+        version: 计算函数源代码的摘要
+    """
+
+    name: str
+    func: Callable[["FactorContext"], np.ndarray]
+    window: int
+    version: str
+
+
+@dataclass
+class FactorContext:
+    """因子函数的输入。
+
+    行情字段中停牌日的价格已按停牌前收盘价填充、成交量为 0，时间序列算子可以
+    直接跨越停牌计算；`trading` 标记每只股票每天是否正常交易，因子引擎最终把
+    非交易日的因子值置为 NaN。截面计算前应先调用 `cross_section`，让停牌的股票
+    不参与当天的排名和标准化。
+
+    Attributes:
+        panel: 停牌已填充的行情面板
+        trading: 是否正常交易，形状为 (股票数, 日期数)
+        industry: 每只股票的行业编号，形状为 (股票数,)
+        industries: 行业名称，下标与行业编号对应
+    """
+
+    panel: DailyPanel
+    trading: np.ndarray
+    industry: np.ndarray
+    industries: np.ndarray
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.panel.open
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.panel.high
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.panel.low
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.panel.close
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.panel.volume
+
+    def cross_section(self, x: np.ndarray) -> np.ndarray:
+        """把非交易日的值置为 NaN，用于截面算子之前。"""
+        return np.where(self.trading, x, np.nan)
+
+    def neutralize(self, x: np.ndarray) -> np.ndarray:
+        """按 `stock_basic` 的行业做中性化。"""
+        return ops.neutralize(x, self.industry)
+
+
+FACTORS: dict[str, Factor] = {}
+
+
+def register_factor(name: str, window: int):
+    """注册因子的装饰器。
+
+    Args:
+        name: 因子名称
+        window: 预热期（交易日）
+    """
+
+    def decorator(func):
+        source = inspect.getsource(func)
+        version = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        FACTORS[name] = Factor(name=name, func=func, window=window, version=version)
+        return func
+
+    return decorator
+
+
+def get_factor(name: str) -> Factor:
+    factor = FACTORS.get(name)
+    if factor is None:
+        raise ValueError(f"没有因子 '{name}'，可用的因子: {', '.join(sorted(FACTORS))}")
+    return factor
+
+
+# --- 内置因子 ---
+@register_factor("momentum_20", window=20)
+def momentum_20(ctx: FactorContext) -> np.ndarray:
+    """20 日动量。"""
+    return ops.pct_change(ctx.close, 20)
+
+
+@register_factor("reversal_5", window=5)
+def reversal_5(ctx: FactorContext) -> np.ndarray:
+    """5 日反转：近 5 日收益率取负。"""
+    return -ops.pct_change(ctx.close, 5)
+
+
+@register_factor("volatility_20", window=21)
+def volatility_20(ctx: FactorContext) -> np.ndarray:
+    """20 日收益率标准差，停牌日不计入。"""
+    returns = ctx.cross_section(ops.pct_change(ctx.close, 1))
+    return ops.rolling_std(returns, 20, min_periods=10)
+
+
+@register_factor("volume_ratio_20", window=20)
+def volume_ratio_20(ctx: FactorContext) -> np.ndarray:
+    """量比：当日成交量与过去 20 个交易日平均成交量之比。"""
+    volume = ctx.cross_section(ctx.volume)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return volume / ops.rolling_mean(volume, 20, min_periods=10)
+
+
+@register_factor("momentum_20_neutral", window=20)
+def momentum_20_neutral(ctx: FactorContext) -> np.ndarray:
+    """行业中性化、去极值并标准化的 20 日动量。"""
+    momentum = ctx.cross_section(ops.pct_change(ctx.close, 20))
+    return ops.zscore(ops.winsorize(ctx.neutralize(momentum)))
@@ -0,0 +1,179 @@
+"""因子算子。
+
+输入都是形状为 (股票数, 日期数) 的二维数组，与 `data.panel.DailyPanel` 一致：
+
+* 时间序列算子（`delay`、`rolling_mean` 等）沿日期方向（最后一个轴）计算，
+  窗口内的 NaN 被跳过，有效值不足 `min_periods` 个时结果为 NaN；
+* 截面算子（`rank`、`zscore`、`neutralize` 等）在每个交易日的全部股票之间计算，
+  NaN（停牌、尚未上市）不参与计算，结果仍为 NaN。
+
+全部为向量化实现，不逐股票或逐日期循环。
+"""
+
+import numpy as np
+import pandas as pd
+
+# MAD 换算为正态分布标准差的系数
+_MAD_SCALE = 1.4826
+
+
+# --- 时间序列算子 ---
+def delay(x: np.ndarray, n: int = 1) -> np.ndarray:
+    """n 个交易日之前的值。"""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if n < x.shape[-1]:
+        out[..., n:] = x[..., : x.shape[-1] - n]
+    return out
+
+
+def delta(x: np.ndarray, n: int = 1) -> np.ndarray:
+    """与 n 个交易日之前的差值。"""
+    return x - delay(x, n)
+
+
+def pct_change(x: np.ndarray, n: int = 1) -> np.ndarray:
+    """n 个交易日的收益率。"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return x / delay(x, n) - 1.0
+
+
+def _window_sums(x: np.ndarray, window: int, power: int = 1):
+    """窗口内有效值的个数与（幂次）和，用累加和的差实现。"""
+    x = np.asarray(x, dtype=np.float64)
+    valid = ~np.isnan(x)
+    values = np.where(valid, x, 0.0) ** power
+    pad = [(0, 0)] * (x.ndim - 1) + [(1, 0)]
+    csum = np.pad(np.cumsum(values, axis=-1), pad)
+    ccount = np.pad(np.cumsum(valid, axis=-1), pad)
+    start = np.maximum(np.arange(1, x.shape[-1] + 1) - window, 0)
+    end = np.arange(1, x.shape[-1] + 1)
+    return ccount[..., end] - ccount[..., start], csum[..., end] - csum[..., start]
+
+
+def rolling_sum(
+    x: np.ndarray, window: int, min_periods: int | None = None
+) -> np.ndarray:
+    """滚动求和。"""
+    count, total = _window_sums(x, window)
+    return np.where(count >= (min_periods or window), total, np.nan)
+
+
+def rolling_mean(
+    x: np.ndarray, window: int, min_periods: int | None = None
+) -> np.ndarray:
+    """滚动平均。"""
+    count, total = _window_sums(x, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(count >= (min_periods or window), total / count, np.nan)
+
+
+def rolling_std(
+    x: np.ndarray, window: int, min_periods: int | None = None
+) -> np.ndarray:
+    """滚动样本标准差（ddof=1）。"""
+    # 先减去各股票的均值，减小平方和相减时的舍入误差
+    x = np.asarray(x, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        center = np.nanmean(x, axis=-1, keepdims=True) if x.size else 0.0
+    x = x - np.nan_to_num(center)
+    count, total = _window_sums(x, window)
+    _, squares = _window_sums(x, window, power=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (squares - total**2 / count) / (count - 1)
+    enough = count >= max(min_periods or window, 2)
+    return np.where(enough, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+
+def _rolling_extreme(x: np.ndarray, window: int, min_periods, func, fill):
+    x = np.asarray(x, dtype=np.float64)
+    count, _ = _window_sums(x, window)
+    pad = [(0, 0)] * (x.ndim - 1) + [(window - 1, 0)]
+    padded = np.pad(np.where(np.isnan(x), fill, x), pad, constant_values=fill)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=-1)
+    return np.where(count >= (min_periods or window), func(windows, axis=-1), np.nan)
+
+
+def rolling_max(
+    x: np.ndarray, window: int, min_periods: int | None = None
+) -> np.ndarray:
+    """滚动最大值。"""
+    return _rolling_extreme(x, window, min_periods, np.max, -np.inf)
+
+
+def rolling_min(
+    x: np.ndarray, window: int, min_periods: int | None = None
+) -> np.ndarray:
+    """滚动最小值。"""
+    return _rolling_extreme(x, window, min_periods, np.min, np.inf)
+
+
+# --- 截面算子 ---
+def _cross_section_stats(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """每个交易日的截面均值和标准差（ddof=0）。"""
+    valid = ~np.isnan(x)
+    count = valid.sum(axis=0)
+    values = np.where(valid, x, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = values.sum(axis=0) / count
+        var = (np.where(valid, x - mean, 0.0) ** 2).sum(axis=0) / count
+    return mean, np.sqrt(var)
+
+
+def rank(x: np.ndarray) -> np.ndarray:
+    """截面百分位排名，取值 (0, 1]，相同的值取平均排名。"""
+    x = np.asarray(x, dtype=np.float64)
+    return pd.DataFrame(x).rank(axis=0, pct=True).to_numpy()
+
+
+def zscore(x: np.ndarray) -> np.ndarray:
+    """截面标准化：减去当日均值后除以当日标准差。"""
+    x = np.asarray(x, dtype=np.float64)
+    mean, std = _cross_section_stats(x)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(std > 0, (x - mean) / std, np.nan)
+
+
+def demean(x: np.ndarray) -> np.ndarray:
+    """减去当日的截面均值。"""
+    x = np.asarray(x, dtype=np.float64)
+    mean, _ = _cross_section_stats(x)
+    return x - mean
+
+
+def winsorize(x: np.ndarray, k: float = 3.0) -> np.ndarray:
+    """中位数去极值（MAD 法）：把偏离当日中位数超过 k 倍 MAD 标准差的值截断。"""
+    x = np.asarray(x, dtype=np.float64)
+    out = x.copy()
+    has_data = (~np.isnan(x)).any(axis=0)
+    if not has_data.any():
+        return out
+    columns = x[:, has_data]
+    median = np.nanmedian(columns, axis=0)
+    mad = np.nanmedian(np.abs(columns - median), axis=0) * _MAD_SCALE
+    out[:, has_data] = np.clip(columns, median - k * mad, median + k * mad)
+    return out
+
+
+def neutralize(x: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """行业中性化：减去当日同一行业内的均值。
+
+    Args:
+        x: 因子值
+        groups: 每只股票的行业编号，形状为 (股票数,)，取值为 0 ~ 行业数-1
+
+    Returns:
+        行业内去均值后的因子值
+    """
+    x = np.asarray(x, dtype=np.float64)
+    groups = np.asarray(groups, dtype=np.int64)
+    if x.size == 0:
+        return x.copy()
+    onehot = np.zeros((groups.max() + 1, len(groups)))
+    onehot[groups, np.arange(len(groups))] = 1.0
+    valid = ~np.isnan(x)
+    sums = onehot @ np.where(valid, x, 0.0)
+    counts = onehot @ valid
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts
+    return x - means[groups]
@@ -0,0 +1,68 @@
+"""因子值的磁盘缓存。
+
+每个因子每个交易日的截面保存为一个 `.npz` 文件（股票代码和因子值，不保存 NaN）：
+
+    <directory>/<复权方式>/<因子名>-<版本>/<YYYYMMDD>.npz
+
+历史日期的因子值一旦算出就不再变化（使用后复权价格时，新增数据不会改变历史
+价格），每天的增量更新只需计算并写入新的一天。因子定义修改后版本号变化，
+写入新的目录，旧目录可以直接删除。
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from .library import Factor
+
+
+class FactorStore:
+    """按日期保存因子截面。
+
+    Attributes:
+        directory: 缓存根目录
+        adj_type: 计算因子时使用的复权方式
+    """
+
+    def __init__(self, directory: str, adj_type: str = "hfq"):
+        self.directory = directory
+        self.adj_type = adj_type
+
+    def _dir(self, factor: Factor) -> str:
+        return os.path.join(
+            self.directory, self.adj_type, f"{factor.name}-{factor.version[:12]}"
+        )
+
+    def dates(self, factor: Factor) -> set[str]:
+        """已缓存的交易日。"""
+        try:
+            names = os.listdir(self._dir(factor))
+        except FileNotFoundError:
+            return set()
+        return {name[:-4] for name in names if name.endswith(".npz")}
+
+    def get(self, factor: Factor, date: str) -> tuple[np.ndarray, np.ndarray] | None:
+        """读取一天的截面，返回 (股票代码, 因子值)，不存在时返回 None。"""
+        try:
+            with np.load(os.path.join(self._dir(factor), f"{date}.npz")) as f:
+                return f["codes"], f["values"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def put(
+        self, factor: Factor, date: str, codes: np.ndarray, values: np.ndarray
+    ) -> None:
+        """写入一天的截面，NaN 不保存。先写临时文件再原子替换。"""
+        directory = self._dir(factor)
+        os.makedirs(directory, exist_ok=True)
+        valid = ~np.isnan(values)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, codes=codes[valid].astype(str), values=values[valid])
+            os.replace(tmp_path, os.path.join(directory, f"{date}.npz"))
+        except OSError as e:
+            print(f"写入因子缓存失败: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,10 @@
+from .cache import IndicatorCache, IndicatorKey, get_default_cache
+from .lines import ArrayIndicator, build_indicator
+
+__all__ = [
+    "IndicatorCache",
+    "IndicatorKey",
+    "get_default_cache",
+    "ArrayIndicator",
+    "build_indicator",
+]
@@ -0,0 +1,202 @@
+"""指标缓存模块。
+
+参数扫描时，大部分参数组合共享相同的 SMA/ATR/MACD 设置。该模块以
+(股票代码, 日期区间, 复权方式, 数据指纹, 指标, 参数) 为键缓存预先计算好的指标数组。
+数据指纹即数据源的 `get_data_fingerprint`，历史数据被修正、换用其他数据源或者
+归档改写数据后，指纹变化，不会读到过期的指标：
+
+* 进程内缓存：按 LRU 策略淘汰。
+* 磁盘缓存（可选）：每个键保存为一个 `.npy` 文件，通过内存映射读取。
+  多个工作进程指向同一目录时，可以互相复用计算结果，并共享操作系统的页缓存。
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class IndicatorKey:
+    """指标缓存键。
+
+    Attributes:
+        symbol: 股票代码
+        start: 数据起始日期，格式为 'YYYYMMDD'
+        end: 数据结束日期，格式为 'YYYYMMDD'
+        adj_type: 复权方式
+        data_version: 数据指纹，见 `DataSource.get_data_fingerprint`
+        indicator: 指标名称
+        params: 排序后的指标参数
+    """
+
+    symbol: str
+    start: str
+    end: str
+    adj_type: str
+    data_version: str
+    indicator: str
+    params: tuple[tuple[str, object], ...] = ()
+
+    @classmethod
+    def create(
+        cls,
+        symbol: str,
+        start: str,
+        end: str,
+        adj_type: str,
+        data_version: str,
+        indicator: str,
+        **params,
+    ) -> "IndicatorKey":
+        """创建缓存键，参数顺序不影响结果。"""
+        return cls(
+            symbol,
+            start,
+            end,
+            adj_type,
+            data_version,
+            indicator,
+            tuple(sorted(params.items())),
+        )
+
+    def digest(self) -> str:
+        """返回缓存键的稳定哈希值，用作磁盘缓存的文件名。"""
+        return hashlib.sha1(repr(self).encode("utf-8")).hexdigest()
+
+
+class IndicatorCache:
+    """两级指标缓存：进程内 LRU 缓存 + 可选的磁盘缓存。
+
+    缓存值是线名称到数组的字典。从磁盘读取的数组是只读的内存映射视图。
+
+    Attributes:
+        maxsize: 进程内缓存的最大条目数
+        directory: 磁盘缓存目录，为 None 时只使用进程内缓存
+        hits: 进程内缓存命中次数
+        disk_hits: 磁盘缓存命中次数
+        misses: 未命中次数
+    """
+
+    def __init__(self, maxsize: int = 256, directory: str | None = None) -> None:
+        self.maxsize = maxsize
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[IndicatorKey, dict[str, np.ndarray]] = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def __contains__(self, key: IndicatorKey) -> bool:
+        return key in self._memory or (
+            self.directory is not None and os.path.exists(self._path(key))
+        )
+
+    def get(self, key: IndicatorKey) -> dict[str, np.ndarray] | None:
+        """读取缓存，依次查找进程内缓存和磁盘缓存。"""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = self._load(key)
+        if value is None:
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: IndicatorKey, value: dict[str, np.ndarray]) -> None:
+        """写入缓存，启用磁盘缓存时同时写入磁盘。"""
+        with self._lock:
+            self._remember(key, value)
+        if self.directory:
+            self._dump(key, value)
+
+    def get_or_compute(
+        self, key: IndicatorKey, compute: Callable[[], dict[str, np.ndarray]]
+    ) -> dict[str, np.ndarray]:
+        """读取缓存，未命中时调用 `compute` 计算并写入缓存。"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self, disk: bool = False) -> None:
+        """清空进程内缓存，`disk` 为 True 时同时删除磁盘缓存文件。"""
+        with self._lock:
+            self._memory.clear()
+        if disk and self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".npy"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def _remember(self, key: IndicatorKey, value: dict[str, np.ndarray]) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: IndicatorKey) -> str:
+        return os.path.join(self.directory or "", f"{key.digest()}.npy")
+
+    def _load(self, key: IndicatorKey) -> dict[str, np.ndarray] | None:
+        if not self.directory:
+            return None
+        try:
+            records = np.load(self._path(key), mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+        return {name: records[name] for name in records.dtype.names}
+
+    def _dump(self, key: IndicatorKey, value: dict[str, np.ndarray]) -> None:
+        # 多条线保存为一个结构化数组，先写临时文件再原子替换，
+        # 避免其他进程读到写了一半的文件
+        names = list(value)
+        length = len(next(iter(value.values()))) if names else 0
+        records = np.empty(length, dtype=[(name, np.float64) for name in names])
+        for name in names:
+            records[name] = value[name]
+
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, records)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"写入指标缓存失败: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+_default_cache: IndicatorCache | None = None
+
+
+def get_default_cache(directory: str | None = None) -> IndicatorCache:
+    """获取进程内共享的指标缓存。
+
+    Args:
+        directory: 磁盘缓存目录，仅在首次创建缓存时生效
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = IndicatorCache(directory=directory)
+    return _default_cache
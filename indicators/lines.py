@@ -0,0 +1,154 @@
+"""把预先计算好的指标数组接入 backtrader。
+
+`ArrayIndicator` 是一个不做任何计算的 backtrader 指标，它的各条线直接从数组中
+复制数值，最小周期由数组的预热期决定，因此策略代码中 `self.sma[-1]` 这样的用法
+与使用 backtrader 内置指标完全一致。
+"""
+
+from array import array
+
+import backtrader as bt
+import numpy as np
+
+from . import ta
+from .cache import IndicatorCache, IndicatorKey
+
+
+class ArrayIndicator(bt.Indicator):
+    """从数组读取数值的指标基类，子类通过 `lines` 声明线名称。
+
+    Params:
+        arrays: 线名称到数组的映射，数组与数据源的 Bar 一一对应
+        warmup: 最小周期（第一个有效值所在的 Bar 数）
+    """
+
+    params = (("arrays", None), ("warmup", 1))
+
+    def __init__(self) -> None:
+        self.addminperiod(self.p.warmup)
+        self._sources = [
+            np.asarray(self.p.arrays[name], dtype=np.float64)
+            for name in self.lines.getlinealiases()
+        ]
+
+    def prenext(self) -> None:
+        self.next()
+
+    def next(self) -> None:
+        i = len(self) - 1
+        for line, source in zip(self.lines, self._sources, strict=True):
+            line[0] = source[i]
+
+    def preonce(self, start: int, end: int) -> None:
+        self.once(start, end)
+
+    def oncestart(self, start: int, end: int) -> None:
+        self.once(start, end)
+
+    def once(self, start: int, end: int) -> None:
+        for line, source in zip(self.lines, self._sources, strict=True):
+            line.array[start:end] = array("d", source[start:end])
+
+
+_array_indicator_classes: dict[str, type[ArrayIndicator]] = {}
+
+
+def array_indicator_class(kind: str) -> type[ArrayIndicator]:
+    """返回指定指标对应的 `ArrayIndicator` 子类，线名称与 backtrader 内置指标一致。"""
+    cls = _array_indicator_classes.get(kind)
+    if cls is None:
+        _, _, line_names = ta.INDICATORS[kind]
+        cls = type(
+            f"Array{kind.upper()}",
+            (ArrayIndicator,),
+            {"lines": line_names, "plotinfo": dict(subplot=kind != "sma")},
+        )
+        _array_indicator_classes[kind] = cls
+    return cls
+
+
+def warmup_period(arrays: dict[str, np.ndarray]) -> int:
+    """根据各条线的前导 NaN 数量计算最小周期。"""
+    warmup = 1
+    for values in arrays.values():
+        valid = ~np.isnan(values)
+        first = int(np.argmax(valid)) if valid.any() else len(values)
+        warmup = max(warmup, first + 1)
+    return warmup
+
+
+def data_arrays(data: bt.AbstractDataBase) -> dict[str, np.ndarray]:
+    """以零拷贝方式读取已预加载数据源的 OHLCV 数组。"""
+    size = data.buflen()
+    return {
+        name: np.frombuffer(getattr(data.lines, name).array, dtype=np.float64)[:size]
+        for name in ("open", "high", "low", "close", "volume")
+    }
+
+
+def data_range(data: bt.AbstractDataBase) -> tuple[str, str]:
+    """返回已预加载数据源的第一个和最后一个 Bar 的日期（'YYYYMMDD'）。"""
+    dates = data.lines.datetime.array
+    start = bt.num2date(dates[0]).strftime("%Y%m%d")
+    end = bt.num2date(dates[data.buflen() - 1]).strftime("%Y%m%d")
+    return start, end
+
+
+def _bt_indicator(data: bt.AbstractDataBase, kind: str, params: dict):
+    if kind == "sma":
+        return bt.indicators.SimpleMovingAverage(data.close, period=params["period"])
+    if kind == "ema":
+        return bt.indicators.ExponentialMovingAverage(
+            data.close, period=params["period"]
+        )
+    if kind == "macd":
+        return bt.indicators.MACD(
+            data.close,
+            period_me1=params["fast"],
+            period_me2=params["slow"],
+            period_signal=params["signal"],
+        )
+    if kind == "atr":
+        return bt.indicators.ATR(data, period=params["period"])
+    raise ValueError(f"不支持的指标: {kind}")
+
+
+def build_indicator(
+    data: bt.AbstractDataBase,
+    kind: str,
+    params: dict,
+    cache: IndicatorCache | None = None,
+    adj_type: str = "",
+    data_version: str | None = None,
+):
+    """创建指标，必须在策略的 `__init__` 中调用。
+
+    提供了缓存、数据源已经预加载且有名称和数据指纹时，从缓存读取（或计算后写入
+    缓存）指标数组，并通过 `ArrayIndicator` 接入 backtrader；否则回退为
+    backtrader 内置指标。
+
+    Args:
+        data: 数据源，名称为股票代码
+        kind: 指标名称，见 `indicators.ta.INDICATORS`
+        params: 指标参数
+        cache: 指标缓存
+        adj_type: 复权方式
+        data_version: 数据指纹。缓存键包含股票代码、数据源实际的首尾 Bar 和
+            数据指纹，新增、修正或改写数据后不会读到过期的缓存
+
+    Returns:
+        backtrader 指标对象
+    """
+    if cache is None or not data._name or not data_version or data.buflen() <= 0:
+        return _bt_indicator(data, kind, params)
+
+    start, end = data_range(data)
+    cache_key = IndicatorKey.create(
+        data._name, start, end, adj_type, data_version, kind, **params
+    )
+    arrays = cache.get_or_compute(
+        cache_key, lambda: ta.compute(kind, data_arrays(data), **params)
+    )
+    return array_indicator_class(kind)(
+        data, arrays=arrays, warmup=warmup_period(arrays)
+    )
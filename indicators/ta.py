@@ -0,0 +1,213 @@
+"""基于 NumPy 的技术指标计算。
+
+指标的定义与 backtrader 内置指标保持一致（包括预热期和种子值的处理方式），
+因此可以用预先计算好的数组替代 backtrader 在每次回测中的逐 Bar 计算。
+所有函数沿最后一个轴计算，既支持单只股票的一维数组，也支持 (股票 × 日期)
+的二维面板。预热期内的值为 NaN。
+"""
+
+from collections.abc import Callable
+
+import numpy as np
+
+
+def sma(x: np.ndarray, period: int) -> np.ndarray:
+    """简单移动平均，等价于 `bt.indicators.SimpleMovingAverage`。"""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] < period:
+        return out
+    csum = np.cumsum(x, axis=-1)
+    out[..., period - 1] = csum[..., period - 1]
+    out[..., period:] = csum[..., period:] - csum[..., :-period]
+    out[..., period - 1 :] /= period
+    return out
+
+
+def exp_smoothing(
+    x: np.ndarray, period: int, alpha: float, seed: np.ndarray | None = None
+) -> np.ndarray:
+    """指数平滑，等价于 `bt.indicators.ExponentialSmoothing`。
+
+    不提供种子值时，以首个有效值开始的 `period` 个值的算术平均作为种子；
+    提供种子值时，从第一个元素开始直接递推（用于增量计算）。
+
+    Args:
+        x: 输入数组，允许存在前导 NaN（例如另一个指标的预热期）
+        period: 周期
+        alpha: 平滑系数
+        seed: 上一个 Bar 的指标值
+
+    Returns:
+        与输入形状相同的数组
+    """
+    from scipy.signal import lfilter  # scipy导入较慢，只在实际计算时导入
+
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if seed is not None:
+        zi = (1.0 - alpha) * np.asarray(seed, dtype=np.float64)[..., None]
+        out[...], _ = lfilter([alpha], [1.0, alpha - 1.0], x, axis=-1, zi=zi)
+        return out
+
+    start = _first_valid(x)
+    seed_end = start + period
+    if seed_end > x.shape[-1]:
+        return out
+
+    seed_value = x[..., start:seed_end].mean(axis=-1)
+    out[..., seed_end - 1] = seed_value
+    rest = x[..., seed_end:]
+    if rest.shape[-1]:
+        zi = (1.0 - alpha) * np.asarray(seed_value)[..., None]
+        out[..., seed_end:], _ = lfilter(
+            [alpha], [1.0, alpha - 1.0], rest, axis=-1, zi=zi
+        )
+    return out
+
+
+def ema(x: np.ndarray, period: int, seed: np.ndarray | None = None) -> np.ndarray:
+    """指数移动平均，等价于 `bt.indicators.ExponentialMovingAverage`。"""
+    return exp_smoothing(x, period, 2.0 / (period + 1.0), seed=seed)
+
+
+def smma(x: np.ndarray, period: int, seed: np.ndarray | None = None) -> np.ndarray:
+    """平滑移动平均，等价于 `bt.indicators.SmoothedMovingAverage`。"""
+    return exp_smoothing(x, period, 1.0 / period, seed=seed)
+
+
+def macd(
+    close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9
+) -> dict[str, np.ndarray]:
+    """MACD 指标，等价于 `bt.indicators.MACD`。
+
+    Returns:
+        包含 "macd"（DIFF）和 "signal"（DEA）两条线的字典
+    """
+    macd_line = ema(close, fast) - ema(close, slow)
+    return {"macd": macd_line, "signal": ema(macd_line, signal)}
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """真实波幅，等价于 `bt.indicators.TrueRange`，第一个 Bar 为 NaN。"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(close.shape, np.nan)
+    prev_close = close[..., :-1]
+    out[..., 1:] = np.maximum(high[..., 1:], prev_close) - np.minimum(
+        low[..., 1:], prev_close
+    )
+    return out
+
+
+def atr(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14
+) -> dict[str, np.ndarray]:
+    """平均真实波幅，等价于 `bt.indicators.AverageTrueRange`。"""
+    return {"atr": smma(true_range(high, low, close), period)}
+
+
+def compute_stateful(
+    kind: str,
+    inputs: dict[str, np.ndarray],
+    state: dict[str, float] | None = None,
+    start: int = 0,
+    **params,
+) -> tuple[dict[str, np.ndarray], dict[str, float]]:
+    """计算指标并返回递推状态，用于增量计算。
+
+    `state` 为 None 时做全量计算；否则 `state` 是第 `start - 1` 个 Bar 结束时的
+    递推状态（例如 EMA 的最后一个值），只计算 `start` 及之后的 Bar，之前的位置
+    填充 NaN。`inputs` 需要包含 `start` 之前足够多的 Bar（SMA 的周期、ATR 的
+    前一个收盘价）。
+
+    Args:
+        kind: 指标名称，见 `INDICATORS`
+        inputs: 输入列名到一维数组的映射
+        state: 上一次计算结束时的递推状态
+        start: 需要计算的第一个 Bar 的位置
+        **params: 指标参数
+
+    Returns:
+        (线名称到数组的映射, 最后一个 Bar 的递推状态)
+    """
+    close = np.asarray(inputs["close"], dtype=np.float64)
+    state = state or {}
+    if kind == "sma":
+        lines = {"sma": sma(close, params["period"])}
+        lines["sma"][:start] = np.nan
+        return lines, {}
+
+    if kind == "ema":
+        values = ema(close[start:], params["period"], seed=state.get("ema"))
+        return {"ema": _pad(values, start)}, {"ema": _last(values)}
+
+    if kind == "macd":
+        fast = ema(close[start:], params["fast"], seed=state.get("fast"))
+        slow = ema(close[start:], params["slow"], seed=state.get("slow"))
+        signal = ema(fast - slow, params["signal"], seed=state.get("signal"))
+        lines = {"macd": _pad(fast - slow, start), "signal": _pad(signal, start)}
+        return lines, {
+            "fast": _last(fast),
+            "slow": _last(slow),
+            "signal": _last(signal),
+        }
+
+    if kind == "atr":
+        tr = true_range(inputs["high"], inputs["low"], close)[start:]
+        if "atr" in state and start == 0:
+            raise ValueError("增量计算 ATR 需要前一个 Bar 的收盘价")
+        values = smma(tr, params["period"], seed=state.get("atr"))
+        return {"atr": _pad(values, start)}, {"atr": _last(values)}
+
+    raise ValueError(f"不支持的指标: {kind}")
+
+
+def _pad(values: np.ndarray, start: int) -> np.ndarray:
+    return np.concatenate([np.full(start, np.nan), values])
+
+
+def _last(values: np.ndarray) -> float:
+    return float(values[-1]) if len(values) else float("nan")
+
+
+def _first_valid(x: np.ndarray) -> int:
+    """返回第一个非 NaN 值的位置（二维面板取所有行中最早的有效位置）。"""
+    valid = ~np.isnan(x)
+    if x.ndim > 1:
+        valid = valid.any(axis=tuple(range(x.ndim - 1)))
+    if not valid.any():
+        return x.shape[-1]
+    return int(np.argmax(valid))
+
+
+# 指标名称 -> (计算函数, 所需的输入列, 输出的线名称)
+INDICATORS: dict[str, tuple[Callable, tuple[str, ...], tuple[str, ...]]] = {
+    "sma": (lambda close, period: {"sma": sma(close, period)}, ("close",), ("sma",)),
+    "ema": (lambda close, period: {"ema": ema(close, period)}, ("close",), ("ema",)),
+    "macd": (macd, ("close",), ("macd", "signal")),
+    "atr": (atr, ("high", "low", "close"), ("atr",)),
+}
+
+
+def compute(
+    kind: str, inputs: dict[str, np.ndarray], **params
+) -> dict[str, np.ndarray]:
+    """按名称计算指标。
+
+    Args:
+        kind: 指标名称，见 `INDICATORS`
+        inputs: 输入列名到数组的映射，例如 {"close": ..., "high": ...}
+        **params: 指标参数
+
+    Returns:
+        线名称到数组的映射
+
+    Raises:
+        ValueError: 当指标名称未注册时抛出
+    """
+    if kind not in INDICATORS:
+        raise ValueError(f"不支持的指标: {kind}")
+    func, columns, _ = INDICATORS[kind]
+    return func(*(inputs[column] for column in columns), **params)
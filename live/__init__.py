@@ -0,0 +1,14 @@
+from .daemon import UpdateDaemon, run_daemon
+from .runner import run_live
+from .session import LiveSession, LiveStateError
+from .state import LiveState, StateStore
+
+__all__ = [
+    "run_live",
+    "UpdateDaemon",
+    "run_daemon",
+    "LiveSession",
+    "LiveStateError",
+    "LiveState",
+    "StateStore",
+]
@@ -0,0 +1,223 @@
+"""盘后自动更新的常驻进程。
+
+`main.py daemon` 一直运行：按交易日历在每个交易日收盘后醒来，按交易日批量下载
+当天全部股票的日线、复权因子和每日指标（每个接口一次请求），更新股票列表和最近
+一年报告期的财务指标，然后刷新派生缓存（截面因子、分钟线聚合）并运行配置的选股。
+非交易日不请求任何数据。
+
+Tushare 的日线一般在收盘后一两个小时内入库，醒来时还没有当天的数据就每隔
+`retry_minutes` 分钟重试，直到 `deadline`。进程停止期间错过的交易日在下一次醒来时
+一起补齐。下载和刷新缓存期间持有 `data.lock.FileLock`，交互式运行的
+`main.py run`、`update` 等任务会等待它完成，反之亦然。
+"""
+
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from data.db_reader import StockDBReader
+from data.lock import FileLock
+from monitor import counter, gauge
+
+DAEMON_RUNS = counter(
+    "daemon_runs_total",
+    "盘后更新的次数，status 为 ok、missed（截止时间前没有当天数据）或 error",
+    ["status"],
+)
+DAEMON_LAST_DATE = gauge(
+    "daemon_last_trade_date", "最近一次成功更新的交易日，格式为 YYYYMMDD 的整数"
+)
+
+DEFAULT_DAEMON_CONFIG = {
+    "after": "16:30",
+    "retry_minutes": 15,
+    "deadline": "23:00",
+    "tasks": ["factors", "screen"],
+}
+# 更新数据后可以运行的任务
+TASKS = ("factors", "minutes", "screen")
+
+
+def _at(date: str, clock_time: str) -> datetime:
+    """交易日 'YYYYMMDD' 的某个时刻 'HH:MM'。"""
+    return datetime.strptime(f"{date} {clock_time}", "%Y%m%d %H:%M")
+
+
+class UpdateDaemon:
+    """按交易日历调度盘后更新。
+
+    Args:
+        config: `config/config.toml` 的内容，调度设置见 [daemon] 部分
+        downloader: `TushareDownloader`
+        reader: 数据库读取器，默认读取下载器的数据库
+        lock: 与交互式任务共享的文件锁
+        clock: 返回当前时间的函数，测试时可以替换
+        sleep: 等待指定秒数的函数，测试时可以替换
+        on_run: 每个交易日处理完后调用，参数为交易日和是否成功，例如写出运行指标
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        downloader,
+        reader: StockDBReader | None = None,
+        lock: FileLock | None = None,
+        clock: Callable[[], datetime] = datetime.now,
+        sleep: Callable[[float], None] = time.sleep,
+        on_run: Callable[[str, bool], None] | None = None,
+    ):
+        self.config = config
+        self.daemon_config = {**DEFAULT_DAEMON_CONFIG, **config.get("daemon", {})}
+        unknown = set(self.daemon_config["tasks"]) - set(TASKS)
+        if unknown:
+            raise ValueError(f"不支持的任务: {sorted(unknown)}，可选 {TASKS}")
+        self.downloader = downloader
+        self.reader = reader or StockDBReader(downloader.sqlite_file_name)
+        self.lock = lock or FileLock()
+        self.clock = clock
+        self.sleep = sleep
+        self.on_run = on_run
+        self.last_date: str | None = None
+
+    def next_session(self, now: datetime) -> tuple[str, datetime]:
+        """下一个需要处理的交易日和开始处理的时间。
+
+        今天是交易日且还没有处理、没有超过截止时间时为今天，否则为之后的第一个
+        交易日。
+        """
+        after, deadline = self.daemon_config["after"], self.daemon_config["deadline"]
+        today = now.strftime("%Y%m%d")
+        # 交易日历按年公布，跨年时向后多看一个月
+        horizon = (now + timedelta(days=31)).strftime("%Y%m%d")
+        for date in self.downloader.open_dates(today, horizon):
+            if date == self.last_date or (date == today and now >= _at(date, deadline)):
+                continue
+            return date, max(now, _at(date, after))
+        raise RuntimeError(f"交易日历中没有 {today} 之后的交易日")
+
+    def wait_until(self, moment: datetime) -> None:
+        """等待到指定时间，分段等待以免系统休眠后错过时间。"""
+        while True:
+            remaining = (moment - self.clock()).total_seconds()
+            if remaining <= 0:
+                return
+            self.sleep(min(remaining, 3600))
+
+    def fetch(self, trade_date: str) -> bool:
+        """补齐截至 `trade_date` 缺少的交易日，返回数据库中是否已有当天的日线。"""
+        last = self.downloader.last_trade_date()
+        if last is not None and last >= trade_date:
+            return True
+        start = (
+            datetime.strptime(last, "%Y%m%d") + timedelta(days=1)
+            if last
+            else _at(trade_date, "00:00")
+        ).strftime("%Y%m%d")
+        missing = self.downloader.open_dates(start, trade_date)
+        rows = self.downloader.update_trade_dates(missing, "盘后更新")
+        if rows:
+            # 股票列表只在有新数据时更新，用于新股和上市状态的筛选
+            self.downloader.get_stock_basic()
+            # 与 `update` 相同，最近一年的报告期可能有新公告或更正公告；
+            # 守护进程下载之后 `update` 没有新交易日，不会再更新财务指标
+            fina_start = _at(trade_date, "00:00") - timedelta(days=365)
+            self.downloader.get_fina_indicator(
+                fina_start.strftime("%Y%m%d"), trade_date
+            )
+        return trade_date in self.reader.get_trade_dates(trade_date, trade_date)
+
+    def refresh(self) -> None:
+        """刷新派生缓存并运行选股，单个任务失败不影响其他任务。"""
+        for task in self.daemon_config["tasks"]:
+            try:
+                if task == "factors":
+                    from factor import update_factors
+
+                    update_factors(self.config, self.reader)
+                elif task == "minutes":
+                    from data.minute import update_minutes
+
+                    update_minutes(self.config, self.downloader.pro)
+                elif task == "screen":
+                    from strategy.screener import screen_market
+
+                    screen_market(self.config, self.reader)
+            except Exception as e:
+                print(f"盘后任务 {task} 运行失败: {type(e).__name__}: {e}")
+
+    def run_day(self, trade_date: str) -> bool:
+        """处理一个交易日：下载数据并刷新缓存，数据还没有入库时等待重试。
+
+        Returns:
+            是否在截止时间前完成
+        """
+        retry = timedelta(minutes=self.daemon_config["retry_minutes"])
+        deadline = _at(trade_date, self.daemon_config["deadline"])
+        while True:
+            # 重试等待期间不持有锁，交互式任务可以正常运行
+            with self.lock:
+                if self.fetch(trade_date):
+                    self.refresh()
+                    return True
+            now = self.clock()
+            if now + retry > deadline:
+                print(f"{trade_date} 的日线在截止时间前仍未入库，跳过当天。")
+                return False
+            print(f"{trade_date} 的日线还没有入库，{retry.seconds // 60} 分钟后重试。")
+            self.wait_until(now + retry)
+
+    def run(self, days: int | None = None) -> int:
+        """主循环。
+
+        Args:
+            days: 处理指定数量的交易日后退出，None 表示一直运行
+
+        Returns:
+            成功处理的交易日数量
+        """
+        succeeded = processed = 0
+        retry = timedelta(minutes=self.daemon_config["retry_minutes"])
+        while days is None or processed < days:
+            try:
+                # 年底可能需要下载新一年的交易日历
+                trade_date, start = self.next_session(self.clock())
+            except Exception as e:
+                print(
+                    f"读取交易日历失败: {type(e).__name__}: {e}，"
+                    f"{retry.seconds // 60} 分钟后重试"
+                )
+                DAEMON_RUNS.labels(status="error").inc()
+                self.wait_until(self.clock() + retry)
+                continue
+            print(f"下一次更新: {trade_date}，{start:%Y-%m-%d %H:%M} 开始")
+            self.wait_until(start)
+            try:
+                ok = self.run_day(trade_date)
+            except Exception as e:
+                # 常驻进程不因一次失败（网络、数据库错误）退出
+                print(f"{trade_date} 盘后更新失败: {type(e).__name__}: {e}")
+                DAEMON_RUNS.labels(status="error").inc()
+                ok = False
+            else:
+                DAEMON_RUNS.labels(status="ok" if ok else "missed").inc()
+            if ok:
+                DAEMON_LAST_DATE.set(int(trade_date))
+                succeeded += 1
+            self.last_date = trade_date
+            processed += 1
+            if self.on_run is not None:
+                self.on_run(trade_date, ok)
+        return succeeded
+
+
+def run_daemon(config: dict, on_run: Callable[[str, bool], None] | None = None) -> int:
+    """按配置启动盘后更新的常驻进程，见 `UpdateDaemon`。"""
+    # tushare、sqlmodel只在需要更新数据库时导入
+    from data.db_based_tushare import TushareDownloader
+
+    daemon_config = {**DEFAULT_DAEMON_CONFIG, **config.get("daemon", {})}
+    print(
+        f"盘后更新进程启动: 每个交易日 {daemon_config['after']} 开始，"
+        f"任务 {', '.join(daemon_config['tasks']) or '无'}"
+    )
+    return UpdateDaemon(config, TushareDownloader(), on_run=on_run).run()
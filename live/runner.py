@@ -0,0 +1,137 @@
+"""增量运行入口。
+
+第一次运行时从配置的起始日期全量回放，之后每次只读取快照中的历史窗口和
+新增的 Bar，运行时间与历史长度无关。
+"""
+
+import math
+from datetime import datetime
+
+import backtrader as bt
+
+from commission.commission import MyStockCommissionScheme
+from data.array_feed import ArrayData
+from data.db_reader import StockDBReader
+from strategy.config_loader import StrategyConfig
+
+from .session import LiveSession
+from .state import LiveState, StateStore, params_digest
+
+
+def _config_start_date(config: dict) -> str:
+    return datetime(
+        config["date"]["start_year"], config["date"]["start_month"], 1
+    ).strftime("%Y%m%d")
+
+
+def _usable(state: LiveState) -> bool:
+    """快照中的递推状态全部有效时才能增量运行（历史过短时指标尚未预热完成）。"""
+    return bool(state.tail_dates) and all(
+        not math.isnan(value)
+        for indicator in state.indicators.values()
+        for value in indicator["state"].values()
+    )
+
+
+def _latest_adj_factor(
+    reader: StockDBReader, symbol: str, trade_date: str
+) -> float | None:
+    df = reader.get_adj_factor(symbol, trade_date, trade_date)
+    if df.empty:
+        return None
+    return float(df["adj_factor"].iloc[-1])
+
+
+def run_live(
+    config: dict,
+    reader: StockDBReader | None = None,
+    store: StateStore | None = None,
+    end_date: str | None = None,
+) -> LiveState | None:
+    """运行一次增量回测，并保存新的状态快照。
+
+    Args:
+        config: `config/config.toml` 的内容
+        reader: 数据库读取器
+        store: 状态快照存储
+        end_date: 结束日期，格式为 'YYYYMMDD'，默认为今天
+
+    Returns:
+        新的状态快照；没有新的 Bar 或没有数据时返回 None
+    """
+    reader = reader or StockDBReader()
+    store = store or StateStore()
+    end_date = end_date or datetime.now().strftime("%Y%m%d")
+
+    name = config["strategy"]["name"]
+    symbol = config["stock"]["symbol"][0]
+    adj_type = config["stock"]["adjust"]
+    strategy_class, strategy_params = StrategyConfig().get_strategy(name=name)
+    digest = params_digest(strategy_params)
+
+    state = store.load(name, symbol, adj_type)
+    if state is not None and (state.params_digest != digest or not _usable(state)):
+        print("策略参数已变化或快照不完整，重新全量运行。")
+        state = None
+
+    start_date = state.tail_dates[0] if state else _config_start_date(config)
+    raw_data = reader.get_daily_price(symbol, start_date, end_date, adj_type)
+    if raw_data.empty:
+        return None
+    dates = [d.strftime("%Y%m%d") for d in raw_data.index]
+
+    if state is not None and dates[: len(state.tail_dates)] != state.tail_dates:
+        print("数据库中的历史数据与快照不一致，重新全量运行。")
+        state = None
+        raw_data = reader.get_daily_price(
+            symbol, _config_start_date(config), end_date, adj_type
+        )
+        dates = [d.strftime("%Y%m%d") for d in raw_data.index]
+
+    if state is not None and len(dates) == len(state.tail_dates):
+        print(f"没有新的交易数据，最新日期仍为 {state.last_date}。")
+        return None
+
+    adj_factor = None
+    if adj_type in ["qfq", "hfq"]:
+        adj_factor = _latest_adj_factor(reader, symbol, dates[-1])
+
+    session = LiveSession(
+        strategy=name,
+        symbol=symbol,
+        adj_type=adj_type,
+        params_digest=digest,
+        dates=dates,
+        state=state,
+        adj_factor=adj_factor,
+    )
+    mode = "增量" if state else "全量"
+    print(
+        f"{mode}运行: 处理 {session.new_bars} 个新 Bar ({dates[session.start]} ~ {dates[-1]})"
+    )
+
+    cerebro = bt.Cerebro()
+    cerebro.adddata(ArrayData.from_dataframe(raw_data), name=symbol)
+    cerebro.addstrategy(
+        strategy_class, **strategy_params, live_session=session, adj_type=adj_type
+    )
+    cerebro.broker.setcash(state.cash if state else config["cash"])
+    cerebro.broker.addcommissioninfo(MyStockCommissionScheme(**config["broker"]))
+    cerebro.run()
+
+    snapshot = session.snapshot
+    if snapshot is None:
+        return None
+    store.save(snapshot)
+
+    signals = ", ".join(f"{o['side']} {o['size']:g}" for o in snapshot.orders) or "无"
+    print(
+        f"""
+增量运行结果:
+       最新日期: {snapshot.last_date}
+       持仓数量: {snapshot.position["size"]}
+       总资金: {round(cerebro.broker.getvalue(), 2)}
+       待成交信号: {signals}
+    """
+    )
+    return snapshot
@@ -0,0 +1,160 @@
+"""增量运行会话。
+
+`LiveSession` 作为策略参数 `live_session` 注入到 `TradeStrategy` 中，负责：
+
+* 创建指标：全量运行时计算完整的指标数组；增量运行时用快照中的指标值填充
+  历史窗口，只对新增的 Bar 从快照的递推状态继续计算。历史窗口内的 Bar 只作为
+  `self.data.close[-1]` 之类的回看数据，策略的 `next()` 只在新增的 Bar 上调用。
+* 恢复状态：恢复持仓和策略自身的状态，并在新增 Bar 之前重新提交上一次运行
+  结束时未成交的订单。
+* 生成快照：策略结束时记录下一次运行所需的状态。
+"""
+
+import backtrader as bt
+import numpy as np
+
+from indicators import ta
+from indicators.lines import array_indicator_class, data_arrays, warmup_period
+
+from .state import LiveState
+
+
+class LiveStateError(RuntimeError):
+    """快照与当前策略不匹配，无法增量运行。"""
+
+
+def indicator_key(kind: str, params: dict) -> str:
+    """指标在快照中的键，例如 "macd(fast=12,signal=9,slow=26)"。"""
+    args = ",".join(f"{key}={value}" for key, value in sorted(params.items()))
+    return f"{kind}({args})"
+
+
+class LiveSession:
+    """一次全量或增量运行的会话。
+
+    Attributes:
+        state: 上一次运行的快照，为 None 时全量运行
+        dates: 本次运行的数据源中每个 Bar 的日期（'YYYYMMDD'）
+        start: 第一个新增 Bar 的位置，全量运行时为 0
+        price_scale: 前复权价格的换算系数（上一次的最新复权因子 / 本次的最新复权因子）
+        snapshot: 运行结束后生成的快照
+    """
+
+    def __init__(
+        self,
+        strategy: str,
+        symbol: str,
+        adj_type: str,
+        params_digest: str,
+        dates: list[str],
+        state: LiveState | None = None,
+        adj_factor: float | None = None,
+    ) -> None:
+        self.strategy = strategy
+        self.symbol = symbol
+        self.adj_type = adj_type
+        self.params_digest = params_digest
+        self.dates = dates
+        self.state = state
+        self.adj_factor = adj_factor
+
+        self.start = len(state.tail_dates) if state else 0
+        self.price_scale = 1.0
+        if state is not None and adj_type == "qfq" and state.adj_factor and adj_factor:
+            # 前复权价格以最新复权因子为基准，出现除权除息后历史价格整体缩放
+            self.price_scale = state.adj_factor / adj_factor
+
+        self.snapshot: LiveState | None = None
+        self._indicators: dict[str, tuple[dict[str, np.ndarray], dict[str, float]]] = {}
+
+    @property
+    def new_bars(self) -> int:
+        """本次运行处理的新 Bar 数量。"""
+        return len(self.dates) - self.start
+
+    def build_indicator(self, data: bt.AbstractDataBase, kind: str, params: dict):
+        """创建指标，由 `TradeStrategy.indicator` 调用。"""
+        key = indicator_key(kind, params)
+        inputs = data_arrays(data)
+
+        if self.state is None:
+            lines, state = ta.compute_stateful(kind, inputs, **params)
+            warmup = warmup_period(lines)
+        else:
+            saved = self.state.indicators.get(key)
+            if saved is None:
+                raise LiveStateError(f"快照中缺少指标 {key}")
+            seed = {
+                name: value * self.price_scale for name, value in saved["state"].items()
+            }
+            lines, state = ta.compute_stateful(
+                kind, inputs, state=seed, start=self.start, **params
+            )
+            for name, values in lines.items():
+                values[: self.start] = (
+                    np.asarray(saved["lines"][name]) * self.price_scale
+                )
+            # 历史窗口只用于回看，策略的 next() 从第一个新增 Bar 开始调用
+            warmup = self.start + 1
+
+        self._indicators[key] = (lines, state)
+        return array_indicator_class(kind)(data, arrays=lines, warmup=warmup)
+
+    def restore(self, strategy: bt.Strategy) -> None:
+        """恢复持仓和策略状态，由 `TradeStrategy.start` 调用。"""
+        if self.state is None:
+            return
+        strategy.set_state(self.state.strategy_state, price_scale=self.price_scale)
+        position = self.state.position
+        if position.get("size"):
+            strategy.broker.getposition(strategy.data).set(
+                position["size"], position["price"] * self.price_scale
+            )
+
+    def prenext(self, strategy: bt.Strategy) -> None:
+        """在最后一个历史 Bar 上重新提交未成交的订单，使其在第一个新增 Bar 成交。"""
+        if self.state is None or len(strategy) != self.start:
+            return
+        for order in self.state.orders:
+            if order["side"] == "buy":
+                strategy.order = strategy.buy(size=order["size"])
+            else:
+                strategy.order = strategy.sell(size=order["size"])
+
+    def capture(self, strategy: bt.Strategy) -> LiveState:
+        """生成快照，由 `TradeStrategy.stop` 调用。"""
+        lookback = self.state.lookback if self.state else strategy.live_lookback()
+        position = strategy.broker.getposition(strategy.data)
+        orders = [
+            {
+                "side": "buy" if order.isbuy() else "sell",
+                "size": abs(order.created.size),
+            }
+            for order in strategy.broker.get_orders_open()
+        ]
+
+        self.snapshot = LiveState(
+            strategy=self.strategy,
+            symbol=self.symbol,
+            adj_type=self.adj_type,
+            params_digest=self.params_digest,
+            last_date=self.dates[-1],
+            lookback=lookback,
+            tail_dates=self.dates[-lookback:],
+            indicators={
+                key: {
+                    "lines": {
+                        name: values[-lookback:].tolist()
+                        for name, values in lines.items()
+                    },
+                    "state": state,
+                }
+                for key, (lines, state) in self._indicators.items()
+            },
+            strategy_state=strategy.get_state(),
+            position={"size": position.size, "price": position.price},
+            cash=strategy.broker.getcash(),
+            orders=orders,
+            adj_factor=self.adj_factor,
+        )
+        return self.snapshot
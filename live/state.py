@@ -0,0 +1,101 @@
+"""增量运行的策略状态快照。
+
+每次运行结束时，把恢复运行所需的最小状态保存为 JSON 文件：最近若干个 Bar 的
+日期和指标值、指标的递推状态（例如 EMA 的最后一个值）、策略自身的状态、
+持仓、现金和未成交的订单。下一次运行只需要读取这几十个 Bar 和新增的 Bar。
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+
+def params_digest(params: dict[str, Any]) -> str:
+    """策略参数的摘要，参数变化后旧的状态快照不再可用。"""
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class LiveState:
+    """策略状态快照。
+
+    Attributes:
+        strategy: 策略名称
+        symbol: 股票代码
+        adj_type: 复权方式
+        params_digest: 策略参数摘要
+        last_date: 最后一个已处理 Bar 的日期，格式为 'YYYYMMDD'
+        lookback: 保留的历史 Bar 数
+        tail_dates: 最近 `lookback` 个 Bar 的日期
+        indicators: 指标键 -> {"lines": 线名称 -> 最近的指标值, "state": 递推状态}
+        strategy_state: 策略自身的状态，见 `TradeStrategy.get_state`
+        position: 持仓，{"size": 数量, "price": 成本价}
+        cash: 现金
+        orders: 未成交的订单，[{"side": "buy"/"sell", "size": 数量}]
+        adj_factor: 快照时最新的复权因子，用于前复权价格的换算
+    """
+
+    strategy: str
+    symbol: str
+    adj_type: str
+    params_digest: str
+    last_date: str
+    lookback: int
+    tail_dates: list[str] = field(default_factory=list)
+    indicators: dict[str, dict[str, Any]] = field(default_factory=dict)
+    strategy_state: dict[str, Any] = field(default_factory=dict)
+    position: dict[str, float] = field(default_factory=dict)
+    cash: float = 0.0
+    orders: list[dict[str, Any]] = field(default_factory=list)
+    adj_factor: float | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "LiveState":
+        return cls(**data)
+
+
+class StateStore:
+    """以 JSON 文件保存策略状态快照，每个 (策略, 股票, 复权方式) 一个文件。"""
+
+    def __init__(self, directory: str = "state") -> None:
+        """
+        :param directory: 快照目录。
+        """
+        self.directory = directory
+
+    def path(self, strategy: str, symbol: str, adj_type: str) -> str:
+        return os.path.join(self.directory, f"{strategy}_{symbol}_{adj_type}.json")
+
+    def load(self, strategy: str, symbol: str, adj_type: str) -> LiveState | None:
+        """读取快照，不存在或无法解析时返回 None。"""
+        path = self.path(strategy, symbol, adj_type)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return LiveState.from_dict(json.load(f))
+        except (ValueError, TypeError) as e:
+            print(f"状态快照 {path} 无法解析，将重新全量运行: {e}")
+            return None
+
+    def save(self, state: LiveState) -> str:
+        """原子地写入快照，返回快照文件路径。"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(state.strategy, state.symbol, state.adj_type)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+    def delete(self, strategy: str, symbol: str, adj_type: str) -> None:
+        path = self.path(strategy, symbol, adj_type)
+        if os.path.exists(path):
+            os.remove(path)
@@ -1,22 +1,62 @@
-import calendar
 import sys
+import time
 import tomllib
 from datetime import datetime
 from pprint import pprint as pp
 
-import matplotlib.pyplot as plt
 import pandas as pd
 from backtrader import bt
 
-from commission.commission import MyStockCommissionScheme
-from data.db_based_tushare import TushareDownloader
-
-# from data.akshare_data import get_stock_data
+from backtest import BacktestJob, ResultStore, run_backtest
 from data.db_reader import StockDBReader
-from strategy.config_loader import StrategyConfig
+from data.lock import FileLock
+from data.source import get_source
+from indicators import IndicatorCache
+from monitor import Profiler, export_metrics, phase, set_profiler
+
+
+def update_database():
+    # tushare、sqlmodel只在需要更新数据库时导入
+    from data.db_based_tushare import TushareDownloader
+
+    data_downloader = TushareDownloader()
+    # 与盘后更新进程（main.py daemon）共用一个锁，避免同时写入数据库
+    with FileLock():
+        data_downloader.update()
+    return data_downloader
+
+
+def export_task_metrics(task: str, duration: float, success: bool):
+    """任务结束时按 [metrics] 配置写出运行指标。"""
+    with open("config/config.toml", "rb") as f:
+        metrics_config = tomllib.load(f).get("metrics", {})
+    paths = export_metrics(
+        textfile=metrics_config.get("textfile", ""),
+        json_path=metrics_config.get("json", ""),
+        job=task,
+        duration=duration,
+        success=success,
+    )
+    for path in paths:
+        print(f"运行指标已保存至 {path}")
+
+
+def plot(cerebro: bt.Cerebro):
+    # matplotlib只在需要画图时导入，无界面环境使用 --headless 跳过
+    import matplotlib.pyplot as plt
+
+    platform = sys.platform.lower()
+    if platform.startswith("win") or platform.startswith("linux"):
+        plt.rcParams["font.sans-serif"] = ["SimHei"]
+    else:
+        plt.rcParams["font.family"] = "sans-serif"
+    plt.rcParams["font.sans-serif"] = ["Hiragino Sans GB", "Hiragino Sans"]
+    plt.rcParams["axes.unicode_minus"] = False
+
+    cerebro.plot(style="candlestick")
 
 
-def main(update_db: bool = True):
+def main(update_db: bool = True, headless: bool = False, force: bool = False):
     with open("config/config.toml", "rb") as f:
         config = tomllib.load(f)
 
@@ -33,96 +73,116 @@ def main(update_db: bool = True):
 
     pp(config_info)
 
-    platform = sys.platform.lower()
-    if platform.startswith("win") or platform.startswith("linux"):
-        plt.rcParams["font.sans-serif"] = ["SimHei"]
-    else:
-        plt.rcParams["font.family"] = "sans-serif"
-    plt.rcParams["font.sans-serif"] = ["Hiragino Sans GB", "Hiragino Sans"]
-    plt.rcParams["axes.unicode_minus"] = False
+    job = BacktestJob.from_config(config)
 
-    end_month_last_day = calendar.monthrange(
-        config["date"]["end_year"], config["date"]["end_month"]
-    )[1]
-    start_date, end_date = (
-        datetime(config["date"]["start_year"], config["date"]["start_month"], 1),
-        datetime(
-            config["date"]["end_year"], config["date"]["end_month"], end_month_last_day
-        ),
-    )
+    # 数据源：Tushare数据库需要先更新，AKShare数据源在读取时自动更新本地缓存
+    source_name = config.get("data", {}).get("source", "tushare")
+    with phase("update_db"):
+        data_downloader = (
+            update_database() if update_db and source_name == "tushare" else None
+        )
 
-    # raw_data = get_stock_data(
-    #     symbol=config["stock"]["symbol"][0],
-    #     adjust=config["stock"]["adjust"]
-    # )
+    # 指标缓存：配置了缓存目录时，相同数据和参数的指标只计算一次
+    cache_config = config.get("cache", {})
+    indicator_dir = cache_config.get("indicator_dir")
+    indicator_cache = IndicatorCache(directory=indicator_dir) if indicator_dir else None
+    # 结果缓存：相同的配置、策略代码和数据直接返回保存的结果
+    result_dir = cache_config.get("result_dir")
+    store = ResultStore(result_dir) if result_dir else None
 
-    # 更新数据库
-    data_downloader = TushareDownloader()
-    if update_db:
-        data_downloader.update()
+    db_reader = get_source(config)
+    with phase("backtest"):
+        result = run_backtest(job, db_reader, store, force, indicator_cache)
 
-    # 读取数据库
-    db_reader = StockDBReader()
-    raw_data = db_reader.get_daily_price(
-        ts_code=config["stock"]["symbol"][0],
-        start_date=start_date.strftime("%Y%m%d"),
-        end_date=end_date.strftime("%Y%m%d"),
-        adj_type=config["stock"]["adjust"],
-    )
+    if result is None and not isinstance(db_reader, StockDBReader):
+        print("数据源中没有数据，可能是因为股票代码不存在或日期范围不正确。")
+        return
 
     # 如果没有数据，执行首次下载
-    if raw_data.empty:
+    if result is None:
         print("数据库中没有数据，执行首次下载...")
         # 设置合理的默认日期范围（最近2年）
         default_start_date = (datetime.now() - pd.DateOffset(years=2)).strftime(
             "%Y%m%d"
         )
         default_end_date = datetime.now().strftime("%Y%m%d")
-        data_downloader.first_download(
-            start_date=default_start_date, end_date=default_end_date
-        )
-        # 重新读取数据
-        raw_data = db_reader.get_daily_price(
-            ts_code=config["stock"]["symbol"][0],
-            start_date=start_date.strftime("%Y%m%d"),
-            end_date=end_date.strftime("%Y%m%d"),
-            adj_type=config["stock"]["adjust"],
-        )
+        if data_downloader is None:
+            from data.db_based_tushare import TushareDownloader
+
+            data_downloader = TushareDownloader()
+        with FileLock():
+            data_downloader.first_download(
+                start_date=default_start_date, end_date=default_end_date
+            )
+        # 重新运行
+        with phase("backtest"):
+            result = run_backtest(job, db_reader, store, force, indicator_cache)
 
         # 如果仍然没有数据，退出程序
-        if raw_data.empty:
+        if result is None:
             print("首次下载后仍然没有数据，可能是因为股票代码不存在或日期范围不正确。")
             return
 
-    strategy_cfg = StrategyConfig()
-    strategy_class, strategy_params = strategy_cfg.get_strategy(
-        name=config["strategy"]["name"]
-    )
+    if result.cached:
+        print(f"命中结果缓存 {result.key[:12]}，跳过回测。使用 --force 重新运行。")
 
-    comminfo = MyStockCommissionScheme(**config["broker"])
+    # HTML报告在子进程中渲染，不阻塞回测结果的输出，完成后打印保存路径或错误
+    report_config = config.get("report", {})
+    if report_config.get("path") and result.strategy is not None:
+        from report import ReportData, render_in_background
 
-    cerebro = bt.Cerebro()
-    data = bt.feeds.PandasData(dataname=raw_data, fromdate=start_date, todate=end_date)
-    cerebro.adddata(data)
-    cerebro.addstrategy(strategy_class, **strategy_params)
-    cerebro.broker.setcash(config["cash"])
-    # 使用自定义佣金信息
-    cerebro.broker.addcommissioninfo(comminfo)
-    cerebro.run()
+        with phase("report"):
+            report = ReportData.from_strategy(result.strategy)
+            render_in_background(
+                report, report_config["path"], report_config.get("max_points", 1500)
+            )
 
-    port_value = cerebro.broker.getvalue()  # 获取回测结束后的总资金
+    metrics = result.metrics
+    port_value = result.final_value  # 回测结束后的总资金
     pnl = port_value - config["cash"]  # 盈亏统计
 
     result_info = f"""
 回测结果:
        初始资金: {config["cash"]}
-       回测期间: {start_date.strftime("%Y%m%d")} ~ {end_date.strftime("%Y%m%d")}
+       回测期间: {job.start_date} ~ {job.end_date}
        总资金: {round(port_value, 2)}
        净收益: {round(pnl, 2)}
+       年化收益: {metrics["annual_return"]:.2%}
+       夏普比率: {metrics["sharpe"]:.2f}
+       索提诺比率: {metrics["sortino"]:.2f}
+       最大回撤: {metrics["max_drawdown"]:.2%} (持续 {metrics["max_drawdown_duration"]} 个交易日)
+       交易次数: {metrics["trades"]}, 胜率: {metrics["win_rate"]:.2%}
+       换手率: {metrics["turnover"]:.2f}, 平均仓位: {metrics["exposure"]:.2%}
     """
     pp(result_info)
 
-    cerebro.plot(style="candlestick")
+    robustness_config = config.get("robustness", {})
+    if robustness_config.get("samples", 0) > 0:
+        from analysis import robustness_test
+
+        try:
+            with phase("robustness"):
+                report = robustness_test(
+                    result.record,
+                    samples=robustness_config["samples"],
+                    method=robustness_config.get("method", "block"),
+                    block=robustness_config.get("block", 20),
+                    workers=robustness_config.get("workers") or None,
+                    seed=robustness_config.get("seed"),
+                    confidence=robustness_config.get("confidence", 0.95),
+                )
+        except ValueError as e:
+            print(f"跳过稳健性检验: {e}")
+        else:
+            print(
+                f"稳健性检验（{report.method}，{robustness_config['samples']} 条路径，"
+                f"置信水平 {report.confidence:.0%}），亏损概率 {report.loss_probability():.2%}:"
+            )
+            print(report.summary().to_string(float_format=lambda x: f"{x:.4f}"))
+
+    if not headless and result.strategy is not None:
+        with phase("plot"):
+            plot(result.strategy.env)
 
 
 if __name__ == "__main__":
@@ -136,15 +196,57 @@ if __name__ == "__main__":
         default="run",
         help="""run: update database & run backtest;
                    update: ONLY update database;
+                   live: update database & process only new bars since the last snapshot;
+                   screen: update database & scan the whole market for today's signals;
+                   factors: update database & compute cross-sectional factors for new dates;
+                   portfolio: update database & backtest a factor top-N rotation over the whole market;
+                   minutes: update database & download new 1-minute bars, then cache 5/15/30/60-minute and daily bars;
+                   daemon: keep running, update the database after each trading day's close, refresh factor/minute caches and run the screener;
+                   archive: move closed years of daily bars and adj factors out of the database into compressed columnar segments;
+                   batch: update database once & run all jobs in a job file, e.g. `batch jobs.toml`;
+                   enqueue: update database once & push all jobs in a job file into the shared queue;
+                   worker: claim and run jobs from the shared queue, e.g. `worker /mnt/share/queue.db`;
                    init_db: initialize database, two date parameters required""",
     )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="do not plot the backtest result, for batch runs and CI",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="ignore the stored result and rerun the backtest",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each stage and the strategy callbacks, print a breakdown table",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default="results/profile.json",
+        help="where to write the profiling result as JSON",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        default="",
+        help="also run cProfile and save the stats to PATH (implies --profile)",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="also trace memory allocations, slow (implies --profile)",
+    )
     parser.add_argument(
         "start_date",
         metavar="s",
         type=str,
         nargs="?",
         default=None,
-        help="start date for backtest in YYYYMMDD format",
+        help="start date for backtest in YYYYMMDD format, "
+        "the job file for batch/enqueue, or the queue file for worker",
     )
     parser.add_argument(
         "end_date",
@@ -156,15 +258,117 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
 
-    if args.task == "run":
-        main(update_db=True)
-    elif args.task == "update":
-        data_downloader = TushareDownloader()
-        data_downloader.update()
-    elif args.task == "init_db":
-        data_downloader = TushareDownloader()
-        data_downloader.first_download(
-            start_date=args.start_date, end_date=args.end_date
-        )
-    else:
-        print("无效的任务参数，请使用 'run', 'update' 或 'init_db'。")
+    profiler = Profiler(
+        enabled=args.profile, cprofile=args.cprofile, memory=args.tracemalloc
+    )
+    if profiler.enabled:
+        set_profiler(profiler)
+        profiler.start()
+    started = time.monotonic()
+    success = False
+    try:
+        if args.task == "run":
+            main(update_db=True, headless=args.headless, force=args.force)
+        elif args.task == "update":
+            update_database()
+        elif args.task == "live":
+            from live import run_live
+
+            update_database()
+            with open("config/config.toml", "rb") as f:
+                run_live(tomllib.load(f))
+        elif args.task == "screen":
+            from strategy.screener import screen_market
+
+            update_database()
+            with open("config/config.toml", "rb") as f:
+                screen_market(tomllib.load(f))
+        elif args.task == "factors":
+            from factor import update_factors
+
+            update_database()
+            with open("config/config.toml", "rb") as f:
+                update_factors(tomllib.load(f))
+        elif args.task == "portfolio":
+            from backtest.portfolio import run_portfolio
+
+            update_database()
+            with open("config/config.toml", "rb") as f:
+                run_portfolio(tomllib.load(f))
+        elif args.task == "minutes":
+            from data.minute import update_minutes
+
+            data_downloader = update_database()
+            with open("config/config.toml", "rb") as f:
+                update_minutes(tomllib.load(f), data_downloader.pro)
+        elif args.task == "daemon":
+            from live import run_daemon
+
+            with open("config/config.toml", "rb") as f:
+                config = tomllib.load(f)
+            # 常驻进程不会结束，每个交易日处理完后写出一次运行指标
+            run_daemon(
+                config,
+                on_run=lambda trade_date, ok: export_task_metrics(
+                    "daemon", time.monotonic() - started, ok
+                ),
+            )
+        elif args.task == "archive":
+            from data.archive import update_archive
+
+            with open("config/config.toml", "rb") as f, FileLock():
+                update_archive(tomllib.load(f))
+        elif args.task == "batch":
+            from backtest.batch import run_batch
+
+            with open("config/config.toml", "rb") as f:
+                run_batch(
+                    args.start_date or "jobs.toml",
+                    tomllib.load(f),
+                    force=args.force,
+                    update_db=update_database,
+                )
+        elif args.task in ("enqueue", "worker"):
+            from backtest.job_queue import enqueue, run_worker
+
+            with open("config/config.toml", "rb") as f:
+                config = tomllib.load(f)
+            queue_config = config.get("queue", {})
+            queue_path = queue_config.get("path", "results/queue.db")
+            if args.task == "enqueue":
+                enqueue(
+                    args.start_date or "jobs.toml",
+                    config,
+                    queue_path,
+                    update_db=update_database,
+                )
+            else:
+                run_worker(
+                    args.start_date or queue_path,
+                    db_name=queue_config.get("db") or "stock_db_based_Tushare.db",
+                    result_dir=config.get("cache", {}).get("result_dir", ""),
+                    lease=queue_config.get("lease", 60),
+                    poll=queue_config.get("poll", 5),
+                    keep_alive=queue_config.get("keep_alive", False),
+                )
+        elif args.task == "init_db":
+            from data.db_based_tushare import TushareDownloader
+
+            data_downloader = TushareDownloader()
+            with FileLock():
+                data_downloader.first_download(
+                    start_date=args.start_date, end_date=args.end_date
+                )
+        else:
+            print(
+                "无效的任务参数，请使用 'run', 'update', 'live', 'screen', 'factors', 'portfolio', 'minutes', 'daemon', 'archive', 'batch', 'enqueue', 'worker' 或 'init_db'。"
+            )
+            sys.exit(2)
+        success = True
+    finally:
+        export_task_metrics(args.task, time.monotonic() - started, success)
+        if profiler.enabled:
+            profiler.stop()
+            print(profiler.table())
+            profiler.write_json(args.profile_output)
+            print(f"计时结果已保存至 {args.profile_output}")
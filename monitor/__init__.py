@@ -0,0 +1,33 @@
+from .metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    counter,
+    export_metrics,
+    gauge,
+    histogram,
+)
+from .profiling import (
+    Profiler,
+    StrategyTimers,
+    get_profiler,
+    phase,
+    set_profiler,
+)
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "Profiler",
+    "StrategyTimers",
+    "counter",
+    "export_metrics",
+    "gauge",
+    "get_profiler",
+    "histogram",
+    "phase",
+    "set_profiler",
+]
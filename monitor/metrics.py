@@ -0,0 +1,372 @@
+"""数据更新和回测任务的运行指标。
+
+下载器原来只通过 tqdm 进度条和 print 报告进度，无法跨夜间任务追踪接口延迟、
+限流错误、每秒写入行数和 SQLite 写入耗时。这里提供进程内的计数器（Counter）、
+直方图（Histogram）和仪表（Gauge），任务结束时写成 Prometheus 文本文件
+（供 node_exporter 的 textfile collector 采集）和 JSON：
+
+    REQUESTS = counter("tushare_api_requests_total", "调用次数", ["api", "status"])
+    REQUESTS.labels(api="daily", status="ok").inc()
+
+    LATENCY = histogram("tushare_api_seconds", "调用耗时", ["api"])
+    with LATENCY.labels(api="daily").time():
+        ...
+
+    export_metrics(textfile="results/metrics/{job}.prom", job="update")
+
+每个带标签的子指标只是一个普通对象，`inc`/`observe` 只做一次加法和一次
+二分查找；循环中反复使用的子指标可以先用 `labels` 取出保存，避免重复查找。
+"""
+
+import bisect
+import json
+import os
+import time
+from contextlib import contextmanager
+
+NAMESPACE = "quant"
+# 秒为单位的默认分桶，覆盖毫秒级的数据库操作到分钟级的批量任务
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def set_to_current_time(self) -> None:
+        self.value = time.time()
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # 每个分桶内（非累计）的样本数
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def cumulative(self) -> list[int]:
+        total, out = 0, []
+        for count in self.counts:
+            total += count
+            out.append(total)
+        return out
+
+
+class Metric:
+    """一个指标及其全部标签组合。
+
+    Args:
+        name: 指标名称，导出时加上 `quant_` 前缀
+        help: 指标说明
+        labels: 标签名
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: list[str] | tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._children: dict[tuple, object] = {}
+        if not self.labelnames:
+            self._children[()] = self._child()
+
+    def _child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """取得指定标签值的子指标，不存在时创建。"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._child()
+        return child
+
+    def samples(self) -> list[tuple[dict, object]]:
+        return [
+            (dict(zip(self.labelnames, key)), child)
+            for key, child in self._children.items()
+        ]
+
+    def clear(self) -> None:
+        self._children.clear()
+        if not self.labelnames:
+            self._children[()] = self._child()
+
+    # 没有标签的指标直接调用
+    def _only(self):
+        return self._children[()]
+
+
+class Counter(Metric):
+    """只增不减的计数器。"""
+
+    kind = "counter"
+
+    def _child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._only().inc(amount)
+
+
+class Gauge(Metric):
+    """可以任意设置的数值，例如最近一次运行的耗时。"""
+
+    kind = "gauge"
+
+    def _child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._only().set(value)
+
+    def set_to_current_time(self) -> None:
+        self._only().set_to_current_time()
+
+
+class Histogram(Metric):
+    """按分桶统计样本分布，例如接口延迟。"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: list[str] | tuple = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels)
+
+    def _child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._only().observe(value)
+
+    def time(self):
+        return self._only().time()
+
+
+class MetricsRegistry:
+    """进程内的指标集合。同名指标只注册一次，重复注册返回已有的指标。"""
+
+    def __init__(self, namespace: str = NAMESPACE):
+        self.namespace = namespace
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric):
+                raise ValueError(f"指标 {metric.name} 已注册为 {existing.kind}")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Metric | None:
+        return self._metrics.get(name)
+
+    def clear(self) -> None:
+        """清空全部样本，保留指标定义。"""
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def _full_name(self, name: str) -> str:
+        return f"{self.namespace}_{name}" if self.namespace else name
+
+    def to_dict(self) -> dict:
+        metrics = []
+        for metric in self._metrics.values():
+            samples = []
+            for labels, child in metric.samples():
+                if metric.kind == "histogram":
+                    value = {
+                        "buckets": dict(
+                            zip(map(str, metric.buckets), child.cumulative())
+                        ),
+                        "sum": child.sum,
+                        "count": child.count,
+                    }
+                else:
+                    value = child.value
+                samples.append({"labels": labels, "value": value})
+            metrics.append(
+                {
+                    "name": self._full_name(metric.name),
+                    "type": metric.kind,
+                    "help": metric.help,
+                    "samples": samples,
+                }
+            )
+        return {"timestamp": time.time(), "metrics": metrics}
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式。"""
+        lines = []
+        for metric in self._metrics.values():
+            name = self._full_name(metric.name)
+            lines.append(f"# HELP {name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, child in metric.samples():
+                if metric.kind != "histogram":
+                    lines.append(f"{name}{_labels(labels)} {_number(child.value)}")
+                    continue
+                for bound, count in zip(metric.buckets, child.cumulative()):
+                    bucket = {**labels, "le": _number(bound)}
+                    lines.append(f"{name}_bucket{_labels(bucket)} {count}")
+                bucket = {**labels, "le": "+Inf"}
+                lines.append(f"{name}_bucket{_labels(bucket)} {child.count}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(child.sum)}")
+                lines.append(f"{name}_count{_labels(labels)} {child.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{k}="{_escape_label(str(v))}"' for k, v in labels.items())
+    return "{" + pairs + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _write_atomic(path: str, text: str) -> None:
+    """先写临时文件再替换，采集方不会读到写了一半的文件。"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, help: str, labels=()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labels))
+
+
+def gauge(name: str, help: str, labels=()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labels))
+
+
+def histogram(
+    name: str, help: str, labels=(), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labels, buckets))
+
+
+# 任务级别的指标，由 export_metrics 在任务结束时设置
+JOB_LAST_RUN = gauge(
+    "job_last_run_timestamp_seconds", "任务最近一次结束的时间", ["job"]
+)
+JOB_DURATION = gauge("job_duration_seconds", "任务最近一次的耗时", ["job"])
+JOB_SUCCESS = gauge("job_success", "任务最近一次是否成功（1/0）", ["job"])
+
+
+def export_metrics(
+    textfile: str = "",
+    json_path: str = "",
+    job: str = "",
+    duration: float | None = None,
+    success: bool = True,
+    registry: MetricsRegistry = REGISTRY,
+) -> list[str]:
+    """写出当前进程的全部指标。
+
+    Args:
+        textfile: Prometheus 文本文件路径，可以包含 `{job}`，为空则不写
+        json_path: JSON 文件路径，可以包含 `{job}`，为空则不写
+        job: 任务名称，例如 run、update、batch
+        duration: 任务耗时（秒）
+        success: 任务是否成功
+        registry: 指标集合
+
+    Returns:
+        写出的文件路径
+    """
+    if job:
+        JOB_LAST_RUN.labels(job=job).set_to_current_time()
+        JOB_SUCCESS.labels(job=job).set(1 if success else 0)
+        if duration is not None:
+            JOB_DURATION.labels(job=job).set(duration)
+
+    written = []
+    if textfile:
+        path = textfile.format(job=job or "main")
+        _write_atomic(path, registry.to_prometheus())
+        written.append(path)
+    if json_path:
+        path = json_path.format(job=job or "main")
+        _write_atomic(
+            path, json.dumps(registry.to_dict(), indent=2, ensure_ascii=False)
+        )
+        written.append(path)
+    return written
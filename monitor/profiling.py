@@ -0,0 +1,277 @@
+"""回测流程和策略热点的计时。
+
+回测慢的时候，需要知道时间花在 SQL 读取、复权、数据预加载、指标预热、`next()`
+还是订单回调上。这里提供一个按需开启的计时器：
+
+* `phase(name)`: 包住流程中的一个阶段，嵌套的阶段名用 "." 连接，例如
+  `backtest.load.sql`；
+* `StrategyTimers`: `TradeStrategy` 的混入类，开启计时时把 `next()`、
+  `notify_order()`、`notify_trade()` 和 backtrader 的指标预热包上计时器，
+  记录累计耗时和逐 Bar 耗时的分布；
+* 可选的 cProfile 函数级分析和 tracemalloc 内存分析。
+
+未开启时 `phase` 返回一个共享的空上下文，策略方法不做任何包装，几乎没有开销。
+
+    profiler = Profiler(enabled=True)
+    previous = set_profiler(profiler)
+    profiler.start()
+    with phase("backtest"):
+        ...
+    profiler.stop()
+    print(profiler.table())
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+import numpy as np
+from prettytable import PrettyTable
+
+_NULL = nullcontext()
+
+
+class _Phase:
+    """一个阶段的计时上下文。"""
+
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        stack = profiler._stack
+        self.name = f"{stack[-1]}.{self.name}" if stack else self.name
+        stack.append(self.name)
+        profiler._samples.setdefault(self.name, [])
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.profiler._stack.pop()
+        self.profiler._samples[self.name].append(elapsed)
+        return False
+
+
+class Profiler:
+    """阶段计时器，可同时开启 cProfile 和 tracemalloc。
+
+    Args:
+        enabled: 是否记录阶段耗时和策略回调耗时
+        cprofile: cProfile 统计文件的保存路径，为空则不开启 cProfile
+        memory: 是否用 tracemalloc 记录内存分配（会明显拖慢运行）
+        top: cProfile 和 tracemalloc 结果中保留的条目数
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        cprofile: str = "",
+        memory: bool = False,
+        top: int = 15,
+    ):
+        self.enabled = enabled or bool(cprofile) or memory
+        self.cprofile = cprofile
+        self.memory = memory
+        self.top = top
+        self._samples: dict[str, list[float]] = {}
+        self._stack: list[str] = []
+        self._cprofile: cProfile.Profile | None = None
+        self._functions: list[dict] = []
+        self._allocations: dict = {}
+
+    def phase(self, name: str):
+        """计时一个阶段，未开启时返回空上下文。"""
+        if not self.enabled:
+            return _NULL
+        return _Phase(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        """记录一次耗时，名称挂在当前所在的阶段下。"""
+        if self._stack:
+            name = f"{self._stack[-1]}.{name}"
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = []
+        samples.append(seconds)
+
+    def timed(self, name: str, func):
+        """返回包上计时器的函数，每次调用记录为 `name` 的一个样本。"""
+        add = self.add
+        clock = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(name, clock() - started)
+
+        return wrapper
+
+    # --- cProfile / tracemalloc ---
+    def start(self) -> None:
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self) -> None:
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            directory = os.path.dirname(self.cprofile)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._cprofile.dump_stats(self.cprofile)
+            self._functions = self._top_functions(pstats.Stats(self._cprofile))
+            self._cprofile = None
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            statistics = tracemalloc.take_snapshot().statistics("lineno")
+            tracemalloc.stop()
+            self._allocations = {
+                "current_kb": current / 1024,
+                "peak_kb": peak / 1024,
+                "top": [
+                    {
+                        "where": str(stat.traceback),
+                        "size_kb": stat.size / 1024,
+                        "count": stat.count,
+                    }
+                    for stat in statistics[: self.top]
+                ],
+            }
+
+    def _top_functions(self, stats: pstats.Stats) -> list[dict]:
+        rows = []
+        for (filename, line, func), row in stats.stats.items():
+            calls, own, cumulative = row[1], row[2], row[3]
+            rows.append(
+                {
+                    "function": f"{os.path.basename(filename)}:{line}({func})",
+                    "calls": calls,
+                    "own_seconds": own,
+                    "cumulative_seconds": cumulative,
+                }
+            )
+        rows.sort(key=lambda row: row["cumulative_seconds"], reverse=True)
+        return rows[: self.top]
+
+    # --- 结果 ---
+    def results(self) -> dict:
+        """各阶段的调用次数、累计耗时和单次耗时分布，以及 cProfile/tracemalloc 结果。
+
+        share 为阶段耗时占全部顶层阶段耗时之和的比例。
+        """
+        total = sum(
+            sum(samples) for name, samples in self._samples.items() if "." not in name
+        )
+        phases = []
+        for name, samples in self._samples.items():
+            if not samples:
+                continue
+            values = np.asarray(samples)
+            phases.append(
+                {
+                    "name": name,
+                    "calls": len(values),
+                    "total": float(values.sum()),
+                    "mean": float(values.mean()),
+                    "p95": float(np.percentile(values, 95)),
+                    "max": float(values.max()),
+                    "share": float(values.sum() / total) if total > 0 else np.nan,
+                }
+            )
+        return {
+            "phases": phases,
+            "functions": self._functions,
+            "memory": self._allocations,
+        }
+
+    def table(self) -> str:
+        """按阶段分解的耗时表，嵌套的阶段缩进显示。"""
+        table = PrettyTable()
+        table.field_names = ["阶段", "次数", "累计(s)", "平均(ms)", "P95(ms)", "占比"]
+        table.align = "r"
+        table.align["阶段"] = "l"
+        for row in self.results()["phases"]:
+            depth = row["name"].count(".")
+            table.add_row(
+                [
+                    "  " * depth + row["name"].rsplit(".", 1)[-1],
+                    row["calls"],
+                    f"{row['total']:.4f}",
+                    f"{row['mean'] * 1000:.3f}",
+                    f"{row['p95'] * 1000:.3f}",
+                    f"{row['share']:.1%}",
+                ]
+            )
+        text = table.get_string()
+        if self._allocations:
+            text += (
+                f"\n内存峰值 {self._allocations['peak_kb'] / 1024:.1f} MB，"
+                f"结束时 {self._allocations['current_kb'] / 1024:.1f} MB"
+            )
+        if self.cprofile:
+            text += f"\ncProfile 统计已保存至 {self.cprofile}"
+        return text
+
+    def write_json(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.results(), f, indent=2, ensure_ascii=False)
+
+
+_profiler = Profiler()
+
+
+def get_profiler() -> Profiler:
+    """当前的全局计时器。"""
+    return _profiler
+
+
+def set_profiler(profiler: Profiler) -> Profiler:
+    """替换全局计时器，返回原来的计时器。"""
+    global _profiler
+    previous, _profiler = _profiler, profiler
+    return previous
+
+
+def phase(name: str):
+    """用全局计时器计时一个阶段，未开启时没有开销。"""
+    return _profiler.phase(name)
+
+
+class StrategyTimers:
+    """`TradeStrategy` 的计时混入类。
+
+    开启计时时，`install_timers` 把策略实例的回调方法替换为计时版本；未开启时
+    不做任何修改，策略方法的调用没有额外开销。
+    """
+
+    # 方法名 -> 计时名称。_once 是 backtrader 向量化计算指标（预热）的入口
+    TIMED_METHODS = {
+        "_once": "warmup",
+        "next": "next",
+        "notify_order": "notify_order",
+        "notify_trade": "notify_trade",
+    }
+
+    def install_timers(self) -> None:
+        profiler = get_profiler()
+        if not profiler.enabled:
+            return
+        for method, name in self.TIMED_METHODS.items():
+            func = getattr(self, method, None)
+            if func is not None:
+                setattr(self, method, profiler.timed(name, func))
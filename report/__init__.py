@@ -0,0 +1,13 @@
+from .data import ReportData
+from .downsample import lttb, lttb_series, ohlc_buckets
+from .html import render_html, render_in_background, write_report
+
+__all__ = [
+    "ReportData",
+    "lttb",
+    "lttb_series",
+    "ohlc_buckets",
+    "render_html",
+    "render_in_background",
+    "write_report",
+]
@@ -0,0 +1,98 @@
+"""从回测结果中提取报表所需的数组。"""
+
+from dataclasses import dataclass, field
+
+import backtrader as bt
+import numpy as np
+
+from analysis import EquityRecorder, RunRecord, summarize
+from indicators.lines import data_arrays
+
+# backtrader 的日期数值是公历序数（0001-01-01 为 1）
+_ORDINAL_EPOCH = np.datetime64("0001-01-01", "D")
+
+
+@dataclass
+class ReportData:
+    """回测报表的数据，只包含数组和字典，可以传给子进程渲染。
+
+    Attributes:
+        title: 报表标题
+        dates: 每个 Bar 的日期
+        open, high, low, close, volume: 行情数组
+        overlays: 与价格画在同一坐标系中的指标线，例如均线
+        subplots: 单独成图的指标，{指标名称: {线名称: 数组}}
+        equity: 每个 Bar 的账户总资产
+        fills: 成交记录，字段同 `analysis.metrics.FILL_DTYPE`
+        metrics: 绩效指标
+    """
+
+    title: str
+    dates: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    overlays: dict[str, np.ndarray] = field(default_factory=dict)
+    subplots: dict[str, dict[str, np.ndarray]] = field(default_factory=dict)
+    equity: np.ndarray | None = None
+    fills: np.ndarray | None = None
+    metrics: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_strategy(cls, strategy: bt.Strategy, title: str = "") -> "ReportData":
+        """从运行结束的策略中复制行情、指标线和 `EquityRecorder` 的记录。
+
+        指标以策略中的属性名命名（例如 `self.sma` 命名为 sma），按指标的
+        `plotinfo.subplot` 决定叠加在价格图上还是单独成图。复制之后不再引用
+        策略对象，策略可以被释放。
+        """
+        data = strategy.datas[0]
+        size = data.buflen()
+        arrays = {name: values.copy() for name, values in data_arrays(data).items()}
+        ordinals = np.frombuffer(data.lines.datetime.array, dtype=np.float64)[:size]
+        dates = _ORDINAL_EPOCH + (np.floor(ordinals).astype(np.int64) - 1)
+
+        names = {
+            id(value): key
+            for key, value in vars(strategy).items()
+            if isinstance(value, bt.Indicator)
+        }
+        overlays, subplots = {}, {}
+        for indicator in strategy.getindicators():
+            name = names.get(id(indicator), type(indicator).__name__)
+            lines = {
+                alias: np.array(line.array[:size], dtype=np.float64)
+                for alias, line in zip(
+                    indicator.lines.getlinealiases(), indicator.lines, strict=True
+                )
+            }
+            if indicator.plotinfo.subplot:
+                subplots[name] = lines
+            else:
+                overlays.update(
+                    {
+                        name if len(lines) == 1 else f"{name}.{k}": v
+                        for k, v in lines.items()
+                    }
+                )
+
+        record = _equity_record(strategy)
+        return cls(
+            title=title or (data._name or ""),
+            dates=dates,
+            overlays=overlays,
+            subplots=subplots,
+            equity=record.equity if record else None,
+            fills=record.fills if record else None,
+            metrics=summarize([record]).iloc[0].to_dict() if record else {},
+            **arrays,
+        )
+
+
+def _equity_record(strategy: bt.Strategy) -> RunRecord | None:
+    for analyzer in strategy.analyzers:
+        if isinstance(analyzer, EquityRecorder):
+            return analyzer.get_analysis()
+    return None
@@ -0,0 +1,89 @@
+"""保持形状的降采样。
+
+多年的日线数据有上千个 Bar，而报表宽度只有一千多个像素。折线使用 LTTB
+（Largest-Triangle-Three-Buckets）算法保留峰谷，K线按桶合并为开高低收，
+两者都不会丢失肉眼可见的极值。
+"""
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """LTTB 降采样。
+
+    Args:
+        x: 横坐标，单调递增
+        y: 纵坐标，不能包含 NaN
+        threshold: 保留的点数
+
+    Returns:
+        被保留的点的下标，升序，包含首尾两点
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    sampled = np.empty(threshold, dtype=np.int64)
+    sampled[0], sampled[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        # 下一个桶的平均点
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        # 当前桶中与上一个选中点、下一个桶平均点构成最大三角形的点
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        sampled[i + 1] = a
+    return sampled
+
+
+def lttb_series(y: np.ndarray, threshold: int) -> tuple[np.ndarray, np.ndarray]:
+    """对按 Bar 排列的序列降采样，忽略其中的 NaN（例如指标的预热期）。
+
+    Returns:
+        (保留点的 Bar 下标, 对应的值)
+    """
+    y = np.asarray(y, dtype=np.float64)
+    idx = np.flatnonzero(~np.isnan(y))
+    keep = idx[lttb(idx, y[idx], threshold)]
+    return keep, y[keep]
+
+
+def ohlc_buckets(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    buckets: int,
+) -> dict[str, np.ndarray]:
+    """把连续的 Bar 合并为最多 `buckets` 根K线。
+
+    每个桶的开盘价取第一个 Bar，收盘价取最后一个 Bar，最高/最低价取桶内极值。
+
+    Returns:
+        包含 index（桶的第一个 Bar 下标）、width（Bar 数）、open、high、low、
+        close 的字典
+    """
+    n = len(close)
+    buckets = max(1, min(buckets, n))
+    starts = np.unique(np.linspace(0, n, buckets, endpoint=False).astype(np.int64))
+    ends = np.append(starts[1:], n)
+    return {
+        "index": starts,
+        "width": ends - starts,
+        "open": np.asarray(open_, dtype=np.float64)[starts],
+        "high": np.maximum.reduceat(np.asarray(high, dtype=np.float64), starts),
+        "low": np.minimum.reduceat(np.asarray(low, dtype=np.float64), starts),
+        "close": np.asarray(close, dtype=np.float64)[ends - 1],
+    }
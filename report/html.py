@@ -0,0 +1,295 @@
+"""把回测报表渲染为单个 HTML 文件。
+
+图表是内联的 SVG，不依赖 JavaScript 和外部资源，可以直接用浏览器打开或作为
+附件发送。渲染可以放到子进程或线程中进行，回测结果无需等待画图即可返回。
+"""
+
+import html
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from .data import ReportData
+from .downsample import lttb_series, ohlc_buckets
+
+WIDTH = 1200  # 图表宽度（像素）
+MARGIN_LEFT, MARGIN_RIGHT = 70, 20
+PRICE_HEIGHT, SUBPLOT_HEIGHT, EQUITY_HEIGHT = 360, 140, 180
+# A股习惯：红涨绿跌
+UP_COLOR, DOWN_COLOR = "#d62728", "#2ca02c"
+PALETTE = ["#1f77b4", "#ff7f0e", "#9467bd", "#8c564b", "#e377c2", "#17becf"]
+
+METRIC_LABELS = {
+    "total_return": ("总收益", "{:.2%}"),
+    "annual_return": ("年化收益", "{:.2%}"),
+    "sharpe": ("夏普比率", "{:.2f}"),
+    "sortino": ("索提诺比率", "{:.2f}"),
+    "max_drawdown": ("最大回撤", "{:.2%}"),
+    "max_drawdown_duration": ("回撤持续(Bar)", "{:.0f}"),
+    "trades": ("交易次数", "{:.0f}"),
+    "win_rate": ("胜率", "{:.2%}"),
+    "turnover": ("换手率", "{:.2f}"),
+    "exposure": ("平均仓位", "{:.2%}"),
+}
+
+
+class _Panel:
+    """一个子图的坐标变换。"""
+
+    def __init__(self, top: float, height: float, bars: int, low: float, high: float):
+        self.top, self.height, self.bars = top, height, bars
+        if not np.isfinite(low) or not np.isfinite(high):
+            low, high = 0.0, 1.0
+        pad = (high - low) * 0.05 or abs(high) * 0.05 or 1.0
+        self.low, self.high = low - pad, high + pad
+
+    def x(self, index) -> np.ndarray:
+        width = WIDTH - MARGIN_LEFT - MARGIN_RIGHT
+        return MARGIN_LEFT + np.asarray(index) * width / max(self.bars - 1, 1)
+
+    def y(self, value) -> np.ndarray:
+        scale = (np.asarray(value) - self.low) / (self.high - self.low)
+        return self.top + self.height * (1.0 - scale)
+
+    def frame(self, title: str, dates: np.ndarray) -> list[str]:
+        """坐标轴、网格和标题。"""
+        right = WIDTH - MARGIN_RIGHT
+        parts = [
+            f'<rect x="{MARGIN_LEFT}" y="{self.top:.1f}" width="{right - MARGIN_LEFT}" '
+            f'height="{self.height}" class="frame"/>',
+            f'<text x="{MARGIN_LEFT + 4}" y="{self.top + 14:.1f}" class="title">'
+            f"{html.escape(title)}</text>",
+        ]
+        for value in np.linspace(self.low, self.high, 5)[1:-1]:
+            y = self.y(value)
+            parts.append(
+                f'<line x1="{MARGIN_LEFT}" x2="{right}" y1="{y:.1f}" y2="{y:.1f}" '
+                f'class="grid"/><text x="{MARGIN_LEFT - 6}" y="{y + 4:.1f}" '
+                f'class="tick" text-anchor="end">{_format_tick(value)}</text>'
+            )
+        for index in np.linspace(0, self.bars - 1, min(8, self.bars)).astype(int):
+            x = self.x(index)
+            parts.append(
+                f'<line x1="{x:.1f}" x2="{x:.1f}" y1="{self.top:.1f}" '
+                f'y2="{self.top + self.height:.1f}" class="grid"/>'
+                f'<text x="{x:.1f}" y="{self.top + self.height + 14:.1f}" class="tick" '
+                f'text-anchor="middle">{dates[index]}</text>'
+            )
+        return parts
+
+    def polyline(self, index: np.ndarray, values: np.ndarray, color: str) -> str:
+        points = " ".join(
+            f"{x:.1f},{y:.1f}"
+            for x, y in zip(self.x(index), self.y(values), strict=True)
+        )
+        return f'<polyline points="{points}" stroke="{color}" class="line"/>'
+
+
+def _format_tick(value: float) -> str:
+    if abs(value) >= 1e4:
+        return f"{value:,.0f}"
+    return f"{value:.2f}" if abs(value) >= 1 else f"{value:.4f}"
+
+
+def _value_range(*series) -> tuple[float, float]:
+    values = np.concatenate([np.ravel(s) for s in series])
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return np.nan, np.nan
+    return float(values.min()), float(values.max())
+
+
+def _candles(panel: _Panel, report: ReportData, max_points: int) -> list[str]:
+    """K线，超过宽度能容纳的数量时按桶合并。"""
+    buckets = ohlc_buckets(
+        report.open,
+        report.high,
+        report.low,
+        report.close,
+        min(max_points, (WIDTH - MARGIN_LEFT - MARGIN_RIGHT) // 3),
+    )
+    bar_width = panel.x(1) - panel.x(0)
+    paths = {UP_COLOR: [], DOWN_COLOR: []}
+    for i in range(len(buckets["index"])):
+        left = panel.x(buckets["index"][i])
+        width = max(bar_width * buckets["width"][i] * 0.8, 1.0)
+        center = left + width / 2
+        o, h, lo, c = (buckets[k][i] for k in ("open", "high", "low", "close"))
+        top, bottom = panel.y(max(o, c)), panel.y(min(o, c))
+        paths[UP_COLOR if c >= o else DOWN_COLOR].append(
+            f"M{center:.1f},{panel.y(h):.1f}V{panel.y(lo):.1f}"
+            f"M{left:.1f},{top:.1f}h{width:.1f}V{max(bottom, top + 0.5):.1f}"
+            f"h{-width:.1f}Z"
+        )
+    return [
+        f'<path d="{"".join(d)}" stroke="{color}" fill="{color}" stroke-width="1"/>'
+        for color, d in paths.items()
+        if d
+    ]
+
+
+def _fills(panel: _Panel, report: ReportData) -> list[str]:
+    """买卖点标记，鼠标悬停显示成交信息。"""
+    if report.fills is None or len(report.fills) == 0:
+        return []
+    index = np.searchsorted(report.dates, report.fills["date"])
+    parts = []
+    for i, fill in zip(index, report.fills, strict=True):
+        x, y = panel.x(min(i, panel.bars - 1)), panel.y(fill["price"])
+        buy = fill["size"] > 0
+        color = UP_COLOR if buy else DOWN_COLOR
+        points = (
+            f"{x:.1f},{y + 4:.1f} {x - 5:.1f},{y + 13:.1f} {x + 5:.1f},{y + 13:.1f}"
+            if buy
+            else f"{x:.1f},{y - 4:.1f} {x - 5:.1f},{y - 13:.1f} {x + 5:.1f},{y - 13:.1f}"
+        )
+        side = "买入" if buy else "卖出"
+        parts.append(
+            f'<polygon points="{points}" fill="{color}"><title>{fill["date"]} '
+            f"{side} {abs(fill['size']):g} @ {fill['price']:.2f}</title></polygon>"
+        )
+    return parts
+
+
+def _lines(
+    panel: _Panel, series: dict[str, np.ndarray], max_points: int
+) -> tuple[list[str], list[tuple[str, str]]]:
+    parts, legend = [], []
+    for color, (name, values) in zip(PALETTE * 4, series.items(), strict=False):
+        index, sampled = lttb_series(values, max_points)
+        if len(index) > 1:
+            parts.append(panel.polyline(index, sampled, color))
+            legend.append((name, color))
+    return parts, legend
+
+
+def _legend(panel: _Panel, legend: list[tuple[str, str]]) -> list[str]:
+    parts, x = [], WIDTH - MARGIN_RIGHT - 10
+    for name, color in reversed(legend):
+        parts.append(
+            f'<text x="{x}" y="{panel.top + 14:.1f}" fill="{color}" class="legend" '
+            f'text-anchor="end">{html.escape(name)}</text>'
+        )
+        x -= 10 + 8 * len(name)
+    return parts
+
+
+def render_svg(report: ReportData, max_points: int = 1500) -> str:
+    """把行情、指标、成交和资金曲线画成一个 SVG。"""
+    bars = len(report.close)
+    dates = report.dates.astype(str)
+    parts: list[str] = []
+    top = 10.0
+
+    panel = _Panel(
+        top,
+        PRICE_HEIGHT,
+        bars,
+        *_value_range(report.low, report.high, *report.overlays.values()),
+    )
+    parts += panel.frame(report.title, dates)
+    parts += _candles(panel, report, max_points)
+    lines, legend = _lines(panel, report.overlays, max_points)
+    parts += lines + _legend(panel, legend) + _fills(panel, report)
+    top += PRICE_HEIGHT + 30
+
+    for name, series in report.subplots.items():
+        panel = _Panel(top, SUBPLOT_HEIGHT, bars, *_value_range(*series.values()))
+        parts += panel.frame(name, dates)
+        lines, legend = _lines(panel, series, max_points)
+        parts += lines + _legend(panel, legend)
+        top += SUBPLOT_HEIGHT + 30
+
+    if report.equity is not None and len(report.equity):
+        equity = report.equity[:bars]
+        panel = _Panel(top, EQUITY_HEIGHT, bars, *_value_range(equity))
+        parts += panel.frame("总资产", dates)
+        lines, _ = _lines(panel, {"equity": equity}, max_points)
+        parts += lines
+        top += EQUITY_HEIGHT + 30
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{top:.0f}" '
+        f'viewBox="0 0 {WIDTH} {top:.0f}">{"".join(parts)}</svg>'
+    )
+
+
+def render_html(report: ReportData, max_points: int = 1500) -> str:
+    """渲染完整的 HTML 页面：绩效指标表格和图表。"""
+    rows = "".join(
+        f"<tr><th>{label}</th><td>{fmt.format(report.metrics[key])}</td></tr>"
+        for key, (label, fmt) in METRIC_LABELS.items()
+        if key in report.metrics
+    )
+    title = html.escape(report.title or "回测报告")
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: -apple-system, "PingFang SC", "Microsoft YaHei", sans-serif; margin: 20px; }}
+table {{ border-collapse: collapse; margin-bottom: 16px; }}
+th, td {{ border: 1px solid #ddd; padding: 4px 10px; text-align: right; }}
+.frame {{ fill: none; stroke: #999; }}
+.grid {{ stroke: #eee; }}
+.tick {{ font-size: 11px; fill: #666; }}
+.title {{ font-size: 13px; font-weight: bold; }}
+.legend {{ font-size: 12px; }}
+.line {{ fill: none; stroke-width: 1.2; }}
+</style>
+</head>
+<body>
+<h2>{title}</h2>
+<table>{rows}</table>
+{render_svg(report, max_points)}
+</body>
+</html>
+"""
+
+
+def write_report(report: ReportData, path: str, max_points: int = 1500) -> str:
+    """渲染报表并写入文件，返回文件路径。"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_html(report, max_points))
+    return path
+
+
+def _report_done(future: Future) -> None:
+    """后台渲染结束时打印文件路径，失败时打印异常，不让错误被静默丢弃。"""
+    error = future.exception()
+    if error is not None:
+        print(f"回测报告渲染失败: {type(error).__name__}: {error}")
+    else:
+        print(f"回测报告已保存至 {future.result()}")
+
+
+def render_in_background(
+    report: ReportData, path: str, max_points: int = 1500, mode: str = "process"
+) -> Future:
+    """在后台渲染报表，立即返回。
+
+    Args:
+        report: 报表数据
+        path: 输出文件路径
+        max_points: 每条曲线最多保留的点数
+        mode: 'process' 在子进程中渲染，'thread' 在线程中渲染
+
+    Returns:
+        结果为文件路径的 Future，完成后打印文件路径或渲染失败的原因。
+        解释器退出前会等待渲染完成
+    """
+    if mode == "process":
+        executor = ProcessPoolExecutor(max_workers=1)
+    elif mode == "thread":
+        executor = ThreadPoolExecutor(max_workers=1)
+    else:
+        raise ValueError(f"不支持的渲染方式: {mode}")
+    future = executor.submit(write_report, report, path, max_points)
+    future.add_done_callback(_report_done)
+    executor.shutdown(wait=False)
+    return future
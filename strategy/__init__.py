@@ -1,6 +1,7 @@
 # 策略模块包初始化文件
 
 from .macd_strategy import MACDStrategy
+from .registry import StrategyRegistry, get_registry
 from .trade_strategy import TradeStrategy
 
-__all__ = ["TradeStrategy", "MACDStrategy"]
+__all__ = ["TradeStrategy", "MACDStrategy", "StrategyRegistry", "get_registry"]
@@ -1,10 +1,10 @@
 """策略配置加载器模块。
 
 该模块负责从配置文件加载策略配置，并根据配置动态导入策略类。
+配置解析和策略类导入由进程内共享的策略注册表缓存，重复实例化不会重复读取配置文件。
 """
 
-import importlib
-import tomllib
+from .registry import DEFAULT_CONFIG_PATH, StrategyRegistry, get_registry
 
 
 class StrategyConfig:
@@ -13,49 +13,44 @@ class StrategyConfig:
     该类从TOML配置文件中读取策略配置信息，并提供动态加载策略类的功能。
 
     Attributes:
-        config: 从配置文件中加载的策略配置字典
+        registry: 进程内共享的策略注册表
     """
 
-    def __init__(self) -> None:
+    def __init__(self, config_path: str = DEFAULT_CONFIG_PATH) -> None:
         """初始化策略配置加载器。
 
+        Args:
+            config_path: 策略配置文件路径
+
         Raises:
             FileNotFoundError: 当配置文件不存在时抛出
             tomllib.TOMLDecodeError: 当配置文件格式错误时抛出
         """
-        with open("config/strategy_config.toml", "rb") as f:
-            self.config = tomllib.load(f)
-
-    def get_strategy(self, name: str | None = None) -> tuple[type, dict]:
+        self.registry: StrategyRegistry = get_registry(config_path)
+        # 提前解析一次，保持配置文件错误在初始化时暴露
+        _ = self.registry.config
+
+    @property
+    def config(self) -> dict:
+        """从配置文件中加载的策略配置字典。"""
+        return self.registry.config
+
+    def get_strategy(
+        self, name: str | None = None, params: dict | None = None
+    ) -> tuple[type, dict]:
         """获取指定名称的策略类和参数。
 
         Args:
             name: 策略名称，如果为None则使用默认策略"MACD"
+            params: 覆盖配置文件默认值的参数，会按参数模式校验
 
         Returns:
             包含策略类和参数字典的元组
 
         Raises:
-            ValueError: 当策略不存在或配置信息不完整时抛出
+            ValueError: 当策略不存在、配置信息不完整或参数未声明时抛出
+            TypeError: 当参数类型与默认值不一致时抛出
             ImportError: 当无法导入策略模块时抛出
             AttributeError: 当策略类不存在时抛出
         """
-        if name is None:
-            # 默认取第一个策略
-            name = "MACD"
-
-        strategy_info = self.config.get(name)
-        if not strategy_info:
-            raise ValueError(f"没有策略 '{name}' ")
-
-        module_name = strategy_info.get("module")
-        class_name = strategy_info.get("class")
-        params = strategy_info.get("params", {})
-
-        if not module_name or not class_name:
-            raise ValueError(f"策略 '{name}' 缺少模块或类名信息")
-
-        module = importlib.import_module(module_name)
-        strategy_class = getattr(module, class_name)
-
-        return strategy_class, params
+        return self.registry.get_strategy(name=name, params=params)
@@ -1,6 +1,6 @@
-import backtrader as bt
 import numpy as np
-from scipy.signal import argrelextrema
+
+from indicators import ta
 
 from .trade_strategy import TradeStrategy
 
@@ -43,16 +43,14 @@ class MACDStrategy(TradeStrategy):
         self.params_dict = params
 
         # 指标计算
-        self.ma15 = bt.indicators.SimpleMovingAverage(
-            self.data.close, period=self.params_dict["ma_period"]
-        )
-        self.macd = bt.indicators.MACD(
-            self.data.close,
-            period_me1=self.params_dict["macd_fast"],
-            period_me2=self.params_dict["macd_slow"],
-            period_signal=self.params_dict["macd_signal"],
+        self.ma15 = self.indicator("sma", period=self.params_dict["ma_period"])
+        self.macd = self.indicator(
+            "macd",
+            fast=self.params_dict["macd_fast"],
+            slow=self.params_dict["macd_slow"],
+            signal=self.params_dict["macd_signal"],
         )
-        self.atr = bt.indicators.ATR(self.data, period=self.params_dict["atr_period"])
+        self.atr = self.indicator("atr", period=self.params_dict["atr_period"])
         self.diff = self.macd.macd  # MACD线
         self.dea = self.macd.signal  # 信号线
 
@@ -113,9 +111,13 @@ class MACDStrategy(TradeStrategy):
 
         # 当有足够数据时检测峰值
         if len(self.high_buffer) >= window_size:
-            # 使用scipy检测局部极大值
+            # 检测严格局部极大值，等价于 argrelextrema(highs, np.greater, order=1)，
+            # 避免为此在启动时导入scipy
             highs = np.array(self.high_buffer)
-            peak_indices = argrelextrema(highs, np.greater, order=1)[0]
+            peak_indices = (
+                np.flatnonzero((highs[1:-1] > highs[:-2]) & (highs[1:-1] > highs[2:]))
+                + 1
+            )
             # peak_indices = find_peaks(highs)[0]
 
             # 检查指定区间[-5:-2]是否存在峰值
@@ -144,3 +146,71 @@ class MACDStrategy(TradeStrategy):
         else:
             if exit_signal and self.order is None:
                 self.order = self.close()  # 平仓
+
+    @classmethod
+    def screen(cls, panel, params: dict) -> dict:
+        """向量化版本的开仓/平仓条件，与 next() 在最新一个 Bar 上的判断一致。"""
+        close, high, volume = panel.close, panel.high, panel.volume
+        ma = ta.sma(close, params["ma_period"])
+        macd = ta.macd(
+            close, params["macd_fast"], params["macd_slow"], params["macd_signal"]
+        )
+        diff, dea = macd["macd"], macd["signal"]
+        atr = ta.atr(high, panel.low, close, params["atr_period"])["atr"]
+
+        # --- 开仓条件（使用前一交易日的数据）---
+        prev_volume = volume[:, -2]
+        volume_avg2 = (volume[:, -3] + volume[:, -4]) / 2.0
+        long_signal = (
+            (close[:, -2] < ma[:, -2])
+            & (diff[:, -2] < 0)
+            & (diff[:, -2] > dea[:, -2])
+            & (prev_volume > volume_avg2)
+        )
+
+        # --- 平仓条件 ---
+        exit_condition1 = close[:, -1] > ma[:, -1] + 0.5 * atr[:, -1]
+
+        # 与 high_buffer 相同：最近 window_size 个前一交易日最高价中的局部峰值
+        window_size = params["peak_window"]
+        highs = high[:, -window_size - 1 : -1]
+        inner = np.arange(
+            max(window_size - 5, 1), min(window_size - 2, window_size - 1)
+        )
+        exit_condition2 = np.zeros(len(close), dtype=bool)
+        for i in inner:
+            exit_condition2 |= (highs[:, i] > highs[:, i - 1]) & (
+                highs[:, i] > highs[:, i + 1]
+            )
+
+        exit_condition3 = close[:, -1] < close[:, -2]
+
+        recent_volume = volume[:, -10:]
+        vol_zscore = (prev_volume - recent_volume.mean(axis=1)) / (
+            recent_volume.std(axis=1) + 1e-8
+        )
+        exit_condition4 = vol_zscore > params["zscore_threshold"]
+
+        exit_signal = (
+            exit_condition1 & exit_condition2 & exit_condition3 & exit_condition4
+        )
+
+        # 按前一交易日的放量程度排序
+        with np.errstate(divide="ignore", invalid="ignore"):
+            score = prev_volume / volume_avg2
+        return {"entry": long_signal, "exit": exit_signal, "score": score}
+
+    def get_state(self) -> dict:
+        return {"high_buffer": list(self.high_buffer)}
+
+    def set_state(self, state: dict, price_scale: float = 1.0) -> None:
+        self.high_buffer = [high * price_scale for high in state.get("high_buffer", [])]
+
+    def live_lookback(self) -> int:
+        # 需要覆盖MA周期、ATR的前一个收盘价和10日成交量窗口
+        return max(
+            self.min_bars,
+            self.params_dict["ma_period"],
+            self.params_dict["atr_period"] + 1,
+            10,
+        )
@@ -0,0 +1,382 @@
+"""策略注册表模块。
+
+该模块负责发现并缓存策略类：配置文件中声明的策略、`strategy` 包内的策略模块以及
+通过 entry point 注册的插件策略。配置文件只在内容变化时重新解析，策略类只导入一次，
+参数模式在首次使用时生成并缓存。长驻的工作进程可以共享同一个注册表，
+并通过 `reload` 热重载被修改过的策略模块。
+"""
+
+import importlib
+import importlib.metadata
+import inspect
+import os
+import pkgutil
+import sys
+import threading
+import tomllib
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Any
+
+ENTRY_POINT_GROUP = "backtrader_trading.strategies"
+DEFAULT_CONFIG_PATH = "config/strategy_config.toml"
+DEFAULT_STRATEGY = "MACD"
+
+
+@dataclass(frozen=True)
+class ParamSchema:
+    """策略参数模式。
+
+    参数模式由配置文件中的默认参数推导而来，用于在运行前校验参数覆盖值，
+    避免参数扫描时拼写错误或类型错误的参数一直到策略内部才报错。
+
+    Attributes:
+        defaults: 参数默认值
+        types: 参数名到参数类型的映射
+    """
+
+    defaults: dict[str, Any] = field(default_factory=dict)
+    types: dict[str, type] = field(default_factory=dict)
+
+    @classmethod
+    def from_defaults(cls, defaults: dict[str, Any]) -> "ParamSchema":
+        """根据默认参数生成参数模式。"""
+        return cls(
+            defaults=dict(defaults),
+            types={key: type(value) for key, value in defaults.items()},
+        )
+
+    def validate(self, overrides: dict[str, Any] | None = None) -> dict[str, Any]:
+        """校验参数覆盖值，并返回合并默认值后的完整参数。
+
+        没有声明默认参数的策略不做校验，覆盖值原样合并。
+
+        Args:
+            overrides: 需要覆盖的参数
+
+        Returns:
+            合并后的参数字典
+
+        Raises:
+            ValueError: 存在未声明的参数时抛出
+            TypeError: 参数类型与默认值类型不一致时抛出
+        """
+        params = dict(self.defaults)
+        if not overrides:
+            return params
+        if not self.types:
+            params.update(overrides)
+            return params
+
+        unknown = sorted(set(overrides) - set(self.types))
+        if unknown:
+            raise ValueError(f"未知的策略参数: {', '.join(unknown)}")
+
+        for key, value in overrides.items():
+            expected = self.types[key]
+            if not _is_instance(value, expected):
+                raise TypeError(
+                    f"参数 '{key}' 类型应为 {expected.__name__}，"
+                    f"实际为 {type(value).__name__}"
+                )
+            params[key] = value
+        return params
+
+
+def _is_instance(value: Any, expected: type) -> bool:
+    """类型检查，整数可以用于浮点参数，但布尔值不能当作数字。"""
+    if isinstance(value, bool) and expected is not bool:
+        return False
+    if expected is float:
+        return isinstance(value, int | float)
+    return isinstance(value, expected)
+
+
+@dataclass
+class StrategyEntry:
+    """注册表中的一条策略记录。
+
+    Attributes:
+        name: 策略名称
+        strategy_class: 策略类
+        module_name: 策略类所在的模块名
+        schema: 策略参数模式
+        origin: 策略来源，"config"、"package" 或 "plugin"
+    """
+
+    name: str
+    strategy_class: type
+    module_name: str
+    schema: ParamSchema
+    origin: str
+
+
+class StrategyRegistry:
+    """策略注册表，缓存策略类和参数模式。
+
+    查找顺序：配置文件中声明的策略 > 策略包内扫描到的策略 > 插件策略。
+    配置文件中的策略按需导入；只有在查找未声明的策略或列出全部策略时才会扫描
+    整个策略包和 entry point 插件，且只扫描一次。
+
+    Attributes:
+        config_path: 策略配置文件路径
+        package: 需要扫描的策略包名
+        entry_point_group: 插件策略的 entry point 分组名
+    """
+
+    def __init__(
+        self,
+        config_path: str = DEFAULT_CONFIG_PATH,
+        package: str = "strategy",
+        entry_point_group: str = ENTRY_POINT_GROUP,
+    ) -> None:
+        self.config_path = config_path
+        self.package = package
+        self.entry_point_group = entry_point_group
+
+        self._lock = threading.RLock()
+        self._config: dict[str, Any] | None = None
+        self._config_mtime: int | None = None
+        self._entries: dict[str, StrategyEntry] = {}
+        self._discovered: dict[str, StrategyEntry] | None = None
+        # 已导入模块的源文件修改时间，用于热重载
+        self._module_mtimes: dict[str, int | None] = {}
+
+    @property
+    def config(self) -> dict[str, Any]:
+        """策略配置字典，仅在配置文件修改后重新解析。
+
+        Raises:
+            FileNotFoundError: 当配置文件不存在时抛出
+            tomllib.TOMLDecodeError: 当配置文件格式错误时抛出
+        """
+        with self._lock:
+            mtime = os.stat(self.config_path).st_mtime_ns
+            if self._config is None or mtime != self._config_mtime:
+                with open(self.config_path, "rb") as f:
+                    self._config = tomllib.load(f)
+                self._config_mtime = mtime
+                # 配置变化后，由配置生成的记录全部失效
+                self._entries = {
+                    name: entry
+                    for name, entry in self._entries.items()
+                    if entry.origin != "config"
+                }
+                self._discovered = None
+            return self._config
+
+    def get(self, name: str | None = None) -> StrategyEntry:
+        """获取策略记录。
+
+        Args:
+            name: 策略名称，如果为None则使用默认策略"MACD"
+
+        Returns:
+            策略记录
+
+        Raises:
+            ValueError: 当策略不存在或配置信息不完整时抛出
+            ImportError: 当无法导入策略模块时抛出
+            AttributeError: 当策略类不存在时抛出
+        """
+        if name is None:
+            name = DEFAULT_STRATEGY
+
+        with self._lock:
+            config = self.config
+            entry = self._entries.get(name)
+            if entry is not None:
+                return entry
+
+            if name in config:
+                entry = self._entry_from_config(name, config[name])
+            else:
+                entry = self._discover().get(name)
+                if entry is None:
+                    raise ValueError(f"没有策略 '{name}' ")
+
+            self._entries[name] = entry
+            return entry
+
+    def get_strategy(
+        self, name: str | None = None, params: dict[str, Any] | None = None
+    ) -> tuple[type, dict]:
+        """获取策略类和校验后的参数。
+
+        Args:
+            name: 策略名称，如果为None则使用默认策略"MACD"
+            params: 覆盖配置文件默认值的参数
+
+        Returns:
+            包含策略类和参数字典的元组
+        """
+        entry = self.get(name)
+        return entry.strategy_class, entry.schema.validate(params)
+
+    def names(self) -> list[str]:
+        """列出所有可用的策略名称。"""
+        with self._lock:
+            names = {
+                key
+                for key, value in self.config.items()
+                if isinstance(value, dict) and "module" in value
+            }
+            names.update(self._discover())
+            return sorted(names)
+
+    def reload(self) -> list[str]:
+        """热重载源文件已修改的策略模块。
+
+        重载后，相关的策略记录会被丢弃，下次获取时重新生成。
+        配置文件的变化在访问 `config` 时自动生效，无需调用本方法。
+
+        Returns:
+            被重载的模块名列表
+        """
+        reloaded = []
+        with self._lock:
+            for module_name, mtime in list(self._module_mtimes.items()):
+                module = sys.modules.get(module_name)
+                if module is None or _module_mtime(module) == mtime:
+                    continue
+                importlib.reload(module)
+                self._module_mtimes[module_name] = _module_mtime(module)
+                reloaded.append(module_name)
+
+            if reloaded:
+                self._entries = {
+                    name: entry
+                    for name, entry in self._entries.items()
+                    if entry.module_name not in reloaded
+                }
+                self._discovered = None
+        return reloaded
+
+    def clear(self) -> None:
+        """清空全部缓存。"""
+        with self._lock:
+            self._config = None
+            self._config_mtime = None
+            self._entries.clear()
+            self._discovered = None
+
+    def _entry_from_config(self, name: str, info: dict[str, Any]) -> StrategyEntry:
+        module_name = info.get("module")
+        class_name = info.get("class")
+        if not module_name or not class_name:
+            raise ValueError(f"策略 '{name}' 缺少模块或类名信息")
+
+        module = self._import(module_name)
+        strategy_class = getattr(module, class_name)
+        return StrategyEntry(
+            name=name,
+            strategy_class=strategy_class,
+            module_name=module_name,
+            schema=ParamSchema.from_defaults(info.get("params", {})),
+            origin="config",
+        )
+
+    def _discover(self) -> dict[str, StrategyEntry]:
+        """扫描策略包和插件，只在首次调用（或重载后）执行。"""
+        if self._discovered is not None:
+            return self._discovered
+
+        discovered: dict[str, StrategyEntry] = {}
+        for entry in self._scan_package():
+            discovered.setdefault(entry.name, entry)
+        for entry in self._scan_plugins():
+            discovered.setdefault(entry.name, entry)
+
+        self._discovered = discovered
+        return discovered
+
+    def _scan_package(self) -> list[StrategyEntry]:
+        from .trade_strategy import TradeStrategy
+
+        try:
+            package = importlib.import_module(self.package)
+        except ImportError as e:
+            print(f"无法导入策略包 {self.package}: {e}")
+            return []
+
+        entries = []
+        for module_info in pkgutil.iter_modules(getattr(package, "__path__", [])):
+            module_name = f"{self.package}.{module_info.name}"
+            try:
+                module = self._import(module_name)
+            except Exception as e:
+                print(f"跳过无法导入的策略模块 {module_name}: {e}")
+                continue
+
+            for _, obj in inspect.getmembers(module, inspect.isclass):
+                if (
+                    issubclass(obj, TradeStrategy)
+                    and obj is not TradeStrategy
+                    and obj.__module__ == module_name
+                    and obj.strategy_name
+                ):
+                    entries.append(self._entry_from_class(obj, "package"))
+        return entries
+
+    def _scan_plugins(self) -> list[StrategyEntry]:
+        entries = []
+        for ep in importlib.metadata.entry_points(group=self.entry_point_group):
+            try:
+                strategy_class = ep.load()
+            except Exception as e:
+                print(f"跳过无法加载的插件策略 {ep.name}: {e}")
+                continue
+            self._track(sys.modules.get(strategy_class.__module__))
+            entries.append(self._entry_from_class(strategy_class, "plugin", ep.name))
+        return entries
+
+    def _entry_from_class(
+        self, strategy_class: type, origin: str, name: str | None = None
+    ) -> StrategyEntry:
+        name = name or getattr(strategy_class, "strategy_name", None)
+        name = name or strategy_class.__name__
+        # 配置文件中有同名参数时，沿用其默认值作为参数模式
+        info = self.config.get(name, {})
+        return StrategyEntry(
+            name=name,
+            strategy_class=strategy_class,
+            module_name=strategy_class.__module__,
+            schema=ParamSchema.from_defaults(info.get("params", {})),
+            origin=origin,
+        )
+
+    def _import(self, module_name: str) -> ModuleType:
+        module = importlib.import_module(module_name)
+        self._track(module)
+        return module
+
+    def _track(self, module: ModuleType | None) -> None:
+        if module is not None and module.__name__ not in self._module_mtimes:
+            self._module_mtimes[module.__name__] = _module_mtime(module)
+
+
+def _module_mtime(module: ModuleType) -> int | None:
+    path = getattr(module, "__file__", None)
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+_registries: dict[str, StrategyRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(config_path: str = DEFAULT_CONFIG_PATH) -> StrategyRegistry:
+    """获取进程内共享的策略注册表。
+
+    同一配置文件路径在进程内只对应一个注册表实例。
+    """
+    key = os.path.abspath(config_path)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = StrategyRegistry(config_path=config_path)
+        return registry
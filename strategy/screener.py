@@ -0,0 +1,155 @@
+"""全市场选股模块。
+
+一次性读取全市场最近 N 个交易日的数据，在 (股票 × 日期) 面板上以向量化方式
+计算策略最新一个交易日的开仓/平仓信号，不再需要为每只股票运行一次 backtrader。
+
+策略通过类方法 `screen(panel, params)` 提供向量化的选股规则：`panel` 为日线行情
+面板（`data.panel.DailyPanel`，每个字段形状为 (股票数, 日期数)），返回包含
+"entry"（开仓信号）、"exit"（平仓信号）、"score"（排序分数，越大越靠前）的字典，
+每个值是长度为股票数的数组，含义与在最新一个 Bar 上调用 `next()` 时的判断一致。
+没有实现 `screen` 的策略不能用于选股。
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+from data.db_reader import StockDBReader
+from data.panel import DailyPanel
+
+from .config_loader import StrategyConfig
+
+DEFAULT_SCREEN_CONFIG = {
+    "bars": 250,  # 读取的交易日数量，需要覆盖指标的预热期
+    "list_status": ["L"],  # 上市状态筛选
+    "industries": [],  # 行业筛选，为空则不筛选
+    "top": 30,  # 打印的候选股票数量
+    "output": "",  # 结果CSV文件路径，为空则不保存
+}
+
+
+def prepare_panel(panel: DailyPanel) -> DailyPanel:
+    """过滤出可以计算信号的股票。
+
+    停牌日按停牌前的收盘价填充；窗口内上市（历史不足）的股票和最新交易日
+    停牌的股票被剔除。
+    """
+    if panel.close.size == 0:
+        return panel
+    traded_today = ~np.isnan(panel.close[:, -1])
+    filled = panel.fill_suspensions()
+    complete = ~np.isnan(filled.close).any(axis=1)
+    return filled.select(traded_today & complete)
+
+
+RESULT_COLUMNS = ["ts_code", "close", "signal", "score"]
+
+
+def supports_screen(strategy_class: type) -> bool:
+    """策略是否实现了向量化选股规则 `screen`。"""
+    return callable(getattr(strategy_class, "screen", None))
+
+
+def screen_panel(strategy_class: type, params: dict, panel: DailyPanel) -> pd.DataFrame:
+    """在面板上计算策略信号，返回按分数排序的候选列表。
+
+    Args:
+        strategy_class: 实现了 `screen` 的策略类
+        params: 策略参数
+        panel: 日线行情面板
+
+    Returns:
+        包含 ts_code, close, signal, score 列的 DataFrame，
+        开仓信号在前（按分数降序），其后是平仓信号
+
+    Raises:
+        TypeError: 策略没有实现 `screen`
+    """
+    if not supports_screen(strategy_class):
+        raise TypeError(f"策略 {strategy_class.__name__} 没有实现向量化选股规则 screen")
+    panel = prepare_panel(panel)
+    if panel.close.size == 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    signals = strategy_class.screen(panel, params)
+    frames = []
+    for signal in ["entry", "exit"]:
+        mask = np.asarray(signals[signal], dtype=bool)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "ts_code": panel.codes[mask],
+                    "close": panel.close[mask, -1],
+                    "signal": signal,
+                    "score": np.asarray(signals["score"])[mask],
+                }
+            ).sort_values("score", ascending=False)
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def screen_market(config: dict, reader: StockDBReader | None = None) -> pd.DataFrame:
+    """按配置对全市场选股，打印并（可选）保存结果。
+
+    Args:
+        config: `config/config.toml` 的内容，选股参数见 [screen] 部分
+        reader: 数据库读取器
+
+    Returns:
+        候选列表，附带股票名称和行业；策略没有实现 `screen` 时为空
+    """
+    screen_config = {**DEFAULT_SCREEN_CONFIG, **config.get("screen", {})}
+    strategy_class, params = StrategyConfig().get_strategy(
+        name=config["strategy"]["name"]
+    )
+    if not supports_screen(strategy_class):
+        print(
+            f"策略 {strategy_class.__name__} 没有实现向量化选股规则 screen，跳过选股。"
+        )
+        return pd.DataFrame(
+            columns=["ts_code", "name", "industry", "close", "signal", "score"]
+        )
+    reader = reader or StockDBReader()
+
+    started = time.perf_counter()
+    panel = reader.get_daily_panel(
+        last_n=screen_config["bars"],
+        adj_type=config["stock"]["adjust"],
+        list_status=screen_config["list_status"],
+        industries=screen_config["industries"],
+    )
+    loaded = time.perf_counter()
+    result = screen_panel(strategy_class, params, panel)
+    finished = time.perf_counter()
+
+    basic = reader.get_stock_basic(result["ts_code"].tolist())
+    result.insert(1, "name", basic["name"].to_numpy())
+    result.insert(2, "industry", basic["industry"].to_numpy())
+
+    trade_date = panel.dates[-1] if len(panel.dates) else "-"
+    print(
+        f"选股日期: {trade_date}, 股票数: {panel.shape[0]}, "
+        f"读取 {loaded - started:.2f}s, 计算 {finished - loaded:.2f}s"
+    )
+    for signal, title in [("entry", "开仓信号"), ("exit", "平仓信号")]:
+        rows = result[result["signal"] == signal].head(screen_config["top"])
+        table = PrettyTable()
+        table.field_names = ["代码", "名称", "行业", "收盘价", "分数"]
+        for row in rows.itertuples():
+            table.add_row(
+                [
+                    row.ts_code,
+                    row.name,
+                    row.industry,
+                    f"{row.close:.2f}",
+                    f"{row.score:.2f}",
+                ]
+            )
+        print(f"\n=== {title} ({(result['signal'] == signal).sum()}) ===\n{table}")
+
+    if screen_config["output"]:
+        result.to_csv(screen_config["output"], index=False)
+        print(f"选股结果已保存至 {screen_config['output']}")
+    return result
@@ -3,8 +3,12 @@ from abc import abstractmethod
 import backtrader as bt
 from prettytable import PrettyTable
 
+from engine.data import BarData
+from indicators.lines import build_indicator
+from monitor.profiling import StrategyTimers, phase
 
-class TradeStrategy(bt.Strategy):
+
+class TradeStrategy(StrategyTimers, bt.Strategy):
     strategy_name: str | None = None  # 用于标识策略名称(可选)
 
     def __init__(self, **params) -> None:
@@ -14,6 +18,86 @@ class TradeStrategy(bt.Strategy):
         super().__init__()
         # 存储每日交易数据，使用字典列表
         self.daily_trade_data: list[dict] = []
+        # 可选的指标缓存，参数扫描时由调用方注入，用于复用预先计算好的指标
+        self.indicator_cache = params.get("indicator_cache")
+        self.adj_type: str = params.get("adj_type", "")
+        # 数据指纹，作为指标缓存键的一部分；没有指纹时不使用指标缓存
+        self.data_version: str | None = params.get("data_version")
+        # 可选的增量运行会话，见 live.session.LiveSession
+        self.live_session = params.get("live_session")
+        # 开启计时（--profile）时记录 next() 和回调的耗时
+        self.install_timers()
+
+    def indicator(self, kind: str, **params):
+        """
+        创建技术指标，在策略的 __init__ 中调用。
+
+        注入了指标缓存时，指标从缓存中读取预先计算好的数组；否则使用 backtrader
+        内置指标。两种方式返回的指标线名称和取值方式完全一致。例：
+            self.sma = self.indicator("sma", period=15)
+            self.macd = self.indicator("macd", fast=12, slow=26, signal=9)
+            self.atr = self.indicator("atr", period=14)
+
+        Args:
+            kind: 指标名称，可选 "sma"、"ema"、"macd"、"atr"
+            **params: 指标参数
+        """
+        if self.live_session is not None:
+            return self.live_session.build_indicator(self.data, kind, params)
+        with phase("indicators"):
+            if isinstance(self.data, BarData):  # 轻量回测引擎
+                return self.data.indicator(
+                    kind,
+                    params,
+                    cache=self.indicator_cache,
+                    adj_type=self.adj_type,
+                    data_version=self.data_version,
+                )
+            return build_indicator(
+                self.data,
+                kind,
+                params,
+                cache=self.indicator_cache,
+                adj_type=self.adj_type,
+                data_version=self.data_version,
+            )
+
+    def start(self) -> None:
+        """
+        策略开始运行前调用。增量运行时在这里恢复持仓和策略状态。
+        """
+        if self.live_session is not None:
+            self.live_session.restore(self)
+
+    def prenext(self) -> None:
+        """
+        指标预热期内调用。增量运行时预热期就是快照中的历史窗口。
+        """
+        if self.live_session is not None:
+            self.live_session.prenext(self)
+
+    def get_state(self) -> dict:
+        """
+        返回增量运行需要保存的策略自身状态（必须可以序列化为JSON）。
+        子类在 next() 中维护了跨 Bar 的状态时需要重写此方法和 set_state()。
+        """
+        return {}
+
+    def set_state(self, state: dict, price_scale: float = 1.0) -> None:
+        """
+        恢复 get_state() 保存的策略状态。
+
+        Args:
+            state: get_state() 返回的状态
+            price_scale: 价格的换算系数，前复权数据在除权除息后需要整体缩放
+        """
+        pass
+
+    def live_lookback(self) -> int:
+        """
+        增量运行时保留的历史 Bar 数，需要覆盖策略在 next() 中回看的最大长度。
+        """
+        return 50
 
     @abstractmethod
     def next(self) -> None:
@@ -139,6 +223,9 @@ class TradeStrategy(bt.Strategy):
         """
         策略结束时调用，打印交易结果汇总表格
         """
+        if self.live_session is not None:
+            self.live_session.capture(self)
+
         if not self.daily_trade_data:
             self.log("没有数据可生成汇总表格", doprint=True)
             return
@@ -7,6 +7,7 @@ import calendar
 import tomllib
 from datetime import datetime
 
+from analysis import EquityRecorder, summarize
 from data.db_based_tushare import TushareDownloader
 from data.db_reader import StockDBReader
 from strategy.trade_strategy import TradeStrategy
@@ -78,8 +79,7 @@ if __name__ == "__main__":
     cerebro.addstrategy(SMAStrategy)
 
     # 加载Analyzer
-    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name="SharpeRatio")
-    cerebro.addanalyzer(bt.analyzers.DrawDown, _name="DrawDown")
+    cerebro.addanalyzer(EquityRecorder, _name="equity")
 
     # 在Broker中设置初始资金和手续费
     cerebro.broker.setcash(10000.0)
@@ -90,6 +90,7 @@ if __name__ == "__main__":
 
     result = cerebro.run()
 
-    print("夏普比率", result[0].analyzers.SharpeRatio.get_analysis()["sharperatio"])
-    print("最大回撤", result[0].analyzers.DrawDown.get_analysis()["max"]["drawdown"])
+    metrics = summarize([result[0].analyzers.equity.get_analysis()]).iloc[0]
+    print("夏普比率", metrics["sharpe"])
+    print("最大回撤", metrics["max_drawdown"])
     cerebro.plot()
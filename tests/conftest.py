@@ -1 +1,24 @@
-# TODO
+import pytest
+
+from benchmarks.synthetic import make_market, write_db
+
+
+@pytest.fixture
+def stock_db(tmp_path):
+    """生成模拟行情数据库，返回数据库路径。
+
+    数据由 `benchmarks.synthetic.make_market` 生成，默认从 2023 年第一个交易日开始，
+    股票代码依次为 600000.SH、000001.SZ、600002.SH……
+
+        path = stock_db(symbols=2, bars=250, seed=21)
+    """
+
+    def make(symbols: int = 2, bars: int = 250, seed: int = 0, **kwargs) -> str:
+        path = str(tmp_path / f"stock-{symbols}-{bars}-{seed}.db")
+        write_db(
+            path,
+            make_market(symbols, bars, seed=seed, **{"start": "20230102", **kwargs}),
+        )
+        return path
+
+    return make
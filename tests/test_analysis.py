@@ -0,0 +1,127 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import (
+    EquityRecorder,
+    RunRecord,
+    max_drawdown,
+    pad,
+    sharpe_ratio,
+    sortino_ratio,
+    summarize,
+)
+
+
+def _record(equity, trade_pnl=(), label=None):
+    equity = np.asarray(equity, dtype=np.float64)
+    return RunRecord(
+        dates=np.arange(len(equity)).astype("datetime64[D]"),
+        equity=equity,
+        exposure=np.full(len(equity), 0.5),
+        trade_pnl=np.asarray(trade_pnl, dtype=np.float64),
+        traded_value=float(equity[0]),
+        label=label or {},
+    )
+
+
+class TestMetrics:
+    """绩效指标函数的测试用例"""
+
+    def test_max_drawdown(self):
+        """测试最大回撤和回撤持续期"""
+        equity = np.array([100, 110, 99, 105, 110, 120, 90, 95, 100])
+        depth, duration = max_drawdown(equity)
+        assert depth == pytest.approx(0.25)
+        # 从120回撤后直到结束都没有创新高
+        assert duration == 3
+
+    def test_sharpe_and_sortino(self):
+        """测试夏普比率、索提诺比率与逐项计算一致"""
+        rng = np.random.default_rng(1)
+        equity = 100 * np.cumprod(1 + rng.normal(0.001, 0.01, 300))
+        returns = equity[1:] / equity[:-1] - 1
+        expected_sharpe = returns.mean() / returns.std(ddof=1) * np.sqrt(252)
+        downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+        assert sharpe_ratio(equity) == pytest.approx(expected_sharpe)
+        assert sortino_ratio(equity) == pytest.approx(
+            returns.mean() / downside * np.sqrt(252)
+        )
+
+    def test_batch_matches_single(self):
+        """测试补齐后批量计算与逐条计算的结果一致"""
+        rng = np.random.default_rng(2)
+        curves = [100 * np.cumprod(1 + rng.normal(0, 0.01, n)) for n in [50, 80, 120]]
+        batch = pad(curves)
+        np.testing.assert_allclose(
+            sharpe_ratio(batch), [sharpe_ratio(c) for c in curves]
+        )
+        depth, duration = max_drawdown(batch)
+        for row, curve in enumerate(curves):
+            assert depth[row] == pytest.approx(max_drawdown(curve)[0])
+            assert duration[row] == max_drawdown(curve)[1]
+
+    def test_summarize(self):
+        """测试汇总结果包含标签和各项指标"""
+        records = [
+            _record([100, 110, 121], trade_pnl=[5, -1, 3], label={"period": 5}),
+            _record([100, 90], label={"period": 10}),
+        ]
+        df = summarize(records)
+
+        assert df["period"].tolist() == [5, 10]
+        assert df["total_return"].tolist() == pytest.approx([0.21, -0.1])
+        assert df["win_rate"].iloc[0] == pytest.approx(2 / 3)
+        assert np.isnan(df["win_rate"].iloc[1])
+        assert df["trades"].tolist() == [3, 0]
+        assert df["exposure"].tolist() == pytest.approx([0.5, 0.5])
+
+
+class _SMACross(bt.Strategy):
+    params = (("period", 10),)
+
+    def __init__(self):
+        self.sma = bt.indicators.SMA(self.data.close, period=self.p.period)
+
+    def next(self):
+        if not self.position and self.data.close[0] > self.sma[0]:
+            self.buy(size=100)
+        elif self.position and self.data.close[0] < self.sma[0]:
+            self.close()
+
+
+class TestEquityRecorder:
+    """EquityRecorder与backtrader内置Analyzer一致性的测试用例"""
+
+    def test_matches_builtin_analyzers(self):
+        """测试记录的资金曲线与DrawDown、TradeAnalyzer的结果一致"""
+        rng = np.random.default_rng(4)
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+        df = pd.DataFrame(
+            {"open": close, "high": close, "low": close, "close": close, "volume": 1e4},
+            index=pd.bdate_range("2023-01-02", periods=300),
+        )
+        cerebro = bt.Cerebro(stdstats=False)
+        cerebro.adddata(bt.feeds.PandasData(dataname=df))
+        cerebro.addstrategy(_SMACross)
+        cerebro.broker.setcash(10000)
+        cerebro.addanalyzer(EquityRecorder, _name="equity", label={"symbol": "X"})
+        cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+        cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
+        strategy = cerebro.run()[0]
+
+        record = strategy.analyzers.equity.get_analysis()
+        drawdown = strategy.analyzers.drawdown.get_analysis()
+        trades = strategy.analyzers.trades.get_analysis()
+
+        assert record.equity[-1] == pytest.approx(cerebro.broker.getvalue())
+        assert max_drawdown(record.equity)[0] * 100 == pytest.approx(
+            drawdown.max.drawdown
+        )
+        assert len(record.trade_pnl) == trades.total.closed
+        assert record.trade_pnl.sum() == pytest.approx(trades.pnl.net.total)
+        # 预热期也记录资金曲线
+        assert len(record.equity) == 300
+        assert record.dates[0] == np.datetime64("2023-01-02")
+        assert summarize([record])["symbol"].iloc[0] == "X"
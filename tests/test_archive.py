@@ -0,0 +1,125 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from benchmarks.synthetic import make_market, write_db
+from data.archive import ArchiveStore, archive_database
+from data.db_reader import StockDBReader
+
+
+@pytest.fixture(scope="module")
+def market():
+    # 2015-01 ~ 2017-09，归档 2015、2016 两年
+    return make_market(symbols=12, bars=700, seed=4, suspend_rate=0.02)
+
+
+@pytest.fixture(scope="module")
+def readers(market, tmp_path_factory):
+    """同一份数据的两个数据库：一个没有归档，一个归档了已结束的年份。"""
+    directory = tmp_path_factory.mktemp("archive")
+    plain, archived = str(directory / "plain.db"), str(directory / "archived.db")
+    write_db(plain, market)
+    shutil.copy(plain, archived)
+    moved = archive_database(archived)
+    assert moved["daily_price"] > 0 and moved["adj_factor"] > 0
+    return StockDBReader(plain), StockDBReader(archived)
+
+
+class TestArchive:
+    """冷数据归档的测试用例"""
+
+    def test_same_results(self, market, readers):
+        """测试归档前后读取器的查询结果相同"""
+        plain, archived = readers
+        codes = market["stock_basic"]["ts_code"].tolist()
+        assert archived.archive.until("daily_price") == "20161231"
+
+        for adj_type in ["bfq", "qfq", "hfq"]:
+            pd.testing.assert_frame_equal(
+                archived.get_daily_price(codes[2], "20150601", "20170301", adj_type),
+                plain.get_daily_price(codes[2], "20150601", "20170301", adj_type),
+            )
+        assert archived.get_trade_dates("20150301") == plain.get_trade_dates("20150301")
+
+        for last_n, end_date in [
+            (5, None),
+            (300, None),
+            (650, None),
+            (800, "20160630"),
+        ]:
+            kwargs = {"end_date": end_date, "list_status": ["L"], "adj_type": "hfq"}
+            expected = plain.get_daily_panel(last_n, **kwargs)
+            panel = archived.get_daily_panel(last_n, **kwargs)
+            assert list(panel.dates) == list(expected.dates)
+            assert list(panel.codes) == list(expected.codes)
+            np.testing.assert_array_equal(panel.close, expected.close)
+            np.testing.assert_array_equal(panel.volume, expected.volume)
+
+        for before in ["20150110", "20160105", "20170110"]:
+            for adj_type in ["bfq", "hfq"]:
+                pd.testing.assert_series_equal(
+                    archived.get_last_close(codes, before, adj_type),
+                    plain.get_last_close(codes, before, adj_type),
+                )
+
+        assert archived.get_data_fingerprint(codes[0], "20100101", "20101231") == ""
+        fingerprint = archived.get_data_fingerprint(codes[0], "20150101", "20171231")
+        assert fingerprint
+        assert fingerprint == archived.get_data_fingerprint(
+            codes[0], "20150101", "20171231"
+        )
+
+    def test_segments(self, market, readers):
+        """测试数据库只保留最新一年，查询时跳过区间外的分段"""
+        _, archived = readers
+        years = pd.read_sql(
+            "SELECT DISTINCT SUBSTR(trade_date, 1, 4) AS year FROM daily_price",
+            archived.engine,
+        )
+        assert years["year"].tolist() == ["2017"]
+
+        store = ArchiveStore(archived.archive.directory)
+        segments = store.segments("daily_price", "20160301", "20160331")
+        assert [segment["year"] for segment in segments] == [2016]
+        df = store.read("daily_price", "20160301", "20160331", columns=["close"])
+        assert list(store._segments) == [
+            f"{store.directory}/daily_price/{segments[0]['file']}"
+        ]
+        daily = market["daily_price"]
+        expected = daily[daily["trade_date"].between("20160301", "20160331")]
+        assert len(df) == len(expected)
+        assert df["trade_date"].is_monotonic_increasing
+
+        with np.load(f"{store.directory}/daily_price/{segments[0]['file']}") as f:
+            assert f["day_delta"].dtype == np.uint16
+            assert len(f["codes"]) == market["stock_basic"].shape[0]
+
+    def test_rearchive(self, market, tmp_path):
+        """测试已归档年份的数据写回数据库后再次归档，只追加新的键"""
+        path = str(tmp_path / "market.db")
+        write_db(path, market)
+        archive_database(path)
+
+        daily = market["daily_price"]
+        old = daily[daily["trade_date"].str.startswith("2016")]
+        extra = old.iloc[:1].assign(ts_code="999999.SZ")
+        engine = create_engine(f"sqlite:///{path}")
+        pd.concat([old, extra]).to_sql(
+            "daily_price", engine, if_exists="append", index=False
+        )
+        engine.dispose()
+
+        moved = archive_database(path)
+        assert moved["daily_price"] == len(old) + 1
+        reader = StockDBReader(path)
+        segments = reader.archive.manifest("daily_price")["segments"]
+        assert [s["rows"] for s in segments if s["file"].startswith("2016-01")] == [1]
+
+        raw = reader.get_raw_daily_price(
+            ["999999.SZ", old["ts_code"].iloc[0]], "20160101", "20161231"
+        )
+        assert (raw["ts_code"] == "999999.SZ").sum() == 1
+        assert not raw.duplicated(["ts_code", "trade_date"]).any()
@@ -0,0 +1,97 @@
+from datetime import datetime
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.array_feed import ArrayData, to_datenum
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(8)
+    n = 300
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame(
+        {
+            "open": close * 1.001,
+            "high": close * 1.02,
+            "low": close * 0.98,
+            "close": close,
+            "volume": rng.integers(1000, 9000, n).astype(float),
+        },
+        index=pd.bdate_range("2023-01-02", periods=n, name="date"),
+    )
+
+
+class _Recorder(bt.Strategy):
+    """记录每个Bar的行情、指标和资金，并按均线交易"""
+
+    def __init__(self):
+        self.sma = bt.ind.SMA(period=20)
+        self.rows = []
+
+    def next(self):
+        d = self.data
+        self.rows.append(
+            (d.datetime[0], d.open[0], d.high[0], d.low[0], d.close[0], d.volume[0])
+            + (self.sma[0], self.broker.getvalue())
+        )
+        if d.close[0] > self.sma[0] and not self.position:
+            self.buy()
+        elif d.close[0] < self.sma[0] and self.position:
+            self.sell()
+
+
+def _run(feed, **kwargs):
+    cerebro = bt.Cerebro(**kwargs)
+    cerebro.adddata(feed)
+    cerebro.addstrategy(_Recorder)
+    return cerebro.run()[0].rows
+
+
+WINDOW = {"fromdate": datetime(2023, 3, 1), "todate": datetime(2023, 10, 31)}
+
+
+class TestArrayData:
+    """ArrayData类的测试用例"""
+
+    @pytest.mark.parametrize(
+        "mode",
+        [{}, {"runonce": False}, {"preload": False}, {"exactbars": 1}],
+        ids=["runonce", "next", "no-preload", "exactbars"],
+    )
+    def test_matches_pandas(self, frame, mode):
+        """测试各种运行模式下与PandasData的结果逐Bar一致"""
+        expected = _run(bt.feeds.PandasData(dataname=frame, **WINDOW), **mode)
+        actual = _run(ArrayData.from_dataframe(frame, **WINDOW), **mode)
+        assert len(actual) == len(expected) > 0
+        assert actual == expected
+
+    def test_window_is_view(self, frame):
+        """测试回测区间通过二分查找截取，不复制输入数组"""
+        close = frame["close"].to_numpy()
+        feed = ArrayData(
+            datetime=frame.index.to_numpy(), close=close, open=close, **WINDOW
+        )
+        cerebro = bt.Cerebro()
+        cerebro.adddata(feed)
+        cerebro.addstrategy(bt.Strategy)
+        cerebro.run()
+
+        window = feed._window()
+        assert np.shares_memory(window["close"], close)
+        dates = frame.index[
+            (frame.index >= "2023-03-01") & (frame.index <= "2023-10-31")
+        ]
+        assert len(window["close"]) == feed.buflen() == len(dates)
+        assert bt.num2date(feed.datetime.array[0]) == dates[0]
+        np.testing.assert_array_equal(feed.volume.array, 0.0)
+
+    def test_to_datenum(self):
+        """测试日期数值与backtrader的date2num一致"""
+        dates = np.array(["2001-02-03", "2024-12-31T15:00"], dtype="datetime64[ns]")
+        expected = [bt.date2num(pd.Timestamp(d).to_pydatetime()) for d in dates]
+        np.testing.assert_allclose(to_datenum(dates), expected)
+        np.testing.assert_array_equal(to_datenum(np.array(expected)), expected)
@@ -0,0 +1,159 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from benchmarks.synthetic import make_fundamentals, make_market, write_db
+from data.asof import asof_join, latest_reports
+from data.db_based_tushare import TushareDownloader
+from data.db_reader import StockDBReader
+
+
+@pytest.fixture(scope="module")
+def market():
+    market = make_market(symbols=8, bars=300, seed=3, suspend_rate=0.01)
+    return {**market, **make_fundamentals(market, seed=3, revision_rate=0.3)}
+
+
+@pytest.fixture(scope="module")
+def reader(market, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("asof") / "market.db")
+    write_db(path, market)
+    return StockDBReader(path)
+
+
+def _random_frames(seed: int):
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range("2024-01-01", periods=60).strftime("%Y%m%d").to_numpy()
+    codes = np.array(["000001.SZ", "000002.SZ", "600000.SH", "688001.SH"])
+    left = pd.DataFrame(
+        {"ts_code": rng.choice(codes[:3], 200), "trade_date": rng.choice(days, 200)}
+    )
+    right = pd.DataFrame(
+        {
+            "ts_code": rng.choice(codes, 40),
+            "ann_date": rng.choice(days, 40),
+            "value": rng.normal(size=40),
+        }
+    ).drop_duplicates(["ts_code", "ann_date"])
+    return left, right
+
+
+class TestAsof:
+    """按时间点关联的测试用例"""
+
+    @pytest.mark.parametrize("allow_exact", [True, False])
+    def test_matches_merge_asof(self, allow_exact):
+        """测试as-of关联与pandas的merge_asof结果一致，且不改变左边的行顺序"""
+        left, right = _random_frames(0)
+        joined = asof_join(
+            left, right, right_on="ann_date", columns=["value"], allow_exact=allow_exact
+        )
+        pd.testing.assert_frame_equal(joined[["ts_code", "trade_date"]], left)
+
+        expected = pd.merge_asof(
+            left.astype({"trade_date": int}).reset_index().sort_values("trade_date"),
+            right.astype({"ann_date": int}).sort_values("ann_date"),
+            left_on="trade_date",
+            right_on="ann_date",
+            by="ts_code",
+            allow_exact_matches=allow_exact,
+        ).set_index("index")
+        np.testing.assert_array_equal(
+            joined["value"].to_numpy(), expected["value"].sort_index().to_numpy()
+        )
+
+    def test_latest_reports(self):
+        """测试新报告期公布后才公布的旧报告期更正被丢弃，同一报告期的更正保留"""
+        df = pd.DataFrame(
+            {
+                "ts_code": ["A"] * 5,
+                "ann_date": [
+                    "20240420",
+                    "20240420",
+                    "20240601",
+                    "20240830",
+                    "20240901",
+                ],
+                "end_date": [
+                    "20231231",
+                    "20240331",
+                    "20240331",
+                    "20240630",
+                    "20240331",
+                ],
+                "roe": [1.0, 2.0, 2.5, 3.0, 9.0],
+            }
+        )
+        reports = latest_reports(df.iloc[::-1])
+        assert reports["roe"].tolist() == [1.0, 2.0, 2.5, 3.0]
+
+        bars = pd.DataFrame(
+            {
+                "ts_code": "A",
+                "trade_date": ["20240420", "20240422", "20240603", "20240902"],
+            }
+        )
+        joined = asof_join(bars, reports, right_on="ann_date", allow_exact=False)
+        assert joined["roe"].isna().tolist() == [True, False, False, False]
+        assert joined["roe"].tolist()[1:] == [2.0, 2.5, 3.0]
+        assert joined["end_date"].tolist()[1:] == ["20240331", "20240331", "20240630"]
+
+
+class TestPointInTime:
+    """每日指标和财务指标对齐到行情面板的测试用例"""
+
+    def test_panel_values(self, market, reader):
+        """测试面板每个格子取当天已知的最新值，财务指标只用已公告的数据"""
+        panel = reader.get_daily_panel(last_n=200, adj_type="hfq")
+        values = reader.get_point_in_time(
+            panel, basic_fields=["pe_ttm", "total_mv"], fina_fields=["roe"]
+        )
+        assert values["pe_ttm"].shape == panel.shape
+
+        basic = market["daily_basic"]
+        fina = latest_reports(market["fina_indicator"])
+        rng = np.random.default_rng(0)
+        for i, j in zip(
+            rng.integers(0, panel.shape[0], 300), rng.integers(0, panel.shape[1], 300)
+        ):
+            code, date = panel.codes[i], panel.dates[j]
+            known = basic[(basic["ts_code"] == code) & (basic["trade_date"] <= date)]
+            expected = known["pe_ttm"].iloc[-1] if len(known) else np.nan
+            np.testing.assert_equal(values["pe_ttm"][i, j], expected)
+
+            reports = fina[(fina["ts_code"] == code) & (fina["ann_date"] < date)]
+            expected = reports["roe"].iloc[-1] if len(reports) else np.nan
+            np.testing.assert_equal(values["roe"][i, j], expected)
+
+        # 停牌日沿用停牌前的每日指标
+        suspended = np.isnan(panel.close)
+        assert suspended.any()
+        assert not np.isnan(values["total_mv"][suspended]).all()
+
+    def test_missing_tables(self, tmp_path):
+        """测试数据库中还没有指标表时返回NaN"""
+        market = make_market(symbols=3, bars=30, seed=1)
+        write_db(str(tmp_path / "plain.db"), market)
+        reader = StockDBReader(str(tmp_path / "plain.db"))
+        panel = reader.get_daily_panel(last_n=10)
+        values = reader.get_point_in_time(panel, ["pb"], ["roe"])
+        assert np.isnan(values["pb"]).all() and np.isnan(values["roe"]).all()
+
+    def test_download_fina_indicator(self, market, tmp_path):
+        """测试按报告期下载财务指标，重复的公告只保存一次"""
+        fina = market["fina_indicator"]
+        pro = MagicMock()
+        pro.fina_indicator_vip.side_effect = lambda period: pd.concat(
+            [fina[fina["end_date"] == period]] * 2
+        )
+        downloader = object.__new__(TushareDownloader)
+        downloader.engine = create_engine(f"sqlite:///{tmp_path / 'fina.db'}")
+        downloader.pro = pro
+        first, last = fina["end_date"].min(), fina["end_date"].max()
+        downloader.get_fina_indicator(first, last)
+        downloader.get_fina_indicator(first, last)
+        stored = pd.read_sql("SELECT * FROM fina_indicator", downloader.engine)
+        assert len(stored) == len(fina)
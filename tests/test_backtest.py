@@ -0,0 +1,175 @@
+import os
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from backtest import BacktestJob, ResultStore, fingerprint, run_backtest
+from data.db_reader import StockDBReader
+from indicators import IndicatorCache
+
+SYMBOL = "000001.SZ"
+
+
+@pytest.fixture
+def reader(tmp_path):
+    rng = np.random.default_rng(11)
+    n = 300
+    dates = pd.bdate_range("2023-01-02", periods=n).strftime("%Y%m%d")
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    daily = pd.DataFrame(
+        {
+            "ts_code": SYMBOL,
+            "trade_date": dates,
+            "open": close,
+            "high": close * 1.02,
+            "low": close * 0.98,
+            "close": close,
+            "vol": rng.integers(1000, 9000, n).astype(float),
+        }
+    )
+    adj = pd.DataFrame({"ts_code": SYMBOL, "trade_date": dates, "adj_factor": 1.0})
+    engine = create_engine(f"sqlite:///{tmp_path / 'stock.db'}")
+    daily.to_sql("daily_price", engine, index=False)
+    adj.to_sql("adj_factor", engine, index=False)
+    return StockDBReader(str(tmp_path / "stock.db"))
+
+
+@pytest.fixture
+def job():
+    return BacktestJob(
+        strategy="MACD",
+        symbol=SYMBOL,
+        start_date="20230101",
+        end_date="20231231",
+        broker={"commission": 0.0006, "stamp_duty": 0.0005, "transfer_fee": 0.00001},
+    )
+
+
+class TestRunBacktest:
+    """回测结果缓存的测试用例"""
+
+    def test_cache_hit(self, reader, job, tmp_path):
+        """测试相同设置的第二次运行直接返回保存的结果，不读取行情"""
+        store = ResultStore(str(tmp_path / "results"))
+        first = run_backtest(job, reader, store)
+        assert not first.cached and first.key in store
+
+        reader.get_daily_price = MagicMock(wraps=reader.get_daily_price)
+        second = run_backtest(job, reader, store)
+
+        assert second.cached
+        reader.get_daily_price.assert_not_called()
+        assert second.key == first.key
+        assert second.final_value == pytest.approx(first.final_value)
+        assert second.metrics == pytest.approx(first.metrics, nan_ok=True)
+        np.testing.assert_array_equal(second.record.equity, first.record.equity)
+        np.testing.assert_array_equal(second.record.fills, first.record.fills)
+
+    def test_force(self, reader, job, tmp_path):
+        """测试--force忽略保存的结果"""
+        store = ResultStore(str(tmp_path / "results"))
+        run_backtest(job, reader, store)
+        assert not run_backtest(job, reader, store, force=True).cached
+
+    def test_key_changes(self, reader, job, tmp_path):
+        """测试参数、手续费或数据变化时得到新的缓存键"""
+        store = ResultStore(str(tmp_path / "results"))
+        base = run_backtest(job, reader, store).key
+
+        params = BacktestJob(**{**job.to_dict(), "params": {"ma_period": 20}})
+        broker = BacktestJob(
+            **{**job.to_dict(), "broker": {**job.broker, "commission": 0.0003}}
+        )
+        assert run_backtest(params, reader, store).key != base
+        assert run_backtest(broker, reader, store).key != base
+
+        with reader.engine.begin() as conn:
+            conn.execute(
+                text(
+                    "UPDATE daily_price SET close = close * 1.01 "
+                    "WHERE trade_date = '20230601'"
+                )
+            )
+        changed = run_backtest(job, reader, store)
+        assert not changed.cached and changed.key != base
+
+    @pytest.mark.parametrize("engine", ["backtrader", "bar"])
+    def test_indicator_cache_follows_data(self, reader, job, engine):
+        """测试指标缓存键包含数据指纹，修正历史数据后重新计算指标"""
+        job = BacktestJob(**{**job.to_dict(), "engine": engine})
+        cache = IndicatorCache()
+        run_backtest(job, reader, indicator_cache=cache)
+        misses = cache.misses
+        assert misses and not cache.hits
+        run_backtest(job, reader, indicator_cache=cache)
+        assert cache.hits == misses
+
+        with reader.engine.begin() as conn:
+            conn.execute(
+                text(
+                    "UPDATE daily_price SET close = close * 1.01 "
+                    "WHERE trade_date = '20230601'"
+                )
+            )
+        run_backtest(job, reader, indicator_cache=cache)
+        assert (cache.misses, cache.hits) == (2 * misses, misses)
+
+    def test_code_fingerprint_covers_data_modules(self):
+        """测试复权计算和数据源模块都计入源代码指纹"""
+        for module in ["data/db_reader.py", "data/archive.py", "data/source.py"]:
+            assert module in fingerprint._ENGINE_MODULES
+        for module in fingerprint._ENGINE_MODULES:
+            assert os.path.exists(os.path.join(fingerprint._ROOT, module)), module
+
+    def test_no_data(self, reader, job):
+        """测试区间内没有数据时返回None"""
+        empty = BacktestJob(**{**job.to_dict(), "start_date": "20300101"})
+        assert run_backtest(empty, reader) is None
+
+    def test_bar_engine(self, reader, job, tmp_path):
+        """测试轻量引擎与backtrader的结果一致，且使用不同的缓存键"""
+        store = ResultStore(str(tmp_path / "results"))
+        expected = run_backtest(job, reader, store)
+        actual = run_backtest(
+            BacktestJob(**{**job.to_dict(), "engine": "bar"}), reader, store
+        )
+
+        assert not actual.cached and actual.key != expected.key
+        assert actual.strategy is None
+        assert actual.final_value == pytest.approx(expected.final_value)
+        assert actual.metrics == pytest.approx(expected.metrics, nan_ok=True)
+        np.testing.assert_allclose(actual.record.equity, expected.record.equity)
+
+    def test_from_config(self):
+        """测试由config.toml创建回测任务"""
+        config = {
+            "cash": 50000,
+            "strategy": {"name": "MACD"},
+            "stock": {"symbol": [SYMBOL], "adjust": "hfq"},
+            "date": {
+                "start_year": 2024,
+                "start_month": 2,
+                "end_year": 2024,
+                "end_month": 2,
+            },
+            "broker": {"commission": 0.0006},
+        }
+        job = BacktestJob.from_config(config)
+        assert (job.start_date, job.end_date) == ("20240201", "20240229")
+        assert job.adj_type == "hfq" and job.cash == 50000
+
+
+class TestResultStore:
+    """ResultStore类的测试用例"""
+
+    def test_missing_or_corrupt(self, tmp_path):
+        """测试结果不存在或损坏时返回None"""
+        store = ResultStore(str(tmp_path))
+        key = "ab" * 32
+        assert store.get(key) is None
+        (tmp_path / "ab").mkdir()
+        (tmp_path / "ab" / f"{key}.json").write_text("{", encoding="utf-8")
+        assert store.get(key) is None
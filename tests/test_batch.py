@@ -0,0 +1,209 @@
+import json
+import multiprocessing as mp
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from backtest import batch
+from backtest.batch import load_jobs, run_batch, run_items
+
+SYMBOLS = ["600000.SH", "000001.SZ"]
+
+CONFIG = {
+    "cash": 100000,
+    "strategy": {"name": "MACD"},
+    "stock": {"symbol": SYMBOLS[:1], "adjust": "qfq"},
+    "date": {"start_year": 2023, "start_month": 1, "end_year": 2023, "end_month": 12},
+    "broker": {"commission": 0.0006, "stamp_duty": 0.0005, "transfer_fee": 0.00001},
+}
+
+fork_only = pytest.mark.skipif(
+    mp.get_start_method() != "fork", reason="需要fork启动方式"
+)
+
+
+@pytest.fixture
+def db(stock_db):
+    return stock_db(symbols=2, bars=250, seed=21)
+
+
+def _write_jobs(tmp_path, db, body, workers=2):
+    path = tmp_path / "jobs.toml"
+    output = tmp_path / "out" / "batch.jsonl"
+    path.write_text(
+        f"""
+[batch]
+workers = {workers}
+timeout = 60
+output = "{output.as_posix()}"
+db = "{db}"
+result_dir = ""
+update_db = true
+{body}
+""",
+        encoding="utf-8",
+    )
+    return str(path), output
+
+
+def _lines(output):
+    return [
+        json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()
+    ]
+
+
+class TestLoadJobs:
+    """任务文件解析的测试用例"""
+
+    def test_expand(self, tmp_path, db):
+        """测试按股票、区间和参数网格展开，未指定的设置取自config.toml"""
+        path, _ = _write_jobs(
+            tmp_path,
+            db,
+            f"""
+[[jobs]]
+symbols = {json.dumps(SYMBOLS)}
+windows = [["20230101", "20230630"], ["20230701", "20231231"]]
+params = {{ ma_period = [10, 20], atr_period = 5 }}
+priority = 3
+""",
+        )
+        settings, items = load_jobs(path, CONFIG)
+
+        assert settings["workers"] == 2
+        assert len(items) == 8
+        assert {item.job.params["ma_period"] for item in items} == {10, 20}
+        assert all(item.job.params["atr_period"] == 5 for item in items)
+        assert all(item.job.cash == 100000 and item.priority == 3 for item in items)
+        assert len({item.id for item in items}) == 8
+
+    def test_workers(self, tmp_path, db):
+        """测试 workers 为 0 时使用全部 CPU，负数报错"""
+        path, _ = _write_jobs(tmp_path, db, "[[jobs]]", workers=0)
+        settings, _ = load_jobs(path, CONFIG)
+        assert settings["workers"] == (os.cpu_count() or 1)
+
+        path, _ = _write_jobs(tmp_path, db, "[[jobs]]", workers=-1)
+        with pytest.raises(ValueError):
+            load_jobs(path, CONFIG)
+
+
+class TestRunBatch:
+    """批量回测调度的测试用例"""
+
+    def test_run_and_resume(self, tmp_path, db):
+        """测试结果逐行写入，数据库只更新一次，恢复运行时跳过已完成的任务"""
+        path, output = _write_jobs(
+            tmp_path,
+            db,
+            f"""
+[[jobs]]
+symbols = {json.dumps(SYMBOLS)}
+params = {{ ma_period = [10, 20] }}
+""",
+        )
+        update_db = MagicMock()
+        records = run_batch(path, CONFIG, update_db=update_db)
+
+        update_db.assert_called_once()
+        assert len(records) == 4
+        assert all(r["status"] == "ok" for r in records)
+        assert len(_lines(output)) == 4
+        assert "sharpe" in records[0]["metrics"]
+
+        # 模拟中断：最后一行写了一半
+        lines = output.read_text(encoding="utf-8").splitlines()
+        output.write_text("\n".join(lines[:3]) + "\n" + lines[3][:20], encoding="utf-8")
+        resumed = run_batch(path, CONFIG)
+        assert len(resumed) == 1
+        assert resumed[0]["id"] == json.loads(lines[3])["id"]
+
+    def test_priority(self, tmp_path, db):
+        """测试单进程时按优先级从高到低运行"""
+        path, output = _write_jobs(
+            tmp_path,
+            db,
+            """
+[[jobs]]
+params = { ma_period = 10 }
+priority = 1
+
+[[jobs]]
+params = { ma_period = 20 }
+priority = 5
+""",
+            workers=1,
+        )
+        run_batch(path, CONFIG)
+        assert [r["job"]["params"]["ma_period"] for r in _lines(output)] == [20, 10]
+
+    def test_error_isolated(self, tmp_path, db):
+        """测试单个任务出错不影响其他任务"""
+        path, _ = _write_jobs(
+            tmp_path,
+            db,
+            """
+[[jobs]]
+params = { not_a_param = 1 }
+
+[[jobs]]
+params = { ma_period = 10 }
+""",
+        )
+        statuses = sorted(r["status"] for r in run_batch(path, CONFIG))
+        assert statuses == ["error", "ok"]
+
+    @fork_only
+    def test_crash_and_timeout(self, tmp_path, db, monkeypatch):
+        """测试子进程崩溃和超时被记录，批量运行继续"""
+        _, items = load_jobs(
+            _write_jobs(
+                tmp_path,
+                db,
+                f"""
+[[jobs]]
+symbols = {json.dumps(SYMBOLS)}
+params = {{ ma_period = [10, 20, 30] }}
+timeout = 1
+""",
+            )[0],
+            CONFIG,
+        )
+        real_run = batch.run_backtest
+
+        def flaky(job, *args, **kwargs):
+            if job.params["ma_period"] == 20:
+                os._exit(3)
+            if job.params["ma_period"] == 30:
+                time.sleep(30)
+            return real_run(job, *args, **kwargs)
+
+        # fork启动的子进程继承父进程中被替换的函数
+        monkeypatch.setattr(batch, "run_backtest", flaky)
+        records = run_items(items, str(tmp_path / "crash.jsonl"), workers=3, db_name=db)
+
+        statuses = {r["job"]["params"]["ma_period"]: r["status"] for r in records}
+        assert statuses == {10: "ok", 20: "error", 30: "timeout"}
+
+    def test_shared_memory(self, tmp_path, db):
+        """测试行情放入共享内存时结果不变"""
+        body = f"""
+[[jobs]]
+symbols = {json.dumps(SYMBOLS)}
+params = {{ ma_period = 10 }}
+"""
+        path, _ = _write_jobs(tmp_path, db, body)
+        expected = {r["id"]: r["final_value"] for r in run_batch(path, CONFIG)}
+
+        text = open(path, encoding="utf-8").read()
+        shared_path = tmp_path / "shared.toml"
+        shared_path.write_text(
+            text.replace("[batch]", "[batch]\nshared_memory = true").replace(
+                "batch.jsonl", "shared.jsonl"
+            ),
+            encoding="utf-8",
+        )
+        records = run_batch(str(shared_path), CONFIG)
+        assert {r["id"]: r["final_value"] for r in records} == pytest.approx(expected)
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.suite import compare, run_suite
+from benchmarks.synthetic import make_market, next_day, write_db
+from data.db_reader import StockDBReader
+
+
+@pytest.fixture(scope="module")
+def market():
+    return make_market(symbols=6, bars=400, seed=5, suspend_rate=0.01, event_rate=0.02)
+
+
+class TestSyntheticMarket:
+    """模拟行情生成器的测试用例"""
+
+    def test_deterministic(self, market):
+        """测试相同的种子生成完全相同的数据，不同的种子不同"""
+        again = make_market(
+            symbols=6, bars=400, seed=5, suspend_rate=0.01, event_rate=0.02
+        )
+        for name, df in market.items():
+            pd.testing.assert_frame_equal(df, again[name])
+        other = make_market(symbols=6, bars=400, seed=6)
+        assert not market["daily_price"]["close"].equals(other["daily_price"]["close"])
+
+    def test_suspensions_and_adj_jumps(self, market):
+        """测试停牌日没有日线但有复权因子，复权因子只升不降且存在跳升"""
+        daily, adj = market["daily_price"], market["adj_factor"]
+        assert len(daily) < len(adj) == 6 * 400
+        factors = adj.pivot(index="trade_date", columns="ts_code", values="adj_factor")
+        steps = np.diff(factors.to_numpy(), axis=0)
+        assert (steps >= 0).all() and (steps > 0).any()
+
+    def test_reader_hfq_within_price_limit(self, market, tmp_path):
+        """测试写入数据库后后复权价格连续，相邻交易日涨跌不超过涨跌停幅度"""
+        db = str(tmp_path / "market.db")
+        write_db(db, market)
+        reader = StockDBReader(db)
+        code = market["stock_basic"]["ts_code"].iloc[0]
+        dates = market["trade_calendar"]["cal_date"]
+        df = reader.get_daily_price(code, dates.iloc[0], dates.iloc[-1], "hfq")
+        days = market["daily_price"].query("ts_code == @code")
+        assert len(df) == len(days)
+        # 停牌前后可能跨越多个交易日，只检查连续的交易日
+        consecutive = np.isin(
+            days["trade_date"].to_numpy()[1:],
+            dates.to_numpy()[np.searchsorted(dates, days["trade_date"])[:-1] + 1],
+        )
+        change = df["close"].pct_change().to_numpy()[1:][consecutive]
+        assert np.abs(change).max() <= 0.1 + 1e-3
+
+    def test_next_day(self, market):
+        """测试增量数据是所有股票最后一个交易日之后的一天"""
+        rows = next_day(market)
+        assert len(rows) == 6
+        assert (rows["trade_date"] > market["trade_calendar"]["cal_date"].max()).all()
+
+
+class TestSuite:
+    """基准测试套件的测试用例"""
+
+    def test_run_and_compare(self):
+        """测试小规模运行得到全部测试项，并能与基准结果对比"""
+        report = run_suite(scales=[(3, 120)], repeat=1)
+        cases = {r["case"] for r in report["results"]}
+        assert cases == {
+            "reader_qfq",
+            "reader_hfq",
+            "reader_panel",
+            "upsert",
+            "commission",
+            "macd_backtrader",
+            "macd_bar",
+        }
+        assert all(r["seconds"] > 0 for r in report["results"])
+        assert "commit" in report["meta"]
+
+        baseline = {
+            "results": [{**r, "seconds": r["seconds"] / 2} for r in report["results"]]
+        }
+        rows = compare(report, baseline, threshold=1.5)
+        assert len(rows) == len(report["results"])
+        assert all(r["slower"] for r in rows)
+        assert rows[0]["ratio"] == pytest.approx(2.0)
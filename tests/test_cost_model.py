@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from commission import AShareCostModel, MyStockCommissionScheme
+from engine.broker import Broker
+from engine.portfolio import PortfolioEngine
+
+
+class TestAShareCostModel:
+    """AShareCostModel类的测试用例"""
+
+    def setup_method(self):
+        self.model = AShareCostModel()
+
+    def test_min_commission(self):
+        """测试小额买入按最低5元收取佣金"""
+        # 成交金额1000元：佣金0.6元不足5元，过户费0.01元
+        assert self.model.fee(100, 10.0) == 5.01
+
+    def test_stamp_duty_on_sell_only(self):
+        """测试印花税只在卖出时收取"""
+        buy = self.model.fee(10000, 10.0)
+        sell = self.model.fee(-10000, 10.0)
+        assert buy == 61.0
+        assert sell == pytest.approx(buy + 50.0)
+
+    def test_zero_size(self):
+        """测试零股交易不收费"""
+        assert self.model.fee(0, 10.0) == 0.0
+        assert self.model.fees([0, 0], [10.0, 11.0]).tolist() == [0.0, 0.0]
+
+    def test_vectorized_matches_scalar(self):
+        """测试批量计算与逐笔计算的结果逐分一致"""
+        rng = np.random.default_rng(0)
+        size = rng.integers(-50, 50, 5000) * 100
+        price = np.round(rng.uniform(1, 200, 5000), 2)
+        expected = [self.model.fee(s, p) for s, p in zip(size.tolist(), price.tolist())]
+        np.testing.assert_array_equal(self.model.fees(size, price), expected)
+
+    def test_breakdown_sums_to_fee(self):
+        """测试费用拆分之和与手续费一致"""
+        size = np.array([100, -100, 20000, -20000])
+        price = np.array([10.0, 10.0, 12.5, 12.5])
+        parts = AShareCostModel(slippage=0.001).breakdown(size, price)
+        total = parts["commission"] + parts["transfer_fee"] + parts["stamp_duty"]
+        np.testing.assert_allclose(total, self.model.fees(size, price), atol=0.005)
+        np.testing.assert_allclose(parts["slippage"], np.abs(size) * price * 0.001)
+
+    def test_round_lot(self):
+        """测试委托数量向零取整到整手"""
+        np.testing.assert_array_equal(
+            self.model.round_lot([250, -250, 99, 100]), [200, -200, 0, 100]
+        )
+
+    def test_execution_price(self):
+        """测试滑点使买入价上浮、卖出价下浮"""
+        model = AShareCostModel(slippage=0.01)
+        np.testing.assert_allclose(
+            model.execution_price(np.array([100, -100, 0]), 10.0), [10.1, 9.9, 10.0]
+        )
+
+    def test_from_config(self):
+        """测试由[broker]配置创建，忽略无关配置项"""
+        model = AShareCostModel.from_config(
+            {"commission": 0.0003, "stamp_duty": 0.001, "percabs": True, "doprint": 1}
+        )
+        assert model.commission == 0.0003
+        assert model.stamp_duty == 0.001
+
+    def test_from_config_percent(self):
+        """测试percabs为False时佣金费率按百分数解释（与backtrader一致）"""
+        model = AShareCostModel.from_config({"commission": 0.03, "percabs": False})
+        assert model.commission == pytest.approx(0.0003)
+
+
+class TestMyStockCommissionScheme:
+    """MyStockCommissionScheme与成本模型一致性的测试用例"""
+
+    def test_matches_cost_model(self):
+        """测试backtrader佣金接口与成本模型的结果一致"""
+        broker = {"commission": 0.0003, "stamp_duty": 0.001, "transfer_fee": 0.00002}
+        for percabs in [True, False]:
+            scheme = MyStockCommissionScheme(**broker, percabs=percabs)
+            model = AShareCostModel.from_config({**broker, "percabs": percabs})
+            assert scheme.cost_model == model
+        scheme = MyStockCommissionScheme(**broker, percabs=True)
+        model = AShareCostModel.from_config({**broker, "percabs": True})
+        for size, price in [(100, 10.0), (-100, 10.0), (30000, 15.37), (-700, 88.8)]:
+            assert scheme.getcommission(size, price) == model.fee(size, price)
+            assert scheme._getcommission(size, price, True) == model.fee(size, price)
+
+
+class TestDefaultParity:
+    """默认构造的各个回测路径的手续费一致的测试用例"""
+
+    def test_engines_match_backtrader(self):
+        """测试轻量引擎、组合引擎与 backtrader 默认的手续费方案逐分一致"""
+        scheme = MyStockCommissionScheme()
+        size = np.array([100, -100, 20000, -20000, 500000, -500000])
+        price = np.array([10.0, 10.0, 35.5, 35.5, 123.45, 123.45])
+        expected = [scheme.getcommission(s, p) for s, p in zip(size, price)]
+        for model in [
+            Broker().cost_model,
+            PortfolioEngine().cost_model,
+            AShareCostModel.from_config({}),
+        ]:
+            np.testing.assert_array_equal(model.fees(size, price), expected)
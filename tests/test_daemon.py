@@ -0,0 +1,267 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+import data.db_based_tushare as db_based_tushare
+import strategy.screener
+from benchmarks.synthetic import make_fundamentals, make_market, write_db
+from data.db_based_tushare import TushareDownloader
+from data.lock import FileLock, LockTimeout
+from live.daemon import DAEMON_RUNS, UpdateDaemon
+
+
+class Clock:
+    """模拟时间，`sleep` 直接把时间向后拨。"""
+
+    def __init__(self, now: datetime):
+        self.now = now
+        self.slept = 0.0
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept += seconds
+        self.now += timedelta(seconds=seconds)
+
+
+class FakePro:
+    """由模拟行情生成 Tushare 接口的返回值，每个交易日的数据到 `published` 的时间才能查到。"""
+
+    def __init__(self, market: dict[str, pd.DataFrame], clock: Clock | None = None):
+        self.market = market
+        self.clock = clock
+        self.published: dict[str, datetime] = {}
+        self.calls = []
+
+    def _available(self, trade_date: str) -> bool:
+        if self.clock is None:
+            return True
+        default = datetime.strptime(trade_date, "%Y%m%d") + timedelta(hours=17)
+        return self.clock() >= self.published.get(trade_date, default)
+
+    def _by_date(self, table: str, api: str, **kwargs) -> pd.DataFrame:
+        self.calls.append((api, kwargs))
+        df = self.market[table]
+        if "trade_date" not in kwargs or not self._available(kwargs["trade_date"]):
+            return df.iloc[:0]
+        return df[df["trade_date"] == kwargs["trade_date"]]
+
+    def daily(self, **kwargs):
+        return self._by_date("daily_price", "daily", **kwargs)
+
+    def adj_factor(self, **kwargs):
+        return self._by_date("adj_factor", "adj_factor", **kwargs)
+
+    def daily_basic(self, **kwargs):
+        return self._by_date("daily_basic", "daily_basic", **kwargs)
+
+    def fina_indicator_vip(self, period):
+        self.calls.append(("fina_indicator_vip", {"period": period}))
+        return self.market["fina_indicator"].iloc[:0]
+
+    def trade_cal(self, exchange, start_date, end_date):
+        self.calls.append(("trade_cal", {"start_date": start_date}))
+        calendar = self.market["trade_calendar"]
+        dates = calendar["cal_date"]
+        return calendar[(dates >= start_date) & (dates <= end_date)]
+
+    def stock_basic(self, exchange, list_status, fields):
+        self.calls.append(("stock_basic", {}))
+        return self.market["stock_basic"]
+
+    def apis(self) -> list[str]:
+        return [api for api, _ in self.calls]
+
+
+@pytest.fixture(scope="module")
+def market():
+    market = make_market(symbols=5, bars=60, seed=2)
+    # 与 Tushare 一样，交易日历包含全年的每一天，is_open 为 0 表示休市
+    open_dates = set(market["trade_calendar"]["cal_date"])
+    days = pd.date_range("20150101", "20151231").strftime("%Y%m%d")
+    calendar = pd.DataFrame(
+        {
+            "exchange": "SSE",
+            "cal_date": days,
+            "is_open": [int(day in open_dates) for day in days],
+        }
+    )
+    return {
+        **market,
+        **make_fundamentals(market, seed=2),
+        "trade_calendar": calendar,
+        "open_dates": pd.Series(sorted(open_dates)),
+    }
+
+
+@pytest.fixture
+def downloader(market, tmp_path):
+    """数据库中只有前40个交易日的数据。"""
+    dates = market["open_dates"]
+    first = {
+        name: market[name][market[name]["trade_date"] <= dates.iloc[39]]
+        for name in ["daily_price", "adj_factor", "daily_basic"]
+    }
+    path = str(tmp_path / "market.db")
+    write_db(
+        path,
+        {
+            **first,
+            "trade_calendar": market["trade_calendar"],
+            "stock_basic": market["stock_basic"],
+        },
+    )
+    downloader = object.__new__(TushareDownloader)
+    downloader.sqlite_file_name = path
+    downloader.engine = create_engine(f"sqlite:///{path}")
+    downloader.pro = FakePro(market)
+    yield downloader
+    downloader.engine.dispose()
+
+
+def _stored_dates(downloader) -> list[str]:
+    query = "SELECT DISTINCT trade_date FROM daily_price ORDER BY trade_date"
+    return pd.read_sql(query, downloader.engine)["trade_date"].tolist()
+
+
+class TestIncrementalUpdate:
+    """只下载新交易日的测试用例"""
+
+    def test_update_skips_closed_days(self, market, downloader, monkeypatch):
+        """测试非交易日不请求数据，有新交易日时按交易日批量下载"""
+        dates = market["open_dates"]
+
+        class Now(datetime):
+            value = datetime(2015, 2, 28, 18)  # 周六
+
+            @classmethod
+            def now(cls, tz=None):
+                return cls.value
+
+        monkeypatch.setattr(db_based_tushare, "datetime", Now)
+        downloader.update()
+        # 周末不请求任何接口
+        assert downloader.pro.calls == []
+
+        Now.value = datetime.strptime(dates.iloc[40], "%Y%m%d") + timedelta(hours=18)
+        downloader.update()
+        apis = downloader.pro.apis()
+        assert apis.count("stock_basic") == 1
+        assert [kwargs for api, kwargs in downloader.pro.calls if api == "daily"] == [
+            {"trade_date": dates.iloc[40]}
+        ]
+        assert _stored_dates(downloader)[-1] == dates.iloc[40]
+
+    def test_open_dates(self, market, downloader):
+        """测试日历没有覆盖到结束日期时下载到年底，之前的日期保留"""
+        with downloader.engine.begin() as conn:
+            conn.exec_driver_sql(
+                "DELETE FROM trade_calendar WHERE cal_date > '20150215'"
+            )
+        dates = market["open_dates"]
+        assert downloader.open_dates("20150201", "20150320") == [
+            date for date in dates if "20150201" <= date <= "20150320"
+        ]
+        assert downloader.pro.apis() == ["trade_cal"]
+        downloader.open_dates("20150101", "20151231")
+        assert downloader.pro.apis() == ["trade_cal"]
+        calendar = pd.read_sql("SELECT cal_date FROM trade_calendar", downloader.engine)
+        assert calendar["cal_date"].tolist() == list(
+            market["trade_calendar"]["cal_date"]
+        )
+
+
+class TestUpdateDaemon:
+    """盘后更新进程的测试用例"""
+
+    @pytest.fixture
+    def daemon(self, downloader, tmp_path, monkeypatch):
+        dates = downloader.pro.market["open_dates"]
+        clock = Clock(datetime.strptime(dates.iloc[40], "%Y%m%d") + timedelta(hours=9))
+        downloader.pro.clock = clock
+        screened = []
+        monkeypatch.setattr(
+            strategy.screener,
+            "screen_market",
+            lambda config, reader: screened.append(reader.get_trade_dates("0")[-1]),
+        )
+        daemon = UpdateDaemon(
+            {"daemon": {"tasks": ["screen"]}},
+            downloader,
+            lock=FileLock(str(tmp_path / "update.lock")),
+            clock=clock,
+            sleep=clock.sleep,
+        )
+        daemon.screened = screened
+        return daemon
+
+    def test_waits_and_retries(self, market, daemon):
+        """测试收盘后醒来，数据入库前重试，每个交易日只按交易日请求一次日线"""
+        dates = market["open_dates"]
+        assert daemon.run(days=2) == 2
+        assert daemon.screened == [dates.iloc[40], dates.iloc[41]]
+        assert _stored_dates(daemon.downloader)[-2:] == list(dates.iloc[40:42])
+
+        daily = [kw for api, kw in daemon.downloader.pro.calls if api == "daily"]
+        # 16:30、16:45 数据还没有入库，17:00 下载成功
+        assert (
+            daily
+            == [{"trade_date": dates.iloc[40]}] * 3
+            + [{"trade_date": dates.iloc[41]}] * 3
+        )
+        assert daemon.clock() == datetime.strptime(
+            dates.iloc[41], "%Y%m%d"
+        ) + timedelta(hours=17)
+        # 只在有新数据时更新股票列表和最近一年报告期的财务指标
+        assert daemon.downloader.pro.apis().count("stock_basic") == 2
+        periods = [
+            kw["period"]
+            for api, kw in daemon.downloader.pro.calls
+            if api == "fina_indicator_vip"
+        ]
+        assert periods == ["20140331", "20140630", "20140930", "20141231"] * 2
+
+    def test_missed_day_caught_up(self, market, daemon):
+        """测试截止时间前没有数据时跳过当天，下一个交易日一起补齐"""
+        dates = market["open_dates"]
+        late = datetime.strptime(dates.iloc[41], "%Y%m%d") + timedelta(hours=10)
+        daemon.downloader.pro.published[dates.iloc[40]] = late
+        missed = DAEMON_RUNS.labels(status="missed").value
+
+        assert daemon.run(days=2) == 1
+        assert DAEMON_RUNS.labels(status="missed").value == missed + 1
+        assert daemon.screened == [dates.iloc[41]]
+        assert _stored_dates(daemon.downloader)[-2:] == list(dates.iloc[40:42])
+
+    def test_calendar_error_retried(self, market, daemon, monkeypatch):
+        """测试读取交易日历失败时等待后重试，进程不退出"""
+        dates = market["open_dates"]
+        open_dates = daemon.downloader.open_dates
+        failures = [ConnectionError("网络错误")]
+
+        def flaky(start, end):
+            if failures:
+                raise failures.pop()
+            return open_dates(start, end)
+
+        monkeypatch.setattr(daemon.downloader, "open_dates", flaky)
+        errors = DAEMON_RUNS.labels(status="error").value
+        assert daemon.run(days=1) == 1
+        assert DAEMON_RUNS.labels(status="error").value == errors + 1
+        assert daemon.screened == [dates.iloc[40]]
+
+    def test_lock(self, tmp_path):
+        """测试文件锁：同一时间只有一个持有者，超时抛出异常"""
+        path = str(tmp_path / "locks" / "update.lock")
+        with FileLock(path) as held:
+            assert held.locked and held.holder().isdigit()
+            other = FileLock(path, poll=0.01)
+            assert not other.acquire(blocking=False)
+            with pytest.raises(LockTimeout):
+                other.acquire(timeout=0.05)
+        assert other.acquire(blocking=False)
+        other.release()
+        assert not other.locked
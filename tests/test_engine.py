@@ -0,0 +1,140 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import EquityRecorder
+from commission.commission import MyStockCommissionScheme
+from commission.cost_model import AShareCostModel
+from data.array_feed import ArrayData
+from engine import BarData, BarEngine, Order
+from strategy.config_loader import StrategyConfig
+from strategy.trade_strategy import TradeStrategy
+
+BROKER = {"commission": 0.03, "stamp_duty": 0.0005, "transfer_fee": 0.00001}
+
+
+class SMACross(TradeStrategy):
+    """收盘价上穿均线买入、下穿卖出，记录订单和交易通知。"""
+
+    def __init__(self, **params) -> None:
+        super().__init__(**params)
+        self.sma = self.indicator("sma", period=params.get("period", 10))
+        self.stake = params.get("stake", 1000)
+        self.events: list[tuple] = []
+
+    def next(self) -> None:
+        above = self.data.close[0] > self.sma[0]
+        if not self.position and above and self.data.close[-1] <= self.sma[-1]:
+            self.buy(size=self.stake)
+        elif self.position and not above:
+            self.close()
+
+    def notify_order(self, order) -> None:
+        self.events.append(("order", order.getstatusname(), order.executed.size))
+
+    def notify_trade(self, trade) -> None:
+        self.events.append(("trade", trade.isclosed, round(trade.pnlcomm, 6)))
+
+
+def make_frame(n: int = 400, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * (1 + rng.normal(0, 0.01, n))
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) * 1.01,
+            "low": np.minimum(open_, close) * 0.99,
+            "close": close,
+            "volume": rng.integers(1000, 9000, n).astype(float),
+        },
+        index=pd.bdate_range("2022-01-03", periods=n),
+    )
+
+
+def run_backtrader(df, strategy_class, cash=100000.0, **params):
+    cerebro = bt.Cerebro()
+    cerebro.adddata(ArrayData.from_dataframe(df))
+    cerebro.addstrategy(strategy_class, **params)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.addcommissioninfo(MyStockCommissionScheme(**BROKER))
+    cerebro.addanalyzer(EquityRecorder, _name="equity")
+    strategy = cerebro.run()[0]
+    return strategy, strategy.analyzers.equity.get_analysis()
+
+
+def run_engine(df, strategy_class, cash=100000.0, **params):
+    engine = BarEngine(cash, AShareCostModel.from_config(BROKER))
+    strategy = engine.run(strategy_class, BarData.from_dataframe(df), **params)
+    return strategy, engine.record()
+
+
+def assert_same_record(expected, actual):
+    np.testing.assert_array_equal(actual.dates, expected.dates)
+    np.testing.assert_allclose(actual.equity, expected.equity, rtol=1e-12)
+    np.testing.assert_allclose(actual.exposure, expected.exposure, rtol=1e-12)
+    np.testing.assert_allclose(actual.trade_pnl, expected.trade_pnl, rtol=1e-9)
+    assert actual.traded_value == pytest.approx(expected.traded_value)
+    assert actual.fills.tolist() == pytest.approx(expected.fills.tolist())
+
+
+class TestBarEngine:
+    """轻量引擎与 backtrader 结果一致性的测试用例"""
+
+    def test_macd_strategy(self):
+        """测试 MACD 策略不加修改即可运行，资金曲线和成交与 backtrader 一致"""
+        strategy_class, params = StrategyConfig().get_strategy(name="MACD")
+        df = make_frame(600)
+        _, expected = run_backtrader(df, strategy_class, **params)
+        _, actual = run_engine(df, strategy_class, **params)
+        assert len(expected.fills) > 0
+        assert_same_record(expected, actual)
+
+    @pytest.mark.parametrize("cash", [100000.0, 10000.0])
+    def test_notifications(self, cash):
+        """测试订单和交易通知的顺序与内容一致，资金不足时同样返回 Margin"""
+        df = make_frame()
+        expected, expected_record = run_backtrader(df, SMACross, cash=cash)
+        actual, actual_record = run_engine(df, SMACross, cash=cash)
+        assert actual.events == expected.events
+        assert_same_record(expected_record, actual_record)
+        if cash < 20000:  # 部分买单资金不足
+            assert ("order", "Margin", 0.0) in actual.events
+
+    def test_t_plus_one(self):
+        """测试当天买入的股票当天不能卖出，卖空被拒绝"""
+
+        class SameDay(TradeStrategy):
+            def __init__(self, **params):
+                super().__init__(**params)
+                self.statuses = []
+
+            def next(self):
+                if len(self) == 1:
+                    self.buy(size=100)
+                    self.sell(size=100)  # 与买单同一个 Bar 成交
+                elif len(self) == 3:
+                    self.sell(size=200)  # 超过持仓
+
+            def notify_order(self, order):
+                if not order.alive():
+                    self.statuses.append((order.getstatusname(), order.size))
+
+        strategy, _ = run_engine(make_frame(10), SameDay)
+        assert strategy.statuses == [
+            ("Completed", 100),
+            ("Rejected", -100),
+            ("Rejected", -200),
+        ]
+        assert strategy.position.size == 100
+
+    def test_only_market_orders(self):
+        """测试轻量引擎拒绝市价单以外的订单类型"""
+
+        class Limit(TradeStrategy):
+            def next(self):
+                self.buy(price=1.0, exectype=Order.Market + 1)
+
+        with pytest.raises(ValueError):
+            run_engine(make_frame(10), Limit)
@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_market, write_db
+from data.db_reader import StockDBReader
+from factor import (
+    FactorEngine,
+    FactorStore,
+    get_factor,
+    ops,
+    update_factors,
+)
+
+NAMES = ["momentum_20", "volatility_20", "momentum_20_neutral"]
+
+
+@pytest.fixture(scope="module")
+def market():
+    return make_market(symbols=12, bars=160, seed=11, suspend_rate=0.01)
+
+
+@pytest.fixture(scope="module")
+def reader(market, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("factor") / "market.db")
+    write_db(path, market)
+    return StockDBReader(path)
+
+
+@pytest.fixture
+def panel_values():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(6, 40))
+    x[rng.random(x.shape) < 0.15] = np.nan
+    return x
+
+
+class TestOps:
+    """因子算子的测试用例"""
+
+    @pytest.mark.parametrize(
+        "op, method",
+        [
+            (ops.rolling_sum, "sum"),
+            (ops.rolling_mean, "mean"),
+            (ops.rolling_std, "std"),
+            (ops.rolling_max, "max"),
+            (ops.rolling_min, "min"),
+        ],
+    )
+    def test_rolling_matches_pandas(self, panel_values, op, method):
+        """测试时间序列算子跳过NaN，与pandas的rolling结果一致"""
+        expected = getattr(
+            pd.DataFrame(panel_values.T).rolling(5, min_periods=3), method
+        )()
+        np.testing.assert_allclose(
+            op(panel_values, 5, min_periods=3), expected.to_numpy().T, atol=1e-12
+        )
+
+    def test_cross_section(self, panel_values):
+        """测试截面排名、标准化和行业中性化只使用当天的有效值"""
+        expected = pd.DataFrame(panel_values).rank(axis=0, pct=True).to_numpy()
+        np.testing.assert_allclose(ops.rank(panel_values), expected)
+
+        z = ops.zscore(panel_values)
+        assert np.array_equal(np.isnan(z), np.isnan(panel_values))
+        np.testing.assert_allclose(np.nanmean(z, axis=0), 0, atol=1e-12)
+        np.testing.assert_allclose(np.nanstd(z, axis=0), 1)
+
+        groups = np.array([0, 0, 0, 1, 1, 2])
+        neutral = ops.neutralize(panel_values, groups)
+        for group in range(3):
+            rows = neutral[groups == group]
+            has_data = ~np.isnan(rows).all(axis=0)
+            np.testing.assert_allclose(
+                np.nanmean(rows[:, has_data], axis=0), 0, atol=1e-12
+            )
+
+    def test_winsorize(self):
+        """测试去极值截断离群值，NaN保持不变"""
+        x = np.array([[1.0], [2.0], [3.0], [4.0], [100.0], [np.nan]])
+        out = ops.winsorize(x, k=3)
+        assert out[4, 0] < 10
+        np.testing.assert_array_equal(out[:4], x[:4])
+        assert np.isnan(out[5, 0])
+
+
+class TestFactorEngine:
+    """截面因子引擎的测试用例"""
+
+    def test_matches_single_stock(self, reader, market):
+        """测试面板上的动量因子与单只股票后复权收盘价计算的结果一致"""
+        dates = market["trade_calendar"]["cal_date"]
+        values = FactorEngine(reader).compute(["momentum_20"], dates.iloc[40])
+        code = values.codes[0]
+        df = reader.get_daily_price(code, dates.iloc[0], dates.iloc[-1], "hfq")
+        close = df["close"].reindex(pd.to_datetime(dates)).ffill().to_numpy()
+        expected = close[20:] / close[:-20] - 1
+        factor = values.frame("momentum_20")[code].to_numpy()
+        traded = pd.to_datetime(values.dates).isin(df.index)
+        np.testing.assert_allclose(factor[traded], expected[20:][traded])
+
+    def test_suspension_is_nan(self, reader, market):
+        """测试停牌日的因子值为NaN，截面因子在有效股票中标准化"""
+        dates = market["trade_calendar"]["cal_date"]
+        values = FactorEngine(reader).compute(NAMES, dates.iloc[30])
+        daily = market["daily_price"]
+        traded = (
+            daily.assign(v=1)
+            .pivot(index="ts_code", columns="trade_date", values="v")
+            .reindex(index=values.codes, columns=values.dates)
+            .notna()
+            .to_numpy()
+        )
+        assert not traded.all()
+        for name in NAMES:
+            assert np.isnan(values.values[name][~traded]).all(), name
+        neutral = values.values["momentum_20_neutral"]
+        np.testing.assert_allclose(np.nanmean(neutral, axis=0), 0, atol=1e-9)
+
+        section = values.cross_section(values.dates[-1])
+        assert list(section.columns) == NAMES
+        assert len(section) == traded[:, -1].sum()
+
+    def test_incremental_store(self, reader, market, tmp_path, monkeypatch):
+        """测试缓存：已计算的日期不再计算，增量结果与全量计算一致"""
+        dates = market["trade_calendar"]["cal_date"]
+        store = FactorStore(str(tmp_path / "factors"))
+        engine = FactorEngine(reader, store)
+        engine.compute(NAMES, dates.iloc[30], dates.iloc[-6])
+        assert store.dates(get_factor("momentum_20")) == set(dates.iloc[30:-5])
+
+        loaded = []
+        get_daily_panel = reader.get_daily_panel
+        monkeypatch.setattr(
+            reader,
+            "get_daily_panel",
+            lambda **kwargs: loaded.append(kwargs) or get_daily_panel(**kwargs),
+        )
+        incremental = engine.compute(NAMES, dates.iloc[30])
+        # 只读取新增的5天和预热期
+        assert loaded == [
+            {
+                "last_n": 5 + 21,
+                "end_date": dates.iloc[-1],
+                "adj_type": "hfq",
+                "list_status": None,
+            }
+        ]
+        engine.compute(NAMES, dates.iloc[30])
+        assert len(loaded) == 1
+
+        full = FactorEngine(reader).compute(NAMES, dates.iloc[30])
+        np.testing.assert_array_equal(incremental.codes, full.codes)
+        for name in NAMES:
+            np.testing.assert_allclose(
+                incremental.values[name], full.values[name], rtol=1e-9, atol=1e-12
+            )
+
+    def test_store_adj_type(self, reader, tmp_path):
+        """测试复权方式与缓存不一致、或者前复权启用缓存时报错"""
+        with pytest.raises(ValueError):
+            FactorEngine(reader, FactorStore(str(tmp_path)), adj_type="qfq")
+        with pytest.raises(ValueError):
+            FactorEngine(reader, FactorStore(str(tmp_path), adj_type="qfq"), "qfq")
+        FactorEngine(reader, FactorStore(str(tmp_path), adj_type="bfq"), "bfq")
+        FactorEngine(reader, adj_type="qfq")
+
+    def test_update_factors(self, reader, tmp_path, capsys):
+        """测试按配置计算最近N个交易日的因子并打印最新截面"""
+        config = {
+            "factor": {
+                "names": ["reversal_5", "volume_ratio_20"],
+                "bars": 30,
+                "directory": str(tmp_path / "factors"),
+                "top": 5,
+            }
+        }
+        values = update_factors(config, reader)
+        assert len(values.dates) == 30
+        assert set(values.values) == {"reversal_5", "volume_ratio_20"}
+        assert "按 reversal_5 排序" in capsys.readouterr().out
@@ -0,0 +1,216 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import ta
+from indicators.cache import IndicatorCache, IndicatorKey
+from indicators.lines import build_indicator
+
+
+@pytest.fixture
+def price_df():
+    """生成确定性的随机游走行情"""
+    rng = np.random.default_rng(42)
+    n = 300
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame(
+        {
+            "open": close * (1 + rng.normal(0, 0.005, n)),
+            "high": close * (1 + np.abs(rng.normal(0, 0.01, n))),
+            "low": close * (1 - np.abs(rng.normal(0, 0.01, n))),
+            "close": close,
+            "volume": rng.integers(1000, 5000, n).astype(float),
+        },
+        index=pd.bdate_range("2023-01-02", periods=n),
+    )
+
+
+def _run_bt_indicators(df, make_indicators):
+    """在 backtrader 中运行指标，返回每个 Bar 的指标值"""
+
+    class Recorder(bt.Strategy):
+        def __init__(self):
+            self.inds = make_indicators(self)
+            self.rows = []
+
+        def prenext(self):
+            self.next()
+
+        def next(self):
+            self.rows.append([line[0] for line in self.inds])
+
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(bt.feeds.PandasData(dataname=df), name="TEST")
+    cerebro.addstrategy(Recorder)
+    return np.array(cerebro.run()[0].rows)
+
+
+class TestTa:
+    """NumPy 指标与 backtrader 内置指标的一致性测试"""
+
+    def test_matches_backtrader(self, price_df):
+        """测试 SMA/EMA/MACD/ATR 与 backtrader 的计算结果一致"""
+        expected = _run_bt_indicators(
+            price_df,
+            lambda s: [
+                bt.indicators.SMA(s.data.close, period=15),
+                bt.indicators.EMA(s.data.close, period=10),
+                bt.indicators.MACD(
+                    s.data.close, period_me1=12, period_me2=26, period_signal=9
+                ).macd,
+                bt.indicators.MACD(
+                    s.data.close, period_me1=12, period_me2=26, period_signal=9
+                ).signal,
+                bt.indicators.ATR(s.data, period=5),
+            ],
+        )
+
+        macd = ta.macd(price_df["close"].values, 12, 26, 9)
+        actual = np.column_stack(
+            [
+                ta.sma(price_df["close"].values, 15),
+                ta.ema(price_df["close"].values, 10),
+                macd["macd"],
+                macd["signal"],
+                ta.atr(price_df["high"], price_df["low"], price_df["close"], 5)["atr"],
+            ]
+        )
+
+        np.testing.assert_allclose(actual, expected, rtol=1e-10, equal_nan=True)
+
+    def test_panel_matches_rows(self, price_df):
+        """测试二维面板按行计算的结果与逐行计算一致"""
+        close = price_df["close"].values
+        panel = np.vstack([close, close * 2, close[::-1].copy()])
+        result = ta.macd(panel, 12, 26, 9)["signal"]
+        for row in range(panel.shape[0]):
+            np.testing.assert_allclose(
+                result[row], ta.macd(panel[row], 12, 26, 9)["signal"], equal_nan=True
+            )
+
+    def test_ema_seed_continues_series(self, price_df):
+        """测试使用种子值的增量计算与全量计算一致"""
+        close = price_df["close"].values
+        full = ta.ema(close, 10)
+        tail = ta.ema(close[200:], 10, seed=full[199])
+        np.testing.assert_allclose(tail, full[200:])
+
+    def test_short_series_is_nan(self):
+        """测试数据长度不足周期时返回 NaN"""
+        assert np.isnan(ta.sma(np.arange(3.0), 5)).all()
+        assert np.isnan(ta.ema(np.arange(3.0), 5)).all()
+
+    def test_unknown_indicator(self):
+        """测试未注册的指标"""
+        with pytest.raises(ValueError):
+            ta.compute("unknown", {"close": np.arange(3.0)})
+
+
+class TestIndicatorCache:
+    """IndicatorCache类的测试用例"""
+
+    def _key(self, period):
+        return IndicatorKey.create(
+            "000001.SZ", "20240101", "20241231", "qfq", "v1", "sma", period=period
+        )
+
+    def test_key_is_order_independent(self):
+        """测试缓存键与参数顺序无关"""
+        a = IndicatorKey.create("A", "1", "2", "qfq", "v1", "macd", fast=1, slow=2)
+        b = IndicatorKey.create("A", "1", "2", "qfq", "v1", "macd", slow=2, fast=1)
+        assert a == b
+        assert a.digest() == b.digest()
+        c = IndicatorKey.create("A", "1", "2", "qfq", "v2", "macd", fast=1, slow=2)
+        assert a.digest() != c.digest()
+
+    def test_get_or_compute_memoizes(self):
+        """测试相同键只计算一次"""
+        cache = IndicatorCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"sma": np.arange(5.0)}
+
+        cache.get_or_compute(self._key(5), compute)
+        cache.get_or_compute(self._key(5), compute)
+
+        assert len(calls) == 1
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_lru_eviction(self):
+        """测试超过容量时淘汰最久未使用的条目"""
+        cache = IndicatorCache(maxsize=2)
+        cache.put(self._key(1), {"sma": np.zeros(1)})
+        cache.put(self._key(2), {"sma": np.zeros(1)})
+        cache.get(self._key(1))
+        cache.put(self._key(3), {"sma": np.zeros(1)})
+
+        assert len(cache) == 2
+        assert self._key(1) in cache
+        assert self._key(2) not in cache
+
+    def test_disk_tier_shared_between_instances(self, tmp_path):
+        """测试磁盘缓存可以被另一个缓存实例（例如另一个进程）复用"""
+        values = {"macd": np.arange(4.0), "signal": np.arange(4.0) * 2}
+        IndicatorCache(directory=str(tmp_path)).put(self._key(9), values)
+
+        other = IndicatorCache(directory=str(tmp_path))
+        loaded = other.get(self._key(9))
+
+        assert other.disk_hits == 1
+        np.testing.assert_array_equal(loaded["macd"], values["macd"])
+        np.testing.assert_array_equal(loaded["signal"], values["signal"])
+
+    def test_clear_disk(self, tmp_path):
+        """测试清空磁盘缓存"""
+        cache = IndicatorCache(directory=str(tmp_path))
+        cache.put(self._key(1), {"sma": np.zeros(3)})
+        cache.clear(disk=True)
+        assert self._key(1) not in cache
+
+
+class TestBuildIndicator:
+    """build_indicator 在 backtrader 中的测试用例"""
+
+    def test_cached_lines_match_builtin(self, price_df):
+        """测试缓存的指标线与 backtrader 内置指标一致，且第二次运行命中缓存"""
+        cache = IndicatorCache()
+
+        def make(cache, version="v1"):
+            options = {"cache": cache, "data_version": version}
+            return lambda s: [
+                build_indicator(s.data, "sma", {"period": 15}, **options),
+                build_indicator(
+                    s.data, "macd", {"fast": 12, "slow": 26, "signal": 9}, **options
+                ).signal,
+                build_indicator(s.data, "atr", {"period": 5}, **options),
+            ]
+
+        expected = _run_bt_indicators(price_df, make(None))
+        first = _run_bt_indicators(price_df, make(cache))
+        second = _run_bt_indicators(price_df, make(cache))
+
+        np.testing.assert_allclose(first, expected, rtol=1e-10, equal_nan=True)
+        np.testing.assert_array_equal(first, second)
+        assert cache.misses == 3
+        assert cache.hits == 3
+
+    def test_data_version(self, price_df):
+        """测试数据指纹变化时不命中缓存，没有指纹时不使用缓存"""
+        cache = IndicatorCache()
+
+        def make(version):
+            return lambda s: [
+                build_indicator(
+                    s.data, "sma", {"period": 15}, cache=cache, data_version=version
+                )
+            ]
+
+        _run_bt_indicators(price_df, make("v1"))
+        _run_bt_indicators(price_df, make("v2"))
+        assert (cache.misses, cache.hits) == (2, 0)
+        _run_bt_indicators(price_df, make(None))
+        assert (cache.misses, cache.hits, len(cache)) == (2, 0, 2)
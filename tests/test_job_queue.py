@@ -0,0 +1,121 @@
+import multiprocessing as mp
+import time
+
+import pytest
+
+from backtest import BacktestJob
+from backtest.batch import BatchItem, job_id
+from backtest.job_queue import JobQueue, run_worker
+
+SYMBOLS = ["600000.SH", "000001.SZ"]
+
+
+def _items(periods=(10, 20), priority=0):
+    items = []
+    for symbol in SYMBOLS:
+        for period in periods:
+            job = BacktestJob(
+                strategy="MACD",
+                symbol=symbol,
+                start_date="20230101",
+                end_date="20231231",
+                params={"ma_period": period},
+            )
+            items.append(BatchItem(id=job_id(job), job=job, priority=priority))
+    return items
+
+
+@pytest.fixture
+def db(stock_db):
+    return stock_db(symbols=2, bars=250, seed=5)
+
+
+class TestJobQueue:
+    """JobQueue类的测试用例"""
+
+    def test_push_and_claim(self, tmp_path):
+        """测试重复添加被忽略，按优先级领取，领取完返回None"""
+        queue = JobQueue(str(tmp_path / "queue.db"))
+        low, high = _items(periods=(10,)), _items(periods=(20,), priority=5)
+        assert queue.push(low + high) == 4
+        assert queue.push(low) == 0
+
+        claimed = [queue.claim("w1") for _ in range(4)]
+        assert [c.job.params["ma_period"] for c in claimed] == [20, 20, 10, 10]
+        assert queue.claim("w1") is None
+        assert queue.counts() == {"queued": 0, "running": 4, "done": 0, "failed": 0}
+
+    def test_expired_lease(self, tmp_path):
+        """测试租约过期的任务被重新分配，原worker的续约和结果被拒绝"""
+        queue = JobQueue(str(tmp_path / "queue.db"))
+        queue.push(_items()[:1], max_attempts=2)
+
+        first = queue.claim("dead", lease=0.05)
+        time.sleep(0.1)
+        second = queue.claim("alive", lease=60)
+        assert second.id == first.id and second.attempts == 2
+        assert not queue.heartbeat(first.id, "dead")
+        assert not queue.complete(first.id, "dead", {"status": "ok"})
+        assert queue.heartbeat(second.id, "alive")
+        assert queue.complete(second.id, "alive", {"status": "ok", "final_value": 1.0})
+
+        [record] = queue.results()
+        assert record["worker"] == "alive" and record["final_value"] == 1.0
+
+    def test_max_attempts(self, tmp_path):
+        """测试超过最大尝试次数的任务标记为失败"""
+        queue = JobQueue(str(tmp_path / "queue.db"))
+        queue.push(_items()[:1], max_attempts=1)
+        queue.claim("dead", lease=0.01)
+        time.sleep(0.05)
+
+        assert queue.requeue_expired() == 1
+        assert queue.claim("alive") is None
+        [record] = queue.results()
+        assert record["status"] == "error" and "租约" in record["error"]
+
+
+class TestWorker:
+    """worker的测试用例"""
+
+    def test_workers(self, tmp_path, db):
+        """测试多个worker进程共享队列，每个任务只运行一次"""
+        path = str(tmp_path / "queue.db")
+        queue = JobQueue(path)
+        queue.push(_items(periods=(10, 15, 20)))
+
+        ctx = mp.get_context("spawn")
+        workers = [
+            ctx.Process(
+                target=run_worker,
+                args=(path, db),
+                kwargs={"poll": 0.1, "worker": f"w{i}"},
+            )
+            for i in range(3)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(timeout=120)
+            assert process.exitcode == 0
+
+        records = queue.results()
+        assert len(records) == 6
+        assert all(r["status"] == "ok" and r["attempts"] == 1 for r in records)
+        assert "sharpe" in records[0]["metrics"]
+
+    def test_error(self, tmp_path, db):
+        """测试回测报错的任务标记为失败，不重试"""
+        path = str(tmp_path / "queue.db")
+        queue = JobQueue(path)
+        job = BacktestJob(
+            strategy="NoSuchStrategy",
+            symbol=SYMBOLS[0],
+            start_date="20230101",
+            end_date="20231231",
+        )
+        queue.push([BatchItem(id=job_id(job), job=job)])
+
+        assert run_worker(path, db, poll=0.1) == 1
+        [record] = queue.results()
+        assert record["status"] == "error" and record["attempts"] == 1
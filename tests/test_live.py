@@ -0,0 +1,160 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from data.db_reader import StockDBReader
+from live import LiveState, StateStore, run_live
+
+SYMBOL = "000001.SZ"
+
+
+def _make_db(path, n=400, dividend_at=None, seed=3):
+    """生成一个包含随机游走行情的SQLite数据库"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2022-01-03", periods=n).strftime("%Y%m%d")
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    daily = pd.DataFrame(
+        {
+            "ts_code": SYMBOL,
+            "trade_date": dates,
+            "open": close * (1 + rng.normal(0, 0.005, n)),
+            "high": close * 1.02,
+            "low": close * 0.98,
+            "close": close,
+            "vol": rng.integers(1000, 9000, n).astype(float),
+        }
+    )
+    factor = np.ones(n)
+    if dividend_at is not None:
+        factor[dividend_at:] = 1.1
+    adj = pd.DataFrame({"ts_code": SYMBOL, "trade_date": dates, "adj_factor": factor})
+
+    engine = create_engine(f"sqlite:///{path}")
+    daily.to_sql("daily_price", engine, index=False)
+    adj.to_sql("adj_factor", engine, index=False)
+    return StockDBReader(str(path)), list(dates)
+
+
+@pytest.fixture
+def config():
+    return {
+        "cash": 100000,
+        "strategy": {"name": "MACD"},
+        "stock": {"symbol": [SYMBOL], "adjust": "qfq"},
+        "date": {"start_year": 2022, "start_month": 1},
+        "broker": {"commission": 0.0006, "stamp_duty": 0.0005, "transfer_fee": 0.00001},
+    }
+
+
+def _assert_indicators_close(a: LiveState, b: LiveState):
+    assert a.indicators.keys() == b.indicators.keys()
+    for key in a.indicators:
+        for name, values in a.indicators[key]["lines"].items():
+            np.testing.assert_allclose(
+                values, b.indicators[key]["lines"][name], rtol=1e-9, equal_nan=True
+            )
+        for name, value in a.indicators[key]["state"].items():
+            assert value == pytest.approx(b.indicators[key]["state"][name], rel=1e-9)
+
+
+class TestRunLive:
+    """增量运行的测试用例"""
+
+    def test_incremental_matches_full_run(self, tmp_path, config):
+        """测试多次增量运行的结果与一次全量运行一致"""
+        reader, dates = _make_db(tmp_path / "stock.db")
+        full = run_live(config, reader, StateStore(str(tmp_path / "full")), dates[-1])
+
+        store = StateStore(str(tmp_path / "inc"))
+        for end in [dates[250], dates[300], dates[301], dates[360], dates[-1]]:
+            incremental = run_live(config, reader, store, end)
+
+        assert incremental.last_date == full.last_date == dates[-1]
+        assert incremental.tail_dates == full.tail_dates
+        assert incremental.position == pytest.approx(full.position)
+        assert incremental.cash == pytest.approx(full.cash)
+        assert incremental.orders == full.orders
+        assert incremental.strategy_state == pytest.approx(full.strategy_state)
+        _assert_indicators_close(incremental, full)
+
+    def test_incremental_reads_only_window(self, tmp_path, config):
+        """测试增量运行只读取快照窗口和新增的Bar"""
+        reader, dates = _make_db(tmp_path / "stock.db")
+        store = StateStore(str(tmp_path / "state"))
+        state = run_live(config, reader, store, dates[300])
+
+        reader.get_daily_price = MagicMock(wraps=reader.get_daily_price)
+        run_live(config, reader, store, dates[310])
+
+        start_date = reader.get_daily_price.call_args.args[1]
+        assert start_date == state.tail_dates[0]
+        assert len(state.tail_dates) == state.lookback
+
+    def test_qfq_rescaled_after_dividend(self, tmp_path, config):
+        """测试除权除息后前复权的指标状态按复权因子换算"""
+        reader, dates = _make_db(tmp_path / "stock.db", dividend_at=330)
+        full = run_live(config, reader, StateStore(str(tmp_path / "full")), dates[-1])
+
+        store = StateStore(str(tmp_path / "inc"))
+        run_live(config, reader, store, dates[300])
+        incremental = run_live(config, reader, store, dates[-1])
+
+        _assert_indicators_close(incremental, full)
+        assert incremental.strategy_state == pytest.approx(full.strategy_state)
+
+    def test_no_new_bars(self, tmp_path, config):
+        """测试没有新增Bar时不运行"""
+        reader, dates = _make_db(tmp_path / "stock.db")
+        store = StateStore(str(tmp_path / "state"))
+        assert run_live(config, reader, store, dates[300]) is not None
+        assert run_live(config, reader, store, dates[300]) is None
+
+    def test_params_change_triggers_full_run(self, tmp_path, config):
+        """测试快照的参数摘要不一致时重新全量运行"""
+        reader, dates = _make_db(tmp_path / "stock.db")
+        store = StateStore(str(tmp_path / "state"))
+        state = run_live(config, reader, store, dates[300])
+        state.params_digest = "changed"
+        store.save(state)
+
+        reader.get_daily_price = MagicMock(wraps=reader.get_daily_price)
+        run_live(config, reader, store, dates[310])
+        assert reader.get_daily_price.call_args.args[1] == "20220101"
+
+
+class TestStateStore:
+    """StateStore类的测试用例"""
+
+    def test_roundtrip(self, tmp_path):
+        """测试快照的保存和读取"""
+        store = StateStore(str(tmp_path))
+        state = LiveState(
+            strategy="MACD",
+            symbol=SYMBOL,
+            adj_type="qfq",
+            params_digest="abc",
+            last_date="20240102",
+            lookback=2,
+            tail_dates=["20240101", "20240102"],
+            indicators={
+                "sma(period=2)": {"lines": {"sma": [float("nan"), 1.0]}, "state": {}}
+            },
+            position={"size": 100, "price": 9.5},
+            orders=[{"side": "sell", "size": 100}],
+        )
+        store.save(state)
+        loaded = store.load("MACD", SYMBOL, "qfq")
+
+        assert loaded.tail_dates == state.tail_dates
+        assert loaded.orders == state.orders
+        assert np.isnan(loaded.indicators["sma(period=2)"]["lines"]["sma"][0])
+
+    def test_missing_or_corrupt(self, tmp_path):
+        """测试快照不存在或损坏时返回None"""
+        store = StateStore(str(tmp_path))
+        assert store.load("MACD", SYMBOL, "qfq") is None
+        (tmp_path / f"MACD_{SYMBOL}_qfq.json").write_text("{", encoding="utf-8")
+        assert store.load("MACD", SYMBOL, "qfq") is None
@@ -0,0 +1,151 @@
+import json
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from backtest import BacktestJob, ResultStore, run_backtest
+from data.db_based_tushare import (
+    API_REQUESTS,
+    API_ROWS,
+    ROWS_WRITTEN,
+    MeteredClient,
+    TushareDownloader,
+)
+from data.db_reader import StockDBReader
+from monitor import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    export_metrics,
+)
+from monitor.metrics import REGISTRY
+
+SYMBOL = "600000.SH"
+
+
+@pytest.fixture
+def reader(stock_db):
+    return StockDBReader(stock_db(symbols=1, bars=150, seed=3))
+
+
+def _value(name: str, **labels) -> float:
+    return REGISTRY.get(name).labels(**labels).value
+
+
+class TestRegistry:
+    """指标集合的测试用例"""
+
+    def test_prometheus_format(self):
+        """测试文本格式包含HELP/TYPE、转义后的标签和累计分桶"""
+        registry = MetricsRegistry()
+        requests = registry.register(Counter("requests_total", "调用次数", ["api"]))
+        requests.labels(api='da"ily').inc(2)
+        registry.register(Gauge("rate", "速率")).set(1.5)
+        latency = registry.register(Histogram("seconds", "耗时", buckets=(0.1, 1.0)))
+        for value in (0.05, 0.5, 5.0):
+            latency.observe(value)
+
+        text = registry.to_prometheus()
+        assert "# TYPE quant_requests_total counter" in text
+        assert 'quant_requests_total{api="da\\"ily"} 2' in text
+        assert "quant_rate 1.5" in text
+        assert 'quant_seconds_bucket{le="0.1"} 1' in text
+        assert 'quant_seconds_bucket{le="1"} 2' in text
+        assert 'quant_seconds_bucket{le="+Inf"} 3' in text
+        assert "quant_seconds_count 3" in text
+        assert "quant_seconds_sum 5.55" in text
+
+    def test_register_idempotent(self):
+        """测试同名指标重复注册返回同一个对象，类型不同时报错"""
+        registry = MetricsRegistry()
+        first = registry.register(Counter("x_total", "x", ["a"]))
+        assert registry.register(Counter("x_total", "x", ["a"])) is first
+        with pytest.raises(ValueError):
+            registry.register(Gauge("x_total", "x"))
+
+    def test_export(self, tmp_path):
+        """测试写出文本文件和JSON，路径中的{job}被替换，并记录任务状态"""
+        registry = MetricsRegistry()
+        registry.register(Counter("rows_total", "行数")).inc(10)
+        paths = export_metrics(
+            textfile=str(tmp_path / "{job}.prom"),
+            json_path=str(tmp_path / "{job}.json"),
+            job="update",
+            duration=3.0,
+            success=False,
+            registry=registry,
+        )
+        assert paths == [str(tmp_path / "update.prom"), str(tmp_path / "update.json")]
+        assert "quant_rows_total 10" in (tmp_path / "update.prom").read_text("utf-8")
+        saved = json.loads((tmp_path / "update.json").read_text("utf-8"))
+        assert saved["metrics"][0]["samples"][0]["value"] == 10
+        assert _value("job_success", job="update") == 0
+        assert _value("job_duration_seconds", job="update") == 3.0
+        assert not list(tmp_path.glob("*.tmp"))
+
+
+class TestInstrumentation:
+    """下载器和回测的指标记录的测试用例"""
+
+    def test_metered_client(self):
+        """测试接口调用按结果分类计数，限流错误单独统计"""
+        client = MagicMock()
+        client.daily.return_value = pd.DataFrame({"ts_code": ["a", "b"]})
+        client.adj_factor.side_effect = Exception("抱歉，您每分钟最多访问该接口500次")
+        client.trade_cal.side_effect = Exception("网络错误")
+        ok = _value("tushare_api_requests_total", api="daily", status="ok")
+        rows = API_ROWS.labels(api="daily").value
+        throttled = API_REQUESTS.labels(api="adj_factor", status="throttled").value
+        errors = API_REQUESTS.labels(api="trade_cal", status="error").value
+
+        metered = MeteredClient(client)
+        assert len(metered.daily(ts_code="a,b")) == 2
+        with pytest.raises(Exception):
+            metered.adj_factor(trade_date="20240102")
+        with pytest.raises(Exception):
+            metered.trade_cal()
+
+        assert _value("tushare_api_requests_total", api="daily", status="ok") == ok + 1
+        assert API_ROWS.labels(api="daily").value == rows + 2
+        assert (
+            API_REQUESTS.labels(api="adj_factor", status="throttled").value
+            == throttled + 1
+        )
+        assert API_REQUESTS.labels(api="trade_cal", status="error").value == errors + 1
+
+    def test_upsert_rows(self, tmp_path):
+        """测试增量写入只统计新插入的行数"""
+        downloader = object.__new__(TushareDownloader)
+        downloader.engine = create_engine(f"sqlite:///{tmp_path / 'up.db'}")
+        before = ROWS_WRITTEN.labels(table="adj_factor").value
+        df = pd.DataFrame(
+            {"ts_code": SYMBOL, "trade_date": ["20240102", "20240103"], "adj_factor": 1}
+        )
+        downloader._upsert_data(df, "adj_factor", ["ts_code", "trade_date"])
+        downloader._upsert_data(df, "adj_factor", ["ts_code", "trade_date"])
+        assert ROWS_WRITTEN.labels(table="adj_factor").value == before + 2
+
+    def test_backtest_status(self, reader, tmp_path):
+        """测试回测按运行、缓存命中和无数据分别计数，并累计Bar数"""
+        job = BacktestJob(
+            strategy="MACD", symbol=SYMBOL, start_date="20230101", end_date="20231231"
+        )
+        store = ResultStore(str(tmp_path / "results"))
+        counts = {
+            status: _value("backtests_total", engine="backtrader", status=status)
+            for status in ("ok", "cached", "no_data")
+        }
+        bars = _value("backtest_bars_total", engine="backtrader")
+
+        run_backtest(job, reader, store)
+        run_backtest(job, reader, store)
+        run_backtest(BacktestJob(**{**job.to_dict(), "symbol": "000001.SZ"}), reader)
+
+        for status in ("ok", "cached", "no_data"):
+            value = _value("backtests_total", engine="backtrader", status=status)
+            assert value == counts[status] + 1, status
+        expected = len(reader.get_daily_price(SYMBOL, "20230101", "20231231", "qfq"))
+        assert _value("backtest_bars_total", engine="backtrader") == bars + expected
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.minute import MinuteBars, MinuteDownloader, MinuteStore
+
+CODES = ["000001.SZ", "600000.SH"]
+
+
+def _session_times(date: str) -> pd.DatetimeIndex:
+    day = pd.Timestamp(date)
+    morning = pd.date_range(day + pd.Timedelta("09:30:00"), periods=121, freq="min")
+    afternoon = pd.date_range(day + pd.Timedelta("13:01:00"), periods=120, freq="min")
+    return morning.append(afternoon)
+
+
+def _minute_frame(ts_code: str, dates: list[str], seed: int = 0) -> pd.DataFrame:
+    """一只股票若干交易日的1分钟线，格式与 stk_mins 接口相同。"""
+    times = _session_times(dates[0])
+    for date in dates[1:]:
+        times = times.append(_session_times(date))
+    rng = np.random.default_rng(seed)
+    close = np.round(10 + rng.normal(0, 0.01, len(times)).cumsum(), 2)
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame(
+        {
+            "ts_code": ts_code,
+            "trade_time": times.strftime("%Y-%m-%d %H:%M:%S"),
+            "open": open_,
+            "close": close,
+            "high": np.fmax(open_, close) + 0.01,
+            "low": np.fmin(open_, close) - 0.01,
+            "vol": rng.integers(100, 10000, len(times)).astype(float),
+            "amount": rng.random(len(times)) * 1e5,
+        }
+    )
+
+
+class FakeClient:
+    """模拟 Tushare 的 stk_mins 接口，按时间倒序返回。"""
+
+    def __init__(self, dates: list[str]):
+        self.dates = dates
+        self.calls = []
+
+    def stk_mins(self, ts_code, freq, start_date, end_date):
+        self.calls.append((ts_code, start_date, end_date))
+        df = _minute_frame(ts_code, self.dates, seed=CODES.index(ts_code))
+        keep = (df["trade_time"] >= start_date) & (df["trade_time"] <= end_date)
+        return df[keep].iloc[::-1].reset_index(drop=True)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MinuteStore(str(tmp_path / "minute"))
+
+
+class TestMinuteStore:
+    """分钟线存储和重采样的测试用例"""
+
+    def test_download_partitions(self, store):
+        """测试按窗口下载、按交易日分区写入，重复下载不产生重复行"""
+        dates = ["20240102", "20240103", "20240110"]
+        client = FakeClient(dates)
+        downloader = MinuteDownloader(client, store, window_days=5)
+        assert downloader.download(CODES, "20240101", "20240110") == 3 * 2 * 241
+        # 两个窗口 × 两只股票
+        assert len(client.calls) == 4
+        assert store.dates() == dates
+        assert downloader.download(CODES, "20240103", "20240103") == 0
+
+        bars = store.read("20240103")
+        assert list(bars.codes) == CODES
+        assert bars.time.dtype == np.int32 and bars.close.dtype == np.float32
+        expected = _minute_frame("600000.SH", dates, seed=1).iloc[241:482]
+        df = bars.frame().loc["600000.SH"]
+        np.testing.assert_allclose(df["close"], expected["close"], rtol=1e-6)
+        assert df.index[0] == pd.Timestamp("2024-01-03 09:30")
+
+    def test_resample_matches_pandas(self, store):
+        """测试按交易时段聚合，结果与pandas逐时段聚合一致"""
+        df = pd.concat(
+            [_minute_frame(code, ["20240102"], i) for i, code in enumerate(CODES)]
+        )
+        bars = MinuteBars.from_frame("20240102", df)
+
+        hourly = bars.resample("60min").select(["000001.SZ"])
+        assert hourly.time.tolist() == [1030, 1130, 1400, 1500]
+        raw = bars.select(["000001.SZ"]).frame().droplevel("ts_code")
+        first = raw.between_time("09:30", "10:30")
+        assert hourly.open[0] == first["open"].iloc[0]
+        assert hourly.high[0] == first["high"].max()
+        assert hourly.close[0] == first["close"].iloc[-1]
+        assert hourly.volume[0] == first["volume"].sum()
+
+        five = bars.resample("5min")
+        assert len(five) == 2 * 48
+        assert five.time[:2].tolist() == [935, 940]
+        np.testing.assert_allclose(five.volume.sum(), bars.volume.sum())
+
+        daily = bars.resample("D")
+        assert daily.time.tolist() == [1500, 1500]
+        np.testing.assert_array_equal(
+            daily.low,
+            [
+                bars.low[: bars.offsets[1]].min(),
+                bars.low[bars.offsets[1] :].min(),
+            ],
+        )
+
+    def test_resample_cache_and_feed(self, store):
+        """测试聚合结果第一次读取时缓存，写入新数据后缓存失效，并可作为数据源"""
+        dates = ["20240102", "20240103"]
+        MinuteDownloader(FakeClient(dates), store).download(
+            CODES, "20240102", "20240103"
+        )
+        assert store.build_cache("20240101", "20240131", ["5min", "D"]) == 4
+        assert store.dates("5min") == dates
+        assert store.build_cache("20240101", "20240131", ["5min", "D"]) == 0
+
+        df = store.get_bars("000001.SZ", "20240101", "20240131", freq="D")
+        assert len(df) == 2
+        assert list(df.columns[:5]) == ["open", "high", "low", "close", "volume"]
+
+        extra = _minute_frame("000002.SZ", ["20240103"])
+        store.put(MinuteBars.from_frame("20240103", extra))
+        assert store.dates("5min") == ["20240102"]
+        assert list(store.read("20240103", "5min").codes) == [
+            "000001.SZ",
+            "000002.SZ",
+            "600000.SH",
+        ]
+
+        days = [date for date, _ in store.iter_bars("20240103", "20240103", "30min")]
+        assert days == ["20240103"]
+        feed = store.feed("000001.SZ", "20240101", "20240131", freq="30min")
+        assert feed.p.compression == 30
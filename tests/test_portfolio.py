@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.portfolio import run_portfolio
+from benchmarks.synthetic import make_market, write_db
+from commission.cost_model import AShareCostModel
+from data.db_reader import StockDBReader
+from data.panel import DailyPanel
+from engine import PortfolioEngine, rebalance_dates, top_n_weights
+
+COSTS = AShareCostModel(commission=0.0003, stamp_duty=0.0005, transfer_fee=0.00001)
+DATES = np.array(["20240102", "20240103", "20240104", "20240105", "20240108"])
+CODES = np.array(["000001.SZ", "600000.SH"])
+
+
+def _panel(open_, close) -> DailyPanel:
+    open_ = np.asarray(open_, dtype=float)
+    close = np.asarray(close, dtype=float)
+    return DailyPanel(
+        codes=CODES,
+        dates=DATES,
+        open=open_,
+        high=np.fmax(open_, close),
+        low=np.fmin(open_, close),
+        close=close,
+        volume=np.where(np.isnan(close), np.nan, 1000.0),
+    )
+
+
+def _weights(rows: dict) -> pd.DataFrame:
+    return pd.DataFrame(rows, index=CODES).T
+
+
+class TestPortfolioEngine:
+    """组合回测引擎的测试用例"""
+
+    def test_fills_fees_and_equity(self):
+        """测试信号次日开盘成交、整手取整、手续费和逐日市值"""
+        panel = _panel(
+            [[10, 10.5, 11, 11, 12], [20, 20, 19, 18, 18]],
+            [[10, 10.8, 11, 11.5, 12], [20, 19.5, 19, 18.5, 18]],
+        )
+        weights = _weights({"20240102": [0.5, 0.5], "20240104": [1.0, 0.0]})
+        result = PortfolioEngine(100_000, COSTS, price_limit=0).run(panel, weights)
+
+        trades = result.trades
+        first = trades[trades["date"] == "20240103"]
+        # 总资产10万，各5万：10.5元买4700股，20元买2500股
+        assert first["size"].tolist() == [4700, 2500]
+        fees = COSTS.fees([4700, 2500], [10.5, 20.0])
+        np.testing.assert_allclose(first["fee"], fees)
+        cash = 100_000 - 4700 * 10.5 - 2500 * 20 - fees.sum()
+        equity = result.record.equity
+        assert equity[0] == 100_000
+        assert equity[1] == pytest.approx(cash + 4700 * 10.8 + 2500 * 19.5)
+
+        # 第二次调仓先卖出600000.SH，再用全部资金买入000001.SZ
+        second = trades[trades["date"] == "20240105"]
+        assert second["size"].tolist() == [-2500, 4100]
+        assert result.positions.to_dict() == {"000001.SZ": 8800}
+        assert len(result.record.trade_pnl) == 1
+        sell_fee = COSTS.fees(-2500, 18.0)
+        expected_pnl = 2500 * 18 - sell_fee - (2500 * 20 + fees[1])
+        assert result.record.trade_pnl[0] == pytest.approx(expected_pnl)
+
+    def test_suspension_and_price_limit(self):
+        """测试停牌不能交易、开盘涨停不能买入、跌停不能卖出"""
+        panel = _panel(
+            [[10, np.nan, 10, 9.0, 9], [20, 22, 22, 22, 22]],
+            [[10, np.nan, 10, 10, 9], [20, 22, 22, 22, 22]],
+        )
+        weights = _weights({"20240102": [0.5, 0.5]})
+        result = PortfolioEngine(100_000, COSTS).run(panel, weights)
+        assert result.trades.empty
+        assert result.blocked == 2
+
+        weights = _weights({"20240104": [0.5, 0.0], "20240105": [0.0, 0.0]})
+        result = PortfolioEngine(100_000, COSTS).run(panel, weights)
+        # 20240105买入000001.SZ；20240108开盘跌停（9 / 10 - 1）无法卖出
+        assert result.trades["date"].tolist() == ["20240105"]
+        assert result.blocked == 1
+        assert result.positions.to_dict() == {"000001.SZ": 5500}
+
+    def test_cash_never_negative(self):
+        """测试权重之和为1时买单按手续费缩减，现金不为负"""
+        rng = np.random.default_rng(1)
+        close = 10 * np.cumprod(1 + rng.normal(0, 0.02, (2, 5)), axis=1)
+        panel = _panel(close, close)
+        weights = _weights({date: [0.5, 0.5] for date in DATES[:-1]})
+        result = PortfolioEngine(50_000, COSTS, price_limit=0).run(panel, weights)
+        trades = result.trades
+        flows = -(trades["size"] * trades["price"]) - trades["fee"]
+        cash = 50_000 + flows.groupby(trades["date"]).sum().cumsum()
+        assert (cash >= 0).all()
+        assert result.record.exposure.max() <= 1
+
+    def test_weights_helpers(self):
+        """测试调仓日期和按因子选前N只的等权权重"""
+        dates = pd.bdate_range("2024-01-01", "2024-03-29").strftime("%Y%m%d")
+        weekly = rebalance_dates(dates, "W")
+        assert weekly[0] == "20240105" and len(weekly) == 13
+        assert rebalance_dates(dates, "M").tolist() == [
+            "20240131",
+            "20240229",
+            "20240329",
+        ]
+        assert rebalance_dates(dates, 20).tolist() == list(dates[19::20])
+
+        values = np.array([[1.0, np.nan], [3.0, 2.0], [2.0, 1.0], [np.nan, 5.0]])
+        weights = top_n_weights(values, list("abcd"), ["d1", "d2"], n=2)
+        assert weights.loc["d1"].to_dict() == {"a": 0, "b": 0.5, "c": 0.5, "d": 0}
+        assert weights.loc["d2"].to_dict() == {"a": 0, "b": 0.5, "c": 0, "d": 0.5}
+
+
+def test_run_portfolio(tmp_path, capsys):
+    """测试按配置在模拟行情上运行因子轮动组合回测"""
+    market = make_market(symbols=20, bars=200, seed=4, suspend_rate=0.01)
+    write_db(str(tmp_path / "market.db"), market)
+    reader = StockDBReader(str(tmp_path / "market.db"))
+    config = {
+        "date": {
+            "start_year": 2015,
+            "start_month": 2,
+            "end_year": 2015,
+            "end_month": 9,
+        },
+        "strategy": {"name": "MACD"},
+        "stock": {"symbol": ["000001.SZ"], "adjust": "qfq"},
+        "cash": 100000,
+        "broker": {"commission": 0.06, "stamp_duty": 0.0005},
+        "portfolio": {"factor": "momentum_20", "top": 5, "cash": 1_000_000},
+        "factor": {"directory": str(tmp_path / "factors")},
+    }
+    result = run_portfolio(config, reader)
+    assert result.record.equity[0] == 1_000_000
+    # 停牌或跌停未能卖出的股票继续持有
+    assert 0 < len(result.positions) <= 5 + result.blocked
+    assert not result.trades.empty
+    assert "组合回测: 20 只股票" in capsys.readouterr().out
@@ -0,0 +1,109 @@
+import json
+
+import numpy as np
+import pytest
+
+from backtest import BacktestJob, run_backtest
+from data.db_reader import StockDBReader
+from monitor import Profiler, get_profiler, phase, set_profiler
+
+SYMBOL = "600000.SH"
+
+
+@pytest.fixture
+def reader(stock_db):
+    return StockDBReader(stock_db(symbols=1, bars=200, seed=5))
+
+
+@pytest.fixture
+def profiler():
+    def install(**kwargs):
+        profiler = Profiler(**kwargs)
+        set_profiler(profiler)
+        return profiler
+
+    previous = get_profiler()
+    yield install
+    set_profiler(previous)
+
+
+def _job(engine="backtrader"):
+    return BacktestJob(
+        strategy="MACD",
+        symbol=SYMBOL,
+        start_date="20230101",
+        end_date="20231231",
+        engine=engine,
+    )
+
+
+class TestProfiler:
+    """计时器的测试用例"""
+
+    def test_disabled_has_no_effect(self, reader):
+        """测试未开启时不记录，策略方法不被包装"""
+        assert not get_profiler().enabled
+        with phase("anything"):
+            pass
+        result = run_backtest(_job(), reader)
+        assert get_profiler().results()["phases"] == []
+        assert "next" not in vars(result.strategy)
+
+    def test_nested_phases(self, profiler):
+        """测试嵌套阶段的名称、次数和占比"""
+        p = profiler(enabled=True)
+        with phase("outer"):
+            for _ in range(3):
+                with phase("inner"):
+                    p.add("step", 0.5)
+        rows = {row["name"]: row for row in p.results()["phases"]}
+        assert list(rows) == ["outer", "outer.inner", "outer.inner.step"]
+        assert rows["outer.inner"]["calls"] == 3
+        assert rows["outer.inner.step"]["total"] == pytest.approx(1.5)
+        assert rows["outer"]["share"] == pytest.approx(1.0)
+        assert "inner" in p.table()
+
+    @pytest.mark.parametrize("engine", ["backtrader", "bar"])
+    def test_backtest_breakdown(self, reader, profiler, engine, tmp_path):
+        """测试回测各阶段和策略回调都被计时，结果可保存为JSON"""
+        p = profiler(enabled=True)
+        with phase("backtest"):
+            run_backtest(_job(engine), reader)
+        rows = {row["name"]: row for row in p.results()["phases"]}
+        for name in [
+            "backtest.cache",
+            "backtest.load.sql",
+            "backtest.load.adjust",
+            "backtest.run.indicators",
+            "backtest.run.next",
+            "backtest.metrics",
+        ]:
+            assert name in rows, name
+        if engine == "backtrader":
+            assert "backtest.run.preload" in rows
+            assert "backtest.run.warmup" in rows
+        # MACD策略的预热期之后每个Bar调用一次next()
+        next_calls = rows["backtest.run.next"]["calls"]
+        assert 100 < next_calls < 200
+        assert rows["backtest.run"]["total"] >= rows["backtest.run.next"]["total"]
+
+        path = tmp_path / "profile.json"
+        p.write_json(str(path))
+        saved = json.loads(path.read_text(encoding="utf-8"))
+        assert len(saved["phases"]) == len(rows)
+
+    def test_cprofile_and_memory(self, profiler, tmp_path):
+        """测试cProfile和tracemalloc的结果"""
+        path = tmp_path / "run.prof"
+        p = profiler(cprofile=str(path), memory=True, top=5)
+        assert p.enabled
+        p.start()
+        with phase("work"):
+            data = [np.arange(10000) for _ in range(20)]
+            sum(float(x.sum()) for x in data)
+        p.stop()
+        results = p.results()
+        assert path.exists()
+        assert 0 < len(results["functions"]) <= 5
+        assert results["memory"]["peak_kb"] > 0
+        assert "内存峰值" in p.table()
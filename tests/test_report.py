@@ -0,0 +1,129 @@
+import time
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import EquityRecorder
+from report import (
+    ReportData,
+    lttb,
+    lttb_series,
+    ohlc_buckets,
+    render_html,
+    render_in_background,
+)
+
+
+class TestDownsample:
+    """降采样的测试用例"""
+
+    def test_lttb_keeps_extremes(self):
+        """测试LTTB保留首尾点和明显的峰谷"""
+        x = np.arange(1000)
+        y = np.sin(x / 50.0)
+        y[500] = 5.0  # 孤立的尖峰
+        idx = lttb(x, y, 100)
+
+        assert len(idx) == 100
+        assert idx[0] == 0 and idx[-1] == 999
+        assert np.all(np.diff(idx) > 0)
+        assert 500 in idx
+
+    def test_lttb_short_series(self):
+        """测试点数不超过阈值时原样返回"""
+        np.testing.assert_array_equal(lttb(np.arange(5), np.ones(5), 10), np.arange(5))
+
+    def test_lttb_series_skips_nan(self):
+        """测试忽略指标预热期的NaN"""
+        y = np.r_[np.full(10, np.nan), np.arange(100.0)]
+        index, values = lttb_series(y, 20)
+        assert index[0] == 10
+        assert not np.isnan(values).any()
+
+    def test_ohlc_buckets(self):
+        """测试K线合并保留开收盘价和桶内极值"""
+        high = np.arange(10.0) + 1
+        low = np.arange(10.0) - 1
+        buckets = ohlc_buckets(np.arange(10.0), high, low, np.arange(10.0) + 0.5, 3)
+
+        np.testing.assert_array_equal(buckets["index"], [0, 3, 6])
+        np.testing.assert_array_equal(buckets["width"], [3, 3, 4])
+        np.testing.assert_array_equal(buckets["open"], [0, 3, 6])
+        np.testing.assert_array_equal(buckets["close"], [2.5, 5.5, 9.5])
+        np.testing.assert_array_equal(buckets["high"], [3, 6, 10])
+        np.testing.assert_array_equal(buckets["low"], [-1, 2, 5])
+
+
+class _SMACross(bt.Strategy):
+    def __init__(self):
+        self.sma = bt.indicators.SMA(self.data.close, period=10)
+        self.rsi = bt.indicators.RSI(self.data.close, period=14)
+
+    def next(self):
+        if not self.position and self.data.close[0] > self.sma[0]:
+            self.buy(size=100)
+        elif self.position and self.data.close[0] < self.sma[0]:
+            self.close()
+
+
+@pytest.fixture(scope="module")
+def report():
+    rng = np.random.default_rng(5)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, 3000)))
+    df = pd.DataFrame(
+        {"open": close, "high": close * 1.01, "low": close * 0.99, "close": close},
+        index=pd.bdate_range("2012-01-02", periods=3000),
+    ).assign(volume=1e4)
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(bt.feeds.PandasData(dataname=df), name="000001.SZ")
+    cerebro.addstrategy(_SMACross)
+    cerebro.addanalyzer(EquityRecorder, _name="equity")
+    return ReportData.from_strategy(cerebro.run()[0])
+
+
+class TestReport:
+    """HTML报告的测试用例"""
+
+    def test_from_strategy(self, report):
+        """测试从策略中提取行情、指标、资金曲线和成交"""
+        assert report.title == "000001.SZ"
+        assert report.dates[0] == np.datetime64("2012-01-02")
+        assert len(report.dates) == len(report.close) == len(report.equity) == 3000
+        assert list(report.overlays) == ["sma"]
+        assert list(report.subplots) == ["rsi"]
+        assert len(report.fills) > 0
+        assert "sharpe" in report.metrics
+
+    def test_render_is_decimated(self, report):
+        """测试渲染结果是自包含的HTML，且每条曲线的点数不超过上限"""
+        page = render_html(report, max_points=500)
+
+        assert page.startswith("<!DOCTYPE html>")
+        # 不依赖脚本和外部资源
+        assert "<script" not in page and "src=" not in page
+        for polyline in page.split("<polyline")[1:]:
+            points = polyline.split('points="')[1].split('"')[0]
+            assert len(points.split()) <= 500
+        assert "买入" in page and "夏普比率" in page
+
+    @pytest.mark.parametrize("mode", ["process", "thread"])
+    def test_render_in_background(self, report, tmp_path, mode):
+        """测试在子进程或线程中写入报告"""
+        path = tmp_path / "out" / "report.html"
+        future = render_in_background(report, str(path), mode=mode)
+        assert future.result(timeout=60) == str(path)
+        assert path.read_text(encoding="utf-8").startswith("<!DOCTYPE html>")
+
+    def test_render_in_background_error(self, report, tmp_path, capsys):
+        """测试后台渲染失败时打印错误，而不是被静默丢弃"""
+        (tmp_path / "file").write_text("")
+        future = render_in_background(
+            report, str(tmp_path / "file" / "report.html"), mode="thread"
+        )
+        assert isinstance(future.exception(timeout=60), OSError)
+        deadline = time.monotonic() + 5
+        while "回测报告渲染失败" not in (out := capsys.readouterr().out):
+            assert time.monotonic() < deadline, out
+            time.sleep(0.01)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from analysis import RunRecord, max_drawdown, robustness_test
+
+
+def _record(n=300, trades=30, seed=0):
+    rng = np.random.default_rng(seed)
+    equity = 100000 * np.cumprod(1 + rng.normal(0.0005, 0.01, n))
+    return RunRecord(
+        dates=np.arange(n).astype("datetime64[D]"),
+        equity=equity,
+        exposure=np.ones(n),
+        trade_pnl=rng.normal(100, 1000, trades),
+    )
+
+
+class TestRobustness:
+    """重采样稳健性检验的测试用例"""
+
+    @pytest.mark.parametrize("method", ["bootstrap", "block", "trades"])
+    def test_shapes_and_seed(self, method):
+        """测试样本数量、置信区间包含均值，相同种子结果相同"""
+        record = _record()
+        report = robustness_test(
+            record, samples=250, method=method, batch_size=100, workers=1, seed=7
+        )
+        assert len(report.samples) == 250
+        summary = report.summary()
+        assert (summary["lower"] <= summary["mean"]).all()
+        assert (summary["mean"] <= summary["upper"]).all()
+        again = robustness_test(
+            record, samples=250, method=method, batch_size=100, workers=1, seed=7
+        )
+        np.testing.assert_array_equal(again.samples, report.samples)
+
+    def test_workers_do_not_change_result(self):
+        """测试多进程计算与单进程结果一致"""
+        record = _record()
+        single = robustness_test(record, samples=300, batch_size=100, workers=1, seed=3)
+        pooled = robustness_test(record, samples=300, batch_size=100, workers=2, seed=3)
+        np.testing.assert_array_equal(pooled.samples, single.samples)
+
+    def test_trade_shuffle(self):
+        """测试打乱交易顺序不改变最终资产，只改变回撤"""
+        record = _record()
+        report = robustness_test(record, samples=200, method="trades", workers=1)
+        final = record.equity[0] + record.trade_pnl.sum()
+        np.testing.assert_allclose(report.samples["final_equity"], final)
+        assert report.observed["final_equity"] == pytest.approx(final)
+        assert report.samples["max_drawdown"].nunique() > 1
+
+    def test_block_rotation(self):
+        """测试块长度等于序列长度时每条路径是原收益的循环移位，总收益不变"""
+        record = _record(n=50)
+        report = robustness_test(
+            record, samples=100, method="block", block=1000, workers=1
+        )
+        np.testing.assert_allclose(
+            report.samples["total_return"], report.observed["total_return"]
+        )
+        depth, _ = max_drawdown(record.equity)
+        assert report.observed["max_drawdown"] == pytest.approx(depth)
+
+    def test_invalid(self):
+        """测试不支持的方式和没有交易时报错"""
+        with pytest.raises(ValueError):
+            robustness_test(_record(), method="jackknife")
+        with pytest.raises(ValueError):
+            robustness_test(_record(trades=0), method="trades")
@@ -0,0 +1,198 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from data.db_reader import StockDBReader
+from data.panel import DailyPanel
+from strategy.macd_strategy import MACDStrategy
+from strategy.screener import (
+    prepare_panel,
+    screen_market,
+    screen_panel,
+    supports_screen,
+)
+from strategy.trade_strategy import TradeStrategy
+
+PARAMS = {
+    "ma_period": 15,
+    "macd_fast": 30,
+    "macd_slow": 50,
+    "macd_signal": 6,
+    "atr_period": 5,
+    "zscore_threshold": 1.5,
+    "peak_window": 5,
+}
+
+
+def _daily_frame(codes, n=150, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-02", periods=n).strftime("%Y%m%d")
+    frames = []
+    for code in codes:
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.03, n)))
+        frames.append(
+            pd.DataFrame(
+                {
+                    "ts_code": code,
+                    "trade_date": dates,
+                    "open": close * (1 + rng.normal(0, 0.01, n)),
+                    "high": close * (1 + np.abs(rng.normal(0, 0.02, n))),
+                    "low": close * (1 - np.abs(rng.normal(0, 0.02, n))),
+                    "close": close,
+                    "vol": rng.integers(1000, 9000, n).astype(float),
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture
+def db(tmp_path):
+    codes = ["000001.SZ", "000002.SZ", "600000.SH", "600001.SH"]
+    daily = _daily_frame(codes)
+    adj = daily[["ts_code", "trade_date"]].assign(adj_factor=1.0)
+    # 000001.SZ 在窗口内除权
+    adj.loc[
+        (adj["ts_code"] == "000001.SZ") & (adj["trade_date"] >= "20240501"),
+        "adj_factor",
+    ] = 1.2
+    basic = pd.DataFrame(
+        {
+            "ts_code": codes,
+            "name": ["平安银行", "万科A", "浦发银行", "退市股"],
+            "industry": ["银行", "房地产", "银行", "银行"],
+            "list_status": ["L", "L", "L", "D"],
+        }
+    )
+    engine = create_engine(f"sqlite:///{tmp_path / 'stock.db'}")
+    daily.to_sql("daily_price", engine, index=False)
+    adj.to_sql("adj_factor", engine, index=False)
+    basic.to_sql("stock_basic", engine, index=False)
+    return StockDBReader(str(tmp_path / "stock.db"))
+
+
+class TestDailyPanel:
+    """行情面板的测试用例"""
+
+    def test_panel_filters_pushed_into_sql(self, db):
+        """测试上市状态和行业筛选"""
+        panel = db.get_daily_panel(last_n=20, list_status=["L"], industries=["银行"])
+        assert panel.codes.tolist() == ["000001.SZ", "600000.SH"]
+        assert panel.shape == (2, 20)
+
+    def test_panel_matches_daily_price(self, db):
+        """测试面板的复权结果与逐只股票读取一致"""
+        panel = db.get_daily_panel(last_n=60, adj_type="qfq")
+        start, end = panel.dates[0], panel.dates[-1]
+        for row, code in enumerate(panel.codes):
+            expected = db.get_daily_price(code, start, end, adj_type="qfq")
+            np.testing.assert_allclose(panel.close[row], expected["close"].to_numpy())
+            np.testing.assert_allclose(panel.volume[row], expected["volume"].to_numpy())
+
+    def test_prepare_panel(self):
+        """测试停牌填充、剔除新股和当日停牌的股票"""
+        nan = np.nan
+        close = np.array([[1.0, nan, 3.0], [nan, 2.0, 3.0], [1.0, 2.0, nan]])
+        panel = DailyPanel(
+            codes=np.array(["A", "B", "C"]),
+            dates=np.array(["1", "2", "3"]),
+            open=close.copy(),
+            high=close.copy(),
+            low=close.copy(),
+            close=close,
+            volume=np.ones_like(close),
+        )
+        prepared = prepare_panel(panel)
+
+        assert prepared.codes.tolist() == ["A"]
+        np.testing.assert_array_equal(prepared.close[0], [1.0, 1.0, 3.0])
+        np.testing.assert_array_equal(prepared.volume[0], [1.0, 0.0, 1.0])
+
+
+class _SignalRecorder(MACDStrategy):
+    """强制设定持仓状态，记录每个Bar上是否发出开仓/平仓指令"""
+
+    holding = False
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.signal_bars: list[int] = []
+
+    @property
+    def position(self):
+        return self.holding
+
+    def buy(self, *args, **kwargs):
+        self.signal_bars.append(len(self) - 1)
+
+    def close(self, *args, **kwargs):
+        self.signal_bars.append(len(self) - 1)
+
+    def stop(self):
+        pass
+
+
+def _bt_signal_bars(df, holding):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(bt.feeds.PandasData(dataname=df))
+    recorder = type("Recorder", (_SignalRecorder,), {"holding": holding})
+    cerebro.addstrategy(recorder, **PARAMS)
+    return cerebro.run()[0].signal_bars
+
+
+class TestScreen:
+    """向量化选股与backtrader逐Bar运行的一致性测试"""
+
+    @pytest.mark.parametrize("holding, signal", [(False, "entry"), (True, "exit")])
+    def test_matches_backtrader(self, holding, signal):
+        """测试每个Bar上的向量化信号与策略的next()一致"""
+        daily = _daily_frame(["X"], n=220, seed=7)
+        panel = DailyPanel.from_frame(daily, adj_type="bfq")
+        df = pd.DataFrame(
+            {name: values[0] for name, values in panel.fields().items()},
+            index=pd.to_datetime(panel.dates),
+        )
+        expected = _bt_signal_bars(df, holding)
+
+        actual = []
+        for end in range(60, len(panel.dates) + 1):
+            window = DailyPanel(
+                codes=panel.codes,
+                dates=panel.dates[:end],
+                **{name: values[:, :end] for name, values in panel.fields().items()},
+            )
+            if MACDStrategy.screen(window, PARAMS)[signal][0]:
+                actual.append(end - 1)
+
+        assert actual == [bar for bar in expected if bar >= 59]
+        assert actual, "测试数据中应至少出现一次信号"
+
+    def test_screen_panel_output(self, db):
+        """测试候选列表的格式"""
+        panel = db.get_daily_panel(last_n=120)
+        result = screen_panel(MACDStrategy, PARAMS, panel)
+        assert list(result.columns) == ["ts_code", "close", "signal", "score"]
+        assert set(result["signal"]) <= {"entry", "exit"}
+
+    def test_screen_market(self, db, tmp_path):
+        """测试按配置选股并保存结果"""
+        output = tmp_path / "screen.csv"
+        config = {
+            "strategy": {"name": "MACD"},
+            "stock": {"adjust": "qfq"},
+            "screen": {"bars": 120, "industries": ["银行"], "output": str(output)},
+        }
+        result = screen_market(config, reader=db)
+
+        assert output.exists()
+        assert set(result["ts_code"]) <= {"000001.SZ", "600000.SH"}
+        assert {"name", "industry"} <= set(result.columns)
+
+    def test_strategy_without_screen(self, db):
+        """测试没有实现 screen 的策略不能用于选股"""
+        assert supports_screen(MACDStrategy)
+        assert not supports_screen(TradeStrategy)
+        with pytest.raises(TypeError):
+            screen_panel(TradeStrategy, {}, db.get_daily_panel(last_n=120))
@@ -0,0 +1,91 @@
+import multiprocessing as mp
+from multiprocessing import resource_tracker
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from backtest import BacktestJob, run_backtest
+from data.db_reader import StockDBReader
+from data.shared_panel import SharedPanel
+
+SYMBOLS = ["600000.SH", "000001.SZ"]
+
+
+@pytest.fixture
+def reader(stock_db):
+    # 两只股票都有停牌和复权因子变化
+    path = stock_db(symbols=2, bars=300, seed=7, suspend_rate=0.01, event_rate=0.01)
+    return StockDBReader(path)
+
+
+def _attached_close(handle, code):
+    """子进程：附加到共享面板，返回收盘价之和以及是否为零拷贝视图。"""
+    panel = SharedPanel.attach(handle)
+    close = panel.view(code)["close"]
+    result = (float(np.nansum(close)), np.shares_memory(close, panel.data))
+    del close
+    panel.close()
+    return result
+
+
+class TestSharedPanel:
+    """SharedPanel类的测试用例"""
+
+    @pytest.mark.parametrize("adj_type", ["qfq", "hfq", "bfq"])
+    @pytest.mark.parametrize(
+        "window", [("20230101", "20231231"), ("20230301", "20230930")]
+    )
+    def test_matches_reader(self, reader, adj_type, window):
+        """测试取出的行情与逐只股票读取数据库的结果一致"""
+        with SharedPanel.load(reader, SYMBOLS, "20230101", "20241231") as panel:
+            for code in SYMBOLS:
+                arrays = panel.symbol_arrays(code, *window, adj_type)
+                expected = reader.get_daily_price(code, *window, adj_type)
+                for name in ("open", "high", "low", "close", "volume"):
+                    np.testing.assert_allclose(arrays[name], expected[name].to_numpy())
+                assert len(arrays["datetime"]) == len(expected)
+
+    def test_attach(self, reader):
+        """测试子进程附加到同一块共享内存，不复制数据"""
+        with SharedPanel.load(reader, SYMBOLS, "20230101", "20241231") as panel:
+            with mp.get_context("spawn").Pool(1) as pool:
+                total, shared = pool.apply(_attached_close, (panel.handle, SYMBOLS[1]))
+            expected = reader.get_raw_daily_price(SYMBOLS[1], "20230101", "20241231")
+            assert total == pytest.approx(expected["close"].sum())
+            assert shared
+
+    def test_attach_untracked(self, reader, monkeypatch):
+        """测试附加方不登记到 resource_tracker，共享内存只由创建者释放"""
+        registered = []
+        with SharedPanel.load(reader, SYMBOLS, "20230101", "20241231") as panel:
+            monkeypatch.setattr(
+                resource_tracker, "register", lambda *args: registered.append(args)
+            )
+            attached = SharedPanel.attach(panel.handle)
+            assert attached.symbol_arrays(SYMBOLS[0], "20230101", "20241231")[
+                "close"
+            ].size
+            attached.close()
+        assert registered == []
+
+    def test_backtest(self, reader):
+        """测试使用共享面板的回测结果与读取数据库的回测结果一致"""
+        job = BacktestJob(
+            strategy="MACD",
+            symbol=SYMBOLS[1],
+            start_date="20230101",
+            end_date="20231231",
+        )
+        expected = run_backtest(job, reader)
+        with SharedPanel.load(reader, SYMBOLS, "20230101", "20241231") as panel:
+            reader.get_daily_price = MagicMock(wraps=reader.get_daily_price)
+            result = run_backtest(job, reader, panel=panel)
+            reader.get_daily_price.assert_not_called()
+            empty = BacktestJob(**{**job.to_dict(), "start_date": "20240601"})
+            assert run_backtest(empty, reader, panel=panel) is None
+            result.strategy = None
+
+        assert result.final_value == pytest.approx(expected.final_value)
+        assert result.metrics == pytest.approx(expected.metrics, nan_ok=True)
+        np.testing.assert_array_equal(result.record.dates, expected.record.dates)
@@ -0,0 +1,139 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import data.akshare_data as akshare_data
+from benchmarks.synthetic import make_market, write_db
+from data.akshare_data import AKShareSource
+from data.db_reader import StockDBReader
+from data.source import DataSource, fetch_many, get_source
+
+
+class FakeAKShare:
+    """由模拟行情生成 `ak.stock_zh_a_hist` 格式的数据，只提供 `until` 之前的数据。"""
+
+    def __init__(self, market: dict[str, pd.DataFrame]):
+        daily = market["daily_price"].merge(
+            market["adj_factor"], on=["ts_code", "trade_date"]
+        )
+        daily["symbol"] = daily["ts_code"].str[:6]
+        self.daily = daily
+        self.until = "99991231"
+        self.calls = []
+
+    def stock_zh_a_hist(self, symbol, period, start_date, end_date, adjust):
+        self.calls.append((symbol, start_date, adjust))
+        end_date = min(end_date, self.until)
+        df = self.daily[
+            (self.daily["symbol"] == symbol)
+            & (self.daily["trade_date"] >= start_date)
+            & (self.daily["trade_date"] <= end_date)
+        ]
+        scale = df["adj_factor"] if adjust == "hfq" else 1.0
+        return pd.DataFrame(
+            {
+                "日期": pd.to_datetime(df["trade_date"]).dt.strftime("%Y-%m-%d"),
+                "股票代码": symbol,
+                "开盘": df["open"] * scale,
+                "收盘": df["close"] * scale,
+                "最高": df["high"] * scale,
+                "最低": df["low"] * scale,
+                "成交量": df["vol"],
+                "成交额": df["amount"],
+                "换手率": 1.0,
+            }
+        )
+
+
+@pytest.fixture(scope="module")
+def market():
+    return make_market(symbols=4, bars=200, seed=5, event_rate=0.02)
+
+
+@pytest.fixture(scope="module")
+def reader(market, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("source") / "market.db")
+    write_db(path, market)
+    return StockDBReader(path)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可以调整的当前日期。"""
+
+    class Clock(datetime):
+        today_value = datetime(2030, 1, 1)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.today_value
+
+    monkeypatch.setattr(akshare_data, "datetime", Clock)
+    return Clock
+
+
+class TestDataSource:
+    """数据源统一接口的测试用例"""
+
+    @pytest.mark.parametrize("adj_type", ["bfq", "qfq", "hfq"])
+    def test_same_frames(self, market, reader, tmp_path, adj_type):
+        """测试AKShare数据源与数据库读取器返回相同格式和数值的日线"""
+        source = AKShareSource(str(tmp_path), client=FakeAKShare(market))
+        assert isinstance(source, DataSource) and isinstance(reader, DataSource)
+        dates = market["trade_calendar"]["cal_date"]
+        code = market["stock_basic"]["ts_code"].iloc[1]
+        start, end = dates.iloc[20], dates.iloc[150]
+        expected = reader.get_daily_price(code, start, end, adj_type)
+        actual = source.get_daily_price(code, start, end, adj_type)
+        pd.testing.assert_frame_equal(actual, expected, check_freq=False)
+
+    def test_tail_refresh(self, market, tmp_path, clock, capsys):
+        """测试缓存：同一天不重复下载，之后只请求最后缓存日期以后的数据"""
+        dates = market["trade_calendar"]["cal_date"]
+        client = FakeAKShare(market)
+        source = AKShareSource(str(tmp_path), client=client)
+        code = market["stock_basic"]["ts_code"].iloc[0]
+
+        client.until = dates.iloc[100]
+        clock.today_value = datetime.strptime(dates.iloc[100], "%Y%m%d")
+        source.get_daily_price(code, dates.iloc[0], dates.iloc[100])
+        assert [call[1] for call in client.calls] == ["19700101", "19700101"]
+        source.get_daily_price(code, dates.iloc[0], dates.iloc[100])
+        assert len(client.calls) == 2
+
+        client.until = dates.iloc[-1]
+        clock.today_value = datetime.strptime(dates.iloc[-1], "%Y%m%d")
+        client.calls.clear()
+        tail = source.get_daily_price(code, dates.iloc[0], dates.iloc[-1], "qfq")
+        # 从倒数第二个缓存日期开始请求
+        assert [call[1] for call in client.calls] == [dates.iloc[99]] * 2
+        fresh = AKShareSource(str(tmp_path / "fresh"), client=client)
+        full = fresh.get_daily_price(code, dates.iloc[0], dates.iloc[-1], "qfq")
+        pd.testing.assert_frame_equal(tail, full)
+
+        # 数据源修正了历史数据：重新下载全部历史
+        client.daily.loc[client.daily["trade_date"] == dates.iloc[-2], "close"] += 1
+        client.until = "99991231"
+        clock.today_value = datetime(2030, 1, 1)
+        client.calls.clear()
+        source.get_daily_price(code, dates.iloc[0], "20300101")
+        assert client.calls[-1][1] == "19700101"
+        assert "历史数据已变化" in capsys.readouterr().out
+
+    def test_fetch_many(self, market, reader, tmp_path):
+        """测试并发读取多只股票，结果与逐只读取相同"""
+        dates = market["trade_calendar"]["cal_date"]
+        codes = list(market["stock_basic"]["ts_code"])
+        source = get_source({"data": {"source": "akshare", "cache_dir": str(tmp_path)}})
+        source._client = FakeAKShare(market)
+        frames = fetch_many(source, codes + codes[:1], dates.iloc[10], dates.iloc[-1])
+        assert list(frames) == codes
+        for code in codes:
+            expected = reader.get_daily_price(code, dates.iloc[10], dates.iloc[-1])
+            pd.testing.assert_frame_equal(frames[code], expected, check_freq=False)
+        # 每只股票下载一次（不复权和后复权各一次请求）
+        assert len(source.client.calls) == 2 * len(codes)
+
+        with pytest.raises(ValueError, match="不支持的数据源"):
+            get_source({"data": {"source": "wind"}})
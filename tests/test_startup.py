@@ -0,0 +1,18 @@
+import subprocess
+import sys
+
+
+class TestStartup:
+    """启动时不导入可选的重量级依赖"""
+
+    def test_main_imports_lazily(self):
+        """测试导入main时不加载matplotlib、scipy和数据源SDK"""
+        code = (
+            "import sys, main\n"
+            "heavy = ['matplotlib', 'scipy', 'tushare', 'akshare']\n"
+            "print(','.join(m for m in heavy if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        assert output.strip() == ""
@@ -0,0 +1,202 @@
+import os
+import sys
+import textwrap
+import tomllib
+from unittest.mock import Mock, patch
+
+import pytest
+
+from strategy.config_loader import StrategyConfig
+from strategy.macd_strategy import MACDStrategy
+from strategy.registry import ParamSchema, StrategyRegistry, get_registry
+
+
+def _write(path, content):
+    path.write_text(textwrap.dedent(content), encoding="utf-8")
+
+
+def _bump_mtime(path):
+    """确保文件修改时间发生变化（部分文件系统的时间精度较低）"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "strategy_config.toml"
+    _write(
+        path,
+        """
+        [MACD]
+        module = "strategy.macd_strategy"
+        class = "MACDStrategy"
+        [MACD.params]
+        ma_period = 15
+        zscore_threshold = 1.5
+        """,
+    )
+    return path
+
+
+@pytest.fixture
+def plugin_module(tmp_path, monkeypatch):
+    """在临时目录中创建一个可导入的策略模块"""
+    module_dir = tmp_path / "plugins"
+    module_dir.mkdir()
+    _write(
+        module_dir / "fake_plugin.py",
+        """
+        class FakeStrategy:
+            version = 1
+        """,
+    )
+    monkeypatch.syspath_prepend(str(module_dir))
+    yield module_dir / "fake_plugin.py"
+    sys.modules.pop("fake_plugin", None)
+
+
+class TestParamSchema:
+    """ParamSchema类的测试用例"""
+
+    def setup_method(self):
+        self.schema = ParamSchema.from_defaults(
+            {"ma_period": 15, "zscore_threshold": 1.5, "use_filter": True}
+        )
+
+    def test_validate_merges_defaults(self):
+        """测试覆盖值与默认值合并"""
+        params = self.schema.validate({"ma_period": 20})
+        assert params == {"ma_period": 20, "zscore_threshold": 1.5, "use_filter": True}
+
+    def test_validate_accepts_int_for_float(self):
+        """测试整数可以作为浮点参数"""
+        assert self.schema.validate({"zscore_threshold": 2})["zscore_threshold"] == 2
+
+    def test_validate_rejects_unknown_param(self):
+        """测试未声明的参数会被拒绝"""
+        with pytest.raises(ValueError):
+            self.schema.validate({"ma_periodd": 20})
+
+    def test_validate_rejects_wrong_type(self):
+        """测试类型错误的参数会被拒绝"""
+        with pytest.raises(TypeError):
+            self.schema.validate({"ma_period": "20"})
+        with pytest.raises(TypeError):
+            self.schema.validate({"ma_period": True})
+
+    def test_empty_schema_is_permissive(self):
+        """测试没有声明默认参数时不做校验"""
+        assert ParamSchema().validate({"anything": 1}) == {"anything": 1}
+
+
+class TestStrategyRegistry:
+    """StrategyRegistry类的测试用例"""
+
+    def test_get_strategy_from_config(self, config_file):
+        """测试从配置文件获取策略类和参数"""
+        registry = StrategyRegistry(config_path=str(config_file))
+        strategy_class, params = registry.get_strategy("MACD")
+
+        assert strategy_class is MACDStrategy
+        assert params == {"ma_period": 15, "zscore_threshold": 1.5}
+
+    def test_config_parsed_once(self, config_file):
+        """测试配置文件只解析一次"""
+        registry = StrategyRegistry(config_path=str(config_file))
+        with patch("strategy.registry.tomllib.load", wraps=tomllib.load) as load:
+            for _ in range(5):
+                registry.get_strategy("MACD")
+        assert load.call_count == 1
+
+    def test_config_change_is_picked_up(self, config_file):
+        """测试配置文件修改后重新解析"""
+        registry = StrategyRegistry(config_path=str(config_file))
+        registry.get_strategy("MACD")
+
+        content = config_file.read_text(encoding="utf-8")
+        config_file.write_text(content.replace("15", "20"), encoding="utf-8")
+        _bump_mtime(config_file)
+
+        _, params = registry.get_strategy("MACD")
+        assert params["ma_period"] == 20
+
+    def test_unknown_strategy(self, config_file):
+        """测试获取不存在的策略"""
+        registry = StrategyRegistry(config_path=str(config_file))
+        with pytest.raises(ValueError):
+            registry.get("NOT_EXIST")
+
+    def test_missing_module_info(self, tmp_path):
+        """测试配置缺少模块信息"""
+        path = tmp_path / "bad.toml"
+        _write(path, '[BAD]\nclass = "X"\n')
+        registry = StrategyRegistry(config_path=str(path))
+        with pytest.raises(ValueError):
+            registry.get("BAD")
+
+    def test_package_scan_finds_strategies(self, tmp_path):
+        """测试扫描策略包发现未在配置中声明的策略"""
+        path = tmp_path / "empty.toml"
+        path.write_text("", encoding="utf-8")
+        registry = StrategyRegistry(config_path=str(path))
+
+        with patch(
+            "strategy.registry.importlib.metadata.entry_points", return_value=[]
+        ):
+            entry = registry.get("MACD")
+            assert registry.names() == ["MACD"]
+
+        assert entry.strategy_class is MACDStrategy
+        assert entry.origin == "package"
+
+    def test_plugin_discovery(self, tmp_path, plugin_module):
+        """测试通过 entry point 发现插件策略"""
+        path = tmp_path / "empty.toml"
+        path.write_text("", encoding="utf-8")
+        registry = StrategyRegistry(config_path=str(path), package="no_such_pkg")
+
+        ep = Mock()
+        ep.name = "FAKE"
+        ep.load.side_effect = lambda: __import__("fake_plugin").FakeStrategy
+        with patch(
+            "strategy.registry.importlib.metadata.entry_points", return_value=[ep]
+        ) as entry_points:
+            entry = registry.get("FAKE")
+            registry.get("FAKE")
+            registry.names()
+
+        assert entry.origin == "plugin"
+        assert entry.strategy_class.version == 1
+        # 插件只扫描一次
+        assert entry_points.call_count == 1
+
+    def test_reload_changed_module(self, tmp_path, plugin_module):
+        """测试热重载修改过的策略模块"""
+        path = tmp_path / "plugin.toml"
+        _write(path, '[FAKE]\nmodule = "fake_plugin"\nclass = "FakeStrategy"\n')
+        registry = StrategyRegistry(config_path=str(path))
+        assert registry.get("FAKE").strategy_class.version == 1
+        assert registry.reload() == []
+
+        _write(plugin_module, "class FakeStrategy:\n    version = 2\n")
+        _bump_mtime(plugin_module)
+
+        assert registry.reload() == ["fake_plugin"]
+        assert registry.get("FAKE").strategy_class.version == 2
+
+    def test_get_registry_is_shared(self, config_file):
+        """测试同一配置文件共享注册表实例"""
+        assert get_registry(str(config_file)) is get_registry(str(config_file))
+
+
+class TestStrategyConfig:
+    """StrategyConfig类的测试用例"""
+
+    def test_get_strategy_with_overrides(self, config_file):
+        """测试StrategyConfig通过注册表获取策略并校验参数"""
+        cfg = StrategyConfig(config_path=str(config_file))
+        strategy_class, params = cfg.get_strategy("MACD", params={"ma_period": 30})
+
+        assert strategy_class is MACDStrategy
+        assert params["ma_period"] == 30
+        assert cfg.config["MACD"]["class"] == "MACDStrategy"